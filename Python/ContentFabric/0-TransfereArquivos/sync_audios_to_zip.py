@@ -2,14 +2,25 @@
 # sync_audios_to_zip.py
 # COMPACTA AUDIOS + METADATA, ENVIA PARA DESTINO
 # E MOVE ARQUIVOS JÁ ENVIADOS PARA ./moved
+#
+# Áudio já é comprimido → gravado com ZIP_STORED (sem zlib).
+# Cada ZIP é um bundle delta: só leva o que ainda não foi para
+# ./moved, com sha1 por arquivo no metadata.json, e é
+# registrado em delta_log.jsonl no destino.
 # ============================================================
 
 import os
-import zipfile
-import json
 import shutil
 from datetime import datetime
 
+from zip_policy import (
+    AtomicZip,
+    append_bundle_log,
+    sha1_files,
+    zip_write,
+    zip_write_json
+)
+
 # ------------------------------------------------------------
 # PATHS
 # ------------------------------------------------------------
@@ -22,6 +33,8 @@ DESTINATION_PATH = (
 
 MOVED_PATH = os.path.join(AUDIO_SOURCE_PATH, "moved")
 
+DELTA_LOG_PATH = os.path.join(DESTINATION_PATH, "delta_log.jsonl")
+
 # ------------------------------------------------------------
 # CONFIG
 # ------------------------------------------------------------
@@ -48,8 +61,9 @@ def is_inside_moved(path: str) -> bool:
     return os.path.commonpath([path, MOVED_PATH]) == MOVED_PATH
 
 
-def collect_audio_metadata(source_dir: str) -> dict:
-    files = []
+def collect_audio_files(source_dir: str) -> list:
+    """Áudios ainda não enviados (fora de ./moved)."""
+    found = []
 
     for root, _, filenames in os.walk(source_dir):
         if is_inside_moved(root):
@@ -59,41 +73,43 @@ def collect_audio_metadata(source_dir: str) -> dict:
             if os.path.splitext(file)[1].lower() not in AUDIO_EXTENSIONS:
                 continue
 
-            full_path = os.path.join(root, file)
-            stat = os.stat(full_path)
+            found.append(os.path.join(root, file))
 
-            files.append({
-                "name": file,
-                "relative_path": os.path.relpath(full_path, source_dir),
-                "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
-            })
+    return found
 
-    return {"files": files}
 
+def collect_audio_metadata(source_dir: str, audio_files: list) -> dict:
+    hashes = sha1_files(audio_files)
+    files = []
 
-def zip_audios(source_dir: str, zip_path: str):
-    base_len = len(source_dir.rstrip(os.sep)) + 1
-    count = 0
-    zipped_files = []
+    for full_path in audio_files:
+        stat = os.stat(full_path)
 
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for root, _, files in os.walk(source_dir):
-            if is_inside_moved(root):
-                continue
+        files.append({
+            "name": os.path.basename(full_path),
+            "relative_path": os.path.relpath(full_path, source_dir),
+            "size": stat.st_size,
+            "sha1": hashes[full_path],
+            "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
+        })
 
-            for file in files:
-                if os.path.splitext(file)[1].lower() not in AUDIO_EXTENSIONS:
-                    continue
+    return {"files": files}
+
+
+def zip_audios(source_dir: str, audio_files: list, zip_path: str, metadata: dict = None):
+    zipped_files = []
 
-                full_path = os.path.join(root, file)
-                arcname = full_path[base_len:]
-                zf.write(full_path, arcname)
+    with AtomicZip(zip_path) as zf:
+        for full_path in audio_files:
+            arcname = os.path.relpath(full_path, source_dir)
+            zip_write(zf, full_path, arcname)
+            zipped_files.append(full_path)
 
-                zipped_files.append(full_path)
-                count += 1
+        if metadata is not None:
+            zip_write_json(zf, "metadata.json", metadata)
 
-    return count, zipped_files
+    return len(zipped_files), zipped_files
 
 
 def move_files(files):
@@ -122,24 +138,31 @@ zip_name = f"audios_{timestamp}.zip"
 zip_path = os.path.join(DESTINATION_PATH, zip_name)
 
 print("🎧 Processando áudios...")
+audio_files = collect_audio_files(AUDIO_SOURCE_PATH)
 
-# --- metadata.json temporário ---
-metadata_path = None
+if not audio_files:
+    print("Nenhum áudio novo encontrado.")
+    raise SystemExit(0)
+
+# --- metadata.json (vai dentro do ZIP) ---
+metadata = None
 if GENERATE_METADATA:
     print("📝 Gerando metadata dos áudios...")
-    metadata = collect_audio_metadata(AUDIO_SOURCE_PATH)
-    metadata_path = os.path.join(AUDIO_SOURCE_PATH, "metadata.json")
-
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    metadata = collect_audio_metadata(AUDIO_SOURCE_PATH, audio_files)
 
 # --- ZIP ---
 print("📦 Compactando áudios...")
-audio_count, zipped_files = zip_audios(AUDIO_SOURCE_PATH, zip_path)
-
-# --- remove metadata temporário ---
-if metadata_path and os.path.exists(metadata_path):
-    os.remove(metadata_path)
+audio_count, zipped_files = zip_audios(AUDIO_SOURCE_PATH, audio_files, zip_path, metadata)
+
+append_bundle_log(DELTA_LOG_PATH, {
+    "bundle_id": os.path.splitext(zip_name)[0],
+    "generated_at": datetime.now().isoformat(),
+    "zip": zip_name,
+    "files": {
+        item["relative_path"]: {"sha1": item["sha1"], "size": item["size"]}
+        for item in (metadata or {}).get("files", [])
+    }
+})
 
 # --- move arquivos já enviados ---
 print("📂 Movendo áudios já enviados para ./moved ...")
@@ -9,16 +9,26 @@
 # 4. Atualizar old_metadata.json automaticamente
 # 5. Compatibilidade com metadata antigo
 # 6. Não gerar ZIP vazio
+# 7. Mídia gravada sem recompressão (ZIP_STORED), JSON com DEFLATE
+# 8. Delta por conteúdo: só entra no ZIP o que mudou de SHA-1
+#    (o fingerprint só escolhe os candidatos a rehash)
+# 9. Cada bundle registra sua base em delta_log.jsonl
 # ============================================================
 
 import os
 import json
 import shutil
-import zipfile
-import hashlib
 
 from datetime import datetime
 
+from zip_policy import (
+    AtomicZip,
+    append_bundle_log,
+    sha1_files,
+    zip_write,
+    zip_write_json
+)
+
 
 # ============================================================
 # PATHS BASE
@@ -65,6 +75,11 @@ JSON_ZIP_PATH = os.path.join(
     "json_files.zip"
 )
 
+DELTA_LOG_PATH = os.path.join(
+    TRANSFER_PATH,
+    "delta_log.jsonl"
+)
+
 
 # ============================================================
 # SOURCES
@@ -91,24 +106,6 @@ def ensure_dirs():
     )
 
 
-def sha1_file(path):
-
-    sha1 = hashlib.sha1()
-
-    with open(path, "rb") as f:
-
-        while True:
-
-            chunk = f.read(1024 * 1024)
-
-            if not chunk:
-                break
-
-            sha1.update(chunk)
-
-    return sha1.hexdigest()
-
-
 def build_fingerprint(path):
 
     stat = os.stat(path)
@@ -253,27 +250,53 @@ def get_new_videos(
     current_files = current_metadata["files"]
     old_files = old_metadata["files"]
 
-    new_files = []
+    candidates = []
 
     for relative_path, info in current_files.items():
 
         old_info = old_files.get(
             relative_path
-        )
-
-        # arquivo novo
-        if not old_info:
-
-            new_files.append(info)
-            continue
+        ) or {}
 
-        # alterado
+        # mesmo fingerprint → reaproveita o sha1 já conhecido
         if (
             old_info.get("fingerprint")
-            != info.get("fingerprint")
+            == info.get("fingerprint")
         ):
 
-            new_files.append(info)
+            if old_info.get("sha1"):
+                info["sha1"] = old_info["sha1"]
+
+            continue
+
+        # arquivo novo ou alterado → candidato a rehash
+        candidates.append(relative_path)
+
+    # ========================================================
+    # HASH PARALELO DOS CANDIDATOS
+    # ========================================================
+
+    hashes = sha1_files(
+        current_files[rp]["path"]
+        for rp in candidates
+    )
+
+    new_files = []
+
+    for relative_path in candidates:
+
+        info = current_files[relative_path]
+        info["sha1"] = hashes[info["path"]]
+
+        old_info = old_files.get(
+            relative_path
+        ) or {}
+
+        # só o mtime mudou (cópia/touch) → conteúdo igual, não transfere
+        if old_info.get("sha1") == info["sha1"]:
+            continue
+
+        new_files.append(info)
 
     return new_files
 
@@ -284,9 +307,15 @@ def get_new_videos(
 
 def build_wordbank_zip(
     new_videos,
-    current_metadata
+    current_metadata,
+    old_metadata
 ):
 
+    # base do próximo delta continua sendo o último bundle gerado
+    current_metadata["last_bundle"] = old_metadata.get(
+        "last_bundle"
+    )
+
     if not new_videos:
 
         print(
@@ -303,14 +332,23 @@ def build_wordbank_zip(
 
         return
 
-    with zipfile.ZipFile(
-        WORDBANK_ZIP_PATH,
-        "w",
-        zipfile.ZIP_DEFLATED
+    bundle_id = datetime.now().strftime(
+        "wordbank_%Y%m%d_%H%M%S"
+    )
+
+    delta_manifest = {
+        "bundle_id": bundle_id,
+        "base_bundle": old_metadata.get("last_bundle"),
+        "generated_at": datetime.now().isoformat(),
+        "files": {}
+    }
+
+    with AtomicZip(
+        WORDBANK_ZIP_PATH
     ) as zipf:
 
         # ====================================================
-        # VIDEOS NOVOS
+        # VIDEOS NOVOS (ZIP_STORED: H.264 não recomprime)
         # ====================================================
 
         for video in new_videos:
@@ -325,42 +363,47 @@ def build_wordbank_zip(
                 f"[VIDEO NOVO] {arcname}"
             )
 
-            zipf.write(
+            zip_write(
+                zipf,
                 video_path,
                 arcname
             )
 
+            delta_manifest["files"][arcname] = {
+                "sha1": video.get("sha1"),
+                "fingerprint": video.get("fingerprint"),
+                "size": video.get("size")
+            }
+
         # ====================================================
-        # METADATA COMPLETO
+        # METADATA COMPLETO + MANIFESTO DO DELTA
         # ====================================================
 
-        temp_metadata_path = os.path.join(
-            TRANSFER_PATH,
-            "__temp_metadata.json"
-        )
-
-        with open(
-            temp_metadata_path,
-            "w",
-            encoding="utf-8"
-        ) as f:
-
-            json.dump(
-                current_metadata,
-                f,
-                ensure_ascii=False,
-                indent=2
-            )
+        current_metadata["last_bundle"] = bundle_id
 
-        zipf.write(
-            temp_metadata_path,
-            "metadata.json"
+        zip_write_json(
+            zipf,
+            "metadata.json",
+            current_metadata
         )
 
-        os.remove(
-            temp_metadata_path
+        zip_write_json(
+            zipf,
+            "delta_manifest.json",
+            delta_manifest
         )
 
+    append_bundle_log(
+        DELTA_LOG_PATH,
+        {
+            "bundle_id": bundle_id,
+            "base_bundle": delta_manifest["base_bundle"],
+            "generated_at": delta_manifest["generated_at"],
+            "zip": os.path.basename(WORDBANK_ZIP_PATH),
+            "files": delta_manifest["files"]
+        }
+    )
+
     print(
         f"\nwordbank.zip criado:"
         f"\n{WORDBANK_ZIP_PATH}"
@@ -495,10 +538,8 @@ def build_json_zip():
 
         return
 
-    with zipfile.ZipFile(
-        JSON_ZIP_PATH,
-        "w",
-        zipfile.ZIP_DEFLATED
+    with AtomicZip(
+        JSON_ZIP_PATH
     ) as zipf:
 
         for file_path in new_jsons:
@@ -512,7 +553,8 @@ def build_json_zip():
                 f"[JSON NOVO] {arcname}"
             )
 
-            zipf.write(
+            zip_write(
+                zipf,
                 file_path,
                 arcname
             )
@@ -602,7 +644,8 @@ def main():
 
     build_wordbank_zip(
         new_videos,
-        current_metadata
+        current_metadata,
+        old_metadata
     )
 
     # ========================================================
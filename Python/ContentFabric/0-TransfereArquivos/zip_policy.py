@@ -0,0 +1,173 @@
+# ============================================================
+# zip_policy.py
+#
+# Helpers compartilhados pelos scripts de transferência
+# (sync_wordbank_and_jsons.py / sync_audios_to_zip.py)
+#
+# 1. Política de compressão por extensão
+#    - mídia já comprimida (mp4/mp3/wav/png...) → ZIP_STORED
+#    - texto (json, srt, txt...)                → ZIP_DEFLATED
+# 2. Hash SHA-1 de vários arquivos em paralelo
+# 3. Escrita atômica do ZIP (.tmp → os.replace)
+# 4. Log append-only dos bundles gerados (delta_log.jsonl)
+# ============================================================
+
+import os
+import json
+import zipfile
+import hashlib
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# H.264 / MP3 / PNG já são comprimidos: DEFLATE só gasta CPU
+STORED_EXTENSIONS = {
+    ".mp4", ".mov", ".mkv", ".webm",
+    ".mp3", ".wav", ".m4a", ".aac", ".ogg", ".flac",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp",
+    ".zip", ".7z", ".rar"
+}
+
+HASH_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+# ============================================================
+# COMPRESSÃO
+# ============================================================
+
+def compression_for(path):
+
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+
+    return zipfile.ZIP_DEFLATED
+
+
+def zip_write(zipf, path, arcname):
+    """
+    Adiciona um arquivo ao ZIP usando a política da extensão.
+    zipfile.write já copia em blocos (streaming).
+    """
+    zipf.write(
+        path,
+        arcname,
+        compress_type=compression_for(path)
+    )
+
+
+def zip_write_json(zipf, arcname, data):
+
+    zipf.writestr(
+        arcname,
+        json.dumps(
+            data,
+            ensure_ascii=False,
+            indent=2
+        ),
+        compress_type=zipfile.ZIP_DEFLATED
+    )
+
+
+class AtomicZip:
+    """
+    with AtomicZip(path) as zipf: ...
+
+    Escreve em <path>.tmp e só substitui o destino se tudo
+    terminar bem: uma falha no meio nunca deixa um ZIP
+    corrompido no lugar do anterior.
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.zipf = None
+
+    def __enter__(self):
+
+        self.zipf = zipfile.ZipFile(
+            self.tmp_path,
+            "w",
+            zipfile.ZIP_DEFLATED,
+            allowZip64=True
+        )
+
+        return self.zipf
+
+    def __exit__(self, exc_type, exc, tb):
+
+        self.zipf.close()
+
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+        return False
+
+
+# ============================================================
+# HASH
+# ============================================================
+
+def sha1_file(path):
+
+    sha1 = hashlib.sha1()
+
+    with open(path, "rb") as f:
+
+        while True:
+
+            chunk = f.read(CHUNK_SIZE)
+
+            if not chunk:
+                break
+
+            sha1.update(chunk)
+
+    return sha1.hexdigest()
+
+
+def sha1_files(paths, workers=HASH_WORKERS):
+    """
+    {path: sha1} calculado em paralelo.
+    hashlib libera o GIL em blocos grandes → threads bastam.
+    """
+    paths = list(paths)
+
+    if not paths:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        return dict(
+            zip(
+                paths,
+                pool.map(sha1_file, paths)
+            )
+        )
+
+
+# ============================================================
+# LOG DE BUNDLES (append-only)
+# ============================================================
+
+def append_bundle_log(log_path, entry):
+    """
+    Uma linha JSON por bundle gerado. Nunca reescreve o
+    arquivo: o histórico de deltas só cresce.
+    """
+    with open(log_path, "a", encoding="utf-8") as f:
+
+        f.write(
+            json.dumps(entry, ensure_ascii=False)
+            + "\n"
+        )
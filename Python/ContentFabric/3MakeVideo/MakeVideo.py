@@ -35,13 +35,13 @@ import os
 import json
 import shutil
 from datetime import datetime
+import numpy as np
 from gtts import gTTS
-from PIL import Image, ImageFilter
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
 from moviepy.editor import (
-    AudioFileClip, TextClip, ImageClip, ColorClip, VideoFileClip,
+    AudioFileClip, ImageClip, VideoFileClip,
     CompositeVideoClip, concatenate_videoclips, CompositeAudioClip
 )
-from moviepy.config import change_settings
 from google.cloud import texttospeech
 
 
@@ -51,8 +51,6 @@ from google.cloud import texttospeech
 if not hasattr(Image, "ANTIALIAS"):
     Image.ANTIALIAS = Image.Resampling.LANCZOS
 
-change_settings({"IMAGEMAGICK_BINARY": "magick"})
-
 
 # ============================================================
 # 1) CARREGAR ARQUIVO DE CONFIGURAÇÃO
@@ -109,6 +107,8 @@ VIDEO_SIZE = tuple(CONFIG["video"]["VIDEO_SIZE"])
 FPS = CONFIG["video"]["FPS"]
 TEXT_COLOR = CONFIG["video"]["TEXT_COLOR"]
 FONT = CONFIG["video"]["FONT"]
+FONT_FILE = normalize_path(CONFIG["video"].get("FONT_FILE", ""))
+FONT_SIZE = CONFIG["video"].get("FONT_SIZE", 50)
 TEXT_BG_COLOR = tuple(CONFIG["video"]["TEXT_BG_COLOR"])
 TEXT_BG_OPACITY = CONFIG["video"]["TEXT_BG_OPACITY"]
 BLUR_AMOUNT = CONFIG["video"]["BLUR_AMOUNT"]
@@ -267,9 +267,10 @@ def cleanup_temp(base_dir):
 # 6) FUNÇÕES DE FUNDO DESFOCADO
 # ============================================================
 
-def generate_blurred_background(source_path, output_path):
+def _blurred_background_image(source_path):
     """
-    Cria uma versão desfocada do fundo, mantendo proporção da imagem.
+    Versão desfocada do fundo (PIL), mantendo proporção da imagem
+    e recortada no tamanho do vídeo.
     """
     img = Image.open(source_path).convert("RGB")
     img_ratio = img.width / img.height
@@ -288,12 +289,215 @@ def generate_blurred_background(source_path, output_path):
     left = (blurred.width - VIDEO_SIZE[0]) // 2
     top = (blurred.height - VIDEO_SIZE[1]) // 2
 
-    cropped = blurred.crop((left, top, left + VIDEO_SIZE[0], top + VIDEO_SIZE[1]))
-    cropped.save(output_path)
+    return blurred.crop((left, top, left + VIDEO_SIZE[0], top + VIDEO_SIZE[1]))
 
+
+def generate_blurred_background(source_path, output_path):
+    """
+    Cria uma versão desfocada do fundo, mantendo proporção da imagem.
+    """
+    _blurred_background_image(source_path).save(output_path)
     return output_path
 
 
+# ============================================================
+# 6.1) CACHE DE QUADROS ESTÁTICOS
+# ------------------------------------------------------------
+# Fundo (desfocado + nítido) e legenda são estáticos durante
+# todo o segmento. Em vez de compor camadas do MoviePy quadro
+# a quadro, cada fundo único e cada legenda única viram UM
+# quadro numpy, reaproveitado em repetições e pausas.
+# ============================================================
+
+ANIMATED_EXTENSIONS = (".gif", ".mp4", ".mov", ".avi", ".mkv")
+
+_background_frames = {}   # (path, mtime) → np.ndarray RGB
+_caption_layers = {}      # texto → (np.ndarray RGBA, pos_y)
+_segment_frames = {}      # (path, mtime, texto) → np.ndarray RGB
+_caption_font = None
+
+
+def is_animated_background(path):
+    return path.lower().endswith(ANIMATED_EXTENSIONS)
+
+
+def _background_key(path):
+    try:
+        return (path, os.path.getmtime(path))
+    except OSError:
+        return (path, None)
+
+
+def get_blurred_frame(path):
+    """Quadro RGB só com o fundo desfocado (cache por arquivo)."""
+    key = _background_key(path) + ("blurred",)
+    if key not in _background_frames:
+        _background_frames[key] = np.asarray(_blurred_background_image(path), dtype=np.uint8)
+    return _background_frames[key]
+
+
+def get_background_frame(path):
+    """
+    Quadro RGB do fundo estático: desfocado em tela cheia
+    + imagem nítida com 90% da altura, centralizada.
+    Calculado uma única vez por imagem de fundo.
+    """
+    key = _background_key(path)
+    if key in _background_frames:
+        return _background_frames[key]
+
+    canvas = Image.fromarray(get_blurred_frame(path))
+
+    sharp = Image.open(path).convert("RGBA")
+    sharp_height = int(VIDEO_SIZE[1] * 0.9)
+    sharp_width = max(1, int(sharp.width * sharp_height / sharp.height))
+    sharp = sharp.resize((sharp_width, sharp_height), Image.LANCZOS)
+
+    offset = (
+        (VIDEO_SIZE[0] - sharp_width) // 2,
+        (VIDEO_SIZE[1] - sharp_height) // 2
+    )
+    canvas.paste(sharp, offset, sharp)
+
+    frame = np.asarray(canvas, dtype=np.uint8)
+    _background_frames[key] = frame
+    return frame
+
+
+def _get_caption_font():
+    """
+    Fonte da legenda para o PIL.
+    FONT é um nome do ImageMagick (ex.: "Arial-Bold"), então tenta
+    FONT_FILE, depois variações comuns do nome e, por fim, a padrão.
+    """
+    global _caption_font
+    if _caption_font is not None:
+        return _caption_font
+
+    candidates = [FONT_FILE, FONT, f"{FONT}.ttf"]
+    if FONT.lower().endswith("-bold"):
+        family = FONT[:-5].lower()
+        candidates += [f"{family}bd.ttf", f"{FONT[:-5]}-Bold.ttf", f"{FONT[:-5]} Bold.ttf"]
+
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            _caption_font = ImageFont.truetype(candidate, FONT_SIZE)
+            return _caption_font
+        except OSError:
+            continue
+
+    print(f"⚠ Fonte '{FONT}' não encontrada pelo PIL. Usando fonte padrão.")
+    try:
+        _caption_font = ImageFont.load_default(FONT_SIZE)
+    except TypeError:
+        _caption_font = ImageFont.load_default()
+    return _caption_font
+
+
+def _wrap_caption(text, font, draw, max_width):
+    """Quebra o texto em linhas que cabem em max_width (equivale ao method="caption")."""
+    lines = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for word in paragraph.split():
+            attempt = f"{current} {word}".strip()
+            if not current or draw.textlength(attempt, font=font) <= max_width:
+                current = attempt
+            else:
+                lines.append(current)
+                current = word
+        lines.append(current)
+    return lines
+
+
+def render_caption(text):
+    """
+    Rasteriza a legenda (caixa translúcida + texto centralizado)
+    uma única vez por texto. Retorna (camada RGBA, pos_y).
+    """
+    if text in _caption_layers:
+        return _caption_layers[text]
+
+    font = _get_caption_font()
+    box_width = int(VIDEO_SIZE[0] * 0.9)
+
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    lines = _wrap_caption(text, font, measure, box_width)
+
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    text_height = line_height * len(lines)
+    box_height = text_height + 30
+
+    layer = Image.new("RGBA", (box_width, box_height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    draw.rectangle(
+        (0, 0, box_width, box_height),
+        fill=TEXT_BG_COLOR + (int(255 * TEXT_BG_OPACITY),)
+    )
+
+    for i, line in enumerate(lines):
+        line_width = draw.textlength(line, font=font)
+        draw.text(
+            ((box_width - line_width) / 2, i * line_height),
+            line, font=font, fill=TEXT_COLOR
+        )
+
+    if SUBTITLE_POSITION == "bottom":
+        pos_y = VIDEO_SIZE[1] - text_height - 80
+    elif SUBTITLE_POSITION == "top":
+        pos_y = 50
+    else:
+        pos_y = (VIDEO_SIZE[1] - text_height) // 2
+
+    result = (np.asarray(layer, dtype=np.uint8), pos_y)
+    _caption_layers[text] = result
+    return result
+
+
+def _blend_caption(frame, caption, pos_y):
+    """Aplica a camada RGBA da legenda sobre um quadro RGB (cópia)."""
+    out = frame.copy()
+    h, w = caption.shape[:2]
+    x = (VIDEO_SIZE[0] - w) // 2
+
+    # recorta o que ficaria fora da tela
+    top = max(pos_y, 0)
+    bottom = min(pos_y + h, VIDEO_SIZE[1])
+    if bottom <= top:
+        return out
+
+    layer = caption[top - pos_y:bottom - pos_y]
+    alpha = layer[:, :, 3:4].astype(np.float32) / 255.0
+    region = out[top:bottom, x:x + w].astype(np.float32)
+
+    blended = layer[:, :, :3] * alpha + region * (1.0 - alpha)
+    out[top:bottom, x:x + w] = blended.astype(np.uint8)
+    return out
+
+
+def clear_frame_caches():
+    """
+    Descarta legendas e quadros de segmento (~6 MB cada) ao fim de
+    um vídeo: não se repetem entre vídeos e, num lote no mesmo
+    processo, o cache cresceria sem limite. Fundos continuam em
+    cache (poucos arquivos, reaproveitados entre vídeos).
+    """
+    _segment_frames.clear()
+    _caption_layers.clear()
+
+
+def get_segment_frame(background, text):
+    """Quadro final (fundo + legenda) de um segmento, reaproveitado entre repetições."""
+    key = _background_key(background) + (text,)
+    if key not in _segment_frames:
+        caption, pos_y = render_caption(text)
+        _segment_frames[key] = _blend_caption(get_background_frame(background), caption, pos_y)
+    return _segment_frames[key]
+
+
 # ============================================================
 # 7) FUNÇÕES DE TTS
 # ============================================================
@@ -376,66 +580,56 @@ def generate_tts(text, lang, velocidade, filename, voice_gender):
 def get_background_clip(path, duration):
     """
     Retorna o clip de fundo — imagem, GIF ou vídeo.
+    Imagens estáticas usam o quadro em cache (desfocado + nítido).
     """
-    lower = path.lower()
+    if not is_animated_background(path):
+        return ImageClip(get_background_frame(path)).set_duration(duration)
 
-    if lower.endswith((".gif", ".mp4", ".mov", ".avi", ".mkv")):
-        clip = VideoFileClip(path).loop(duration=duration)
-        clip = clip.resize(height=VIDEO_SIZE[1]).set_position("center")
-    else:
-        clip = ImageClip(path).resize(height=VIDEO_SIZE[1]).set_position("center")
+    clip = VideoFileClip(path).loop(duration=duration)
+    clip = clip.resize(height=VIDEO_SIZE[1]).set_position("center")
 
     return clip.set_duration(duration)
 
 
-def create_text_clip(text, duration, blurred_image, sharp_image):
+def create_text_clip(text, duration, background):
     """
     Cria o clipe com:
       - fundo desfocado
       - imagem nítida (sharp)
       - fundo translúcido atrás do texto
       - texto centralizado
+
+    Fundo estático → um único quadro pré-composto (cache).
+    Fundo animado (GIF/vídeo) → composição, mas com a legenda
+    já rasterizada pelo PIL.
     """
-    bg_blurred = get_background_clip(blurred_image, duration)
+    if not is_animated_background(background):
+        return ImageClip(get_segment_frame(background, text)).set_duration(duration)
 
-    sharp_clip = (
-        get_background_clip(sharp_image, duration)
+    caption, pos_y = render_caption(text)
+
+    bg_clip = (
+        get_background_clip(background, duration)
         .resize(height=int(VIDEO_SIZE[1] * 0.9))
         .set_position("center")
     )
 
-    txt_clip = TextClip(
-        text,
-        fontsize=50,
-        color=TEXT_COLOR,
-        font=FONT,
-        method="caption",
-        align="center",
-        size=(int(VIDEO_SIZE[0] * 0.9), None)
-    ).set_duration(duration)
-
-    txt_bg = (
-        ColorClip(
-            size=(int(VIDEO_SIZE[0] * 0.9), txt_clip.h + 30),
-            color=TEXT_BG_COLOR
-        )
-        .set_opacity(TEXT_BG_OPACITY)
+    caption_clip = (
+        ImageClip(caption[:, :, :3])
+        .set_mask(ImageClip(caption[:, :, 3] / 255.0, ismask=True))
         .set_duration(duration)
+        .set_position(("center", pos_y))
     )
 
-    if SUBTITLE_POSITION == "bottom":
-        pos_y = VIDEO_SIZE[1] - txt_clip.h - 80
-    elif SUBTITLE_POSITION == "top":
-        pos_y = 50
-    else:
-        pos_y = (VIDEO_SIZE[1] - txt_clip.h) // 2
+    layers = [bg_clip, caption_clip]
+
+    # GIF: o PIL lê o primeiro quadro → fundo desfocado também em cache
+    try:
+        layers.insert(0, ImageClip(get_blurred_frame(background)).set_duration(duration))
+    except Exception:
+        pass
 
-    return CompositeVideoClip([
-        bg_blurred,
-        sharp_clip,
-        txt_bg.set_position(("center", pos_y)),
-        txt_clip.set_position(("center", pos_y))
-    ])
+    return CompositeVideoClip(layers, size=VIDEO_SIZE)
 
 
 # ============================================================
@@ -443,8 +637,7 @@ def create_text_clip(text, duration, blurred_image, sharp_image):
 # ============================================================
 
 def create_video_segment(
-    text, lang, velocidade, idx, base_dir, voice_gender,
-    blurred_image, sharp_image
+    text, lang, velocidade, idx, base_dir, voice_gender, background
 ):
     """
     Gera TTS → gera clipe de texto → retorna clipe completo.
@@ -454,7 +647,7 @@ def create_video_segment(
     generate_tts(text, lang, velocidade, temp_audio, voice_gender)
 
     audio = AudioFileClip(temp_audio)
-    clip = create_text_clip(text, audio.duration, blurred_image, sharp_image)
+    clip = create_text_clip(text, audio.duration, background)
 
     return clip.set_audio(audio.volumex(VOICE_VOLUME))
 
@@ -478,9 +671,6 @@ def process_block(items, base_dir, velocidades, repeat_each, voice_gender):
         if "background" in sub_items[0]:
             current_bg = normalize_path(sub_items[0]["background"])
 
-        blurred_path = os.path.join(base_dir, f"blurred_{idx}.jpg")
-        generate_blurred_background(current_bg, blurred_path)
-
         print(f"🖼️ Fundo atual: {current_bg}")
 
         for sub in sub_items:
@@ -493,15 +683,15 @@ def process_block(items, base_dir, velocidades, repeat_each, voice_gender):
             velocidade = sub.get("VoiceSpeed", velocidades.get(lang, 2))
             repeat = sub.get("repeat", repeat_each.get(lang, 1))
 
-            # TTS e clipe
-            for r in range(repeat):
-                print(f"🎙️ [{lang}] {text[:60]}...")
+            # TTS e clipe: gerados uma vez e reaproveitados nas repetições
+            if repeat > 0:
+                print(f"🎙️ [{lang}] {text[:60]}... (x{repeat})")
                 clip = create_video_segment(
                     text, lang, velocidade,
-                    f"{idx}_{r}", base_dir, voice_gender,
-                    blurred_path, current_bg
+                    idx, base_dir, voice_gender,
+                    current_bg
                 )
-                clips.append(clip)
+                clips.extend([clip] * repeat)
 
             # Pausa opcional
             if "pause" in sub:
@@ -601,20 +791,17 @@ def main():
     print("=====================================================")
 
     all_clips = []
+    clear_frame_caches()
 
     # ------------------------------------------------------
     # INTRODUÇÃO
     # ------------------------------------------------------
     if introducao:
-        blurred_path = os.path.join(base_dir, "blurred_intro.jpg")
-        generate_blurred_background(BACKGROUND_IMAGE, blurred_path)
-
         intro_clip = create_video_segment(
             introducao, "pt",
             velocidades.get("pt", 2),
             "intro", base_dir,
-            VOICE_TYPE, blurred_path,
-            BACKGROUND_IMAGE
+            VOICE_TYPE, BACKGROUND_IMAGE
         )
         all_clips.append(intro_clip)
 
@@ -685,6 +872,7 @@ def main():
 
     # Remover temporários
     cleanup_temp(base_dir)
+    clear_frame_caches()
 
     print("  Processo finalizado com sucesso!")
 
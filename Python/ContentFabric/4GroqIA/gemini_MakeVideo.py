@@ -9,6 +9,8 @@ r"""
   - Ignora uploaded_*.json
   - Ignora JSONs já processados
   - Pipeline idempotente
+  - Processamento concorrente sob token bucket (RPM / TPM)
+  - Espera só em 429 real, pelo retry_delay informado
 =====================================================================
 """
 
@@ -18,7 +20,16 @@ import shutil
 import argparse
 import time
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from rate_scheduler import (
+    KeyRateLimiter,
+    estimate_tokens,
+    retry_after_from_error
+)
 
 # ======================================================================
 # CONFIG
@@ -40,6 +51,12 @@ DEBUG = CONFIG.get("debug", True)
 
 MODEL_NAME = "models/gemini-2.5-flash"
 
+# Limites da key (free tier do gemini-2.5-flash: 10 RPM / 250K TPM)
+RATE_LIMIT = CONFIG.get("gemini_rate_limit", {})
+REQUESTS_PER_MINUTE = RATE_LIMIT.get("requests_per_minute", 10)
+TOKENS_PER_MINUTE = RATE_LIMIT.get("tokens_per_minute", 250000)
+COMPLETION_TOKENS = RATE_LIMIT.get("completion_tokens_estimate", 1200)
+
 # ======================================================================
 # INIT GEMINI
 # ======================================================================
@@ -48,6 +65,8 @@ api_key = open(API_KEY_FILE).read().strip()
 genai.configure(api_key=api_key)
 model = genai.GenerativeModel(MODEL_NAME)
 
+limiter = KeyRateLimiter([api_key], REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+
 # ======================================================================
 # UTILS
 # ======================================================================
@@ -116,13 +135,20 @@ def call_gemini(system_prompt, user_prompt):
         + json.dumps(user_prompt, ensure_ascii=False)
     )
 
+    estimated = estimate_tokens(prompt, COMPLETION_TOKENS)
+
     for attempt in range(RETRY_MAX + 1):
+        slot = limiter.acquire(estimated)
+
         try:
             response = model.generate_content(
                 prompt,
                 generation_config={"temperature": TEMPERATURE}
             )
 
+            usage = getattr(response, "usage_metadata", None)
+            limiter.record_usage(slot, estimated, getattr(usage, "total_token_count", None))
+
             text = getattr(response, "text", None)
             log(f"Gemini raw text: {repr(text)}")
 
@@ -131,6 +157,11 @@ def call_gemini(system_prompt, user_prompt):
 
             return text
 
+        except google_exceptions.ResourceExhausted as e:
+            # 429 real: a key para pelo tempo que o Gemini pediu
+            wait = limiter.penalize(slot, retry_after_from_error(e))
+            print(f"[Gemini SDK] 429 → key parada por {wait:.1f}s")
+
         except Exception as e:
             wait = min(2 ** attempt + random.uniform(0.5, 1.5), 30)
             print(f"[Gemini SDK] Retry em {wait:.1f}s → {str(e)}")
@@ -157,12 +188,55 @@ def build_playlist_object(key, friendly):
 # MAIN
 # ======================================================================
 
+def process_file(label, path, video_dir, prompts, force_playlist):
+    system_prompt, base_prompt, friendly = prompts
+
+    try:
+        data = load_json(path)
+    except Exception as e:
+        print(f" {label} ❌ JSON inválido: {e}")
+        return False
+
+    if "nome_arquivos" not in data:
+        print(f" {label} ⚠ nome_arquivos ausente")
+        return False
+
+    try:
+        raw = call_gemini(system_prompt, {
+            "base": base_prompt,
+            "extra": data,
+            "friendly_keys": list(friendly.keys()),
+            "force_playlist": force_playlist
+        })
+
+        meta = safe_extract_json(raw)
+
+        key = force_playlist or meta.get("playlist_key", "GeneralVocabulary")
+        meta["playlist"] = build_playlist_object(key, friendly)
+        meta.pop("playlist_key", None)
+
+        video = find_video(video_dir, data["nome_arquivos"])
+        final = write_final_json(video, meta)
+
+        move_to_processed(path)
+
+        print(f" {label} ✔ JSON FINAL: {final}")
+        return True
+
+    except Exception as e:
+        print(f" {label} ❌ ERRO: {str(e)}")
+        print(f" {label}    JSON ORIGINAL PRESERVADO")
+        return False
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path")
     parser.add_argument("--videos")
     parser.add_argument("--playlist")
-    parser.add_argument("--sleep-between", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=4,
+                        help="arquivos em paralelo (o token bucket limita as chamadas)")
+    parser.add_argument("--sleep-between", type=int, default=0,
+                        help="pausa fixa após cada arquivo (modo antigo)")
     args = parser.parse_args()
 
     json_dir = args.path
@@ -170,9 +244,11 @@ def main():
 
     ensure_dir(PROCESSED_DIR)
 
-    system_prompt = load_json(SYSTEM_PROMPT_FILE)
-    base_prompt = load_json(BASE_PROMPT_FILE)
-    friendly = load_json(FRIENDLY_PLAYLISTS_FILE)
+    prompts = (
+        load_json(SYSTEM_PROMPT_FILE),
+        load_json(BASE_PROMPT_FILE),
+        load_json(FRIENDLY_PLAYLISTS_FILE)
+    )
 
     files = [
         f for f in os.listdir(json_dir)
@@ -181,43 +257,21 @@ def main():
         and not os.path.exists(os.path.join(PROCESSED_DIR, f))
     ]
 
-    print(f"📄 JSONs encontrados: {len(files)}")
-
-    for idx, file in enumerate(files, 1):
-        print(f"\n [{idx}/{len(files)}] {file}")
-        path = os.path.join(json_dir, file)
-        data = load_json(path)
-
-        if "nome_arquivos" not in data:
-            print("⚠ nome_arquivos ausente")
-            continue
+    print(f"📄 JSONs encontrados: {len(files)} | workers: {args.workers}")
 
-        try:
-            raw = call_gemini(system_prompt, {
-                "base": base_prompt,
-                "extra": data,
-                "friendly_keys": list(friendly.keys()),
-                "force_playlist": args.playlist
-            })
-
-            meta = safe_extract_json(raw)
-
-            key = args.playlist or meta.get("playlist_key", "GeneralVocabulary")
-            meta["playlist"] = build_playlist_object(key, friendly)
-            meta.pop("playlist_key", None)
-
-            video = find_video(video_dir, data["nome_arquivos"])
-            final = write_final_json(video, meta)
-
-            move_to_processed(path)
-
-            print(f"✔ JSON FINAL: {final}")
+    def run(idx, file):
+        label = f"[{idx}/{len(files)}]"
+        print(f"\n {label} {file}")
+        ok = process_file(label, os.path.join(json_dir, file), video_dir, prompts, args.playlist)
+        if ok and args.sleep_between:
             time.sleep(args.sleep_between)
+        return ok
 
-        except Exception as e:
-            print(f"❌ ERRO: {str(e)}")
-            print("   JSON ORIGINAL PRESERVADO")
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(run, idx, file) for idx, file in enumerate(files, 1)]
+        results = [f.result() for f in as_completed(futures)]
 
+    print(f"\n Sucesso: {sum(results)} | Falhas: {len(results) - sum(results)}")
     print("\n Execução concluída")
 
 if __name__ == "__main__":
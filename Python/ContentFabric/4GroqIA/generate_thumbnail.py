@@ -3,11 +3,28 @@
  Script: generate_thumbnail.py
  Autor: Leandro (via Gemini)
  Finalidade: Gera thumbnails .jpg automaticamente lendo metadados.
+
+ Uso:
+   python generate_thumbnail.py video.json
+   python generate_thumbnail.py pasta_com_jsons [--workers N] [--force]
+
+ Em lote:
+ - Fundo + avatar (já redimensionado) são montados UMA vez por
+   processo; cada thumbnail só copia essa base e escreve o texto
+ - Fontes em cache por tamanho; o tamanho do texto é achado por
+   busca binária na largura medida de cada linha
+ - JSONs processados em paralelo (pool de processos)
+ - .thumbnails_cache.json guarda o hash das entradas (texto +
+   assets + layout): thumbnail com o mesmo hash não é refeita
 =====================================================================
 """
 import os
+import sys
 import json
-import textwrap
+import hashlib
+import argparse
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 
 # --- CONFIGURAÇÕES VISUAIS ---
@@ -18,103 +35,265 @@ TEXT_COLOR = (255, 255, 0)       # Amarelo (Chama atenção)
 STROKE_COLOR = (0, 0, 0)         # Contorno Preto
 STROKE_WIDTH = 6                 # Grossura do contorno
 
+MAX_FONT_SIZE = 130
+MIN_FONT_SIZE = 50
+TEXT_MARGIN_X = 50               # Margem esquerda fixa
+MAX_TEXT_WIDTH = int(TEMPLATE_WIDTH * 0.60)   # só o lado ESQUERDO (onde não tem avatar)
+MAX_TEXT_HEIGHT = TEMPLATE_HEIGHT * 0.8
+AVATAR_SCALE = 0.9               # altura do avatar em relação ao template
+MAX_TEXT_CHARS = 25
+
+# Mudou o desenho? Incrementa → todas as thumbnails são refeitas
+LAYOUT_VERSION = 2
+
+CACHE_FILE = ".thumbnails_cache.json"
+
 # Caminhos (Ajuste para seu ambiente)
-ASSETS_DIR = "./assets" 
+ASSETS_DIR = "./assets"
 FONT_PATH = os.path.join(ASSETS_DIR, "Impact.ttf") # Baixe essa fonte!
 AVATAR_PATH = os.path.join(ASSETS_DIR, "Leandrinho_Apontando.png")
 BG_PATH = os.path.join(ASSETS_DIR, "fundo_padrao.jpg") # Opcional
 
-def create_thumbnail(json_path):
-    # 1. Carregar Metadados
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    # Pega o texto curto (ou usa o título truncado se a Groq falhar)
-    raw_text = data.get("thumbnail_text", data.get("title", "AULA DE INGLÊS"))
-    if len(raw_text) > 25: raw_text = raw_text[:25] # Segurança
-    
-    # 2. Criar Base
+
+# --- ASSETS (carregados uma vez por processo) ---
+
+@lru_cache(maxsize=None)
+def load_font(size):
+    """Fonte em cache por tamanho (senão usa a padrão do Pillow)."""
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:
+            return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
+def load_base_image():
+    """Fundo já no tamanho do template com o avatar colado (Canto Direito)."""
     if os.path.exists(BG_PATH):
-        img = Image.open(BG_PATH).resize((TEMPLATE_WIDTH, TEMPLATE_HEIGHT))
+        base = Image.open(BG_PATH).convert("RGB").resize((TEMPLATE_WIDTH, TEMPLATE_HEIGHT))
     else:
-        img = Image.new('RGB', (TEMPLATE_WIDTH, TEMPLATE_HEIGHT), color=BACKGROUND_COLOR)
-    
-    draw = ImageDraw.Draw(img)
-    
-    # 3. Adicionar Avatar (Canto Direito)
+        base = Image.new('RGB', (TEMPLATE_WIDTH, TEMPLATE_HEIGHT), color=BACKGROUND_COLOR)
+
     if os.path.exists(AVATAR_PATH):
         avatar = Image.open(AVATAR_PATH).convert("RGBA")
-        # Redimensiona avatar para caber bem (ex: 80% da altura)
-        scale_factor = 0.9
-        target_h = int(TEMPLATE_HEIGHT * scale_factor)
-        aspect_ratio = avatar.width / avatar.height
-        target_w = int(target_h * aspect_ratio)
+        # Redimensiona avatar para caber bem (90% da altura)
+        target_h = int(TEMPLATE_HEIGHT * AVATAR_SCALE)
+        target_w = int(target_h * avatar.width / avatar.height)
         avatar = avatar.resize((target_w, target_h), Image.Resampling.LANCZOS)
-        
+
         # Cola na direita
-        x_pos = TEMPLATE_WIDTH - target_w
-        y_pos = TEMPLATE_HEIGHT - target_h
-        img.paste(avatar, (x_pos, y_pos), avatar)
+        base.paste(avatar, (TEMPLATE_WIDTH - target_w, TEMPLATE_HEIGHT - target_h), avatar)
 
-    # 4. Configurar Fonte e Texto
-    # Tenta carregar fonte, senão usa padrão
-    try:
-        font_size = 130
-        font = ImageFont.truetype(FONT_PATH, font_size)
-    except:
-        font = ImageFont.load_default()
-        font_size = 40 # Fallback
-        
-    # Quebra de linha inteligente (Wrap)
-    # Ajustamos a largura do texto para ocupar só o lado ESQUERDO (onde não tem avatar)
-    max_text_width = int(TEMPLATE_WIDTH * 0.60) 
-    
-    # Lógica simples de quebra (reduz tamanho se não couber)
+    return base
+
+
+def assets_signature():
+    """Muda quando fonte, avatar, fundo ou layout mudam."""
+    parts = [f"layout={LAYOUT_VERSION}"]
+    for path in (FONT_PATH, AVATAR_PATH, BG_PATH):
+        try:
+            st = os.stat(path)
+            parts.append(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return "|".join(parts)
+
+
+# --- TEXTO ---
+
+def thumbnail_text(data):
+    # Pega o texto curto (ou usa o título truncado se a Groq falhar)
+    raw_text = data.get("thumbnail_text", data.get("title", "AULA DE INGLÊS"))
+    return raw_text[:MAX_TEXT_CHARS] # Segurança
+
+
+def wrap_text(text, font, max_width):
+    """Quebra por palavras usando a largura MEDIDA de cada linha."""
     lines = []
-    while font_size > 50:
-        font = ImageFont.truetype(FONT_PATH, font_size)
-        # Tenta quebrar o texto para caber na largura
-        avg_char_width = font.getlength("A")
-        chars_per_line = int(max_text_width / avg_char_width)
-        lines = textwrap.wrap(raw_text, width=chars_per_line)
-        
-        # Verifica se a altura total cabe
-        total_height = len(lines) * font_size * 1.2
-        if total_height < TEMPLATE_HEIGHT * 0.8:
-            break
-        font_size -= 10 # Diminui fonte e tenta de novo
-
-    # 5. Desenhar Texto com Contorno (Stroke)
-    text_y = (TEMPLATE_HEIGHT - (len(lines) * font_size)) // 2 # Centraliza Verticalmente
-    
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and font.getlength(candidate) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def text_fits(text, size):
+    font = load_font(size)
+    lines = wrap_text(text, font, MAX_TEXT_WIDTH)
+    fits = (
+        all(font.getlength(line) <= MAX_TEXT_WIDTH for line in lines)
+        and len(lines) * size * 1.2 < MAX_TEXT_HEIGHT
+    )
+    return fits, lines
+
+
+def fit_text(text):
+    """Maior tamanho entre MIN e MAX em que o texto cabe (busca binária)."""
+    low, high = MIN_FONT_SIZE, MAX_FONT_SIZE
+    best_size, best_lines = MIN_FONT_SIZE, None
+
+    while low <= high:
+        mid = (low + high) // 2
+        fits, lines = text_fits(text, mid)
+        if fits:
+            best_size, best_lines = mid, lines
+            low = mid + 1
+        else:
+            high = mid - 1
+
+    if best_lines is None:
+        # nem no mínimo cabe: usa o mínimo mesmo assim
+        best_lines = text_fits(text, MIN_FONT_SIZE)[1]
+
+    return best_size, best_lines
+
+
+# --- RENDER ---
+
+def render_thumbnail(text, output_path):
+    img = load_base_image().copy()
+    draw = ImageDraw.Draw(img)
+
+    font_size, lines = fit_text(text)
+    font = load_font(font_size)
+
+    # Centraliza Verticalmente
+    text_y = (TEMPLATE_HEIGHT - (len(lines) * font_size)) // 2
+
     for line in lines:
-        # Calcula largura da linha para centralizar na área esquerda
-        line_w = font.getlength(line)
-        text_x = 50 # Margem esquerda fixa
-        
-        # Desenha contorno grosso (Stroke)
-        # Pillow mais novo tem parâmetro stroke_width, mas esse loop garante compatibilidade e grossura
-        for adj_x in range(-STROKE_WIDTH, STROKE_WIDTH+1):
-            for adj_y in range(-STROKE_WIDTH, STROKE_WIDTH+1):
-                draw.text((text_x+adj_x, text_y+adj_y), line, font=font, fill=STROKE_COLOR)
-        
-        # Desenha texto principal
-        draw.text((text_x, text_y), line, font=font, fill=TEXT_COLOR)
-        
+        # Contorno grosso (Stroke) + texto principal numa chamada só
+        draw.text(
+            (TEXT_MARGIN_X, text_y), line, font=font, fill=TEXT_COLOR,
+            stroke_width=STROKE_WIDTH, stroke_fill=STROKE_COLOR
+        )
         text_y += int(font_size * 1.1)
 
-    # 6. Salvar
-    # Salva com o mesmo nome do JSON, mas extensão .jpg
-    output_path = json_path.replace(".json", ".jpg")
     img.save(output_path, quality=95)
+    return output_path
+
+
+def output_path_for(json_path):
+    # Salva com o mesmo nome do JSON, mas extensão .jpg
+    return os.path.splitext(json_path)[0] + ".jpg"
+
+
+def create_thumbnail(json_path):
+    # 1. Carregar Metadados
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    output_path = render_thumbnail(thumbnail_text(data), output_path_for(json_path))
     print(f"🖼️ Thumbnail gerada: {output_path}")
     return output_path
 
+
+# --- LOTE ---
+
+def _render_job(job):
+    text, output_path = job
+    try:
+        render_thumbnail(text, output_path)
+        return output_path, None
+    except Exception as ex:
+        return output_path, str(ex)
+
+
+def load_cache(directory):
+    path = os.path.join(directory, CACHE_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_cache(directory, cache):
+    path = os.path.join(directory, CACHE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def create_thumbnails(directory, workers=None, force=False):
+    """Gera as thumbnails de todos os JSONs da pasta. Retorna (geradas, puladas, erros)."""
+    cache = {} if force else load_cache(directory)
+    signature = assets_signature()
+
+    jobs, hashes, skipped = [], {}, 0
+
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json") or name == CACHE_FILE:
+            continue
+
+        json_path = os.path.join(directory, name)
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                text = thumbnail_text(json.load(f))
+        except Exception as ex:
+            print(f"⚠️ JSON inválido: {name} ({ex})")
+            continue
+
+        output_path = output_path_for(json_path)
+        digest = hashlib.sha1(f"{signature}|{text}".encode("utf-8")).hexdigest()
+
+        if cache.get(name) == digest and os.path.exists(output_path):
+            skipped += 1
+            continue
+
+        jobs.append((text, output_path))
+        hashes[output_path] = (name, digest)
+
+    errors = []
+    done = 0
+
+    if jobs:
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_render_job, jobs, chunksize=4))
+        else:
+            results = [_render_job(job) for job in jobs]
+
+        for output_path, error in results:
+            name, digest = hashes[output_path]
+            if error:
+                errors.append((name, error))
+                cache.pop(name, None)
+                print(f"❌ {name}: {error}")
+            else:
+                cache[name] = digest
+                done += 1
+
+    save_cache(directory, cache)
+    return done, skipped, errors
+
+
 # --- Integração Rápida para Teste ---
 if __name__ == "__main__":
-    import sys
-    # Se passar arquivo como argumento, processa
-    if len(sys.argv) > 1:
-        create_thumbnail(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Gera thumbnails .jpg a partir dos JSONs de metadados.")
+    parser.add_argument("path", nargs="?", help="arquivo .json ou pasta com JSONs")
+    parser.add_argument("--workers", type=int, help="processos em paralelo (padrão: nº de CPUs)")
+    parser.add_argument("--force", action="store_true", help="refaz mesmo as thumbnails sem mudança")
+    args = parser.parse_args()
+
+    if not args.path:
+        print("Arraste um JSON (ou uma pasta) para este script para testar.")
+        sys.exit(0)
+
+    if os.path.isdir(args.path):
+        done, skipped, errors = create_thumbnails(args.path, args.workers, args.force)
+        print(f"🖼️ Geradas: {done} · sem mudança: {skipped} · erros: {len(errors)}")
     else:
-        print("Arraste um JSON para este script para testar.")
\ No newline at end of file
+        create_thumbnail(args.path)
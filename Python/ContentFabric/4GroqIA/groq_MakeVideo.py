@@ -10,12 +10,13 @@
   - JSON original movido imediatamente para processed_json_dir
   - JSON final sempre salvo com o NOME DO VÍDEO
   - Correção automática de JSON malformado
-  - Rate limit inteligente (jitter + respeito ao "try again in X ms")
+  - Rate limit por token bucket (requests/min e tokens/min por key)
+  - Processamento concorrente entre as keys (--workers)
+  - Espera só em 429 real, pelo retry-after informado pela Groq
   - Ignora arquivos já processados
   - Ignora arquivos que iniciam com uploaded_
   - Exibe total de arquivos ignorados por uploaded_
   - Remoção 100% da thumbnail
-  - Delay entre chamadas ao Groq
   - SUPORTE A MÚLTIPLAS GROQ API KEYS (ROTATION)
   - ERROR REPORT JSON (RESILIÊNCIA)
 =====================================================================
@@ -23,7 +24,8 @@
 Exemplos:
 python groq_MakeVideo.py "C:\\Content"
 python groq_MakeVideo.py "C:\\Content" --playlist "Inglês para Viagem"
-python groq_MakeVideo.py "C:\\Content" --sleep-between 30
+python groq_MakeVideo.py "C:\\Content" --workers 6
+python groq_MakeVideo.py "C:\\Content" --workers 1 --sleep-between 20   (modo antigo)
 python groq_MakeVideo.py "C:\\Users\\leand\\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\\EKF - English Knowledge Framework - Videos\\Videos"
 """
 
@@ -33,10 +35,17 @@ import requests
 import shutil
 import argparse
 import time
-import random
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from rate_scheduler import (
+    KeyRateLimiter,
+    estimate_tokens,
+    retry_after_from_headers
+)
+
 # ======================================================================
 # CONFIG
 # ======================================================================
@@ -64,6 +73,14 @@ VIDEO_EXTENSIONS = CONFIG["video_extensions"]
 RETRY_MAX = CONFIG["retry_max_attempts"]
 DEBUG = CONFIG["debug"]
 
+# Limites por key (free tier do gpt-oss-20b: 30 RPM / 8K TPM)
+RATE_LIMIT = CONFIG.get("rate_limit", {})
+REQUESTS_PER_MINUTE = RATE_LIMIT.get("requests_per_minute", 30)
+TOKENS_PER_MINUTE = RATE_LIMIT.get("tokens_per_minute", 8000)
+COMPLETION_TOKENS = RATE_LIMIT.get("completion_tokens_estimate", 1200)
+
+REQUEST_TIMEOUT = CONFIG.get("request_timeout", 60)
+
 # ======================================================================
 # UTILS
 # ======================================================================
@@ -103,6 +120,8 @@ def write_final_json(video_path, metadata_json):
 # ERROR REPORT
 # ======================================================================
 
+_REPORT_LOCK = threading.Lock()
+
 def log_error_report(json_file, stage, exc: Exception):
     entry = {
         "timestamp": datetime.utcnow().isoformat(),
@@ -114,15 +133,17 @@ def log_error_report(json_file, stage, exc: Exception):
         "stacktrace": traceback.format_exc()
     }
 
-    if os.path.exists(ERROR_REPORT_FILE):
-        report = load_json(ERROR_REPORT_FILE)
-    else:
-        report = []
+    # várias threads podem falhar ao mesmo tempo
+    with _REPORT_LOCK:
+        if os.path.exists(ERROR_REPORT_FILE):
+            report = load_json(ERROR_REPORT_FILE)
+        else:
+            report = []
 
-    report.append(entry)
+        report.append(entry)
 
-    with open(ERROR_REPORT_FILE, "w", encoding="utf-8") as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(ERROR_REPORT_FILE, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
 
     print(f"  Erro registrado em {ERROR_REPORT_FILE}")
 
@@ -156,15 +177,14 @@ def load_groq_keys(path):
         raise RuntimeError("Nenhuma API key válida encontrada em GroqKeys.json")
     return keys
 
-class GroqKeyManager:
-    def __init__(self, keys):
-        self.keys = keys
-        self.index = 0
+class GroqKeyManager(KeyRateLimiter):
+    """
+    Keys da Groq com token bucket próprio (RPM / TPM).
+    acquire() escolhe a key que libera mais cedo.
+    """
 
-    def next_key(self):
-        key = self.keys[self.index]
-        self.index = (self.index + 1) % len(self.keys)
-        return key
+    def __init__(self, keys):
+        super().__init__(keys, REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
 
 # ======================================================================
 # GROQ API
@@ -180,40 +200,34 @@ def call_groq(system_prompt, user_prompt, key_manager):
         "temperature": TEMPERATURE
     }
 
-    retries = 0
-    attempted_keys = 0
-    max_keys = len(key_manager.keys)
+    estimated = estimate_tokens(json.dumps(payload["messages"]), COMPLETION_TOKENS)
 
-    while True:
-        api_key = key_manager.next_key()
-        attempted_keys += 1
+    for _ in range(RETRY_MAX + 1):
+        slot = key_manager.acquire(estimated)
 
         headers = {
-            "Authorization": f"Bearer {api_key}",
+            "Authorization": f"Bearer {slot.key}",
             "Content-Type": "application/json"
         }
 
-        res = requests.post(API_URL, json=payload, headers=headers)
-
-        if res.status_code == 200:
-            return res.json()["choices"][0]["message"]["content"]
+        res = requests.post(API_URL, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
 
         if res.status_code == 429:
-            if attempted_keys < max_keys:
-                continue
-
-            wait = min(2 ** retries + random.uniform(0.5, 1.2), 60)
-            time.sleep(wait)
-            retries += 1
-            attempted_keys = 0
-
-            if retries > RETRY_MAX:
-                raise RuntimeError("Rate limit excedido em todas as keys.")
-
+            wait = key_manager.penalize(slot, retry_after_from_headers(res.headers))
+            log(f"429 em {slot.name} → key parada por {wait:.1f}s")
             continue
 
+        if res.status_code == 200:
+            data = res.json()
+            used = data.get("usage", {}).get("total_tokens")
+            key_manager.record_usage(slot, estimated, used, res.headers)
+            return data["choices"][0]["message"]["content"]
+
+        key_manager.record_usage(slot, estimated, headers=res.headers)
         raise RuntimeError(res.text)
 
+    raise RuntimeError("Rate limit excedido em todas as keys.")
+
 # ======================================================================
 # PLAYLIST
 # ======================================================================
@@ -235,12 +249,55 @@ def build_playlist_object(playlist_key, friendly):
 # MAIN
 # ======================================================================
 
+def process_file(label, full_path, video_dir, prompts, force_playlist, key_manager):
+    system_prompt, base_prompt, friendly_playlists = prompts
+    filename = os.path.basename(full_path)
+
+    try:
+        comp_json = load_json(full_path)
+
+        if "nome_arquivos" not in comp_json:
+            raise ValueError("'nome_arquivos' ausente")
+
+        tag = comp_json["nome_arquivos"]
+        move_to_processed(full_path)
+
+        raw = call_groq(
+            system_prompt,
+            {
+                "base": base_prompt,
+                "extra": comp_json,
+                "friendly_keys": list(friendly_playlists.keys()),
+                "force_playlist": force_playlist
+            },
+            key_manager
+        )
+
+        metadata_json = safe_extract_json(raw)
+        playlist_key = force_playlist or metadata_json.get("playlist_key", "GeneralVocabulary")
+        metadata_json["playlist"] = build_playlist_object(playlist_key, friendly_playlists)
+        metadata_json.pop("playlist_key", None)
+
+        video_path = find_video(video_dir, tag)
+        write_final_json(video_path, metadata_json)
+
+        print(f" {label} Sucesso: {filename}")
+        return True
+
+    except Exception as e:
+        print(f" {label} Erro em {filename}: {e}")
+        log_error_report(filename, "processing", e)
+        return False
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path")
     parser.add_argument("--videos")
     parser.add_argument("--playlist")
-    parser.add_argument("--sleep-between", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="arquivos em paralelo (padrão: 2 por key, máx. 8)")
+    parser.add_argument("--sleep-between", type=int, default=0,
+                        help="pausa fixa após cada arquivo (o token bucket já limita)")
     args = parser.parse_args()
 
     json_dir = args.path
@@ -248,11 +305,14 @@ def main():
 
     ensure_dir(PROCESSED_DIR)
 
-    system_prompt = load_json(SYSTEM_PROMPT_FILE)
-    base_prompt = load_json(BASE_PROMPT_FILE)
-    friendly_playlists = load_json(FRIENDLY_PLAYLISTS_FILE)
+    prompts = (
+        load_json(SYSTEM_PROMPT_FILE),
+        load_json(BASE_PROMPT_FILE),
+        load_json(FRIENDLY_PLAYLISTS_FILE)
+    )
 
     key_manager = GroqKeyManager(load_groq_keys(API_KEYS_FILE))
+    workers = max(1, args.workers or min(8, 2 * len(key_manager.keys)))
 
     json_files = [
         f for f in os.listdir(json_dir)
@@ -261,44 +321,29 @@ def main():
         and not os.path.exists(os.path.join(PROCESSED_DIR, f))
     ]
 
-    for idx, filename in enumerate(json_files, start=1):
-        print(f"\n [{idx}/{len(json_files)}] Processando: {filename}")
-        try:
-            full_path = os.path.join(json_dir, filename)
-            comp_json = load_json(full_path)
-
-            if "nome_arquivos" not in comp_json:
-                raise ValueError("'nome_arquivos' ausente")
-
-            tag = comp_json["nome_arquivos"]
-            move_to_processed(full_path)
-
-            raw = call_groq(
-                system_prompt,
-                {
-                    "base": base_prompt,
-                    "extra": comp_json,
-                    "friendly_keys": list(friendly_playlists.keys()),
-                    "force_playlist": args.playlist
-                },
-                key_manager
-            )
-
-            metadata_json = safe_extract_json(raw)
-            playlist_key = args.playlist or metadata_json.get("playlist_key", "GeneralVocabulary")
-            metadata_json["playlist"] = build_playlist_object(playlist_key, friendly_playlists)
-            metadata_json.pop("playlist_key", None)
-
-            video_path = find_video(video_dir, tag)
-            write_final_json(video_path, metadata_json)
-
-            print("Sucesso")
-
-        except Exception as e:
-            log_error_report(filename, "processing", e)
-            print("Erro tratado. Seguindo para o próximo.")
-
-        time.sleep(args.sleep_between)
+    print(f"\n {len(json_files)} JSONs | {len(key_manager.keys)} keys | {workers} workers")
+
+    def run(idx, filename):
+        label = f"[{idx}/{len(json_files)}]"
+        print(f"\n {label} Processando: {filename}")
+        ok = process_file(
+            label, os.path.join(json_dir, filename), video_dir,
+            prompts, args.playlist, key_manager
+        )
+        if args.sleep_between:
+            time.sleep(args.sleep_between)
+        return ok
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run, idx, filename)
+            for idx, filename in enumerate(json_files, start=1)
+        ]
+        results = [f.result() for f in as_completed(futures)]
+
+    print(f"\n Sucesso: {sum(results)} | Erros: {len(results) - sum(results)}")
+    for s in key_manager.stats():
+        print(f"   {s['name']}: {s['calls']} chamadas, {s['rate_limited']} x 429")
 
     print("\n Processo concluído com resiliência total.")
 
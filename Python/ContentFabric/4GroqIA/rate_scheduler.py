@@ -0,0 +1,199 @@
+# ============================================================
+# rate_scheduler.py
+#
+# Controle de rate limit compartilhado pelos scripts de
+# metadata (groq_MakeVideo.py / gemini_MakeVideo.py)
+#
+# 1. Token bucket por key: requests/min e tokens/min
+#    - a chamada só sai quando a key tem saldo nos dois
+#    - saldo reabastece continuamente (não em janelas)
+# 2. Escolha da key com menor espera (não round-robin cego)
+# 3. Espera SÓ em 429 real, pelo tempo de retry-after /
+#    x-ratelimit-reset-* (ou pela dica na mensagem de erro)
+# 4. Saldo sincronizado com x-ratelimit-remaining-* e
+#    ajustado pelo uso real de tokens da resposta
+# ============================================================
+
+import os
+import re
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# Mesmo parser de "7.66s" / "2m59.56s" / "250ms" do cliente Groq compartilhado
+from groq_client import parse_reset_duration as parse_duration
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Espera quando o 429 não informa quanto aguardar
+DEFAULT_RETRY_AFTER = 10.0
+
+# Estimativa de tokens da resposta (somada ao prompt)
+DEFAULT_COMPLETION_TOKENS = 1200
+
+# "Please retry in 23.5s" / "retry_delay { seconds: 23 }"
+_RETRY_HINT_RE = re.compile(
+    r"retry in (\d+(?:\.\d+)?)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)",
+    re.IGNORECASE
+)
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def retry_after_from_headers(headers):
+    """Tempo de espera de um 429 pelos headers da resposta."""
+    return (
+        parse_duration(headers.get("retry-after"))
+        or parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        or parse_duration(headers.get("x-ratelimit-reset-requests"))
+        or DEFAULT_RETRY_AFTER
+    )
+
+
+def retry_after_from_error(exc):
+    """Tempo de espera de um 429 pela mensagem da exceção (SDKs)."""
+    match = _RETRY_HINT_RE.search(str(exc))
+    if not match:
+        return DEFAULT_RETRY_AFTER
+    return float(match.group(1) or match.group(2))
+
+
+def estimate_tokens(text, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """Estimativa grosseira: ~4 caracteres por token + resposta."""
+    return len(text) // 4 + completion_tokens
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================================
+# TOKEN BUCKET
+# ============================================================
+
+class TokenBucket:
+    """Saldo que reabastece per_minute unidades por minuto até capacity."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Segundos até haver saldo para amount (0 = já pode)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, remaining):
+        """O servidor sabe melhor: nunca acreditar em mais saldo que ele."""
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+# ============================================================
+# KEYS
+# ============================================================
+
+class KeySlot:
+    """Uma key com seus dois buckets e o bloqueio por 429."""
+
+    def __init__(self, name, key, requests_per_minute, tokens_per_minute):
+        self.name = name
+        self.key = key
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+
+        self.calls = 0
+        self.rate_limited = 0
+
+    def wait_time(self, tokens, now):
+        return max(
+            self.blocked_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now)
+        )
+
+
+class KeyRateLimiter:
+    """
+    Distribui chamadas entre várias keys respeitando o
+    token bucket de cada uma. Seguro entre threads.
+    """
+
+    def __init__(self, keys, requests_per_minute, tokens_per_minute):
+        if not keys:
+            raise RuntimeError("Nenhuma API key informada ao rate limiter")
+
+        self.keys = list(keys)
+        self.slots = [
+            KeySlot(f"key{i}", key, requests_per_minute, tokens_per_minute)
+            for i, key in enumerate(self.keys, start=1)
+        ]
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        """Bloqueia até alguma key ter saldo; debita e retorna o slot."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                slot = min(self.slots, key=lambda s: s.wait_time(tokens, now))
+                wait = slot.wait_time(tokens, now)
+
+                if wait <= 0:
+                    slot.requests.take(1)
+                    slot.tokens.take(tokens)
+                    slot.calls += 1
+                    return slot
+
+            time.sleep(wait)
+
+    def record_usage(self, slot, estimated, used=None, headers=None):
+        """Ajusta o saldo pelo uso real e pelos headers x-ratelimit-*."""
+        with self._lock:
+            if used is not None:
+                slot.tokens.give_back(estimated - used)
+
+            if headers is not None:
+                slot.requests.sync(_to_int(headers.get("x-ratelimit-remaining-requests")))
+                slot.tokens.sync(_to_int(headers.get("x-ratelimit-remaining-tokens")))
+
+    def penalize(self, slot, retry_after):
+        """429 real: a key fica parada pelo tempo indicado."""
+        with self._lock:
+            slot.blocked_until = max(slot.blocked_until, time.monotonic() + retry_after)
+            slot.rate_limited += 1
+        return retry_after
+
+    def stats(self):
+        with self._lock:
+            return [
+                {"name": s.name, "calls": s.calls, "rate_limited": s.rate_limited}
+                for s in self.slots
+            ]
@@ -9,13 +9,43 @@
 # - playlists associadas
 #
 # Usa as mesmas keys/paths do upload_youtube.py
+#
+# MODO INCREMENTAL (padrão)
+# - Guarda ETag + itens de cada playlist / página em
+#   youtube_uploaded_inventory.sync_state.json
+# - Playlist com o mesmo itemCount e o mesmo ETag da
+#   listagem de playlists: reaproveitada sem chamada
+# - Demais: primeira página com If-None-Match; 304 =
+#   reaproveita a playlist inteira (o ETag da página 1
+#   cobre pageInfo.totalResults)
+# - Ponto cego: trocar um item fora da página 1 (remove A,
+#   adiciona B) não muda itemCount, ETag do recurso nem a
+#   página 1. Por isso cada playlist é relida por inteiro
+#   (sem ETag) quando a cópia salva passa de
+#   PLAYLIST_MAX_AGE_DAYS (+0..6 dias por playlist, para não
+#   vencerem todas no mesmo dia). Até lá, a troca pode não
+#   aparecer; --full força na hora
+# - Uploads: para de paginar ao encontrar o vídeo mais
+#   novo já conhecido (se a contagem bater)
+# - Playlists e lotes de videos.list em paralelo
+# - Relatório de unidades de quota gastas na execução
+#   (também somadas em youtube_quota_ledger.json)
+#
+# --full ignora o estado salvo e refaz tudo
 # -------------------------------------------------------
 
 import os
 import json
+import zlib
+import argparse
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
 
-from youtube_auth import get_youtube_client
+from youtube_auth import get_youtube_credentials, build_youtube_client
+from youtube_quota import QuotaLedger
 
 # ======================================================
 # PATHS - mesmos padrões do upload_youtube.py
@@ -32,6 +62,22 @@ OUTPUT_FILE = os.path.join(
     f"youtube_uploaded_inventory.json"
 )
 
+SYNC_STATE_FILE = os.path.join(
+    OUTPUT_DIR,
+    "youtube_uploaded_inventory.sync_state.json"
+)
+
+SYNC_STATE_VERSION = 1
+
+# Chamadas simultâneas à API (um client por thread)
+DEFAULT_WORKERS = 6
+
+# Custo em unidades de quota de cada chamada *.list()
+LIST_COST = 1
+
+# Idade máxima da cópia salva de uma playlist antes de relê-la inteira
+PLAYLIST_MAX_AGE_DAYS = 7
+
 
 # ======================================================
 # LOCAL FILE MAP
@@ -92,133 +138,391 @@ def build_uploaded_file_map(directory):
 
     return result_by_title, result_by_base
 
+# ======================================================
+# API: CLIENT POR THREAD + CONTADOR DE QUOTA
+# ======================================================
+
+class YouTubeApi:
+    """
+    execute() com If-None-Match opcional.
+
+    Devolve (response, etag) — response None = 304 (não mudou).
+    Conta as unidades de quota de cada chamada. Um 304 também
+    é contado: a economia vem das páginas que nem são pedidas.
+    """
+
+    def __init__(self, creds):
+        self.creds = creds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.not_modified = 0
+        self.units = 0
+        self.by_method = {}
+
+    def client(self):
+        if not hasattr(self._local, "youtube"):
+            self._local.youtube = build_youtube_client(self.creds)
+        return self._local.youtube
+
+    def execute(self, method, request, etag=None, cost=LIST_COST):
+        if etag:
+            request.headers["If-None-Match"] = etag
+
+        try:
+            response = request.execute()
+            status = 200
+        except HttpError as ex:
+            if ex.resp.status != 304:
+                raise
+            response = None
+            status = 304
+
+        with self._lock:
+            self.calls += 1
+            self.units += cost
+            self.by_method[method] = self.by_method.get(method, 0) + cost
+            if status == 304:
+                self.not_modified += 1
+
+        if response is None:
+            return None, etag
+        return response, response.get("etag")
+
+    def report(self):
+        return {
+            "calls": self.calls,
+            "not_modified": self.not_modified,
+            "quota_units": self.units,
+            "quota_units_by_method": dict(sorted(self.by_method.items()))
+        }
+
+# ======================================================
+# ESTADO DA SINCRONIZAÇÃO
+# ======================================================
+
+def empty_sync_state():
+    return {"version": SYNC_STATE_VERSION, "uploads": None, "playlists_list": None,
+            "playlists": {}, "video_batches": {}}
+
+
+def load_sync_state(path):
+    empty = empty_sync_state()
+
+    if not os.path.exists(path):
+        return empty
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return empty
+
+    if state.get("version") != SYNC_STATE_VERSION:
+        return empty
+
+    return state
+
+
+def save_sync_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
 # ======================================================
 # YOUTUBE HELPERS
 # ======================================================
 
-def get_uploads_playlist_id(youtube):
-    response = youtube.channels().list(
-        part="contentDetails",
-        mine=True
-    ).execute()
+def get_uploads_playlist_id(api):
+    response, _ = api.execute(
+        "channels.list",
+        api.client().channels().list(
+            part="contentDetails",
+            mine=True
+        )
+    )
 
     return response["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
 
 
-def get_all_upload_items(youtube, uploads_playlist_id):
+def compact_upload_item(item):
+    snippet = item.get("snippet", {})
+    content_details = item.get("contentDetails", {})
+
+    return {
+        "video_id": content_details.get("videoId"),
+        "title": snippet.get("title"),
+        "description": snippet.get("description"),
+        "uploaded_at": content_details.get("videoPublishedAt") or snippet.get("publishedAt")
+    }
+
+
+def compact_playlist_item(item):
+    return {
+        "video_id": item["contentDetails"]["videoId"],
+        "position": item["snippet"].get("position")
+    }
+
+
+def fetch_playlist_items(api, playlist_id, cached, compact, newest_first=False):
+    """
+    Todos os itens de uma playlist → {"etag", "total", "items"}.
+
+    cached: o mesmo dict da execução anterior (ou None).
+    newest_first: playlist de uploads — novos vídeos entram no
+    topo, então dá para parar ao encontrar o primeiro conhecido.
+    """
     items = []
     page_token = None
+    first_etag = None
+    total = None
+
+    known_first = cached["items"][0]["video_id"] if cached and cached.get("items") else None
 
     while True:
-        response = youtube.playlistItems().list(
-            part="snippet,contentDetails",
-            playlistId=uploads_playlist_id,
-            maxResults=50,
-            pageToken=page_token
-        ).execute()
+        response, etag = api.execute(
+            "playlistItems.list",
+            api.client().playlistItems().list(
+                part="snippet,contentDetails",
+                playlistId=playlist_id,
+                maxResults=50,
+                pageToken=page_token
+            ),
+            etag=cached.get("etag") if cached and page_token is None else None
+        )
+
+        if response is None:
+            # 304 na primeira página: playlist inteira igual à última execução
+            return cached
 
-        items.extend(response.get("items", []))
+        if page_token is None:
+            first_etag = etag
+            total = response.get("pageInfo", {}).get("totalResults")
+
+        for item in response.get("items", []):
+            compacted = compact(item)
+
+            if (
+                newest_first
+                and known_first
+                and compacted["video_id"] == known_first
+                and total == len(items) + len(cached["items"])
+            ):
+                return {"etag": first_etag, "total": total, "items": items + cached["items"]}
+
+            items.append(compacted)
 
         page_token = response.get("nextPageToken")
         if not page_token:
             break
 
-    return items
+    return {"etag": first_etag, "total": total, "items": items}
 
 
-def get_all_playlists(youtube):
+def get_all_upload_items(api, uploads_playlist_id, state):
+    state["uploads"] = fetch_playlist_items(
+        api,
+        uploads_playlist_id,
+        state.get("uploads"),
+        compact_upload_item,
+        newest_first=True
+    )
+    return state["uploads"]["items"]
+
+
+def get_all_playlists(api, state):
+    cached = state.get("playlists_list")
     playlists = {}
     page_token = None
+    first_etag = None
 
     while True:
-        response = youtube.playlists().list(
-            part="snippet",
-            mine=True,
-            maxResults=50,
-            pageToken=page_token
-        ).execute()
+        response, etag = api.execute(
+            "playlists.list",
+            api.client().playlists().list(
+                part="snippet,contentDetails",
+                mine=True,
+                maxResults=50,
+                pageToken=page_token
+            ),
+            etag=cached.get("etag") if cached and page_token is None else None
+        )
+
+        if response is None:
+            return cached["playlists"]
+
+        if page_token is None:
+            first_etag = etag
 
         for item in response.get("items", []):
             playlists[item["id"]] = {
                 "playlist_id": item["id"],
-                "playlist_title": item["snippet"]["title"]
+                "playlist_title": item["snippet"]["title"],
+                "item_count": item.get("contentDetails", {}).get("itemCount"),
+                "etag": item.get("etag")
             }
 
         page_token = response.get("nextPageToken")
         if not page_token:
             break
 
+    state["playlists_list"] = {"etag": first_etag, "playlists": playlists}
     return playlists
 
 
-def build_video_playlist_map(youtube, playlists):
-    video_playlist_map = {}
+def is_playlist_copy_expired(playlist_id, cached, now):
+    """Cópia salva mais velha que PLAYLIST_MAX_AGE_DAYS (+0..6 dias estável por playlist)."""
+    fetched_at = cached.get("fetched_at")
+    if not fetched_at:
+        return True
 
-    for playlist_id, playlist_data in playlists.items():
-        page_token = None
+    try:
+        age = now - datetime.fromisoformat(fetched_at)
+    except ValueError:
+        return True
 
-        while True:
-            response = youtube.playlistItems().list(
-                part="snippet,contentDetails",
-                playlistId=playlist_id,
-                maxResults=50,
-                pageToken=page_token
-            ).execute()
+    max_age = PLAYLIST_MAX_AGE_DAYS + zlib.crc32(playlist_id.encode("utf-8")) % 7
+    return age.days >= max_age
+
+
+def build_video_playlist_map(api, playlists, state, workers=DEFAULT_WORKERS):
+    cached_playlists = state.get("playlists", {})
+    fresh = {}
+    to_fetch = []
+    skipped = 0
 
-            for item in response.get("items", []):
-                video_id = item["contentDetails"]["videoId"]
+    now = datetime.now()
+    expired = set()
 
-                video_playlist_map.setdefault(video_id, []).append({
-                    "playlist_id": playlist_id,
-                    "playlist_title": playlist_data["playlist_title"],
-                    "position": item["snippet"].get("position")
-                })
+    for playlist_id, playlist_data in playlists.items():
+        cached = cached_playlists.get(playlist_id)
+
+        if cached and is_playlist_copy_expired(playlist_id, cached, now):
+            expired.add(playlist_id)
+            to_fetch.append(playlist_id)
+
+        # mesmo ETag do recurso + mesma contagem: nenhuma chamada
+        elif (
+            cached
+            and cached.get("resource_etag") == playlist_data.get("etag")
+            and cached.get("total") == playlist_data.get("item_count")
+        ):
+            fresh[playlist_id] = cached
+            skipped += 1
+        else:
+            to_fetch.append(playlist_id)
+
+    def fetch(playlist_id):
+        cached = cached_playlists.get(playlist_id)
+        # cópia vencida: relê sem ETag (cobre trocas fora da página 1)
+        result = fetch_playlist_items(
+            api,
+            playlist_id,
+            None if playlist_id in expired else cached,
+            compact_playlist_item
+        )
+        # 304 devolve a própria cópia salva: mantém a data da última leitura completa
+        fetched_at = result.get("fetched_at") if result is cached else now.isoformat()
+        return playlist_id, dict(
+            result,
+            resource_etag=playlists[playlist_id].get("etag"),
+            fetched_at=fetched_at or now.isoformat()
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for playlist_id, result in pool.map(fetch, to_fetch):
+            fresh[playlist_id] = result
+
+    print(
+        f"   Playlists reaproveitadas sem chamada: {skipped} · consultadas: {len(to_fetch)} "
+        f"(relidas por idade: {len(expired)})"
+    )
+
+    # playlists apagadas somem do estado
+    state["playlists"] = fresh
+
+    video_playlist_map = {}
 
-            page_token = response.get("nextPageToken")
-            if not page_token:
-                break
+    for playlist_id, playlist_data in playlists.items():
+        for item in fresh[playlist_id]["items"]:
+            video_playlist_map.setdefault(item["video_id"], []).append({
+                "playlist_id": playlist_id,
+                "playlist_title": playlist_data["playlist_title"],
+                "position": item["position"]
+            })
 
     return video_playlist_map
 
 
-def enrich_video_details(youtube, videos):
-    enriched = []
+def enrich_video_details(api, videos, state, workers=DEFAULT_WORKERS):
+    """
+    Lotes de 50 IDs montados do vídeo mais ANTIGO para o mais novo:
+    uploads novos só mexem no último lote, os outros mantêm a
+    mesma chave (e o ETag) de uma execução para outra.
+    """
+    cached_batches = state.get("video_batches", {})
+    fresh_batches = {}
+
+    ordered = [v for v in reversed(videos) if v["video_id"]]
+    batches = [ordered[i:i + 50] for i in range(0, len(ordered), 50)]
+
+    def fetch(batch):
+        ids = ",".join(v["video_id"] for v in batch)
+        cached = cached_batches.get(ids)
+
+        response, etag = api.execute(
+            "videos.list",
+            api.client().videos().list(
+                part="snippet,status,statistics,contentDetails",
+                id=ids
+            ),
+            etag=cached.get("etag") if cached else None
+        )
+
+        if response is None:
+            return ids, cached
+
+        return ids, {
+            "etag": etag,
+            "details": {item["id"]: item for item in response.get("items", [])}
+        }
 
-    for i in range(0, len(videos), 50):
-        batch = videos[i:i + 50]
-        ids = ",".join(v["video_id"] for v in batch if v["video_id"])
+    details_map = {}
 
-        if not ids:
-            continue
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for ids, batch_state in pool.map(fetch, batches):
+            fresh_batches[ids] = batch_state
+            details_map.update(batch_state["details"])
 
-        response = youtube.videos().list(
-            part="snippet,status,statistics,contentDetails",
-            id=ids
-        ).execute()
+    state["video_batches"] = fresh_batches
 
-        details_map = {
-            item["id"]: item
-            for item in response.get("items", [])
-        }
+    enriched = []
 
-        for video in batch:
-            detail = details_map.get(video["video_id"], {})
-
-            snippet = detail.get("snippet", {})
-            status = detail.get("status", {})
-            statistics = detail.get("statistics", {})
-            content_details = detail.get("contentDetails", {})
-
-            video.update({
-                "youtube_uploaded_at": snippet.get("publishedAt") or video.get("youtube_uploaded_at"),
-                "privacy_status": status.get("privacyStatus"),
-                "duration": content_details.get("duration"),
-                "view_count": statistics.get("viewCount"),
-                "like_count": statistics.get("likeCount"),
-                "comment_count": statistics.get("commentCount"),
-                "tags": snippet.get("tags", [])
-            })
+    for video in videos:
+        detail = details_map.get(video["video_id"], {})
+
+        snippet = detail.get("snippet", {})
+        status = detail.get("status", {})
+        statistics = detail.get("statistics", {})
+        content_details = detail.get("contentDetails", {})
+
+        video.update({
+            # título/descrição editados no YouTube: o item de uploads pode vir do estado
+            # salvo, mas o snippet do videos.list (coberto pelo ETag do lote) é atual
+            "title": snippet.get("title", video.get("title")),
+            "description": snippet.get("description", video.get("description")),
+            "youtube_uploaded_at": snippet.get("publishedAt") or video.get("youtube_uploaded_at"),
+            "privacy_status": status.get("privacyStatus"),
+            "duration": content_details.get("duration"),
+            "view_count": statistics.get("viewCount"),
+            "like_count": statistics.get("likeCount"),
+            "comment_count": statistics.get("commentCount"),
+            "tags": snippet.get("tags", [])
+        })
 
+        if video["video_id"]:
             enriched.append(video)
 
     return enriched
@@ -239,58 +543,76 @@ def find_local_uploaded_file(title, uploaded_by_title):
 # ======================================================
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="ignora o estado salvo (ETags) e refaz tudo")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="chamadas simultâneas à API")
+    args = parser.parse_args()
+
     print("Autenticando no YouTube...")
-    youtube = get_youtube_client()
+    api = YouTubeApi(get_youtube_credentials())
+
+    state = empty_sync_state() if args.full else load_sync_state(SYNC_STATE_FILE)
+    print("Modo:", "completo" if args.full else "incremental")
 
     print("Lendo arquivos locais uploaded_*.mp4 / uploaded_*.json...")
     uploaded_by_title, uploaded_by_base = build_uploaded_file_map(DEFAULT_VIDEO_DIRECTORY)
 
     print("Obtendo playlist de uploads do canal...")
-    uploads_playlist_id = get_uploads_playlist_id(youtube)
+    uploads_playlist_id = get_uploads_playlist_id(api)
 
     print("Listando todos os vídeos enviados...")
-    upload_items = get_all_upload_items(youtube, uploads_playlist_id)
+    upload_items = get_all_upload_items(api, uploads_playlist_id, state)
 
     print(f"Total de vídeos encontrados no YouTube: {len(upload_items)}")
 
     print("Listando playlists do canal...")
-    playlists = get_all_playlists(youtube)
+    playlists = get_all_playlists(api, state)
 
     print(f"Total de playlists encontradas: {len(playlists)}")
 
     print("Mapeando vídeos para playlists...")
-    video_playlist_map = build_video_playlist_map(youtube, playlists)
+    video_playlist_map = build_video_playlist_map(api, playlists, state, args.workers)
 
     videos = []
 
     for item in upload_items:
-        snippet = item.get("snippet", {})
-        content_details = item.get("contentDetails", {})
-
-        video_id = content_details.get("videoId")
-        title = snippet.get("title")
-        description = snippet.get("description")
-        uploaded_at = content_details.get("videoPublishedAt") or snippet.get("publishedAt")
+        video_id = item["video_id"]
 
         video_playlists = video_playlist_map.get(video_id, [])
-        local_file = find_local_uploaded_file(title, uploaded_by_title)
 
         videos.append({
             "video_id": video_id,
-            "title": title,
-            "description": description,
-            "youtube_uploaded_at": uploaded_at,
+            "title": item["title"],
+            "description": item["description"],
+            "youtube_uploaded_at": item["uploaded_at"],
 
-            "uploaded_file_name": local_file.get("uploaded_file_name") if local_file else None,
-            "uploaded_json_name": local_file.get("uploaded_json_name") if local_file else None,
-            "has_local_uploaded_file": local_file is not None,
+            "uploaded_file_name": None,
+            "uploaded_json_name": None,
+            "has_local_uploaded_file": False,
 
             "has_playlist": len(video_playlists) > 0,
             "playlists": video_playlists
         })
 
     print("Enriquecendo dados dos vídeos...")
-    videos = enrich_video_details(youtube, videos)
+    videos = enrich_video_details(api, videos, state, args.workers)
+
+    # match local depois do enriquecimento: usa o título atual do YouTube
+    for video in videos:
+        local_file = find_local_uploaded_file(video["title"], uploaded_by_title)
+
+        video.update({
+            "uploaded_file_name": local_file.get("uploaded_file_name") if local_file else None,
+            "uploaded_json_name": local_file.get("uploaded_json_name") if local_file else None,
+            "has_local_uploaded_file": local_file is not None
+        })
+
+    quota = api.report()
+
+    # mesma quota diária usada pelos scripts de playlist (youtube_quota_ledger.json)
+    ledger = QuotaLedger()
+    ledger.charge(quota["quota_units"], "inventory")
+    ledger.save()
 
     output = {
         "generated_at": datetime.now().isoformat(),
@@ -298,6 +620,9 @@ def main():
         "local_video_directory": DEFAULT_VIDEO_DIRECTORY,
         "uploads_playlist_id": uploads_playlist_id,
 
+        "sync_mode": "full" if args.full else "incremental",
+        "quota": quota,
+
         "total_videos": len(videos),
         "total_playlists": len(playlists),
 
@@ -313,10 +638,21 @@ def main():
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
         json.dump(output, f, indent=4, ensure_ascii=False)
 
+    # estado só é gravado depois do inventário: execução interrompida não deixa ETag sem dados
+    save_sync_state(SYNC_STATE_FILE, state)
+
     print("")
     print("JSON gerado com sucesso:")
     print(OUTPUT_FILE)
 
+    print("")
+    print(
+        f"Quota: {quota['quota_units']} unidade(s) em {quota['calls']} chamada(s) "
+        f"({quota['not_modified']} com 304 Not Modified)"
+    )
+    for method, units in quota["quota_units_by_method"].items():
+        print(f"   {method}: {units}")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
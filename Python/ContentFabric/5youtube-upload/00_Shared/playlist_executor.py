@@ -0,0 +1,648 @@
+# -------------------------------------------------------
+# playlist_executor.py
+# Executor compartilhado de planos de playlist (YouTube)
+#
+# Usado por:
+# - PlayListByDate/03_create_date_playlists_from_inventory.py
+# - classified_playlist/step_03_execute.py
+#
+# Um plano é uma lista de jobs:
+#   {
+#     "key": "date:2026-05-08",        # estável entre execuções
+#     "title": "...",
+#     "description": "...",
+#     "playlist_id": None,             # opcional (ID já conhecido)
+#     "assume_empty": False,           # True = não lista itens existentes
+#     "video_ids": [...],
+#     "also_add_to": ["PL..."]         # playlists extras por vídeo
+#   }
+#
+# - Orçamento: jobs ordenados pelo custo estimado (menor
+#   primeiro = mais playlists completas por unidade) e
+#   admitidos em ondas que cabem na quota restante do dia
+# - Inserts em HTTP batch: cada rodada manda no máximo UM
+#   insert por playlist (inserts simultâneos na mesma
+#   playlist dão conflito), várias playlists por batch
+# - Ritmo adaptativo (AIMD): sem sleep fixo; 403/429/409/5xx
+#   reduzem o batch à metade e aumentam a espera, rodadas
+#   limpas voltam a acelerar
+# - playlistNotFound logo após criar: só aquela playlist
+#   espera (backoff), as outras seguem
+# - Checkpoint por operação: a próxima execução (ex.: no dia
+#   seguinte, com quota nova) continua exatamente de onde parou
+# -------------------------------------------------------
+
+import os
+import json
+import math
+import time
+import random
+from collections import deque
+from datetime import datetime
+
+from googleapiclient.errors import HttpError
+
+from youtube_quota import QuotaLedger, QUOTA_COSTS
+
+CHECKPOINT_VERSION = 1
+
+MAX_BATCH_SIZE = 20
+MAX_DELAY_SECONDS = 60.0
+MAX_OP_ATTEMPTS = 6
+
+# Backoff de playlistNotFound (playlist recém-criada ainda propagando)
+NOT_FOUND_BACKOFF_SECONDS = 2.0
+NOT_FOUND_MAX_WAIT_SECONDS = 30.0
+
+# ======================================================
+# ERROS
+# ======================================================
+
+def error_reason(ex: Exception) -> str:
+    """reason do corpo JSON do erro (ex.: quotaExceeded, playlistNotFound)."""
+    content = getattr(ex, "content", None)
+    if not content:
+        return ""
+    try:
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", "replace")
+        errors = json.loads(content).get("error", {}).get("errors") or []
+        return errors[0].get("reason", "") if errors else ""
+    except Exception:
+        return ""
+
+
+def classify_error(ex: Exception) -> str:
+    """quota | duplicate | not_found | throttle | fatal"""
+    reason = error_reason(ex).lower()
+    msg = str(ex).lower()
+    status = getattr(getattr(ex, "resp", None), "status", 0)
+
+    if reason in ("quotaexceeded", "dailylimitexceeded") or "quotaexceeded" in msg or "dailylimitexceeded" in msg:
+        return "quota"
+
+    if reason == "videoalreadyinplaylist" or "videoalreadyinplaylist" in msg:
+        return "duplicate"
+
+    if reason == "playlistnotfound" or "playlistnotfound" in msg:
+        return "not_found"
+
+    if (
+        reason in ("ratelimitexceeded", "userratelimitexceeded")
+        or "rate_limit_exceeded" in msg
+        or status in (409, 429, 500, 502, 503, 504)
+    ):
+        return "throttle"
+
+    if not isinstance(ex, HttpError):
+        # falha de rede/transporte: vale nova tentativa
+        return "throttle"
+
+    return "fatal"
+
+
+def retry_after_seconds(ex: Exception) -> float | None:
+    resp = getattr(ex, "resp", None)
+    try:
+        value = resp.get("retry-after") if resp is not None else None
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+# ======================================================
+# RITMO ADAPTATIVO
+# ======================================================
+
+class AdaptivePacer:
+    """Aumento aditivo / redução multiplicativa do tamanho do batch e da espera."""
+
+    def __init__(self, max_batch: int = MAX_BATCH_SIZE):
+        self.max_batch = max(1, max_batch)
+        self.batch_size = max(1, self.max_batch // 4)
+        self.delay = 0.0
+        self.throttles = 0
+
+    def wait(self):
+        if self.delay > 0:
+            time.sleep(self.delay)
+
+    def on_success(self):
+        self.batch_size = min(self.max_batch, self.batch_size + 1)
+        self.delay = self.delay / 2 if self.delay > 0.25 else 0.0
+
+    def on_throttle(self, retry_after: float | None = None):
+        self.throttles += 1
+        self.batch_size = max(1, self.batch_size // 2)
+        backoff = max(1.0, self.delay * 2)
+        self.delay = min(MAX_DELAY_SECONDS, max(retry_after or 0.0, backoff)) + random.uniform(0, 0.5)
+
+# ======================================================
+# CHECKPOINT
+# ======================================================
+
+def op_key(playlist_id: str, video_id: str) -> str:
+    return f"{playlist_id}:{video_id}"
+
+
+class ExecutorCheckpoint:
+    """{job_key: {"playlist_id", "done": [playlist_id:video_id], "completed"}}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.jobs = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CHECKPOINT_VERSION:
+                    self.jobs = data.get("jobs", {})
+            except Exception:
+                self.jobs = {}
+
+        self._done = {key: set(job.get("done", [])) for key, job in self.jobs.items()}
+
+    def job(self, key: str) -> dict:
+        return self.jobs.setdefault(key, {"playlist_id": None, "done": [], "completed": False})
+
+    def is_done(self, key: str, op: str) -> bool:
+        return op in self._done.get(key, ())
+
+    def mark_done(self, key: str, op: str):
+        done = self._done.setdefault(key, set())
+        if op not in done:
+            done.add(op)
+            self.job(key)["done"].append(op)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CHECKPOINT_VERSION, "jobs": self.jobs}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+# ======================================================
+# EXECUTOR
+# ======================================================
+
+class PlaylistExecutor:
+
+    def __init__(
+        self,
+        youtube,
+        checkpoint_path: str,
+        ledger: QuotaLedger | None = None,
+        existing_playlists: dict | None = None,
+        privacy_status: str = "public",
+        dry_run: bool = False,
+        max_batch: int = MAX_BATCH_SIZE,
+        label: str = "playlists",
+        log=print
+    ):
+        self.youtube = youtube
+        self.checkpoint = ExecutorCheckpoint(checkpoint_path)
+        self.ledger = ledger or QuotaLedger()
+        # title.lower() → {playlist_id, playlist_title, item_count (opcional)}
+        self.existing_playlists = existing_playlists or {}
+        # listar uma playlist custa 1 unidade por página de 50 itens
+        self._item_counts = {
+            p["playlist_id"]: p["item_count"]
+            for p in self.existing_playlists.values()
+            if p.get("playlist_id") and p.get("item_count") is not None
+        }
+        self.privacy_status = privacy_status
+        self.dry_run = dry_run
+        self.pacer = AdaptivePacer(max_batch)
+        self.label = label
+        self.log = log
+
+        self._existing_ids = {}
+        self._units_this_run = 0
+        self.stopped_reason = None
+
+        self.report = {
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "dry_run": dry_run,
+            "created_playlists": [],
+            "used_existing_playlists": [],
+            "added": [],
+            "skipped_duplicates": [],
+            "errors": [],
+            "completed_jobs": [],
+            "deferred_jobs": [],
+            "stopped_reason": None,
+            "quota": {}
+        }
+
+    # --------------------------------------------------
+    # QUOTA
+    # --------------------------------------------------
+
+    def _charge(self, kind: str, count: int = 1):
+        units = QUOTA_COSTS[kind] * count
+        self._units_this_run += units
+        if not self.dry_run or kind == "list":
+            self.ledger.charge(units, self.label)
+
+    def _save(self):
+        if not self.dry_run:
+            self.checkpoint.save()
+        self.ledger.save()
+
+    # --------------------------------------------------
+    # CHAMADAS
+    # --------------------------------------------------
+
+    def _execute_batch(self, requests: list) -> list:
+        """[(tag, HttpRequest)] → [(tag, response, exception)] numa única ida HTTP."""
+        if len(requests) == 1:
+            tag, request = requests[0]
+            try:
+                return [(tag, request.execute(), None)]
+            except Exception as ex:
+                return [(tag, None, ex)]
+
+        results = {}
+
+        def callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        batch = self.youtube.new_batch_http_request(callback=callback)
+        for i, (_, request) in enumerate(requests):
+            batch.add(request, request_id=str(i))
+
+        try:
+            batch.execute()
+        except Exception as ex:
+            return [(tag, None, ex) for tag, _ in requests]
+
+        return [
+            (tag, *results.get(str(i), (None, RuntimeError("sem resposta no batch"))))
+            for i, (tag, _) in enumerate(requests)
+        ]
+
+    def _existing_video_ids(self, playlist_id: str) -> set:
+        if playlist_id in self._existing_ids:
+            return self._existing_ids[playlist_id]
+
+        video_ids = set()
+        page_token = None
+
+        while True:
+            self._charge("list")
+            response = self.youtube.playlistItems().list(
+                part="contentDetails",
+                playlistId=playlist_id,
+                maxResults=50,
+                pageToken=page_token
+            ).execute()
+
+            for item in response.get("items", []):
+                video_ids.add(item["contentDetails"]["videoId"])
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+        self._existing_ids[playlist_id] = video_ids
+        return video_ids
+
+    # --------------------------------------------------
+    # PLANEJAMENTO
+    # --------------------------------------------------
+
+    def _known_playlist_id(self, job: dict) -> str | None:
+        return (
+            self.checkpoint.job(job["key"]).get("playlist_id")
+            or job.get("playlist_id")
+            or self.existing_playlists.get(job["title"].lower(), {}).get("playlist_id")
+        )
+
+    def _targets(self, job: dict, playlist_id: str | None) -> list:
+        return [playlist_id] + list(job.get("also_add_to", []))
+
+    def _pending_ops(self, job: dict, playlist_id: str | None) -> list:
+        ops = []
+        for video_id in job["video_ids"]:
+            for target in self._targets(job, playlist_id):
+                if target is None or not self.checkpoint.is_done(job["key"], op_key(target, video_id)):
+                    ops.append((target, video_id))
+        return ops
+
+    def _is_complete(self, job: dict) -> bool:
+        """
+        Concluído = nenhum vídeo ATUAL do job pendente. A mesma chave
+        pode voltar com vídeos novos (ex.: mais uploads na mesma data):
+        aí o job reabre, mesmo marcado "completed" antes.
+        """
+        state = self.checkpoint.job(job["key"])
+        complete = not self._pending_ops(job, self._known_playlist_id(job))
+        state["completed"] = complete
+        return complete
+
+    def _list_cost(self, playlist_id: str) -> int:
+        """Unidades para listar os itens da playlist (0 se já listada nesta execução)."""
+        if playlist_id in self._existing_ids:
+            return 0
+        # sem itemCount conhecido: ao menos uma página
+        pages = math.ceil((self._item_counts.get(playlist_id) or 0) / 50)
+        return QUOTA_COSTS["list"] * max(1, pages)
+
+    def estimate_cost(self, job: dict) -> int:
+        """
+        Limite superior de unidades para completar o job (exato para
+        a listagem quando o itemCount da playlist é conhecido).
+        """
+        playlist_id = self._known_playlist_id(job)
+        cost = 0
+
+        if playlist_id is None:
+            cost += QUOTA_COSTS["insert"]
+        elif not job.get("assume_empty"):
+            cost += self._list_cost(playlist_id)
+
+        for target in job.get("also_add_to", []):
+            cost += self._list_cost(target)
+
+        cost += QUOTA_COSTS["insert"] * len(self._pending_ops(job, playlist_id))
+        return cost
+
+    # --------------------------------------------------
+    # EXECUÇÃO
+    # --------------------------------------------------
+
+    def run(self, jobs: list) -> dict:
+        pending = [j for j in jobs if not self._is_complete(j)]
+        skipped = len(jobs) - len(pending)
+        if skipped:
+            self.log(f"Jobs já concluídos em execuções anteriores: {skipped}")
+
+        self._list_shared_targets(pending)
+
+        pending.sort(key=self.estimate_cost)
+
+        while pending and not self.stopped_reason:
+            remaining = self.ledger.remaining()
+            wave, reserved = [], 0
+
+            for job in pending:
+                cost = self.estimate_cost(job)
+                if reserved + cost <= remaining:
+                    wave.append(job)
+                    reserved += cost
+
+            if not wave:
+                self.stopped_reason = f"daily quota budget: {remaining} unidade(s) restantes"
+                break
+
+            self.log(f"Onda: {len(wave)} playlist(s), até {reserved} unidade(s) · restante hoje: {remaining}")
+            pending = [j for j in pending if j not in wave]
+            self._run_wave(wave)
+
+            # estimativas são limites superiores: sobra de quota volta para a próxima onda
+            pending.sort(key=self.estimate_cost)
+
+        self.report["deferred_jobs"] = [j["key"] for j in jobs if not self._is_complete(j)]
+        self.report["stopped_reason"] = self.stopped_reason
+        self.report["finished_at"] = datetime.now().isoformat()
+        self.report["quota"] = {
+            "units_this_run": self._units_this_run,
+            "used_today": self.ledger.used(),
+            "daily_budget": self.ledger.daily_budget,
+            "throttles": self.pacer.throttles,
+            "final_batch_size": self.pacer.batch_size
+        }
+        self._save()
+        return self.report
+
+    def _list_shared_targets(self, jobs: list):
+        """
+        Playlists de also_add_to (ex.: "Word Bank - ALL", milhares de
+        itens) são listadas UMA vez antes das ondas: o custo real sai
+        da quota aqui e não infla a reserva de cada job.
+        """
+        targets = []
+        for job in jobs:
+            for target in job.get("also_add_to", []):
+                if target not in targets and target not in self._existing_ids:
+                    targets.append(target)
+
+        for target in targets:
+            cost = self._list_cost(target)
+            if cost > self.ledger.remaining():
+                self.stopped_reason = f"daily quota budget: listar {target} custa {cost} unidade(s)"
+                return
+
+            try:
+                items = self._existing_video_ids(target)
+            except HttpError as ex:
+                self.report["errors"].append({"playlist_id": target, "error": str(ex)})
+                if classify_error(ex) == "quota":
+                    self.ledger.exhaust()
+                    self.stopped_reason = "YouTube quota reached"
+                    return
+                continue
+
+            self.log(f"Playlist compartilhada {target}: {len(items)} item(ns) já presentes")
+
+    def _create_playlists(self, jobs: list) -> dict:
+        """Cria em batch as playlists ainda sem ID. Retorna {job_key: criada_em}."""
+        created_at = {}
+
+        if self.dry_run:
+            for job in jobs:
+                self.checkpoint.job(job["key"])["playlist_id"] = f"DRY_RUN_{job['title']}"
+            return created_at
+
+        requests = [
+            (job, self.youtube.playlists().insert(
+                part="snippet,status",
+                body={
+                    "snippet": {"title": job["title"], "description": job.get("description", "")},
+                    "status": {"privacyStatus": self.privacy_status}
+                }
+            ))
+            for job in jobs
+        ]
+
+        for chunk_start in range(0, len(requests), self.pacer.max_batch):
+            chunk = requests[chunk_start:chunk_start + self.pacer.max_batch]
+            self._charge("insert", len(chunk))
+
+            for job, response, ex in self._execute_batch(chunk):
+                if ex is not None:
+                    kind = classify_error(ex)
+                    self.report["errors"].append({"job": job["key"], "playlist_title": job["title"], "error": str(ex)})
+                    if kind == "quota":
+                        self.ledger.exhaust()
+                        self.stopped_reason = "YouTube quota reached"
+                    continue
+
+                playlist_id = response["id"]
+                self.checkpoint.job(job["key"])["playlist_id"] = playlist_id
+                self.existing_playlists[job["title"].lower()] = {"playlist_id": playlist_id, "playlist_title": job["title"]}
+                self._existing_ids[playlist_id] = set()
+                created_at[job["key"]] = time.monotonic()
+
+                self.report["created_playlists"].append({
+                    "job": job["key"], "playlist_id": playlist_id, "playlist_title": job["title"]
+                })
+                self.log(f"Playlist criada: {job['title']} -> {playlist_id}")
+
+        self._save()
+        return created_at
+
+    def _run_wave(self, wave: list):
+        to_create = [j for j in wave if self._known_playlist_id(j) is None]
+        if to_create:
+            self._create_playlists(to_create)
+
+        # ── filas por playlist de destino ──────────────────
+        queues = {}          # playlist_id → deque[(job, video_id, tentativas)]
+        ready_at = {}        # playlist_id → monotonic (backoff de playlistNotFound)
+        active_jobs = []
+
+        for job in wave:
+            playlist_id = self._known_playlist_id(job)
+            if playlist_id is None:
+                continue  # criação falhou
+
+            state = self.checkpoint.job(job["key"])
+            state["playlist_id"] = playlist_id
+            active_jobs.append(job)
+
+            if job["key"] not in [c["job"] for c in self.report["created_playlists"]]:
+                self.report["used_existing_playlists"].append({
+                    "job": job["key"], "playlist_id": playlist_id, "playlist_title": job["title"]
+                })
+
+            if job.get("assume_empty") or playlist_id.startswith("DRY_RUN_"):
+                self._existing_ids.setdefault(playlist_id, set())
+
+            for target, video_id in self._pending_ops(job, playlist_id):
+                try:
+                    existing = self._existing_video_ids(target)
+                except HttpError as ex:
+                    self.report["errors"].append({"job": job["key"], "playlist_id": target, "error": str(ex)})
+                    if classify_error(ex) == "quota":
+                        self.ledger.exhaust()
+                        self.stopped_reason = "YouTube quota reached"
+                        return
+                    continue
+
+                if video_id in existing:
+                    self.checkpoint.mark_done(job["key"], op_key(target, video_id))
+                    self.report["skipped_duplicates"].append({
+                        "job": job["key"], "playlist_id": target, "video_id": video_id
+                    })
+                    continue
+
+                queues.setdefault(target, deque()).append((job, video_id, 0))
+
+        self._save()
+
+        # ── rodadas: um insert por playlist, várias playlists por batch ──
+        while any(queues.values()) and not self.stopped_reason:
+            now = time.monotonic()
+            ready = [pid for pid, q in queues.items() if q and ready_at.get(pid, 0) <= now]
+
+            if not ready:
+                time.sleep(max(0.0, min(ready_at[pid] for pid, q in queues.items() if q) - now))
+                continue
+
+            random.shuffle(ready)
+            chosen = ready[:self.pacer.batch_size]
+
+            if self.ledger.remaining() < QUOTA_COSTS["insert"] * len(chosen):
+                chosen = chosen[:self.ledger.remaining() // QUOTA_COSTS["insert"]]
+                if not chosen:
+                    self.stopped_reason = "daily quota budget exhausted"
+                    break
+
+            ops = [(pid, queues[pid].popleft()) for pid in chosen]
+
+            self.pacer.wait()
+            results = self._insert_batch(ops)
+
+            throttled, retry_after = False, None
+
+            for (pid, (job, video_id, attempts)), (response, ex) in zip(ops, results):
+                key = op_key(pid, video_id)
+
+                if ex is None:
+                    self.checkpoint.mark_done(job["key"], key)
+                    self._existing_ids.setdefault(pid, set()).add(video_id)
+                    self.report["added"].append({
+                        "job": job["key"],
+                        "playlist_id": pid,
+                        "video_id": video_id,
+                        "playlist_item_id": response.get("id") if response else None,
+                        "status": "dry_run" if self.dry_run else "added"
+                    })
+                    continue
+
+                kind = classify_error(ex)
+
+                if kind == "duplicate":
+                    self.checkpoint.mark_done(job["key"], key)
+                    self.report["skipped_duplicates"].append({"job": job["key"], "playlist_id": pid, "video_id": video_id})
+                    continue
+
+                if kind == "quota":
+                    self.ledger.exhaust()
+                    self.stopped_reason = "YouTube quota reached"
+                    queues[pid].appendleft((job, video_id, attempts))
+                    continue
+
+                if kind in ("throttle", "not_found") and attempts + 1 < MAX_OP_ATTEMPTS:
+                    queues[pid].appendleft((job, video_id, attempts + 1))
+                    if kind == "throttle":
+                        throttled = True
+                        retry_after = max(retry_after or 0.0, retry_after_seconds(ex) or 0.0) or None
+                    else:
+                        wait = min(NOT_FOUND_MAX_WAIT_SECONDS, NOT_FOUND_BACKOFF_SECONDS * 2 ** attempts)
+                        ready_at[pid] = time.monotonic() + wait
+                    continue
+
+                self.report["errors"].append({
+                    "job": job["key"], "playlist_id": pid, "video_id": video_id, "error": str(ex)
+                })
+
+            if throttled:
+                self.pacer.on_throttle(retry_after)
+                self.log(f"Throttle da API: batch {self.pacer.batch_size}, espera {self.pacer.delay:.1f}s")
+            else:
+                self.pacer.on_success()
+
+            self._save()
+
+        # ── jobs concluídos ─────────────────────────────────
+        for job in active_jobs:
+            state = self.checkpoint.job(job["key"])
+            if not self._pending_ops(job, state["playlist_id"]):
+                state["completed"] = True
+                self.report["completed_jobs"].append(job["key"])
+
+        self._save()
+
+    def _insert_batch(self, ops: list) -> list:
+        """[(playlist_id, (job, video_id, tentativas))] → [(response, exception)]"""
+        if self.dry_run:
+            return [({"id": None}, None) for _ in ops]
+
+        self._charge("insert", len(ops))
+
+        requests = [
+            (i, self.youtube.playlistItems().insert(
+                part="snippet",
+                body={
+                    "snippet": {
+                        "playlistId": pid,
+                        "resourceId": {"kind": "youtube#video", "videoId": video_id}
+                    }
+                }
+            ))
+            for i, (pid, (_, video_id, _)) in enumerate(ops)
+        ]
+
+        return [(response, ex) for _, response, ex in self._execute_batch(requests)]
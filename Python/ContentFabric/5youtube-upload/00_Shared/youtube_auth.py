@@ -14,7 +14,7 @@ SCOPES = [
 ]
 
 
-def get_youtube_client():
+def get_youtube_credentials():
     creds = None
 
     # ---------------------------------------------------------
@@ -63,8 +63,21 @@ def get_youtube_client():
 
         print("Novo token salvo.")
 
+    return creds
+
+
+def build_youtube_client(creds):
+    """
+    Um client por thread: o transporte (httplib2) não é thread-safe.
+    Usa o discovery embutido no pacote (sem download a cada client).
+    """
     return build(
         "youtube",
         "v3",
-        credentials=creds
-    )
\ No newline at end of file
+        credentials=creds,
+        cache_discovery=False
+    )
+
+
+def get_youtube_client():
+    return build_youtube_client(get_youtube_credentials())
\ No newline at end of file
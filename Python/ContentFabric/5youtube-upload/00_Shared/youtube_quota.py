@@ -0,0 +1,97 @@
+# -------------------------------------------------------
+# youtube_quota.py
+# Livro-caixa da quota diária da YouTube Data API
+#
+# - Unidades gastas por dia (o dia da quota vira à meia-noite
+#   do horário do Pacífico, não no fuso local)
+# - Compartilhado por todos os scripts de 5youtube-upload:
+#   inventário, playlists por data, playlists classificadas
+# - remaining() = orçamento do dia - já gasto por qualquer
+#   script hoje
+# -------------------------------------------------------
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+LEDGER_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "youtube_quota_ledger.json"
+)
+
+DEFAULT_DAILY_QUOTA = 10000
+
+# Custo (unidades) por tipo de chamada
+QUOTA_COSTS = {
+    "list": 1,
+    "insert": 50,
+    "update": 50,
+    "delete": 50
+}
+
+# Dias mantidos no arquivo
+KEEP_DAYS = 30
+
+try:
+    from zoneinfo import ZoneInfo
+    _PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:
+    # Windows sem o pacote tzdata: aproxima pelo horário padrão (UTC-8)
+    _PACIFIC = timezone(timedelta(hours=-8))
+
+
+def quota_day(now: datetime | None = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(_PACIFIC).strftime("%Y-%m-%d")
+
+
+class QuotaLedger:
+    """{dia: {"used": unidades, "by_label": {...}}} em JSON."""
+
+    def __init__(self, path: str = LEDGER_FILE, daily_budget: int = DEFAULT_DAILY_QUOTA):
+        self.path = path
+        self.daily_budget = daily_budget
+        self._lock = threading.Lock()
+        self.days = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.days = json.load(f)
+            except Exception:
+                self.days = {}
+
+    def _today(self) -> dict:
+        return self.days.setdefault(quota_day(), {"used": 0, "by_label": {}})
+
+    def used(self) -> int:
+        with self._lock:
+            return self._today()["used"]
+
+    def remaining(self) -> int:
+        return max(0, self.daily_budget - self.used())
+
+    def charge(self, units: int, label: str = "other"):
+        if units <= 0:
+            return
+        with self._lock:
+            today = self._today()
+            today["used"] += units
+            today["by_label"][label] = today["by_label"].get(label, 0) + units
+
+    def exhaust(self):
+        """A API respondeu quotaExceeded: nada mais hoje, independente da conta local."""
+        with self._lock:
+            today = self._today()
+            today["used"] = max(today["used"], self.daily_budget)
+
+    def save(self):
+        with self._lock:
+            for day in sorted(self.days)[:-KEEP_DAYS]:
+                del self.days[day]
+
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.days, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.path)
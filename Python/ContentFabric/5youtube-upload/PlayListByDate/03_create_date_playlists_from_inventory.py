@@ -12,8 +12,12 @@
 # Corrigido:
 # - evita playlistNotFound logo após criar playlist
 # - adiciona retry/backoff
-# - limita criação/processamento por execução
 # - salva report parcial mesmo com erro
+#
+# Execução: 00_Shared/playlist_executor.py
+# - orçamento de quota diário em vez de limite fixo de playlists
+# - inserts em HTTP batch, ritmo adaptativo (sem sleeps fixos)
+# - checkpoint: a próxima execução continua exatamente de onde parou
 # -------------------------------------------------------
 
 import os
@@ -23,6 +27,7 @@ import time
 import sys
 from datetime import datetime
 from collections import defaultdict
+from functools import lru_cache
 
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -34,6 +39,8 @@ SHARED_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "00_Shared"))
 if SHARED_DIR not in sys.path:
     sys.path.append(SHARED_DIR)
 from youtube_auth import get_youtube_client
+from youtube_quota import QuotaLedger
+from playlist_executor import PlaylistExecutor
 
 # ======================================================
 # CONFIG
@@ -64,15 +71,12 @@ PLAYLIST_PRIVACY_STATUS = "public"
 
 DRY_RUN = False
 
-# Evita estourar quota/rate limit.
-MAX_PLAYLISTS_PER_RUN = 5
-
-# Pequeno intervalo entre inserts.
-SLEEP_BETWEEN_INSERTS_SECONDS = 1.5
+# Quota diária da YouTube Data API que este script pode usar
+# (descontado o que outros scripts já gastaram hoje — youtube_quota_ledger.json).
+DAILY_QUOTA_BUDGET = 10000
 
-# Delay após criar playlist.
-# Evita 404 playlistNotFound por eventual consistency.
-SLEEP_AFTER_PLAYLIST_CREATE_SECONDS = 5
+# Progresso por playlist/vídeo: a próxima execução continua de onde parou.
+CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "date_playlists_checkpoint.json")
 
 # Retry para erros temporários.
 MAX_RETRIES = 4
@@ -137,12 +141,15 @@ def execute_with_retry(callable_fn, action_name: str):
 # DURATION
 # ======================================================
 
+ISO8601_DURATION_RE = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+@lru_cache(maxsize=4096)
 def parse_iso8601_duration(duration: str) -> int:
     if not duration:
         return 0
 
-    pattern = r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?"
-    match = re.match(pattern, duration)
+    match = ISO8601_DURATION_RE.match(duration)
 
     if not match:
         return 0
@@ -215,7 +222,7 @@ def get_all_playlists(youtube):
     while True:
         response = execute_with_retry(
             lambda: youtube.playlists().list(
-                part="snippet",
+                part="snippet,contentDetails",
                 mine=True,
                 maxResults=50,
                 pageToken=page_token
@@ -227,7 +234,9 @@ def get_all_playlists(youtube):
             title = item["snippet"]["title"]
             playlists[title.lower()] = {
                 "playlist_id": item["id"],
-                "playlist_title": title
+                "playlist_title": title,
+                # o executor estima o custo de listar a playlist (1 unidade / 50 itens)
+                "item_count": item.get("contentDetails", {}).get("itemCount")
             }
 
         page_token = response.get("nextPageToken")
@@ -237,109 +246,6 @@ def get_all_playlists(youtube):
     return playlists
 
 
-def create_playlist(youtube, title, description):
-    if DRY_RUN:
-        return f"DRY_RUN_{title}"
-
-    response = execute_with_retry(
-        lambda: youtube.playlists().insert(
-            part="snippet,status",
-            body={
-                "snippet": {
-                    "title": title,
-                    "description": description
-                },
-                "status": {
-                    "privacyStatus": PLAYLIST_PRIVACY_STATUS
-                }
-            }
-        ).execute(),
-        f"create_playlist:{title}"
-    )
-
-    playlist_id = response["id"]
-
-    print(f"Playlist criada: {title} -> {playlist_id}")
-    print(f"Aguardando {SLEEP_AFTER_PLAYLIST_CREATE_SECONDS}s para evitar playlistNotFound...")
-    time.sleep(SLEEP_AFTER_PLAYLIST_CREATE_SECONDS)
-
-    return playlist_id
-
-
-def get_or_create_playlist(youtube, existing_playlists, title, description):
-    key = title.lower()
-
-    if key in existing_playlists:
-        return existing_playlists[key]["playlist_id"], False
-
-    playlist_id = create_playlist(youtube, title, description)
-
-    existing_playlists[key] = {
-        "playlist_id": playlist_id,
-        "playlist_title": title
-    }
-
-    return playlist_id, True
-
-
-def get_existing_video_ids_in_playlist(youtube, playlist_id):
-    video_ids = set()
-    page_token = None
-
-    while True:
-        response = execute_with_retry(
-            lambda: youtube.playlistItems().list(
-                part="contentDetails",
-                playlistId=playlist_id,
-                maxResults=50,
-                pageToken=page_token
-            ).execute(),
-            f"get_existing_video_ids_in_playlist:{playlist_id}"
-        )
-
-        for item in response.get("items", []):
-            video_ids.add(item["contentDetails"]["videoId"])
-
-        page_token = response.get("nextPageToken")
-        if not page_token:
-            break
-
-    return video_ids
-
-
-def add_video_to_playlist(youtube, playlist_id, video_id):
-    if DRY_RUN:
-        return {
-            "status": "dry_run",
-            "video_id": video_id,
-            "playlist_id": playlist_id
-        }
-
-    response = execute_with_retry(
-        lambda: youtube.playlistItems().insert(
-            part="snippet",
-            body={
-                "snippet": {
-                    "playlistId": playlist_id,
-                    "resourceId": {
-                        "kind": "youtube#video",
-                        "videoId": video_id
-                    }
-                }
-            }
-        ).execute(),
-        f"add_video_to_playlist:{video_id}"
-    )
-
-    time.sleep(SLEEP_BETWEEN_INSERTS_SECONDS)
-
-    return {
-        "status": "added",
-        "playlist_item_id": response.get("id"),
-        "video_id": video_id,
-        "playlist_id": playlist_id
-    }
-
 # ======================================================
 # PLAN
 # ======================================================
@@ -355,21 +261,19 @@ def build_plan(inventory):
         if not video_id:
             continue
 
+        # Uma conversão por vídeo: o valor segue junto até o plano
         duration_seconds = parse_iso8601_duration(video.get("duration"))
 
         if duration_seconds > 120:
             continue
 
         date_key = get_upload_date_key(video)
-        groups[date_key].append(video)
+        groups[date_key].append((video, duration_seconds))
 
     playlists = []
 
     for date_key, videos in sorted(groups.items(), reverse=True):
-        total_seconds = sum(
-            parse_iso8601_duration(v.get("duration"))
-            for v in videos
-        )
+        total_seconds = sum(seconds for _, seconds in videos)
 
         playlist_title = build_playlist_title(date_key, total_seconds)
 
@@ -391,10 +295,10 @@ def build_plan(inventory):
                     "title": v.get("title"),
                     "youtube_uploaded_at": v.get("youtube_uploaded_at"),
                     "duration": v.get("duration"),
-                    "duration_seconds": parse_iso8601_duration(v.get("duration")),
+                    "duration_seconds": seconds,
                     "uploaded_file_name": v.get("uploaded_file_name")
                 }
-                for v in videos
+                for v, seconds in videos
             ]
         })
 
@@ -402,7 +306,7 @@ def build_plan(inventory):
         "generated_at": datetime.now().isoformat(),
         "source_json": INPUT_JSON,
         "dry_run": DRY_RUN,
-        "max_playlists_per_run": MAX_PLAYLISTS_PER_RUN,
+        "daily_quota_budget": DAILY_QUOTA_BUDGET,
         "rule": "Only videos with has_playlist=false are grouped by youtube_uploaded_at date.",
         "word_bank_all_playlist": {
             "playlist_id": WORD_BANK_ALL_PLAYLIST_ID,
@@ -441,27 +345,10 @@ def create_empty_report():
 # EXECUTION
 # ======================================================
 
-def execute_plan(youtube, plan):
-    report = create_empty_report()
-
-    existing_playlists = get_all_playlists(youtube)
-
-    print("Carregando vídeos já existentes em Word Bank - ALL...")
-    word_bank_existing_video_ids = get_existing_video_ids_in_playlist(
-        youtube,
-        WORD_BANK_ALL_PLAYLIST_ID
-    )
-
-    processed_playlists = 0
+def plan_to_jobs(plan):
+    jobs = []
 
     for playlist in plan["playlists"]:
-        if processed_playlists >= MAX_PLAYLISTS_PER_RUN:
-            report["stopped_reason"] = f"MAX_PLAYLISTS_PER_RUN reached: {MAX_PLAYLISTS_PER_RUN}"
-            print(f"Limite por execução atingido: {MAX_PLAYLISTS_PER_RUN}")
-            break
-
-        playlist_title = playlist["playlist_title"]
-
         description = (
             f"Playlist automática gerada para vídeos enviados em "
             f"{playlist['upload_date_br']}.\n"
@@ -469,107 +356,78 @@ def execute_plan(youtube, plan):
             f"Total de vídeos: {playlist['total_videos']}."
         )
 
-        print("")
-        print(f"Processando playlist: {playlist_title}")
+        jobs.append({
+            # por data (o título muda com a duração total; a data não)
+            "key": f"date:{playlist['upload_date']}",
+            "title": playlist["playlist_title"],
+            "description": description,
+            "video_ids": [v["video_id"] for v in playlist["videos"]],
+            "also_add_to": [WORD_BANK_ALL_PLAYLIST_ID]
+        })
 
-        try:
-            playlist_id, created = get_or_create_playlist(
-                youtube,
-                existing_playlists,
-                playlist_title,
-                description
-            )
-
-            playlist["playlist_id"] = playlist_id
-
-            if created:
-                report["created_playlists"].append({
-                    "playlist_id": playlist_id,
-                    "playlist_title": playlist_title
-                })
-
-                # CORREÇÃO:
-                # Playlist recém-criada ainda pode não estar disponível para playlistItems.list.
-                date_playlist_existing_video_ids = set()
-            else:
-                report["used_existing_playlists"].append({
-                    "playlist_id": playlist_id,
-                    "playlist_title": playlist_title
-                })
-
-                print("Carregando vídeos já existentes na playlist da data...")
-                date_playlist_existing_video_ids = get_existing_video_ids_in_playlist(
-                    youtube,
-                    playlist_id
-                )
-
-            for video in playlist["videos"]:
-                video_id = video["video_id"]
-
-                # 1) Playlist da data
-                if video_id in date_playlist_existing_video_ids:
-                    report["skipped_date_playlist_duplicates"].append({
-                        "video_id": video_id,
-                        "title": video["title"],
-                        "playlist_id": playlist_id,
-                        "playlist_title": playlist_title
-                    })
-                else:
-                    result = add_video_to_playlist(youtube, playlist_id, video_id)
-                    date_playlist_existing_video_ids.add(video_id)
-
-                    report["added_to_date_playlists"].append({
-                        **result,
-                        "title": video["title"],
-                        "playlist_title": playlist_title
-                    })
-
-                # 2) Word Bank - ALL
-                if video_id in word_bank_existing_video_ids:
-                    report["skipped_word_bank_all_duplicates"].append({
-                        "video_id": video_id,
-                        "title": video["title"],
-                        "playlist_id": WORD_BANK_ALL_PLAYLIST_ID,
-                        "playlist_title": WORD_BANK_ALL_PLAYLIST_TITLE
-                    })
-                else:
-                    result = add_video_to_playlist(
-                        youtube,
-                        WORD_BANK_ALL_PLAYLIST_ID,
-                        video_id
-                    )
-                    word_bank_existing_video_ids.add(video_id)
-
-                    report["added_to_word_bank_all"].append({
-                        **result,
-                        "title": video["title"],
-                        "playlist_title": WORD_BANK_ALL_PLAYLIST_TITLE
-                    })
-
-            processed_playlists += 1
-            save_json(REPORT_OUTPUT, report)
+    return jobs
 
-        except HttpError as ex:
-            report["errors"].append({
-                "playlist_title": playlist_title,
-                "error": str(ex)
-            })
 
-            if is_rate_limit_error(ex):
-                report["stopped_reason"] = "YouTube rate limit/quota reached"
-                print("Rate limit/quota detectado. Encerrando execução com report parcial.")
-                break
+def execute_plan(youtube, plan):
+    report = create_empty_report()
 
-            save_json(REPORT_OUTPUT, report)
+    existing_playlists = get_all_playlists(youtube)
 
-        except Exception as ex:
-            report["errors"].append({
-                "playlist_title": playlist_title,
-                "error": str(ex)
-            })
-            save_json(REPORT_OUTPUT, report)
+    executor = PlaylistExecutor(
+        youtube,
+        checkpoint_path=CHECKPOINT_FILE,
+        ledger=QuotaLedger(daily_budget=DAILY_QUOTA_BUDGET),
+        existing_playlists=existing_playlists,
+        privacy_status=PLAYLIST_PRIVACY_STATUS,
+        dry_run=DRY_RUN,
+        label="date_playlists"
+    )
+
+    result = executor.run(plan_to_jobs(plan))
+
+    # ── converte o report genérico no formato deste script ──
+    titles = {
+        v["video_id"]: v["title"]
+        for playlist in plan["playlists"]
+        for v in playlist["videos"]
+    }
+    playlist_titles = {
+        p["playlist_id"]: p["playlist_title"]
+        for p in result["created_playlists"] + result["used_existing_playlists"]
+    }
+    playlist_titles[WORD_BANK_ALL_PLAYLIST_ID] = WORD_BANK_ALL_PLAYLIST_TITLE
+
+    def describe(entry):
+        return {
+            "status": entry.get("status", "skipped"),
+            "video_id": entry["video_id"],
+            "playlist_id": entry["playlist_id"],
+            "playlist_item_id": entry.get("playlist_item_id"),
+            "title": titles.get(entry["video_id"]),
+            "playlist_title": playlist_titles.get(entry["playlist_id"])
+        }
+
+    for entry in result["added"]:
+        target = "added_to_word_bank_all" if entry["playlist_id"] == WORD_BANK_ALL_PLAYLIST_ID else "added_to_date_playlists"
+        report[target].append(describe(entry))
+
+    for entry in result["skipped_duplicates"]:
+        target = (
+            "skipped_word_bank_all_duplicates"
+            if entry["playlist_id"] == WORD_BANK_ALL_PLAYLIST_ID
+            else "skipped_date_playlist_duplicates"
+        )
+        report[target].append(describe(entry))
+
+    report["created_playlists"] = result["created_playlists"]
+    report["used_existing_playlists"] = result["used_existing_playlists"]
+    report["errors"] = result["errors"]
+    report["completed_playlists"] = result["completed_jobs"]
+    report["deferred_playlists"] = result["deferred_jobs"]
+    report["quota"] = result["quota"]
+    report["stopped_reason"] = result["stopped_reason"]
+    report["finished_at"] = result["finished_at"]
 
-    report["finished_at"] = datetime.now().isoformat()
     save_json(REPORT_OUTPUT, report)
 
     return report
@@ -613,7 +471,7 @@ def main():
     print(f"Plano gerado: {PLAN_OUTPUT}")
     print(f"Playlists a processar: {plan['total_playlists_to_process']}")
     print(f"Vídeos a processar: {plan['total_videos_to_process']}")
-    print(f"Máximo de playlists por execução: {MAX_PLAYLISTS_PER_RUN}")
+    print(f"Orçamento diário de quota: {DAILY_QUOTA_BUDGET} unidade(s)")
 
     if plan["total_videos_to_process"] == 0:
         print("Nenhum vídeo sem playlist encontrado.")
@@ -635,6 +493,9 @@ def main():
     print(f"Duplicados ignorados em playlists por data: {len(report['skipped_date_playlist_duplicates'])}")
     print(f"Duplicados ignorados em Word Bank - ALL: {len(report['skipped_word_bank_all_duplicates'])}")
     print(f"Erros: {len(report['errors'])}")
+    print(f"Playlists concluídas: {len(report['completed_playlists'])}")
+    print(f"Playlists para a próxima execução: {len(report['deferred_playlists'])}")
+    print(f"Quota usada nesta execução: {report['quota']['units_this_run']} (hoje: {report['quota']['used_today']}/{report['quota']['daily_budget']})")
     print(f"Motivo de parada: {report['stopped_reason']}")
 
 
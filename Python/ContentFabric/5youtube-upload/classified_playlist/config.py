@@ -37,9 +37,20 @@ BATCH_SIZE = 25
 MAX_RETRIES = 3
 TIMEOUT_SECONDS = 60
 
+# Batches enviados ao mesmo tempo (limitado ao número de chaves Groq)
+CLASSIFY_WORKERS = 4
+
+# Pré-ranking local (BM25) antes do Groq
+PRERANK_TOP_K = 120
+PRERANK_BORDERLINE_RATIO = 0.5   # abaixo do top-K, entra quem tiver >= 50% do score do corte
+PRERANK_MAX_CANDIDATES = 200
+
 PLAYLIST_PRIVACY_STATUS = "public"
 DRY_RUN = False
-SLEEP_SECONDS = 1.5
+
+# Quota diária da YouTube Data API para inserções (compartilhada com os
+# outros scripts de 5youtube-upload via 00_Shared/youtube_quota_ledger.json)
+YOUTUBE_DAILY_QUOTA_BUDGET = 10000
 
 # Máximo de duração permitido (em segundos)
 MAX_VIDEO_DURATION_SECONDS = 120  # 2 minutos
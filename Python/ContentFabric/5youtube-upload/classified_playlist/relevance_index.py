@@ -0,0 +1,212 @@
+"""
+relevance_index.py
+
+Responsabilidade: pré-ranquear localmente (BM25) os vídeos do contexto
+para uma intenção, antes de gastar chamadas Groq.
+
+  - Documento = titleTheme + descriptionTheme + youtube_title
+  - Índice salvo em JSON ao lado do youtube_playlist_context.json
+  - sync() só re-tokeniza vídeos novos ou com texto alterado
+    (assinatura por vídeo) e remove os que saíram do contexto
+  - select() devolve o top-K + os candidatos "limítrofes"
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import unicodedata
+
+INDEX_VERSION = 1
+
+# Parâmetros clássicos do BM25
+BM25_K1 = 1.5
+BM25_B  = 0.75
+
+TEXT_FIELDS = ("titleTheme", "descriptionTheme", "youtube_title")
+
+# Palavras que não ajudam a separar temas (EN + PT)
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "the", "this", "to", "with", "you", "your",
+    "o", "os", "as", "um", "uma", "de", "do", "da", "dos", "das", "e", "em",
+    "no", "na", "nos", "nas", "para", "por", "com", "que", "se", "ao",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# ── texto ─────────────────────────────────────────────────────────────────────
+
+def tokenize(text: str) -> list[str]:
+    """minúsculas, sem acento, sem stopwords ("Família" → "familia")."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return [t for t in _TOKEN_RE.findall(text) if len(t) > 1 and t not in STOPWORDS]
+
+
+def video_text(video: dict) -> str:
+    return " ".join(str(video.get(field) or "") for field in TEXT_FIELDS)
+
+
+def text_signature(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+# ── índice ────────────────────────────────────────────────────────────────────
+
+class BM25Index:
+    """
+    {video_id: {"sig", "len", "tf"}} + document frequency global.
+
+    O df é mantido incrementalmente (soma/subtrai só os documentos
+    que mudaram), então sync() num contexto de milhares de vídeos
+    custa o mesmo que tokenizar os poucos vídeos novos.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.docs: dict[str, dict] = {}
+        self.df: dict[str, int] = {}
+        self.total_len = 0
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != INDEX_VERSION:
+            return
+
+        for video_id, doc in data.get("docs", {}).items():
+            self._add(video_id, doc)
+        self.dirty = False
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "docs": self.docs}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    # ── manutenção ────────────────────────────────────────────────────────────
+
+    def _add(self, video_id: str, doc: dict):
+        self.docs[video_id] = doc
+        self.total_len += doc["len"]
+        for term in doc["tf"]:
+            self.df[term] = self.df.get(term, 0) + 1
+        self.dirty = True
+
+    def _remove(self, video_id: str):
+        doc = self.docs.pop(video_id)
+        self.total_len -= doc["len"]
+        for term in doc["tf"]:
+            count = self.df[term] - 1
+            if count:
+                self.df[term] = count
+            else:
+                del self.df[term]
+        self.dirty = True
+
+    def sync(self, videos: list[dict]) -> tuple[int, int, int]:
+        """Alinha o índice com o contexto. Retorna (novos, alterados, removidos)."""
+        added = updated = 0
+        seen = set()
+
+        for video in videos:
+            video_id = video.get("youtube_video_id")
+            if not video_id:
+                continue
+            seen.add(video_id)
+
+            text = video_text(video)
+            sig = text_signature(text)
+
+            current = self.docs.get(video_id)
+            if current and current["sig"] == sig:
+                continue
+
+            if current:
+                self._remove(video_id)
+                updated += 1
+            else:
+                added += 1
+
+            tokens = tokenize(text)
+            tf: dict[str, int] = {}
+            for t in tokens:
+                tf[t] = tf.get(t, 0) + 1
+
+            self._add(video_id, {"sig": sig, "len": len(tokens), "tf": tf})
+
+        gone = [video_id for video_id in self.docs if video_id not in seen]
+        for video_id in gone:
+            self._remove(video_id)
+
+        return added, updated, len(gone)
+
+    # ── consulta ──────────────────────────────────────────────────────────────
+
+    def score(self, query: str) -> dict[str, float]:
+        """{video_id: score} só para vídeos com algum termo da consulta."""
+        n = len(self.docs)
+        if not n:
+            return {}
+
+        avg_len = (self.total_len / n) or 1.0
+        scores: dict[str, float] = {}
+
+        for term in set(tokenize(query)):
+            df = self.df.get(term)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+            for video_id, doc in self.docs.items():
+                tf = doc["tf"].get(term)
+                if not tf:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc["len"] / avg_len)
+                scores[video_id] = scores.get(video_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        return scores
+
+    def select(self, query: str, top_k: int, borderline_ratio: float,
+               max_candidates: int, candidate_ids: list[str] | None = None
+               ) -> tuple[list[str], dict[str, float]]:
+        """
+        IDs que valem ir ao LLM, dentre candidate_ids (padrão: todos):
+        os top_k melhores + os que ficaram logo abaixo do corte
+        (score >= borderline_ratio × score do k-ésimo), limitados a
+        max_candidates.
+
+        Com menos de top_k acertos léxicos o BM25 não separa nada
+        (intenção semântica: "família", "fé"...): devolve TODOS os
+        candidatos, os com acerto primeiro e o resto na ordem original.
+        """
+        scores = self.score(query)
+        pool = list(self.docs) if candidate_ids is None else list(candidate_ids)
+        ranked = sorted((i for i in pool if scores.get(i)), key=scores.get, reverse=True)
+
+        if len(ranked) < top_k:
+            hits = set(ranked)
+            return ranked + [i for i in pool if i not in hits], scores
+
+        cutoff = scores[ranked[top_k - 1]] * borderline_ratio
+        selected = ranked[:top_k]
+        for video_id in ranked[top_k:max_candidates]:
+            if scores[video_id] < cutoff:
+                break
+            selected.append(video_id)
+
+        return selected, scores
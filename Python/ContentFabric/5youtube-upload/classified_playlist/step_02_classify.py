@@ -4,8 +4,12 @@ step_02_classify.py
 Responsabilidades:
   1. Receber a INTENÇÃO do usuário (ex: "Past Continuous", "família", "fé")
   2. Se não houver nome/ID de playlist, pedir ao Groq para gerar um nome criativo
-  3. Classificar os vídeos do contexto em batches via Groq
-  4. Salvar e retornar o resultado
+     (uma vez por intenção: o nome gerado fica em "generated_names" e é reusado)
+  3. Pré-ranquear os vídeos localmente (BM25) e mandar ao Groq só o top-K
+     e os limítrofes, em batches paralelos (uma chave por batch)
+  4. Reaproveitar decisões já tomadas para (vídeo, intenção, nome da
+     playlist) — ficam em "decision_cache" no próprio JSON de classificação
+  5. Salvar e retornar o resultado
 """
 
 import os
@@ -13,9 +17,13 @@ import sys
 import json
 import re
 import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from itertools import cycle
 import config
+from relevance_index import BM25Index
 
 # ── Groq loader ───────────────────────────────────────────────────────────────
 GROQ_LOADER_DIR = r"C:\dev\scripts\ScriptsUteis\Python"
@@ -43,13 +51,23 @@ MAX_RETRIES     = config.MAX_RETRIES
 TIMEOUT_SECONDS = config.TIMEOUT_SECONDS
 BATCH_SIZE      = config.BATCH_SIZE
 
+CLASSIFY_WORKERS         = config.CLASSIFY_WORKERS
+PRERANK_TOP_K            = config.PRERANK_TOP_K
+PRERANK_BORDERLINE_RATIO = config.PRERANK_BORDERLINE_RATIO
+PRERANK_MAX_CANDIDATES   = config.PRERANK_MAX_CANDIDATES
+
+# Índice BM25 fica ao lado do youtube_playlist_context.json
+BM25_INDEX_FILE = "youtube_playlist_context.bm25.json"
+
 # ── Groq key rotation ─────────────────────────────────────────────────────────
 
 _groq_key_cycle = cycle(random.sample(GROQ_KEYS, len(GROQ_KEYS)))
+_groq_key_lock  = threading.Lock()
 
 
 def _get_client():
-    key_info = next(_groq_key_cycle)
+    with _groq_key_lock:
+        key_info = next(_groq_key_cycle)
     return Groq(api_key=key_info["key"]), key_info["name"]
 
 
@@ -141,19 +159,20 @@ Return ONLY this JSON object:
 
 # ── 2. Classificação em batch ─────────────────────────────────────────────────
 
+def _compact_video(v: dict) -> dict:
+    return {
+        "youtube_video_id": v.get("youtube_video_id"),
+        "youtube_title": v.get("youtube_title"),
+        "youtube_description": v.get("youtube_description"),
+        "titleTheme": v.get("titleTheme"),
+        "descriptionTheme": v.get("descriptionTheme"),
+        "tags": v.get("tags", []),
+        "playlists": v.get("playlists", []),
+    }
+
+
 def _build_classification_prompt(videos, intention, playlist_name):
-    compact = [
-        {
-            "youtube_video_id": v.get("youtube_video_id"),
-            "youtube_title": v.get("youtube_title"),
-            "youtube_description": v.get("youtube_description"),
-            "titleTheme": v.get("titleTheme"),
-            "descriptionTheme": v.get("descriptionTheme"),
-            "tags": v.get("tags", []),
-            "playlists": v.get("playlists", []),
-        }
-        for v in videos
-    ]
+    compact = [_compact_video(v) for v in videos]
 
     return f"""
 You are classifying existing YouTube videos from an English learning channel.
@@ -233,7 +252,71 @@ def _classify_batch(videos: list[dict], intention: str, playlist_name: str) -> d
     return json.loads(json_text)
 
 
-# ── 3. Entry-point do step ────────────────────────────────────────────────────
+# ── 3. Cache de decisões (vídeo, intenção, playlist) ──────────────────────────
+
+def _intention_key(intention: str) -> str:
+    return re.sub(r"\s+", " ", intention.strip().lower())
+
+
+def _decision_key(intention: str, playlist_name: str) -> str:
+    """O prompt leva a intenção E o nome da playlist: os dois entram na chave."""
+    return f"{_intention_key(intention)} | {_intention_key(playlist_name)}"
+
+
+def _video_signature(v: dict) -> str:
+    """Muda quando muda qualquer campo enviado ao Groq → reclassifica."""
+    payload = json.dumps(_compact_video(v), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_previous_output(output_file: str) -> dict:
+    """
+    JSON de classificação anterior, de onde saem:
+      - decision_cache  {intenção | playlist: {video_id: decisão}}
+      - generated_names {intenção: nome gerado pelo Groq}
+    """
+    if not os.path.exists(output_file):
+        return {}
+    try:
+        with open(output_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# ── 4. Pré-ranking local ──────────────────────────────────────────────────────
+
+def _prerank(videos: list[dict], candidates: list[dict], query: str, output_dir: str) -> list[dict]:
+    """Candidatos que valem uma chamada ao Groq (top-K + limítrofes do BM25)."""
+    index = BM25Index(os.path.join(output_dir, BM25_INDEX_FILE))
+    added, updated, removed = index.sync(videos)
+    index.save()
+
+    print(
+        f"\n  🔎 Índice BM25: {len(index.docs)} vídeos "
+        f"(+{added} novos, {updated} alterados, -{removed} removidos)"
+    )
+
+    selected, _ = index.select(
+        query,
+        top_k=PRERANK_TOP_K,
+        borderline_ratio=PRERANK_BORDERLINE_RATIO,
+        max_candidates=PRERANK_MAX_CANDIDATES,
+        candidate_ids=[v.get("youtube_video_id") for v in candidates],
+    )
+
+    if len(selected) >= len(candidates):
+        # poucos acertos léxicos (ex.: tema só semântico): o BM25 não separa nada
+        print("  ⚠️  Pré-ranking com menos acertos léxicos que o top-K — enviando todos os candidatos")
+        return candidates
+
+    selected_ids = set(selected)
+    kept = [v for v in candidates if v.get("youtube_video_id") in selected_ids]
+    print(f"  🔎 Pré-ranking: {len(kept)}/{len(candidates)} candidatos seguem para o Groq")
+    return kept
+
+
+# ── 5. Entry-point do step ────────────────────────────────────────────────────
 
 def run(
     context: dict,
@@ -259,6 +342,11 @@ def run(
     """
     os.makedirs(output_dir, exist_ok=True)
 
+    output_file     = os.path.join(output_dir, "youtube_playlist_classification.json")
+    previous        = _load_previous_output(output_file)
+    decision_cache  = previous.get("decision_cache", {})
+    generated_names = previous.get("generated_names", {})
+
     # ── resolver nome da playlist ──────────────────────────────────────────────
     if playlist_name_hint and not playlist_name_hint.startswith("PL"):
         # usuário informou um nome (não um ID)
@@ -268,9 +356,14 @@ def run(
         # usuário informou um ID — o nome será o da intenção para logs
         playlist_name = intention
         print(f"\n  🆔 Usando ID de playlist: '{playlist_name_hint}'")
+    elif generated_names.get(_intention_key(intention)):
+        # nome já gerado para esta intenção — reusar mantém o cache de decisões válido
+        playlist_name = generated_names[_intention_key(intention)]
+        print(f"\n  📋 Reusando nome gerado antes: '{playlist_name}'")
     else:
         # nenhuma entrada — gerar via Groq
         playlist_name = generate_playlist_name(intention)
+        generated_names[_intention_key(intention)] = playlist_name
 
     # ── candidatos (vídeos com algum sinal de tema) ────────────────────────────
     videos = context.get("videos", [])
@@ -283,24 +376,56 @@ def run(
 
     print(f"\n  📦 Total de candidatos a classificar: {len(candidates)}")
 
+    # ── decisões já tomadas para esta intenção + playlist ─────────────────────
+    decisions = decision_cache.setdefault(_decision_key(intention, playlist_name), {})
+
+    signatures = {v["youtube_video_id"]: _video_signature(v) for v in candidates}
+
     all_results: list[dict] = []
-    total_batches = (len(candidates) + BATCH_SIZE - 1) // BATCH_SIZE
+    pending = []
+    for v in candidates:
+        cached = decisions.get(v["youtube_video_id"])
+        if cached and cached.get("sig") == signatures[v["youtube_video_id"]]:
+            all_results.append({k: val for k, val in cached.items() if k != "sig"})
+        else:
+            pending.append(v)
 
-    for i in range(0, len(candidates), BATCH_SIZE):
-        batch      = candidates[i : i + BATCH_SIZE]
-        batch_num  = i // BATCH_SIZE + 1
-        print(f"\n  ── Batch {batch_num}/{total_batches} ({len(batch)} vídeos) ──")
+    print(f"  ♻️  Decisões reaproveitadas: {len(all_results)} · pendentes: {len(pending)}")
 
-        try:
-            batch_result = _classify_batch(batch, intention, playlist_name)
-            results = batch_result.get("videos", [])
+    # ── pré-ranking local: só o que tem chance vai ao Groq ─────────────────────
+    to_classify = _prerank(videos, pending, f"{intention} {playlist_name}", output_dir) if pending else []
+
+    batches = [to_classify[i : i + BATCH_SIZE] for i in range(0, len(to_classify), BATCH_SIZE)]
+    workers = max(1, min(CLASSIFY_WORKERS, len(GROQ_KEYS), len(batches)))
+
+    if batches:
+        print(f"\n  🚀 {len(batches)} batch(es) · {workers} em paralelo")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_classify_batch, batch, intention, playlist_name): (num, batch)
+            for num, batch in enumerate(batches, start=1)
+        }
+
+        for future in as_completed(futures):
+            batch_num, batch = futures[future]
+            print(f"\n  ── Batch {batch_num}/{len(batches)} ({len(batch)} vídeos) ──")
+
+            try:
+                results = future.result().get("videos", [])
+            except Exception as ex:
+                print(f"     ❌ Erro no batch {batch_num}: {ex}")
+                continue
 
             all_results.extend(results)
 
+            for r in results:
+                video_id = r.get("youtube_video_id")
+                if video_id in signatures:
+                    decisions[video_id] = {**r, "sig": signatures[video_id]}
+
             included = sum(1 for r in results if r.get("include"))
             print(f"     Incluídos neste batch: {included}/{len(batch)}")
-        except Exception as ex:
-            print(f"     ❌ Erro no batch {batch_num}: {ex}")
 
     # ── montar lista de vídeos incluídos ──────────────────────────────────────
     included_ids = {
@@ -315,16 +440,18 @@ def run(
     ]
 
     # ── salvar resultado ──────────────────────────────────────────────────────
-    output_file = os.path.join(output_dir, "youtube_playlist_classification.json")
-
     output = {
         "generated_at"    : datetime.now().isoformat(),
         "intention"       : intention,
         "target_playlist" : playlist_name,
         "total_candidates": len(candidates),
+        "total_cached"    : len(candidates) - len(pending),
+        "total_sent_to_llm": len(to_classify),
         "total_included"  : len(included_videos),
         "classification"  : all_results,
         "videos"          : included_videos,
+        "decision_cache"  : decision_cache,
+        "generated_names" : generated_names,
     }
 
     with open(output_file, "w", encoding="utf-8") as f:
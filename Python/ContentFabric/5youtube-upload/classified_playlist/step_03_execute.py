@@ -6,12 +6,16 @@ Responsabilidades:
   2. Resolver a playlist (ID direto | busca por nome | criação)
   3. Adicionar os vídeos classificados, pulando duplicatas
   4. Gerar relatório de execução
+
+Passos 2 e 3 rodam no executor compartilhado (00_Shared/playlist_executor.py):
+orçamento de quota diário, inserts em HTTP batch, ritmo adaptativo e
+checkpoint por vídeo.
 """
 
 import os
 import sys
 import json
-import time
+import re
 from datetime import datetime
 
 import config
@@ -20,12 +24,13 @@ if config.SHARED_DIR not in sys.path:
     sys.path.insert(0, config.SHARED_DIR)
 
 from youtube_auth import get_youtube_client
-from googleapiclient.errors import HttpError
+from youtube_quota import QuotaLedger
+from playlist_executor import PlaylistExecutor
 
 
 # ── CONFIG ────────────────────────────────────────────────────────────────────
 PLAYLIST_PRIVACY_STATUS = config.PLAYLIST_PRIVACY_STATUS
-SLEEP_SECONDS           = config.SLEEP_SECONDS   # pausa entre inserções para respeitar rate limit
+DAILY_QUOTA_BUDGET      = config.YOUTUBE_DAILY_QUOTA_BUDGET
 DRY_RUN                 = config.DRY_RUN  # True = simula sem chamar API de escrita
 inventory_file = config.YOUTUBE_INVENTORY_JSON
 
@@ -38,7 +43,10 @@ def _get_all_playlists_from_inventory(inventory_file: str) -> dict:
     Retorna playlists a partir do inventory local.
 
     Formato:
-    title.lower() → {playlist_id, playlist_title}
+    title.lower() → {playlist_id, playlist_title, item_count}
+
+    item_count = vídeos do inventário na playlist (o executor usa
+    para estimar o custo de listar a playlist: 1 unidade / 50 itens).
     """
 
     with open(inventory_file, "r", encoding="utf-8") as f:
@@ -52,97 +60,15 @@ def _get_all_playlists_from_inventory(inventory_file: str) -> dict:
             pid = pl.get("playlist_id")
 
             if title and pid:
-                playlists_map[title.lower()] = {
+                entry = playlists_map.setdefault(title.lower(), {
                     "playlist_id": pid,
-                    "playlist_title": title
-                }
+                    "playlist_title": title,
+                    "item_count": 0
+                })
+                entry["item_count"] += 1
 
     return playlists_map
 
-def _create_playlist(youtube, name: str, intention: str) -> str:
-    resp = youtube.playlists().insert(
-        part="snippet,status",
-        body={
-            "snippet": {
-                "title": name,
-                "description": f"Playlist automática - Intenção: {intention}"
-            },
-            "status": {"privacyStatus": PLAYLIST_PRIVACY_STATUS}
-        }
-    ).execute()
-
-    time.sleep(3)
-    return resp["id"]
-
-def _resolve_playlist(
-    youtube,
-    playlist_id_override: str | None,
-    playlist_name: str,
-    intention: str,
-) -> tuple[str, bool]:
-    if playlist_id_override and playlist_id_override.startswith("PL"):
-        print(f"  🆔 Usando ID de playlist fornecido: {playlist_id_override}")
-        return playlist_id_override, False
-
-    print(f"\n  🔍 Buscando playlist existente: '{playlist_name}'...")
-    
-    existing = _get_all_playlists_from_inventory(inventory_file)
-    
-    key = playlist_name.lower()
-
-    if key in existing:
-        pid = existing[key]["playlist_id"]
-        print(f"  ✅ Playlist encontrada: '{playlist_name}' → {pid}")
-        return pid, False
-
-    print(f"  📝 Playlist não encontrada. Criando: '{playlist_name}'...")
-    pid = _create_playlist(youtube, playlist_name, intention)
-    return pid, True
-
-
-def _get_existing_video_ids(youtube, playlist_id: str) -> set[str]:
-    ids        = set()
-    page_token = None
-
-    while True:
-        resp = youtube.playlistItems().list(
-            part="contentDetails",
-            playlistId=playlist_id,
-            maxResults=50,
-            pageToken=page_token,
-        ).execute()
-
-        for item in resp.get("items", []):
-            ids.add(item["contentDetails"]["videoId"])
-
-        page_token = resp.get("nextPageToken")
-        if not page_token:
-            break
-
-    return ids
-
-
-def _add_video(youtube, playlist_id: str, video_id: str) -> str:
-    if DRY_RUN:
-        return "dry_run_item_id"
-
-    resp = youtube.playlistItems().insert(
-        part="snippet",
-        body={
-            "snippet": {
-                "playlistId": playlist_id,
-                "resourceId": {
-                    "kind"   : "youtube#video",
-                    "videoId": video_id,
-                },
-            }
-        },
-    ).execute()
-
-    time.sleep(SLEEP_SECONDS)
-    return resp.get("id", "")
-
-
 # ── ENTRY-POINT (função) ──────────────────────────────────────────────────────
 
 def run(
@@ -244,120 +170,80 @@ def run(
     youtube = get_youtube_client()
     print("  ✅ Autenticado.")
 
-    report = {
-        "started_at"        : datetime.now().isoformat(),
-        "intention"         : intention,
-        "playlist_name_base": playlist_name,
-        "playlist_parts"    : len(video_chunks),
-        "dry_run"           : DRY_RUN,
-        "added"             : [],
-        "skipped_duplicates": [],
-        "skipped_duration"  : skipped_duration,
-        "errors"            : [],
-    }
-
-    print(f"\n  ── Iniciando inserção de {len(videos)} vídeos em {len(video_chunks)} parte(s) ──")
+    intention_key = re.sub(r"\s+", " ", intention.strip().lower())
 
+    jobs = []
     for part_index, chunk in enumerate(video_chunks, 1):
-
         part_playlist_name = (
             f"{playlist_name} - Part {part_index}"
             if len(video_chunks) > 1
             else playlist_name
         )
 
-        print(f"\n  📂 Processando playlist: {part_playlist_name}")
-
-        try:
-            playlist_id, created = _resolve_playlist(
-                youtube,
-                playlist_id_override=playlist_id_override if part_index == 1 else None,
-                playlist_name=part_playlist_name,
-                intention=intention,
-            )
-        except HttpError as ex:
-            if "quota" in str(ex).lower():
-                print("  ❌ Quota da YouTube API excedida. Interrompendo.")
-                report["errors"].append({
-                    "playlist": part_playlist_name,
-                    "error": str(ex)
-                })
-                break
-            raise
-
-        # quando o ID foi passado direto ou a playlist acabou de ser criada,
-        # pula o prefetch para economizar cota
-        skip_prefetch = created or bool(
+        use_override = bool(
             playlist_id_override and playlist_id_override.startswith("PL") and part_index == 1
         )
 
-        existing_ids: set[str] = set()
+        jobs.append({
+            "key": f"{intention_key}|{part_playlist_name}",
+            "title": part_playlist_name,
+            "description": f"Playlist automática - Intenção: {intention}",
+            "playlist_id": playlist_id_override if use_override else None,
+            # ID passado direto: pula o prefetch para economizar cota
+            "assume_empty": use_override,
+            "video_ids": [v["youtube_video_id"] for v in chunk],
+            "part": part_index,
+        })
 
-        if not skip_prefetch:
-            print("  🔎 Carregando vídeos já existentes na playlist...")
-            existing_ids = _get_existing_video_ids(youtube, playlist_id)
+    print(f"\n  ── Iniciando inserção de {len(videos)} vídeos em {len(video_chunks)} parte(s) ──")
 
-        print(f"  🔎 Vídeos pré-carregados da playlist: {len(existing_ids)}")
+    executor = PlaylistExecutor(
+        youtube,
+        checkpoint_path=os.path.join(output_dir, "playlist_executor_checkpoint.json"),
+        ledger=QuotaLedger(daily_budget=DAILY_QUOTA_BUDGET),
+        existing_playlists=_get_all_playlists_from_inventory(inventory_file),
+        privacy_status=PLAYLIST_PRIVACY_STATUS,
+        dry_run=DRY_RUN,
+        label="classified_playlist",
+        log=lambda msg: print(f"  {msg}"),
+    )
 
-        for idx, video in enumerate(chunk, 1):
-            video_id = video.get("youtube_video_id")
-            title    = video.get("youtube_title", "")
+    result = executor.run(jobs)
 
-            if not video_id or video_id.lower() in ("none", ""):
-                print(f"  ⚠️  [{part_index}.{idx:03}] ID inválido, pulando.")
-                continue
+    jobs_by_key = {j["key"]: j for j in jobs}
 
-            if video_id in existing_ids:
-                report["skipped_duplicates"].append({
-                    "video_id": video_id,
-                    "playlist": part_playlist_name
-                })
-                print(f"  ⏭️  [{part_index}.{idx:03}] Já existe : {video_id} — {title[:55]}")
-                continue
-
-            try:
-                item_id = _add_video(youtube, playlist_id, video_id)
-                existing_ids.add(video_id)
-                report["added"].append({
-                    "video_id": video_id,
-                    "playlist_item_id": item_id,
-                    "playlist_id": playlist_id,
-                    "playlist_name": part_playlist_name,
-                    "part": part_index
-                })
-                processed_ids.add(video_id)
-
-                with open(progress_file, "w", encoding="utf-8") as f:
-                    json.dump(list(processed_ids), f)
-                print(f"  ✅ [{part_index}.{idx:03}] Adicionado: {video_id} — {title[:55]}")
-
-            except HttpError as ex:
-                err_msg = str(ex)
-
-                if "videoAlreadyInPlaylist" in err_msg or "duplicate" in err_msg.lower():
-                    report["skipped_duplicates"].append({
-                        "video_id": video_id,
-                        "playlist": part_playlist_name
-                    })
-                    existing_ids.add(video_id)
-                    print(f"  ⏭️  [{part_index}.{idx:03}] Já existe : {video_id} — {title[:55]}")
-                    continue
-
-                if "quota" in err_msg.lower():
-                    print(f"  ⛔ Quota excedida no vídeo {part_index}.{idx}. Interrompendo.")
-                    report["errors"].append({
-                        "video_id": video_id,
-                        "playlist": part_playlist_name,
-                        "error": err_msg
-                    })
-                    break
-
-                report["errors"].append({
-                    "video_id": video_id,
-                    "playlist": part_playlist_name,
-                    "error": err_msg
-                })
-                print(f"  ❌ [{part_index}.{idx:03}] Erro      : {video_id} — {err_msg[:70]}")
+    report = {
+        "started_at"        : result["started_at"],
+        "intention"         : intention,
+        "playlist_name_base": playlist_name,
+        "playlist_parts"    : len(video_chunks),
+        "dry_run"           : DRY_RUN,
+        "added"             : [
+            {
+                "video_id": a["video_id"],
+                "playlist_item_id": a["playlist_item_id"],
+                "playlist_id": a["playlist_id"],
+                "playlist_name": jobs_by_key[a["job"]]["title"],
+                "part": jobs_by_key[a["job"]]["part"],
+            }
+            for a in result["added"]
+        ],
+        "skipped_duplicates": [
+            {"video_id": s["video_id"], "playlist": jobs_by_key[s["job"]]["title"]}
+            for s in result["skipped_duplicates"]
+        ],
+        "skipped_duration"  : skipped_duration,
+        "errors"            : result["errors"],
+        "created_playlists" : result["created_playlists"],
+        "deferred_parts"    : result["deferred_jobs"],
+        "stopped_reason"    : result["stopped_reason"],
+        "quota"             : result["quota"],
+    }
+
+    processed_ids.update(a["video_id"] for a in report["added"])
+    if not DRY_RUN:
+        with open(progress_file, "w", encoding="utf-8") as f:
+            json.dump(list(processed_ids), f)
 
     report["finished_at"] = datetime.now().isoformat()
 
@@ -374,6 +260,9 @@ def run(
     print(f"  Duplicatas   : {len(report['skipped_duplicates'])}")
     print(f"  Pulados > duração: {len(report['skipped_duration'])}")
     print(f"  Erros        : {len(report['errors'])}")
+    print(f"  Quota usada  : {report['quota']['units_this_run']} (hoje: {report['quota']['used_today']}/{report['quota']['daily_budget']})")
+    if report["deferred_parts"]:
+        print(f"  Pendentes    : {len(report['deferred_parts'])} parte(s) — {report['stopped_reason']}")
     print(f"  Relatório    : {report_file}")
 
     return report
@@ -1,6 +1,9 @@
 # -------------------------------------------------------
 # upload_youtube.py — FINAL
 # Limite de uploads + feedback avançado + report robusto
+# + cliente único por execução
+# + upload resumível em blocos (retoma no meio do arquivo)
+# + validação dos JSONs antes do loop de upload
 #
 # python upload_youtube.py "C:\Users\leand\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\EKF - English Knowledge Framework - Videos\EnableToYoutubeUpload"
 # -------------------------------------------------------
@@ -9,8 +12,10 @@ import os
 import sys
 import json
 import shutil
+import time
 import requests
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # ======================================================
@@ -19,6 +24,20 @@ from datetime import datetime
 
 MAX_UPLOADS_PER_RUN = 10
 
+# ======================================================
+# UPLOAD RESUMÍVEL
+# ======================================================
+
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024   # múltiplo de 256 KB (exigência da API)
+MAX_CHUNK_RETRIES = 8
+RETRIABLE_STATUS = {500, 502, 503, 504}
+
+# Sessões de upload em andamento (URI resumível por vídeo)
+UPLOAD_SESSIONS_PATH = "./reports/upload_sessions.json"
+
+METADATA_WORKERS = 8
+REQUIRED_METADATA_KEYS = ("title", "description", "tags", "category_id", "visibility")
+
 # ======================================================
 # PATHS
 # ======================================================
@@ -49,7 +68,11 @@ if SHARED_DIR not in sys.path:
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
+from httplib2 import HttpLib2Error
 from youtube_auth import get_youtube_client
+
+# queda de conexão / timeout durante um bloco
+RETRIABLE_EXCEPTIONS = (OSError, HttpLib2Error)
 # ======================================================
 # GROQ
 # ======================================================
@@ -113,36 +136,244 @@ def move_to_faulty(video_path, json_path):
     shutil.move(video_path, os.path.join(FAULTY_DIR, os.path.basename(video_path)))
     shutil.move(json_path, os.path.join(FAULTY_DIR, os.path.basename(json_path)))
 
+# ======================================================
+# CLIENTE (UM POR EXECUÇÃO)
+# ======================================================
+
+_youtube = None
+
+def get_client():
+    """Credenciais + discovery uma única vez; reaproveitado em todos os uploads."""
+    global _youtube
+    if _youtube is None:
+        _youtube = get_youtube_client()
+    return _youtube
+
+# ======================================================
+# SESSÕES DE UPLOAD (PERSISTIDAS)
+# ======================================================
+
+def load_upload_sessions():
+    if not os.path.exists(UPLOAD_SESSIONS_PATH):
+        return {}
+    try:
+        with open(UPLOAD_SESSIONS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_upload_sessions(sessions):
+    os.makedirs(os.path.dirname(UPLOAD_SESSIONS_PATH), exist_ok=True)
+    tmp = UPLOAD_SESSIONS_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sessions, f, indent=4, ensure_ascii=False)
+    os.replace(tmp, UPLOAD_SESSIONS_PATH)
+
+def video_fingerprint(video_path):
+    stat = os.stat(video_path)
+    return f"{stat.st_size}_{int(stat.st_mtime)}"
+
+def remember_session(video_path, request):
+    sessions = load_upload_sessions()
+    sessions[os.path.basename(video_path)] = {
+        "fingerprint": video_fingerprint(video_path),
+        "resumable_uri": request.resumable_uri,
+        "progress": request.resumable_progress,
+        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    save_upload_sessions(sessions)
+
+def forget_session(video_path):
+    sessions = load_upload_sessions()
+    if sessions.pop(os.path.basename(video_path), None) is not None:
+        save_upload_sessions(sessions)
+
+def query_upload_status(request, size):
+    """
+    Pergunta ao servidor até onde a sessão resumível chegou
+    (PUT vazio com Content-Range: bytes */<tamanho>, protocolo
+    público de upload resumível do Google).
+
+    Retorna (bytes_confirmados, resposta_final | None) ou
+    None se a sessão não existe mais.
+    """
+    resp, content = request.http.request(
+        request.resumable_uri,
+        method="PUT",
+        body="",
+        headers={"Content-Range": f"bytes */{size}", "Content-Length": "0"}
+    )
+
+    if resp.status in (200, 201):
+        # upload já tinha terminado: o corpo é o recurso do vídeo
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        return size, json.loads(content)
+
+    if resp.status == 308:
+        # "Range: bytes=0-N" → N+1 bytes confirmados (sem Range → nada)
+        received = resp.get("range")
+        return (int(received.rsplit("-", 1)[1]) + 1 if received else 0), None
+
+    return None
+
+def restore_session(video_path, request):
+    """
+    Se existe URI salva para este arquivo (mesmo tamanho/mtime),
+    consulta no servidor o último byte confirmado e posiciona o
+    request ali: next_chunk continua do meio do arquivo.
+
+    Retorna (retomado, resposta_final). resposta_final vem
+    preenchida se o upload já tinha terminado no servidor.
+    """
+    saved = load_upload_sessions().get(os.path.basename(video_path))
+    if not saved or saved.get("fingerprint") != video_fingerprint(video_path):
+        return False, None
+
+    request.resumable_uri = saved["resumable_uri"]
+
+    try:
+        status = query_upload_status(request, os.path.getsize(video_path))
+    except Exception as e:
+        print(f"{YELLOW}Não foi possível consultar a sessão salva ({e}), recomeçando{RESET}")
+        status = None
+
+    if status is None:
+        # sessão expirada/inválida → upload do zero
+        forget_session(video_path)
+        request.resumable_uri = None
+        return False, None
+
+    request.resumable_progress, response = status
+    return True, response
 
 # ======================================================
 # UPLOAD
 # ======================================================
 
+def build_insert_request(youtube, metadata, video_path):
+    media = MediaFileUpload(video_path, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+
+    return youtube.videos().insert(
+        part="snippet,status",
+        body={
+            "snippet": {
+                "title": metadata["title"],
+                "description": metadata["description"],
+                "tags": metadata["tags"],
+                "categoryId": metadata["category_id"]
+            },
+            "status": {
+                "privacyStatus": metadata["visibility"]
+            }
+        },
+        media_body=media
+    )
+
 def upload_video(metadata, video_path):
-    youtube = get_youtube_client()
-    media = MediaFileUpload(video_path, resumable=True)
+    youtube = get_client()
+    request = build_insert_request(youtube, metadata, video_path)
+
+    resumed, response = restore_session(video_path, request)
+    if resumed:
+        print(f"{YELLOW}Retomando upload interrompido...{RESET}")
+
+    retries = 0
+    restarted = False
 
+    while response is None:
+        try:
+            status, response = request.next_chunk()
+
+            if status:
+                remember_session(video_path, request)
+                print(f"   {int(status.progress() * 100)}%", end="\r")
+
+            retries = 0
+
+        except HttpError as e:
+            code = e.resp.status
+
+            # sessão salva expirou/inválida → recomeça do zero uma vez
+            if code in (404, 410) and not restarted:
+                restarted = True
+                forget_session(video_path)
+                request = build_insert_request(youtube, metadata, video_path)
+                continue
+
+            if code not in RETRIABLE_STATUS or retries >= MAX_CHUNK_RETRIES:
+                forget_session(video_path)
+                return str(e)
+
+            retries += 1
+            wait = min(60, 2 ** retries) + random.random()
+            print(f"{YELLOW}Erro {code} no bloco, tentando de novo em {wait:.0f}s{RESET}")
+            time.sleep(wait)
+
+        except RETRIABLE_EXCEPTIONS as e:
+            if retries >= MAX_CHUNK_RETRIES:
+                # mantém a sessão: a próxima execução retoma deste ponto
+                return f"Upload interrompido: {e}"
+
+            retries += 1
+            wait = min(60, 2 ** retries) + random.random()
+            print(f"{YELLOW}Rede instável ({e}), retomando em {wait:.0f}s{RESET}")
+            time.sleep(wait)
+
+    forget_session(video_path)
+    return response["id"]
+
+# ======================================================
+# PREPARAÇÃO (ANTES DO LOOP DE UPLOAD)
+# ======================================================
+
+def load_metadata(json_path):
+    """Lê e valida o JSON do vídeo. Retorna (metadata, erro)."""
     try:
-        res = youtube.videos().insert(
-            part="snippet,status",
-            body={
-                "snippet": {
-                    "title": metadata["title"],
-                    "description": metadata["description"],
-                    "tags": metadata["tags"],
-                    "categoryId": metadata["category_id"]
-                },
-                "status": {
-                    "privacyStatus": metadata["visibility"]
-                }
-            },
-            media_body=media
-        ).execute()
+        with open(json_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+    except Exception as e:
+        return None, f"JSON inválido: {e}"
+
+    if not isinstance(metadata, dict):
+        return None, "JSON inválido: esperado um objeto"
+
+    # presença, não conteúdo: tags [] e description "" são válidos
+    missing = [k for k in REQUIRED_METADATA_KEYS if metadata.get(k) is None]
+    if missing:
+        return None, f"Campos ausentes no JSON: {', '.join(missing)}"
+
+    return metadata, None
+
+def prepare_jobs(directory, videos):
+    """
+    Carrega e valida todos os JSONs em paralelo, antes de qualquer upload.
+    Inválidos vão direto para Faulty; retorna só os jobs prontos.
+    """
+    paths = []
+    for video in videos:
+        base = os.path.splitext(video)[0]
+        paths.append((
+            video,
+            os.path.join(directory, video),
+            os.path.join(directory, base + ".json")
+        ))
+
+    with ThreadPoolExecutor(max_workers=METADATA_WORKERS) as pool:
+        loaded = list(pool.map(load_metadata, [p[2] for p in paths]))
+
+    jobs = []
+    for (video, video_path, json_path), (metadata, error) in zip(paths, loaded):
+        if error:
+            REPORT["failed_uploads"] += 1
+            REPORT["videos"].append({"file": video, "uploaded": False, "error": error})
+            print(f"{RED}{video}: {error} -> movendo para Faulty{RESET}")
+            move_to_faulty(video_path, json_path)
+            continue
 
-        return res["id"]
+        jobs.append((video, video_path, json_path, metadata))
 
-    except HttpError as e:
-        return str(e)
+    return jobs
 
 # ======================================================
 # PROCESS
@@ -158,11 +389,17 @@ def process_batch(directory):
 
     random.shuffle(videos)
 
+    # uploads interrompidos na execução anterior vão primeiro
+    pending_sessions = load_upload_sessions()
+    videos.sort(key=lambda v: v not in pending_sessions)
+
     REPORT["total_videos_found"] = len(videos)
 
     print(f"{BLUE}Encontrados:{RESET} {len(videos)} vídeos\n")
 
-    for video in videos:
+    jobs = prepare_jobs(directory, videos)
+
+    for video, video_path, json_path, metadata in jobs:
         if REPORT["successful_uploads"] >= MAX_UPLOADS_PER_RUN:
             REPORT["execution_stopped_reason"] = "Upload limit reached"
             print(f"{YELLOW}Limite atingido. Encerrando execução.{RESET}")
@@ -171,9 +408,6 @@ def process_batch(directory):
         REPORT["processed_videos"] += 1
 
         base = os.path.splitext(video)[0]
-        video_path = os.path.join(directory, video)
-        json_path = os.path.join(directory, base + ".json")
-        metadata = json.load(open(json_path, encoding="utf-8"))
 
         print(f"{BLUE}Upload:{RESET} {video}")
 
@@ -192,6 +426,12 @@ def process_batch(directory):
                 print(f"{RED}Limite do YouTube detectado.{RESET}")
                 break
 
+            # rede caiu no meio: arquivo fica, a próxima execução retoma
+            if result.startswith("Upload interrompido"):
+                REPORT["execution_stopped_reason"] = "Network error during upload"
+                print(f"{RED}{result}. Upload será retomado na próxima execução.{RESET}")
+                break
+
             print(f"{RED}Falha -> movendo para Faulty{RESET}")
             move_to_faulty(video_path, json_path)
             continue
@@ -1,6 +1,14 @@
 from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
 import os
 
+
+@lru_cache(maxsize=64)
+def load_font(font_path, size):
+    # Mesma fonte/tamanho entre thumbnails do lote: abre o .ttf uma vez só
+    return ImageFont.truetype(font_path, size=size)
+
+
 def generate_thumbnail(
     image_path,
     output_path,
@@ -22,8 +30,8 @@ def generate_thumbnail(
 
     W, H = img.size
 
-    title_font = ImageFont.truetype(font_path, size=int(H * 0.10))
-    highlight_font = ImageFont.truetype(font_path, size=int(H * 0.14))
+    title_font = load_font(font_path, int(H * 0.10))
+    highlight_font = load_font(font_path, int(H * 0.14))
 
     title_y = int(H * 0.15)
     highlight_y = int(H * 0.30)
@@ -3,11 +3,18 @@
 # ============================================================
 
 import os
+import sys
 import json
 import shutil
-import subprocess
 from datetime import datetime
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# Duração em cache persistente por (caminho, tamanho, mtime); faltas sondadas em paralelo
+from media_metadata import get_default_metadata
+
 # ============================================================
 # CONFIGURAÇÕES INLINE
 # ============================================================
@@ -44,20 +51,16 @@ def print_header():
     print("=" * 60 + "\n")
 
 
-def get_video_duration(file_path):
-    try:
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            file_path
-        ]
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        return float(result.stdout.strip())
-    except:
-        print(f"⚠ Erro ao obter duração: {file_path}")
-        return 0
+def get_video_durations(file_paths):
+    """{caminho: segundos} de uma pasta inteira (0 se o ffprobe falhar)."""
+    durations = {}
+    for path, info in get_default_metadata().get_many(file_paths).items():
+        if info is None:
+            print(f"⚠ Erro ao obter duração: {path}")
+            durations[path] = 0
+        else:
+            durations[path] = info["duration"]
+    return durations
 
 
 def load_history():
@@ -108,16 +111,16 @@ def process():
             print("   ❌ Pasta não existe")
             continue
 
-        for file in os.listdir(source):
+        files = [f for f in os.listdir(source) if f.lower().endswith(VIDEO_EXTENSIONS)]
+        durations = get_video_durations([os.path.join(source, f) for f in files])
 
-            if not file.lower().endswith(VIDEO_EXTENSIONS):
-                continue
+        for file in files:
 
             video_path = os.path.join(source, file)
             base_name = os.path.splitext(file)[0]
             json_path = os.path.join(source, base_name + ".json")
 
-            duration = get_video_duration(video_path)
+            duration = durations[video_path]
 
             print(f"\n🎬 {file}")
             print(f"   ⏱ Duração: {round(duration,2)}s")
@@ -5,31 +5,35 @@
 
 import os
 import json
-import random
-import time
-import requests
 import re
+import time
 import unicodedata
 import sys
-from typing import Dict, List
-from itertools import cycle
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict
 
 # ============================================================
 # CONFIGURAÇÕES
 # ============================================================
 
 BASE_TERMS_DIR = r"C:\Users\leand\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\EKF - English Knowledge Framework - Base\BaseTerms"
-VOCAB_DB_FILE = "C:\Users\leand\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\EKF - English Knowledge Framework - Base\vocab_bank.json"
+VOCAB_DB_FILE = r"C:\Users\leand\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\EKF - English Knowledge Framework - Base\vocab_bank.json"
 
-GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_MODEL = "openai/gpt-oss-20b"
 
-SLEEP_BETWEEN_CALLS = 0.6
 MAX_CORRECT_PER_TERM = 5
 
 ENABLE_GROQ_VALIDATION = True
 ENABLE_GROQ_WRONG_FEEDBACK = True
 
+# Respostas acumuladas no log antes de reescrever o vocab_bank.json
+COMPACT_EVERY = 200
+
+# Enriquecimentos simultâneos (o GroqClient distribui entre as keys)
+ENRICH_WORKERS = 4
+# Salva o banco a cada N termos novos (queda não perde o lote todo)
+ENRICH_SAVE_EVERY = 25
+
 # ============================================================
 # 🎨 CORES (ANSI)
 # ============================================================
@@ -42,66 +46,38 @@ MAGENTA = "\033[95m"
 RESET = "\033[0m"
 
 # ============================================================
-# 🔑 GROQ KEYS – RANDOM ROTATION
+# 🔑 GROQ – CLIENTE COMPARTILHADO (MULTI KEYS)
 # ============================================================
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from groq_keys_loader import GROQ_KEYS
+from groq_client import LazyGroqClient
+from llm_cache import get_default_cache, DAY
+
+from anki_srs import QUALITY, DueQueue, ReviewLog, sm2_update
 
-_groq_key_cycle = cycle(random.sample(GROQ_KEYS, len(GROQ_KEYS)))
+_groq_client = LazyGroqClient(model=GROQ_MODEL, timeout=60, cache=get_default_cache())
 
-def get_next_groq_key() -> str:
-    for _ in range(len(GROQ_KEYS)):
-        key = next(_groq_key_cycle).get("key", "").strip()
-        if key.startswith("gsk_"):
-            return key
-    raise RuntimeError("❌ Nenhuma GROQ API Key válida encontrada.")
+# Enriquecimento e validação do mesmo termo/resposta não mudam entre execuções
+CACHE_TTL_ENRICH = 180 * DAY
+CACHE_TTL_VALIDATE = 30 * DAY
 
 # ============================================================
 # GROQ CALL
 # ============================================================
 
-def call_groq(prompt: str) -> str:
-    last_error = None
-
-    for _ in range(len(GROQ_KEYS)):
-        api_key = get_next_groq_key()
-
-        try:
-            response = requests.post(
-                GROQ_URL,
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": GROQ_MODEL,
-                    "messages": [
-                        {"role": "system", "content": "You are an English teacher. Return ONLY valid JSON."},
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.2,
-                },
-                timeout=60,
-            )
-
-            if response.status_code == 429:
-                last_error = "Rate limit"
-                continue
-
-            response.raise_for_status()
-            time.sleep(SLEEP_BETWEEN_CALLS)
-
-            return response.json()["choices"][0]["message"]["content"]
-
-        except Exception as e:
-            last_error = str(e)
-            continue
-
-    raise RuntimeError(f"❌ Todas as GROQ keys falharam. Último erro: {last_error}")
+def call_groq(prompt: str, cache_ttl: float | None = None, cache_tag: str | None = None) -> str:
+    return _groq_client.ask(
+        prompt,
+        system="You are an English teacher. Return ONLY valid JSON.",
+        temperature=0.2,
+        cache_ttl=cache_ttl,
+        cache_tag=cache_tag,
+        # resposta vazia/sem JSON não fica meses no cache
+        cache_validate=_has_json,
+    )
 
 # ============================================================
 # NORMALIZAÇÃO
@@ -130,6 +106,13 @@ def safe_json_parse(text: str) -> dict:
             return json.loads(match.group())
     raise ValueError("Resposta não contém JSON válido.")
 
+def _has_json(text: str) -> bool:
+    try:
+        safe_json_parse(text)
+        return True
+    except Exception:
+        return False
+
 # ============================================================
 # GROQ – SEMANTIC VALIDATION
 # ============================================================
@@ -147,7 +130,7 @@ Return:
 {{ "is_correct": true | false }}
 """
     try:
-        data = safe_json_parse(call_groq(prompt))
+        data = safe_json_parse(call_groq(prompt, CACHE_TTL_VALIDATE, "anki.validate"))
         return bool(data.get("is_correct"))
     except Exception:
         return False
@@ -196,7 +179,7 @@ For the English term "{term}", return JSON:
 }}
 """
     try:
-        data = safe_json_parse(call_groq(prompt))
+        data = safe_json_parse(call_groq(prompt, CACHE_TTL_ENRICH, "anki.enrich"))
     except Exception:
         return None
 
@@ -215,7 +198,8 @@ For the English term "{term}", return JSON:
 # VOCAB DB
 # ============================================================
 
-def load_vocab_db() -> Dict[str, dict]:
+def load_vocab_db(review_log: ReviewLog | None = None) -> Dict[str, dict]:
+    """Banco compactado + respostas do log ainda não compactadas."""
     if not os.path.exists(VOCAB_DB_FILE):
         return {}
 
@@ -229,11 +213,21 @@ def load_vocab_db() -> Dict[str, dict]:
         v["stats"].setdefault("wrong", 0)
         v["stats"].setdefault("dont_know", 0)
 
+    (review_log or ReviewLog(ReviewLog.path_for(VOCAB_DB_FILE))).replay(db)
+
     return db
 
 def save_vocab_db(db: Dict[str, dict]):
-    with open(VOCAB_DB_FILE, "w", encoding="utf-8") as f:
+    # .tmp + replace: queda no meio não corrompe o banco
+    tmp = VOCAB_DB_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(db, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, VOCAB_DB_FILE)
+
+def compact_vocab_db(db: Dict[str, dict], review_log: ReviewLog):
+    """Grava o banco com tudo aplicado e zera o log."""
+    save_vocab_db(db)
+    review_log.truncate()
 
 # ============================================================
 # CONSOLIDAÇÃO BASE TERMS
@@ -262,32 +256,44 @@ def consolidate_terms():
 # ============================================================
 
 def reenrich_all_terms():
-    vocab_db = load_vocab_db()
+    review_log = ReviewLog(ReviewLog.path_for(VOCAB_DB_FILE))
+    vocab_db = load_vocab_db(review_log)
     consolidated = consolidate_terms()
 
     print(f"\n📚 Total termos encontrados: {len(consolidated)}\n")
 
-    for term in consolidated:
-        if term in vocab_db:
-            print(f"⏭️ Já existe no vocab: {term}")
-            continue
+    missing = [term for term in consolidated if term not in vocab_db]
+    print(f"⏭️ Já existem no vocab: {len(consolidated) - len(missing)}")
+    print(f"🌐 Termos novos para enriquecer: {len(missing)}\n")
 
-        print(f"🌐 Criando novo termo: {term}")
+    created = 0
 
-        enriched = enrich_term(term)
-        if not enriched:
-            print("   ⚠️ Falha ao enriquecer.")
-            continue
+    with ThreadPoolExecutor(max_workers=ENRICH_WORKERS) as pool:
+        futures = {pool.submit(enrich_term, term): term for term in missing}
 
-        enriched["stats"] = {
-            "seen": 0,
-            "correct": 0,
-            "wrong": 0,
-            "dont_know": 0
-        }
+        for future in as_completed(futures):
+            term = futures[future]
+            enriched = future.result()
+
+            if not enriched:
+                print(f"   ⚠️ Falha ao enriquecer: {term}")
+                continue
 
-        vocab_db[term] = enriched
-        save_vocab_db(vocab_db)
+            enriched["stats"] = {
+                "seen": 0,
+                "correct": 0,
+                "wrong": 0,
+                "dont_know": 0
+            }
+
+            vocab_db[term] = enriched
+            created += 1
+            print(f"✅ [{created}/{len(missing)}] {term}")
+
+            if created % ENRICH_SAVE_EVERY == 0:
+                compact_vocab_db(vocab_db, review_log)
+
+    compact_vocab_db(vocab_db, review_log)
 
     print("\n✅ Reenriquecimento concluído.")
 
@@ -303,15 +309,19 @@ def progress_bar(pct: float, width: int = 25) -> str:
     filled = int(width * pct / 100)
     return "█" * filled + "░" * (width - filled)
 
-def render_header(db: Dict[str, dict]):
-    seen = correct = wrong = dont = 0
-
+def compute_totals(db: Dict[str, dict]) -> dict:
+    """Somatório das stats (calculado uma vez; o jogo atualiza incrementalmente)."""
+    totals = {"seen": 0, "correct": 0, "wrong": 0, "dont_know": 0}
     for v in db.values():
-        s = v["stats"]
-        seen += s["seen"]
-        correct += s["correct"]
-        wrong += s["wrong"]
-        dont += s["dont_know"]
+        for k in totals:
+            totals[k] += v["stats"][k]
+    return totals
+
+def render_header(totals: dict):
+    seen = totals["seen"]
+    correct = totals["correct"]
+    wrong = totals["wrong"]
+    dont = totals["dont_know"]
 
     def pct(x):
         return (x / seen * 100) if seen else 0.0
@@ -342,50 +352,59 @@ def show_details(entry: dict):
 # GAME
 # ============================================================
 
-def play(db: Dict[str, dict]):
+def play(db: Dict[str, dict], review_log: ReviewLog):
+    """
+    Próximo termo = o de vencimento mais antigo (heap SM-2).
+    Cada resposta é anexada ao log; o banco só é reescrito a
+    cada COMPACT_EVERY respostas e ao sair.
+    """
+    queue = DueQueue.from_db(db, MAX_CORRECT_PER_TERM)
+    totals = compute_totals(db)
+
     while True:
         clear_screen()
-        render_header(db)
+        render_header(totals)
 
-        eligible_terms = [
-            term for term, data in db.items()
-            if data["stats"]["correct"] < MAX_CORRECT_PER_TERM
-        ]
-
-        if not eligible_terms:
+        nxt = queue.pop()
+        if nxt is None:
             print(f"{GREEN}🎉 Todos os termos dominados!{RESET}")
+            compact_vocab_db(db, review_log)
             return
 
-        term = random.choice(eligible_terms)
+        due, term = nxt
         entry = db[term]
         stats = entry["stats"]
 
+        if due > time.time():
+            wait_min = (due - time.time()) / 60
+            print(f"{YELLOW}⏩ Nenhuma revisão vencida — adiantando (vence em {wait_min:.0f} min){RESET}")
+
         print(f"\n🔤 {CYAN}Termo:{RESET} {term}")
         user = input("✍️ Tradução (n = não sei | s = sair): ").strip()
 
         if user.lower() == "s":
-            save_vocab_db(db)
+            compact_vocab_db(db, review_log)
             return
 
         stats["seen"] += 1
 
         if user.lower() == "n":
-            stats["dont_know"] += 1
+            result = "dont_know"
             print(f"{YELLOW}👉 Tradução:{RESET} {entry['translation']}")
 
         elif local_match(user, entry["translation"]):
-            stats["correct"] += 1
+            result = "correct"
             print(f"{GREEN}✅ Correto!{RESET}")
 
         elif ENABLE_GROQ_VALIDATION and groq_validate_translation(
             term, user, entry["translation"]
         ):
-            stats["correct"] += 1
+            result = "semantic"
             print(f"{CYAN}🤖 Correto (validação semântica)!{RESET}")
             print(f"{YELLOW}👉 Tradução aceita:{RESET} {entry['translation']}")
 
         else:
-            stats["wrong"] += 1
+            result = "wrong"
             print(f"{RED}❌ Incorreto.{RESET}")
             print(f"{YELLOW}👉 Correto:{RESET} {entry['translation']}")
 
@@ -397,11 +416,25 @@ def play(db: Dict[str, dict]):
                     print(f"{MAGENTA}• Exemplo EN:{RESET} {fb['example_en']}")
                     print(f"{MAGENTA}• Tradução PT:{RESET} {fb['example_pt']}")
 
+        counter = "correct" if result == "semantic" else result
+        stats[counter] += 1
+        totals["seen"] += 1
+        totals[counter] += 1
+
+        entry["srs"] = sm2_update(entry.get("srs"), QUALITY[result])
+        review_log.append(term, result, stats, entry["srs"])
+
+        if stats["correct"] < MAX_CORRECT_PER_TERM:
+            queue.push(term, entry["srs"]["due"])
+
+        if review_log.pending >= COMPACT_EVERY:
+            compact_vocab_db(db, review_log)
+
         show_details(entry)
-        save_vocab_db(db)
 
         cmd = input("\n↩️ ENTER = próximo | s = sair: ").strip().lower()
         if cmd == "s":
+            compact_vocab_db(db, review_log)
             return
 
 # ============================================================
@@ -409,7 +442,8 @@ def play(db: Dict[str, dict]):
 # ============================================================
 
 def main():
-    vocab_db = load_vocab_db()
+    review_log = ReviewLog(ReviewLog.path_for(VOCAB_DB_FILE))
+    vocab_db = load_vocab_db(review_log)
 
     clear_screen()
     print("Digite:")
@@ -425,7 +459,7 @@ def main():
         return
 
     if cmd == "i":
-        play(vocab_db)
+        play(vocab_db, review_log)
 
 if __name__ == "__main__":
     main()
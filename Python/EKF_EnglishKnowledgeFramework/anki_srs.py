@@ -0,0 +1,172 @@
+# ============================================================
+# anki_srs.py
+# Repetição espaçada (SM-2) para o MyAnki.py
+#
+# - sm2_update(): agenda a próxima revisão de um termo
+# - DueQueue: heap (vencimento, desempate, termo) → próximo
+#   termo em O(log n), sem varrer o banco a cada pergunta
+# - ReviewLog: cada resposta vira UMA linha JSONL anexada;
+#   o vocab_bank.json só é reescrito na compactação
+#
+# Cada linha do log guarda o estado FINAL do termo (stats +
+# srs), não o incremento: reaplicar o log é idempotente, então
+# uma compactação interrompida não duplica contagens.
+# ============================================================
+
+import os
+import json
+import heapq
+import random
+import time
+
+# ============================================================
+# CONFIGURAÇÕES
+# ============================================================
+
+DAY_SECONDS = 86400
+
+# Erro / "não sei": o termo volta na mesma sessão
+RELEARN_SECONDS = 10 * 60
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# Qualidade SM-2 (0..5) de cada tipo de resposta
+QUALITY = {
+    "correct": 5,
+    "semantic": 4,
+    "wrong": 1,
+    "dont_know": 0
+}
+
+# ============================================================
+# SM-2
+# ============================================================
+
+def sm2_update(srs: dict | None, quality: int, now: float | None = None) -> dict:
+    """Novo estado {ease, reps, interval (dias), lapses, due (epoch)}."""
+    now = time.time() if now is None else now
+    srs = srs or {}
+
+    ease = srs.get("ease", DEFAULT_EASE)
+    reps = srs.get("reps", 0)
+    interval = srs.get("interval", 0)
+    lapses = srs.get("lapses", 0)
+
+    if quality < 3:
+        reps = 0
+        interval = 0
+        lapses += 1
+        due = now + RELEARN_SECONDS
+    else:
+        reps += 1
+        if reps == 1:
+            interval = 1
+        elif reps == 2:
+            interval = 6
+        else:
+            interval = round(interval * ease, 2)
+        due = now + interval * DAY_SECONDS
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    return {
+        "ease": round(ease, 3),
+        "reps": reps,
+        "interval": interval,
+        "lapses": lapses,
+        "due": int(due)
+    }
+
+# ============================================================
+# FILA DE VENCIMENTOS
+# ============================================================
+
+class DueQueue:
+    """Termos ordenados pelo vencimento. Termos novos (sem srs) vêm primeiro."""
+
+    def __init__(self, items=()):
+        # desempate aleatório: termos com o mesmo vencimento não saem sempre na mesma ordem
+        self._heap = [(due, random.random(), term) for term, due in items]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def from_db(cls, db: dict, max_correct: int):
+        return cls(
+            (term, entry.get("srs", {}).get("due", 0))
+            for term, entry in db.items()
+            if entry["stats"]["correct"] < max_correct
+        )
+
+    def push(self, term: str, due: float):
+        heapq.heappush(self._heap, (due, random.random(), term))
+
+    def pop(self):
+        """(vencimento, termo) do mais urgente, ou None se a fila acabou."""
+        if not self._heap:
+            return None
+        due, _, term = heapq.heappop(self._heap)
+        return due, term
+
+    def __len__(self):
+        return len(self._heap)
+
+# ============================================================
+# LOG DE REVISÕES
+# ============================================================
+
+class ReviewLog:
+    """vocab_bank.reviews.jsonl: uma linha por resposta."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending = 0
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.pending = sum(1 for line in f if line.strip())
+
+    @staticmethod
+    def path_for(db_file: str) -> str:
+        return os.path.splitext(db_file)[0] + ".reviews.jsonl"
+
+    def append(self, term: str, result: str, stats: dict, srs: dict):
+        record = {
+            "term": term,
+            "result": result,
+            "ts": int(time.time()),
+            "stats": stats,
+            "srs": srs
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.pending += 1
+
+    def replay(self, db: dict) -> int:
+        """Aplica o log ao banco carregado. Retorna quantas linhas valeram."""
+        if not os.path.exists(self.path):
+            return 0
+
+        applied = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # última linha truncada (queda no meio da escrita)
+                    continue
+
+                entry = db.get(record.get("term"))
+                if entry is None:
+                    continue
+
+                entry["stats"] = record["stats"]
+                entry["srs"] = record["srs"]
+                applied += 1
+
+        return applied
+
+    def truncate(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.pending = 0
@@ -20,23 +20,23 @@ python mainTranscript.py
 import os
 import sys
 import json
-import requests
-import random
-from itertools import cycle
 from datetime import datetime
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
-from groq_keys_loader import GROQ_KEYS
+from groq_client import LazyGroqClient
+from llm_cache import get_default_cache, DAY
 # ================================================================================
-# CONFIG - GROQ MULTI KEYS (ROTATION / RANDOM)
+# CONFIG - GROQ (CLIENTE COMPARTILHADO, MULTI KEYS)
 # ================================================================================
-_groq_key_cycle = cycle(random.sample(GROQ_KEYS, len(GROQ_KEYS)))
-
-GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_MODEL = "openai/gpt-oss-20b"
 
+_groq_client = LazyGroqClient(model=GROQ_MODEL, timeout=20, cache=get_default_cache())
+
+# Correções/traduções do mesmo texto não mudam → reaproveita do cache
+CACHE_TTL_CORRECT = 90 * DAY
+
 # ================================================================================
 # PATHS
 # ================================================================================
@@ -108,46 +108,23 @@ def load_external_terms() -> list[str]:
 
 
 
-def get_next_groq_key() -> str:
-    for _ in range(len(GROQ_KEYS)):
-        key = next(_groq_key_cycle).get("key", "").strip()
-        if key.startswith("gsk_"):
-            return key
-    raise RuntimeError("❌ Nenhuma GROQ API Key válida encontrada.")
-
+def _json_object(raw: str) -> str:
+    return raw[raw.find("{"): raw.rfind("}") + 1]
 
-def groq(prompt: str) -> str:
-    last_error = None
 
-    for _ in range(len(GROQ_KEYS)):
-        api_key = get_next_groq_key()
+def _is_json_object(raw: str) -> bool:
+    try:
+        return isinstance(json.loads(_json_object(raw)), dict)
+    except ValueError:
+        return False
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "model": GROQ_MODEL,
-            "messages": [{"role": "user", "content": prompt}]
-        }
-
-        try:
-            res = requests.post(GROQ_URL, json=payload, headers=headers, timeout=20)
 
-            if res.status_code == 429:
-                last_error = "Rate limit"
-                continue
-
-            res.raise_for_status()
-            raw = res.json()["choices"][0]["message"]["content"]
-            return raw[raw.find("{"): raw.rfind("}") + 1]
-
-        except requests.RequestException as e:
-            last_error = str(e)
-            continue
-
-    raise RuntimeError(f"❌ Todas as GROQ keys falharam. Último erro: {last_error}")
+def groq(prompt: str, cache_ttl: float | None = None, cache_tag: str | None = None) -> str:
+    # só respostas com JSON válido ficam no cache
+    raw = _groq_client.ask(
+        prompt, cache_ttl=cache_ttl, cache_tag=cache_tag, cache_validate=_is_json_object
+    )
+    return _json_object(raw)
 
 # ================================================================================
 # 1 — CORRIGIR + TRADUZIR (INALTERADO)
@@ -212,7 +189,7 @@ Return ONLY JSON in the format:
 
 Input: "{text}"
 """
-    obj = json.loads(groq(prompt))
+    obj = json.loads(groq(prompt, CACHE_TTL_CORRECT, "w.correct_and_translate"))
     obj["model_used"] = "Groq"
     return obj
 
@@ -12,13 +12,17 @@
 # - listening practice
 # - emotional rendering
 # - AI-directed pacing
+# - legenda SRT exata (eventos WordBoundary do Edge TTS +
+#   offsets de cada segmento na concatenação), sem Whisper
 #
 # ============================================================
 
 import os
 import io
 import sys
+import json
 import asyncio
+import hashlib
 
 from pydub import AudioSegment
 
@@ -55,6 +59,30 @@ VOICE_EN = "en-US-BrianMultilingualNeural"
 
 VOICE_PT = "pt-BR-AntonioNeural"
 
+# Quantas sínteses Edge TTS simultâneas
+MAX_CONCURRENT_SYNTH = 6
+
+# Cache persistente de áudio já decodificado
+# (chave: texto + voz + rate + pitch)
+TTS_CACHE_DIR = os.path.join(
+    CURRENT_DIR,
+    ".cache",
+    "edge_tts"
+)
+
+# Formato único para concatenar os buffers PCM
+RENDER_FRAME_RATE = 24000
+
+RENDER_CHANNELS = 1
+
+RENDER_SAMPLE_WIDTH = 2
+
+# Legenda: máximo de palavras por cue
+SRT_MAX_WORDS = 8
+
+# Edge TTS reporta offsets em unidades de 100 ns
+TICKS_PER_MS = 10_000
+
 
 # ============================================================
 # HELPERS
@@ -79,13 +107,6 @@ def _clean_text(text: str) -> str:
     return text
 
 
-def _pause(ms: int):
-
-    return AudioSegment.silent(
-        duration=ms
-    )
-
-
 # ============================================================
 # VOICE PARAMS
 # ============================================================
@@ -180,18 +201,23 @@ def _resolve_voice_params(
 # SYNTHESIS
 # ============================================================
 
+def _voice_for(lang: str) -> str:
+
+    return (
+        VOICE_EN
+        if lang == "en"
+        else VOICE_PT
+    )
+
+
 async def _synthesize_async(
     text: str,
     lang: str,
     rate: str,
     pitch: str
-) -> bytes:
+):
 
-    voice_name = (
-        VOICE_EN
-        if lang == "en"
-        else VOICE_PT
-    )
+    voice_name = _voice_for(lang)
     
     fallback_voice = (
         "en-US-BrianMultilingualNeural"
@@ -201,7 +227,7 @@ async def _synthesize_async(
     
     try:
 
-        communicate = edge_tts.Communicate(
+        communicate = _communicate(
 
             text=text,
 
@@ -214,7 +240,7 @@ async def _synthesize_async(
 
     except Exception:
 
-        communicate = edge_tts.Communicate(
+        communicate = _communicate(
 
             text=text,
 
@@ -227,12 +253,26 @@ async def _synthesize_async(
 
     buffer = io.BytesIO()
 
+    # [offset_ms, duration_ms, palavra]
+    boundaries = []
+
     async for chunk in communicate.stream():
 
         if chunk["type"] == "audio":
 
             buffer.write(chunk["data"])
 
+        elif chunk["type"] == "WordBoundary":
+
+            boundaries.append([
+
+                chunk["offset"] / TICKS_PER_MS,
+
+                chunk["duration"] / TICKS_PER_MS,
+
+                chunk["text"]
+            ])
+
     buffer.seek(0)
 
     data = buffer.read()
@@ -243,7 +283,25 @@ async def _synthesize_async(
             "Nenhum áudio recebido."
         )
 
-    return data
+    return data, boundaries
+
+
+def _communicate(**kwargs):
+
+    # edge-tts >= 7 só envia WordBoundary se pedido;
+    # versões antigas não têm o parâmetro (e já enviam)
+    try:
+
+        return edge_tts.Communicate(
+            boundary="WordBoundary",
+            **kwargs
+        )
+
+    except TypeError:
+
+        return edge_tts.Communicate(
+            **kwargs
+        )
 
 
 # ============================================================
@@ -429,15 +487,277 @@ def _build_segments(
     return segments
 
 
+# ============================================================
+# CACHE
+# ============================================================
+
+def _cache_key(seg: dict) -> str:
+
+    raw = json.dumps(
+
+        [
+            seg["text"],
+            _voice_for(seg["lang"]),
+            seg["rate"],
+            seg["pitch"]
+        ],
+
+        ensure_ascii=False
+    )
+
+    return hashlib.sha1(
+        raw.encode("utf-8")
+    ).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+
+    return os.path.join(
+        TTS_CACHE_DIR,
+        key[:2],
+        f"{key}.wav"
+    )
+
+
+def _normalize(audio: AudioSegment) -> AudioSegment:
+
+    return (
+        audio
+        .set_frame_rate(RENDER_FRAME_RATE)
+        .set_channels(RENDER_CHANNELS)
+        .set_sample_width(RENDER_SAMPLE_WIDTH)
+    )
+
+
+def _boundaries_path(key: str) -> str:
+
+    return _cache_path(key)[:-4] + ".words.json"
+
+
+def _load_cached(key: str):
+    """
+    Retorna (audio, boundaries) ou None.
+    boundaries é None para entradas antigas, sem os tempos.
+    """
+
+    path = _cache_path(key)
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+
+        audio = _normalize(
+            AudioSegment.from_wav(path)
+        )
+
+    except Exception:
+
+        # arquivo corrompido → ressintetiza
+        return None
+
+    boundaries = None
+
+    try:
+
+        with open(
+            _boundaries_path(key),
+            "r",
+            encoding="utf-8"
+        ) as f:
+
+            boundaries = json.load(f)
+
+    except (OSError, ValueError):
+        pass
+
+    return audio, boundaries
+
+
+def _atomic_write(path: str, write):
+
+    # grava em arquivo temporário e troca no final
+    # (nunca deixa um arquivo pela metade no cache)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    write(tmp_path)
+
+    os.replace(tmp_path, path)
+
+
+def _store_cached(key: str, audio: AudioSegment, boundaries=None):
+
+    path = _cache_path(key)
+
+    os.makedirs(
+        os.path.dirname(path),
+        exist_ok=True
+    )
+
+    if boundaries:
+
+        def write_boundaries(tmp_path):
+
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(boundaries, f, ensure_ascii=False)
+
+        _atomic_write(
+            _boundaries_path(key),
+            write_boundaries
+        )
+
+    _atomic_write(
+        path,
+        lambda tmp_path: audio.export(tmp_path, format="wav")
+    )
+
+
 # ============================================================
 # RENDER
 # ============================================================
 
+async def _render_unique_async(
+    seg: dict,
+    semaphore: asyncio.Semaphore
+):
+
+    key = _cache_key(seg)
+
+    # leitura/decodificação fora do event loop: as outras
+    # streams do edge-tts seguem enquanto um WAV é lido
+    cached = await asyncio.to_thread(_load_cached, key)
+
+    if cached is not None:
+        return key, cached
+
+    audio_bytes = None
+
+    boundaries = None
+
+    async with semaphore:
+
+        for attempt in range(1, 4):
+
+            try:
+
+                audio_bytes, boundaries = await _synthesize_async(
+
+                    text=seg["text"],
+
+                    lang=seg["lang"],
+
+                    rate=seg["rate"],
+
+                    pitch=seg["pitch"]
+                )
+
+                break
+
+            except Exception as e:
+
+                print(
+                    f"⚠️ tentativa "
+                    f"{attempt} falhou: {e}"
+                )
+
+    if not audio_bytes:
+        return key, None
+
+    # ffmpeg (decode do mp3) + export do WAV bloqueiam:
+    # rodam numa thread para não travar as outras streams
+    audio = await asyncio.to_thread(
+        _decode_and_store, key, audio_bytes, boundaries
+    )
+
+    return key, (audio, boundaries)
+
+
+def _decode_and_store(
+    key: str,
+    audio_bytes: bytes,
+    boundaries
+):
+
+    audio = _normalize(
+
+        AudioSegment.from_file(
+
+            io.BytesIO(audio_bytes),
+
+            format="mp3"
+        )
+    )
+
+    _store_cached(key, audio, boundaries)
+
+    return audio
+
+
+def _bytes_to_ms(size: int) -> float:
+
+    return size * 1000 / (
+        RENDER_FRAME_RATE
+        * RENDER_CHANNELS
+        * RENDER_SAMPLE_WIDTH
+    )
+
+
+def _silence_bytes(ms: int) -> bytes:
+
+    frames = int(
+        RENDER_FRAME_RATE * ms / 1000
+    )
+
+    return b"\x00" * (
+        frames
+        * RENDER_CHANNELS
+        * RENDER_SAMPLE_WIDTH
+    )
+
+
 async def _render_segments_async(
     segments
 ):
 
-    combined = _pause(300)
+    # --------------------------------------------------------
+    # 1) sintetiza cada texto ÚNICO em paralelo
+    #    (repetições de repeat_each viram um único pedido)
+    # --------------------------------------------------------
+
+    unique = {}
+
+    for seg in segments:
+
+        if seg.get("text"):
+
+            unique.setdefault(
+                _cache_key(seg),
+                seg
+            )
+
+    semaphore = asyncio.Semaphore(
+        MAX_CONCURRENT_SYNTH
+    )
+
+    results = await asyncio.gather(*[
+
+        _render_unique_async(seg, semaphore)
+
+        for seg in unique.values()
+    ])
+
+    rendered = dict(results)
+
+    # --------------------------------------------------------
+    # 2) concatena uma única vez sobre os buffers PCM,
+    #    anotando o offset de cada segmento falado
+    # --------------------------------------------------------
+
+    chunks = [_silence_bytes(300)]
+
+    cursor = len(chunks[0])
+
+    cues = []
 
     for seg in segments:
 
@@ -453,54 +773,173 @@ async def _render_segments_async(
 
         if text:
 
-            audio_bytes = None
+            result = rendered.get(
+                _cache_key(seg)
+            )
 
-            for attempt in range(1, 4):
+            if result is not None:
 
-                try:
+                audio, boundaries = result
 
-                    audio_bytes = await _synthesize_async(
+                cues.extend(
+                    _segment_cues(
+                        text,
+                        boundaries,
+                        start_ms=_bytes_to_ms(cursor),
+                        total_ms=_bytes_to_ms(len(audio.raw_data))
+                    )
+                )
 
-                        text=text,
+                chunks.append(audio.raw_data)
 
-                        lang=seg["lang"],
+            else:
 
-                        rate=seg["rate"],
+                chunks.append(_silence_bytes(900))
 
-                        pitch=seg["pitch"]
-                    )
+            cursor += len(chunks[-1])
 
-                    break
+        if pause_ms:
 
-                except Exception as e:
+            chunks.append(
+                _silence_bytes(pause_ms)
+            )
 
-                    print(
-                        f"⚠️ tentativa "
-                        f"{attempt} falhou: {e}"
-                    )
+            cursor += len(chunks[-1])
 
-            if audio_bytes:
+    combined = AudioSegment(
 
-                audio = AudioSegment.from_file(
+        data=b"".join(chunks),
 
-                    io.BytesIO(audio_bytes),
+        sample_width=RENDER_SAMPLE_WIDTH,
 
-                    format="mp3"
-                )
+        frame_rate=RENDER_FRAME_RATE,
 
-                combined += audio
+        channels=RENDER_CHANNELS
+    )
 
-            else:
+    return combined, cues
 
-                combined += _pause(900)
 
-        if pause_ms:
+# ============================================================
+# LEGENDA (SRT)
+# ============================================================
+
+def _word_times(words, boundaries, total_ms: float):
+    """
+    [(início_ms, fim_ms)] de cada palavra do TEXTO do roteiro.
+
+    - mesma quantidade de WordBoundary e palavras → tempos exatos
+    - senão, distribui por caracteres dentro do trecho falado
+      (primeiro→último WordBoundary, ou o segmento inteiro)
+    """
+
+    if boundaries and len(boundaries) == len(words):
+
+        return [
+            (offset, offset + duration)
+            for offset, duration, _ in boundaries
+        ]
+
+    if boundaries:
+
+        span_start = boundaries[0][0]
+
+        span_end = boundaries[-1][0] + boundaries[-1][1]
+
+    else:
+
+        span_start, span_end = 0.0, total_ms
+
+    weights = [len(w) + 1 for w in words]
+
+    scale = (span_end - span_start) / max(sum(weights), 1)
+
+    times = []
+
+    position = span_start
+
+    for weight in weights:
+
+        times.append((position, position + weight * scale))
+
+        position += weight * scale
+
+    return times
+
+
+def _segment_cues(text: str, boundaries, start_ms: float, total_ms: float):
+    """
+    Quebra o texto de um segmento em cues de até SRT_MAX_WORDS
+    palavras (cortando antes em pontuação), com tempos absolutos.
+    """
+
+    words = text.split()
+
+    if not words:
+        return []
+
+    times = _word_times(words, boundaries, total_ms)
+
+    cues = []
+
+    first = 0
+
+    for i, word in enumerate(words):
+
+        last_word = i == len(words) - 1
 
-            combined += _pause(
-                pause_ms
+        full = i - first + 1 >= SRT_MAX_WORDS
+
+        if last_word or full or word[-1] in ".!?;:":
+
+            cues.append({
+
+                "start": start_ms + times[first][0],
+
+                "end": start_ms + times[i][1],
+
+                "text": " ".join(words[first:i + 1])
+            })
+
+            first = i + 1
+
+    return cues
+
+
+def _format_srt_time(ms: float) -> str:
+
+    ms = int(round(ms))
+
+    h, ms = divmod(ms, 3_600_000)
+
+    m, ms = divmod(ms, 60_000)
+
+    s, ms = divmod(ms, 1000)
+
+    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+
+
+def write_srt(cues, srt_path: str) -> str:
+
+    os.makedirs(
+        os.path.dirname(srt_path) or ".",
+        exist_ok=True
+    )
+
+    with open(srt_path, "w", encoding="utf-8") as f:
+
+        for i, cue in enumerate(cues, start=1):
+
+            f.write(f"{i}\n")
+
+            f.write(
+                f"{_format_srt_time(cue['start'])} --> "
+                f"{_format_srt_time(cue['end'])}\n"
             )
 
-    return combined
+            f.write(f"{cue['text']}\n\n")
+
+    return srt_path
 
 
 # ============================================================
@@ -509,8 +948,13 @@ async def _render_segments_async(
 
 def generate_audio_edge(
     lesson_json: dict,
-    output_path: str
+    output_path: str,
+    srt_path: str = None
 ) -> str:
+    """
+    Gera o WAV da lição. Se srt_path for informado, grava também
+    a legenda com os tempos reais da síntese (sem Whisper).
+    """
 
     print(
         "🎤 Edge TTS Multilingual"
@@ -520,12 +964,18 @@ def generate_audio_edge(
         lesson_json
     )
 
-    combined = asyncio.run(
+    combined, cues = asyncio.run(
         _render_segments_async(
             segments
         )
     )
 
+    if srt_path:
+
+        write_srt(cues, srt_path)
+
+        print(f"✔ legenda gerada: {srt_path}")
+
     os.makedirs(
         os.path.dirname(output_path),
         exist_ok=True
@@ -14,16 +14,13 @@ import os
 import sys
 import json
 import re
-import random
-from itertools import cycle
 
 _GROQ_LOADER_DIR = r"C:\dev\scripts\ScriptsUteis\Python"
 
 if _GROQ_LOADER_DIR not in sys.path:
     sys.path.insert(0, _GROQ_LOADER_DIR)
 
-from groq import Groq
-from groq_keys_loader import GROQ_KEYS
+from groq_client import LazyGroqClient
 
 
 # ------------------------------------------------------------------
@@ -53,15 +50,14 @@ PERSONA = (
 
 
 # ------------------------------------------------------------------
-# KEY ROTATION
+# CLIENTE GROQ (sessões keep-alive + escolha da chave com mais folga;
+# criado só na primeira chamada)
 # ------------------------------------------------------------------
 
-_groq_key_cycle = cycle(random.sample(GROQ_KEYS, len(GROQ_KEYS)))
-
-
-def _get_client():
-    key_info = next(_groq_key_cycle)
-    return Groq(api_key=key_info["key"]), key_info["name"]
+_groq_client = LazyGroqClient(
+    model=GROQ_MODEL,
+    timeout=TIMEOUT_SECONDS
+)
 
 
 # ------------------------------------------------------------------
@@ -77,42 +73,28 @@ def _extract_json(text: str) -> str | None:
 
 def _call_groq(messages: list, label: str = "") -> str:
 
-    last_error = None
-
-    for attempt in range(1, MAX_RETRIES + 1):
-
-        client, key_name = _get_client()
-
-        try:
-
-            print(
-                f"   [Groq{' ' + label if label else ''}] "
-                f"tentativa {attempt} · key: {key_name}"
-            )
-
-            response = client.chat.completions.create(
-                model=GROQ_MODEL,
-                messages=messages,
-                temperature=TEMPERATURE,
-                timeout=TIMEOUT_SECONDS,
-            )
+    print(
+        f"   [Groq{' ' + label if label else ''}] "
+        f"consultando..."
+    )
 
-            return response.choices[0].message.content.strip()
+    try:
 
-        except Exception as e:
+        response = _groq_client.chat(
+            messages,
+            temperature=TEMPERATURE,
+            max_attempts=MAX_RETRIES * 2
+        )
 
-            last_error = e
+    except Exception as e:
 
-            print(
-                f"   ⚠️ [Groq] Falha na tentativa "
-                f"{attempt}: {e}"
-            )
+        raise RuntimeError(
+            f"[generate_script_groq] "
+            f"Todas as tentativas falharam.\n"
+            f"Último erro: {e}"
+        )
 
-    raise RuntimeError(
-        f"[generate_script_groq] "
-        f"Todas as tentativas falharam.\n"
-        f"Último erro: {last_error}"
-    )
+    return response.strip()
 
 
 def _normalize_text(text: str) -> str:
@@ -149,94 +149,143 @@ def run_test_audio():
 
 
 # ------------------------------------------------------------------
-# SCRIPT PRINCIPAL
+# ETAPAS DO PIPELINE
+#
+# Separadas em funções para que run_batch.py importe o pipeline
+# uma única vez e rode várias palavras em paralelo:
+#   - prepare_media → script (Groq) + imagem + áudio  (I/O-bound)
+#   - render_video  → encode do vídeo final           (CPU-bound)
 # ------------------------------------------------------------------
 
-if "--testAudio" in sys.argv:
-    run_test_audio()
+class PipelineStageError(RuntimeError):
+    """Falha em uma etapa do pipeline (stage = script/image/audio/video)."""
+
+    def __init__(self, stage, message):
+        super().__init__(message)
+        self.stage = stage
+
+
+def ensure_output_dirs():
+    os.makedirs("outputs/audio",  exist_ok=True)
+    os.makedirs("outputs/images", exist_ok=True)
+    os.makedirs("outputs/videos", exist_ok=True)
 
-if len(sys.argv) < 2:
-    print("Uso: python main.py palavra_ou_frase  ou  python main.py --testAudio")
-    exit(1)
 
-RAW_WORD  = sys.argv[1].strip()
-SAFE_NAME = sanitize_filename(RAW_WORD)
+def prepare_media(raw_word):
+    """
+    Etapas 1–4: JSON da aula, imagem e áudio.
+    Retorna o SAFE_NAME usado nos arquivos de outputs/.
+    """
+    raw_word = raw_word.strip()
+    safe_name = sanitize_filename(raw_word)
 
-if not SAFE_NAME:
-    print("Erro: palavra inválida após sanitização.")
-    exit(1)
+    if not safe_name:
+        raise PipelineStageError("script", "Erro: palavra inválida após sanitização.")
 
-print(f"📌 Gerando vídeo para: {RAW_WORD}")
-print(f"➡ Nome seguro do arquivo: {SAFE_NAME}")
-print(f"   Script : {'Groq/llama (zero custo)'    if USE_ZERO_COST_SCRIPT else 'Gemini IA'}")
-print(f"   Imagem : {'Zero-cost (fixa)'           if USE_ZERO_COST_IMAGE  else 'Gemini IA'}")
-print(f"   Áudio  : {_AUDIO_LABELS[AUDIO_ENGINE]}")
+    print(f"📌 Gerando vídeo para: {raw_word}")
+    print(f"➡ Nome seguro do arquivo: {safe_name}")
+    print(f"   Script : {'Groq/llama (zero custo)'    if USE_ZERO_COST_SCRIPT else 'Gemini IA'}")
+    print(f"   Imagem : {'Zero-cost (fixa)'           if USE_ZERO_COST_IMAGE  else 'Gemini IA'}")
+    print(f"   Áudio  : {_AUDIO_LABELS[AUDIO_ENGINE]}")
 
-os.makedirs("outputs/audio",  exist_ok=True)
-os.makedirs("outputs/images", exist_ok=True)
-os.makedirs("outputs/videos", exist_ok=True)
+    ensure_output_dirs()
 
+    # ----------------------------------------------------
+    # 1) Gerar JSON da aula
+    # ----------------------------------------------------
+    try:
+        lesson = generate_lesson_json(raw_word)
+    except Exception as e:
+        raise PipelineStageError("script", f"❌ Erro crítico ao gerar JSON:\n{e}") from e
 
-# ----------------------------------------------------
-# 1) Gerar JSON da aula
-# ----------------------------------------------------
-try:
-    lesson = generate_lesson_json(RAW_WORD)
-except Exception as e:
-    print("❌ Erro crítico ao gerar JSON:")
-    print(e)
-    sys.exit(1)
+    lesson["nome_arquivos"] = safe_name
 
-lesson["nome_arquivos"] = SAFE_NAME
+    json_path = f"outputs/videos/{safe_name}.json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(lesson, f, ensure_ascii=False, indent=2)
 
-json_path = f"outputs/videos/{SAFE_NAME}.json"
-with open(json_path, "w", encoding="utf-8") as f:
-    json.dump(lesson, f, ensure_ascii=False, indent=2)
+    print(f"✔ JSON salvo em: {json_path}")
 
-print(f"✔ JSON salvo em: {json_path}")
+    # ----------------------------------------------------
+    # 2) Construir texto do TTS  (usado apenas pelo Gemini TTS)
+    # ----------------------------------------------------
+    tts_text = build_tts_text(lesson)
 
+    # ----------------------------------------------------
+    # 3) Gerar IMAGEM
+    # ----------------------------------------------------
+    img_path = f"outputs/images/{safe_name}.png"
 
-# ----------------------------------------------------
-# 2) Construir texto do TTS  (usado apenas pelo Gemini TTS)
-# ----------------------------------------------------
-tts_text = build_tts_text(lesson)
+    try:
+        if USE_ZERO_COST_IMAGE:
+            print("🖼️  Modo ZERO COST: usando imagem fixa.")
+            generate_image_zero_cost(img_path, mode="landscape")
+        else:
+            print("🧠 Gerando imagem via IA Gemini...")
+            generate_image(raw_word, img_path, mode="landscape")
+    except Exception as e:
+        raise PipelineStageError("image", f"❌ Erro ao gerar imagem: {e}") from e
 
+    # ----------------------------------------------------
+    # 4) Gerar ÁUDIO
+    # ----------------------------------------------------
+    audio_path = f"outputs/audio/{safe_name}.wav"
 
-# ----------------------------------------------------
-# 3) Gerar IMAGEM
-# ----------------------------------------------------
-img_path = f"outputs/images/{SAFE_NAME}.png"
+    try:
+        if AUDIO_ENGINE == "gcloud":
+            print("🎤 Gerando áudio via Google Cloud TTS...")
+            generate_audio_gcloud(lesson, audio_path)
+        elif AUDIO_ENGINE == "edge":
+            print("🎤 Gerando áudio via Edge TTS (Microsoft Neural)...")
+            # legenda sai com os tempos da própria síntese (sem Whisper)
+            generate_audio_edge(lesson, audio_path, srt_path=f"outputs/videos/{safe_name}.srt")
+        else:
+            print("🎤 Gerando áudio via Gemini TTS...")
+            generate_audio(tts_text, audio_path, voice="schedar")
+    except Exception as e:
+        raise PipelineStageError("audio", f"❌ Erro ao gerar áudio: {e}") from e
 
-if USE_ZERO_COST_IMAGE:
-    print("🖼️  Modo ZERO COST: usando imagem fixa.")
-    generate_image_zero_cost(img_path, mode="landscape")
-else:
-    print("🧠 Gerando imagem via IA Gemini...")
-    generate_image(RAW_WORD, img_path, mode="landscape")
+    return safe_name
 
 
-# ----------------------------------------------------
-# 4) Gerar ÁUDIO
-# ----------------------------------------------------
-audio_path = f"outputs/audio/{SAFE_NAME}.wav"
+def render_video(safe_name):
+    """Etapa 5: monta o vídeo final a partir de imagem + áudio."""
+    ensure_output_dirs()
 
-if AUDIO_ENGINE == "gcloud":
-    print("🎤 Gerando áudio via Google Cloud TTS...")
-    generate_audio_gcloud(lesson, audio_path)
-elif AUDIO_ENGINE == "edge":
-    print("🎤 Gerando áudio via Edge TTS (Microsoft Neural)...")
-    generate_audio_edge(lesson, audio_path)
-else:
-    print("🎤 Gerando áudio via Gemini TTS...")
-    generate_audio(tts_text, audio_path, voice="schedar")
+    video_path = f"outputs/videos/{safe_name}.mp4"
+
+    try:
+        build_video(safe_name, "outputs/images", "outputs/audio", video_path)
+    except Exception as e:
+        raise PipelineStageError("video", f"❌ Erro ao montar vídeo: {e}") from e
+
+    print("\n✅ VÍDEO FINAL GERADO:")
+    print(video_path)
+    print(f"📄 JSON correspondente: outputs/videos/{safe_name}.json")
+
+    return video_path
+
+
+def generate_word(raw_word):
+    """Pipeline completo de uma palavra (todas as etapas, em sequência)."""
+    return render_video(prepare_media(raw_word))
+
+
+# ------------------------------------------------------------------
+# SCRIPT PRINCIPAL
+# ------------------------------------------------------------------
+
+if __name__ == "__main__":
 
+    if "--testAudio" in sys.argv:
+        run_test_audio()
 
-# ----------------------------------------------------
-# 5) Gerar VÍDEO FINAL
-# ----------------------------------------------------
-video_path = f"outputs/videos/{SAFE_NAME}.mp4"
-build_video(SAFE_NAME, "outputs/images", "outputs/audio", video_path)
+    if len(sys.argv) < 2:
+        print("Uso: python main.py palavra_ou_frase  ou  python main.py --testAudio")
+        exit(1)
 
-print("\n✅ VÍDEO FINAL GERADO:")
-print(video_path)
-print(f"📄 JSON correspondente: {json_path}")
\ No newline at end of file
+    try:
+        generate_word(sys.argv[1])
+    except PipelineStageError as e:
+        print(e)
+        sys.exit(1)
@@ -3,6 +3,8 @@ import os
 import json
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 BATCH_DIRECTORY = r"C:\Users\leand\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\EKF - English Knowledge Framework - Base\TermsReadyToBeCreated"
@@ -20,6 +22,23 @@ VIDEO_OUTPUT_PATHS = [
 
 MAIN_SCRIPT = "main.py"
 
+# ============================================================
+# MODO DE EXECUÇÃO
+# ============================================================
+
+# True  → importa o pipeline uma vez e processa várias palavras em paralelo
+# False → modo legado: um subprocesso "python main.py <palavra>" por termo
+IN_PROCESS = True
+
+# Script Groq + imagem + TTS (I/O-bound → threads)
+MEDIA_WORKERS = 3
+
+# Encode do vídeo (CPU-bound → processos)
+VIDEO_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# register_history é chamado de várias threads
+_history_lock = threading.Lock()
+
 def load_history_terms():
     """
     Retorna apenas termos que foram gerados com sucesso.
@@ -103,11 +122,17 @@ def load_pending():
 
     return unique_terms
 
-def register_history(term: str, success: bool, error_message: str = None):
+def register_history(term: str, success: bool, error_message: str = None, stage: str = None):
     """
     Registra ou atualiza histórico.
     Se já existir registro, atualiza.
+    stage indica a etapa que falhou (script/image/audio/video).
     """
+    with _history_lock:
+        _register_history_locked(term, success, error_message, stage)
+
+
+def _register_history_locked(term, success, error_message, stage):
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -132,6 +157,7 @@ def register_history(term: str, success: bool, error_message: str = None):
             existing["error"] = True
             existing["errorDetail"] = {
                 "dt": now,
+                "stage": stage,
                 "msgError": error_message
             }
     else:
@@ -144,6 +170,7 @@ def register_history(term: str, success: bool, error_message: str = None):
         if not success:
             record["errorDetail"] = {
                 "dt": now,
+                "stage": stage,
                 "msgError": error_message
             }
 
@@ -163,8 +190,12 @@ def normalize_term(term: str) -> str:
 
 VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".avi", ".webm"}
 
-def term_already_generated(term: str) -> bool:
-    normalized = normalize_term(term)
+def build_generated_index() -> dict:
+    """
+    Varre VIDEO_OUTPUT_PATHS uma única vez.
+    Retorna {nome_normalizado: caminho_do_video}.
+    """
+    index = {}
 
     for base_path in VIDEO_OUTPUT_PATHS:
         if not os.path.exists(base_path):
@@ -174,10 +205,22 @@ def term_already_generated(term: str) -> bool:
             for file in files:
                 name, ext = os.path.splitext(file.lower())
 
-                if name == normalized and ext in VIDEO_EXTENSIONS:
-                    print(f" 🔁 JÁ EXISTE → '{term}' encontrado em:")
-                    print(f"    {os.path.join(root, file)}")
-                    return True
+                if ext in VIDEO_EXTENSIONS:
+                    index.setdefault(name, os.path.join(root, file))
+
+    return index
+
+
+def term_already_generated(term: str, generated_index: dict = None) -> bool:
+    if generated_index is None:
+        generated_index = build_generated_index()
+
+    found = generated_index.get(normalize_term(term))
+
+    if found:
+        print(f" 🔁 JÁ EXISTE → '{term}' encontrado em:")
+        print(f"    {found}")
+        return True
 
     return False
 
@@ -216,6 +259,80 @@ def run_word(word):
     except Exception as e:
         return False, str(e)
     
+def _render_video_job(safe_name):
+    """
+    Executado nos processos do VIDEO_WORKERS.
+    Importa apenas o builder de vídeo (sem SDKs Groq/Gemini/TTS).
+    """
+    from generate_video import build_video
+
+    video_path = f"outputs/videos/{safe_name}.mp4"
+    build_video(safe_name, "outputs/images", "outputs/audio", video_path)
+
+    return video_path
+
+
+def run_words_in_process(words):
+    """
+    Engine em processo único:
+      - MEDIA_WORKERS threads fazem script + imagem + áudio
+      - VIDEO_WORKERS processos fazem o encode assim que a mídia fica pronta
+    Falhas são registradas no histórico (com a etapa) e não param a fila.
+    Retorna a lista de termos que falharam.
+    """
+    import main as pipeline   # import único de moviepy/Groq/Gemini/pydub
+
+    failed = []
+    total = len(words)
+    done = 0
+
+    def _fail(word, stage, error):
+        failed.append(word)
+        print(f" Erro ao processar: {word} [{stage}]")
+        print(" Motivo:", error)
+        register_history(word, False, str(error), stage=stage)
+
+    with ThreadPoolExecutor(max_workers=MEDIA_WORKERS) as media_pool, \
+         ProcessPoolExecutor(max_workers=VIDEO_WORKERS) as video_pool:
+
+        media_futures = {
+            media_pool.submit(pipeline.prepare_media, word): word
+            for word in words
+        }
+
+        video_futures = {}
+
+        for future in as_completed(media_futures):
+            word = media_futures[future]
+
+            try:
+                safe_name = future.result()
+            except Exception as e:
+                _fail(word, getattr(e, "stage", "media"), e)
+                done += 1
+                print_progress(done, total, word)
+                continue
+
+            print(f" 🎞️  Mídia pronta → enfileirando encode: {word}")
+            video_futures[video_pool.submit(_render_video_job, safe_name)] = word
+
+        for future in as_completed(video_futures):
+            word = video_futures[future]
+            done += 1
+
+            try:
+                video_path = future.result()
+            except Exception as e:
+                _fail(word, "video", e)
+            else:
+                print(f"Concluído: {word} → {video_path}")
+                register_history(word, True)
+
+            print_progress(done, total, word)
+
+    return failed
+
+
 def print_progress(current, total, word):
     """
     Barra de progresso simples no console.
@@ -245,34 +362,46 @@ def run_batch():
 
     print(f" {len(pending)} itens encontrados na lista.\n")
 
-    still_pending = []
-
-    total = len(pending)
+    # --------------------------------------------
+    # VERIFICAÇÃO DE REDUNDÂNCIA (ANTI-CUSTO)
+    # --------------------------------------------
+    generated_index = build_generated_index()
 
-    for index, word in enumerate(pending, start=1):
-        # --------------------------------------------
-        # VERIFICAÇÃO DE REDUNDÂNCIA (ANTI-CUSTO)
-        # --------------------------------------------
-        if term_already_generated(word):
+    to_process = []
+    for word in pending:
+        if term_already_generated(word, generated_index):
             print(f" ⏭️  Pulando '{word}' (já processado anteriormente)\n")
             continue
+        to_process.append(word)
 
-        print_progress(index, total, word)
-        success, error_msg = run_word(word)
+    if IN_PROCESS:
+        print(f" ⚙️  Modo em processo: {MEDIA_WORKERS} workers de mídia, {VIDEO_WORKERS} de vídeo\n")
+        still_pending = run_words_in_process(to_process)
 
-        if success:
-            print(f"Concluído: {word}")
-            register_history(word, True)
-        else:
-            print(f" Erro ao processar: {word}")
-            print(" Motivo:", error_msg)
-            register_history(word, False, error_msg)
-            break
+    else:
+        still_pending = []
+        total = len(to_process)
+
+        for index, word in enumerate(to_process, start=1):
+            print_progress(index, total, word)
+            success, error_msg = run_word(word)
+
+            if success:
+                print(f"Concluído: {word}")
+                register_history(word, True)
+            else:
+                # registra e segue: o termo volta na próxima execução
+                print(f" Erro ao processar: {word}")
+                print(" Motivo:", error_msg)
+                register_history(word, False, error_msg)
+                still_pending.append(word)
 
     if not still_pending:
         print("\n Todos os vídeos foram gerados com sucesso!")
     else:
-        print("\n PROCESSAMENTO INTERROMPIDO — ainda restam itens no pending!")
+        print(f"\n {len(still_pending)} termo(s) falharam e serão reprocessados na próxima execução:")
+        for word in still_pending:
+            print(f"   - {word}")
 
     # Hora de término
     end = datetime.now()
@@ -1,9 +1,23 @@
 from groq import Groq
 import os
+import sys
 import logging
 
+_SCRIPTS_PYTHON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+if _SCRIPTS_PYTHON_DIR not in sys.path:
+    sys.path.insert(0, _SCRIPTS_PYTHON_DIR)
+
+from llm_cache import get_default_cache, DAY
+
 GROQ_KEY_PATH = r"C:\Users\leand\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\EKF - English Knowledge Framework - Base\FilesHelper\secret_tokens_keys\groq_api_key.txt"
 
+GROQ_MODEL = "openai/gpt-oss-20b"
+
+# Traduções de termos são estáveis → cache persistente de longa duração
+CACHE_TTL = 365 * DAY
+CACHE_TAG = "term_translator"
+
 _client = None
 _cache = {}
 
@@ -18,20 +32,30 @@ def _get_client():
 def translate_to_english(text: str) -> str:
     """
     Tradução resiliente:
+    - Consulta primeiro o cache em memória e depois o cache em disco
     - Se Groq falhar, retorna o termo original
     - Nunca quebra o pipeline
     """
     if text in _cache:
         return _cache[text]
 
+    prompt = f"Translate to English only, no punctuation, no commentary:\n{text}"
+    messages = [{"role": "user", "content": prompt}]
+
+    disk_cache = get_default_cache()
+    cache_key = disk_cache.make_key(GROQ_MODEL, messages, 0)
+
+    cached = disk_cache.get(cache_key, tag=CACHE_TAG)
+    if cached:
+        _cache[text] = cached
+        return cached
+
     try:
         client = _get_client()
 
-        prompt = f"Translate to English only, no punctuation, no commentary:\n{text}"
-
         response = client.chat.completions.create(
-            model="openai/gpt-oss-20b",
-            messages=[{"role": "user", "content": prompt}],
+            model=GROQ_MODEL,
+            messages=messages,
             temperature=0,
             timeout=10
         )
@@ -40,12 +64,13 @@ def translate_to_english(text: str) -> str:
 
         if translated:
             _cache[text] = translated
+            disk_cache.set(cache_key, translated, ttl=CACHE_TTL, tag=CACHE_TAG)
             return translated
 
     except Exception as e:
         print(f"⚠️ [Groq] Falha ao traduzir '{text}'. Usando original.")
         print(f"    Motivo: {e}")
 
-    # fallback seguro
+    # fallback seguro (não vai para o disco: tenta de novo na próxima execução)
     _cache[text] = text.lower()
     return text.lower()
@@ -10,7 +10,12 @@ REGRAS:
 - Podem existir com ou sem prefixo 'uploaded_'
 - Apenas histórias COM termos são classificadas
 - Story + termos ficam na MESMA pasta
-- Arquivos são SEMPRE COPIADOS
+- Termos de QUALQUER tamanho (1, 2, 3+ palavras) são reconhecidos:
+  um autômato Aho-Corasick (por palavra) com todos os vídeos é
+  montado uma vez e cada legenda é lida em UMA passada
+- Legendas são processadas em paralelo (pool de processos)
+- Materialização: -mode link (padrão) tenta hardlink → reflink →
+  cópia; -mode copy mantém a cópia completa
 
 ====================================================================================
 """
@@ -20,7 +25,10 @@ import json
 import shutil
 import re
 import argparse
-from typing import Dict, List, Set, Optional
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Optional, Sequence
 
 # =========================================================
 # CONFIGURAÇÕES (PATHS MANTIDOS)
@@ -42,6 +50,9 @@ CLASSIFIED_BASE = os.path.join(OUTPUT_BASE, "ClassifiedsHistories")
 
 VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi")
 
+# Abaixo disso o pool de processos custa mais do que economiza
+MIN_STORIES_FOR_POOL = 8
+
 # =========================================================
 # UTILIDADES
 # =========================================================
@@ -63,6 +74,10 @@ def normalize_video_name(filename: str) -> str:
         base = base[len("uploaded_"):]
     return base.lower()
 
+def base_to_words(base: str) -> List[str]:
+    """'give_up' → ['give', 'up'] (mesma normalização da legenda)."""
+    return normalize(base.replace("_", " ")).split()
+
 def extract_story_id_from_subtitle(filename: str) -> Optional[str]:
     name = filename.lower()
     if ".en." in name:
@@ -95,30 +110,89 @@ def build_video_index(paths: List[str]) -> Dict[str, str]:
     return index
 
 # =========================================================
-# FASE 1 — EXTRAÇÃO DE TERMOS DA LEGENDA
+# AUTÔMATO DE TERMOS (AHO-CORASICK POR PALAVRA)
+# =========================================================
+
+class TermAutomaton:
+    """
+    Todos os termos (sequências de palavras) num único autômato.
+
+    find() percorre a legenda UMA vez, palavra a palavra, e
+    devolve as bases de vídeo encontradas — custo proporcional
+    ao tamanho da legenda, não ao número de vídeos indexados.
+    Como os símbolos são palavras inteiras, "art" não casa
+    dentro de "start".
+    """
+
+    def __init__(self, patterns: Dict[str, Sequence[str]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[tuple] = [()]
+
+        for base, words in patterns.items():
+            if words:
+                self._insert(base, words)
+
+        self._build_fail_links()
+
+    def _insert(self, base: str, words: Sequence[str]):
+        node = 0
+        for w in words:
+            nxt = self.goto[node].get(w)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][w] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            node = nxt
+        self.out[node] += (base,)
+
+    def _build_fail_links(self):
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for w, child in self.goto[node].items():
+                queue.append(child)
+
+                f = self.fail[node]
+                while f and w not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(w, 0)
+
+                # saídas do sufixo: "up" termina dentro de "give up"
+                self.out[child] += self.out[self.fail[child]]
+
+    def find(self, words: Sequence[str]) -> Set[str]:
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        found: Set[str] = set()
+
+        for w in words:
+            while node and w not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(w, 0)
+            if out[node]:
+                found.update(out[node])
+
+        return found
+
+    @classmethod
+    def from_video_index(cls, video_index: Dict[str, str]) -> "TermAutomaton":
+        return cls({base: base_to_words(base) for base in video_index})
+
+# =========================================================
+# FASE 1 — EXTRAÇÃO DE PALAVRAS DA LEGENDA
 # =========================================================
 
-def extract_terms_from_subtitle(path: str) -> Set[str]:
+def read_subtitle_words(path: str) -> List[str]:
     with open(path, "r", encoding="utf-8") as f:
         content = f.read()
 
     # remove timestamps e números
     content = re.sub(r"\d+\n\d{2}:\d{2}:\d{2},\d{3} --> .*", " ", content)
-    content = normalize(content)
-
-    words = content.split()
-    terms: Set[str] = set()
-
-    # unigrams
-    terms.update(words)
-
-    # bigrams
-    terms.update(
-        f"{a} {b}"
-        for a, b in zip(words, words[1:])
-    )
-
-    return terms
+    return normalize(content).split()
 
 # =========================================================
 # FASE 2 — INDEXAÇÃO DAS HISTÓRIAS
@@ -160,18 +234,35 @@ def build_stories(limit: Optional[int]) -> List[Dict]:
 # FASE 3 — MATCHING TERMOS ↔ VÍDEOS
 # =========================================================
 
-def match_terms_to_videos(stories: List[Dict], video_index: Dict[str, str]) -> List[Dict]:
+# Autômato do processo worker (enviado uma vez por processo, não por legenda)
+_WORKER_AUTOMATON: Optional[TermAutomaton] = None
+
+def _init_worker(automaton: TermAutomaton):
+    global _WORKER_AUTOMATON
+    _WORKER_AUTOMATON = automaton
+
+def _match_subtitle(path: str) -> Set[str]:
+    return _WORKER_AUTOMATON.find(read_subtitle_words(path))
+
+def match_terms_to_videos(stories: List[Dict], automaton: TermAutomaton,
+                          workers: Optional[int] = None) -> List[Dict]:
     log("\n🔹 FASE 2 — Relacionando termos aos vídeos")
     result = []
 
-    for story in stories:
-        extracted_terms = extract_terms_from_subtitle(story["subtitle_path"])
+    paths = [story["subtitle_path"] for story in stories]
+    workers = workers or os.cpu_count() or 1
 
-        matched_videos = {
-            base for base in video_index
-            if base in extracted_terms
-        }
+    if workers > 1 and len(paths) >= MIN_STORIES_FOR_POOL:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(automaton,)
+        ) as pool:
+            matches = list(pool.map(_match_subtitle, paths, chunksize=8))
+    else:
+        matches = [automaton.find(read_subtitle_words(p)) for p in paths]
 
+    for story, matched_videos in zip(stories, matches):
         if not matched_videos:
             continue
 
@@ -190,18 +281,52 @@ def match_terms_to_videos(stories: List[Dict], video_index: Dict[str, str]) -> L
 # FASE 4 — MATERIALIZAÇÃO
 # =========================================================
 
-def materialize(mapping: List[Dict], video_index: Dict[str, str]):
-    log("\n🔹 FASE 3 — Copiando arquivos")
+def link_or_copy(src: str, dst: str, mode: str) -> str:
+    """mode link: hardlink → reflink (cp --reflink) → cópia. Retorna o método usado."""
+    if mode == "link":
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+
+        if os.name != "nt":
+            result = subprocess.run(
+                ["cp", "--reflink=always", src, dst],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            if result.returncode == 0:
+                return "reflink"
+
+    shutil.copy2(src, dst)
+    return "cópia"
+
+def same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+def materialize(mapping: List[Dict], video_index: Dict[str, str], mode: str = "link"):
+    log(f"\n🔹 FASE 3 — Materializando arquivos (modo {mode})")
     ensure_dir(CLASSIFIED_BASE)
 
+    methods: Dict[str, int] = {}
+
     for item in mapping:
         story_dir = os.path.join(CLASSIFIED_BASE, item["story_id"])
         ensure_dir(story_dir)
 
-        shutil.copy2(
-            item["story_video_path"],
-            os.path.join(story_dir, os.path.basename(item["story_video_path"]))
-        )
+        story_src = item["story_video_path"]
+        story_dest = os.path.join(story_dir, os.path.basename(story_src))
+
+        # a história é sempre atualizada (exceto se já for o mesmo arquivo)
+        if not same_file(story_src, story_dest):
+            if os.path.exists(story_dest):
+                os.remove(story_dest)
+            method = link_or_copy(story_src, story_dest, mode)
+            methods[method] = methods.get(method, 0) + 1
 
         for base in item["terms_video_bases"]:
             src = video_index.get(base)
@@ -210,9 +335,11 @@ def materialize(mapping: List[Dict], video_index: Dict[str, str]):
 
             dest = os.path.join(story_dir, os.path.basename(src))
             if not os.path.exists(dest):
-                shutil.copy2(src, dest)
+                method = link_or_copy(src, dest, mode)
+                methods[method] = methods.get(method, 0) + 1
 
-    log("✅ Classificação concluída")
+    summary = ", ".join(f"{m}: {n}" for m, n in sorted(methods.items())) or "nada novo"
+    log(f"✅ Classificação concluída ({summary})")
 
 # =========================================================
 # MAIN
@@ -221,18 +348,22 @@ def materialize(mapping: List[Dict], video_index: Dict[str, str]):
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("-limit", type=int)
+    parser.add_argument("-workers", type=int, help="processos para ler as legendas (padrão: nº de CPUs)")
+    parser.add_argument("-mode", choices=("link", "copy"), default="link",
+                        help="link: hardlink/reflink sem ocupar disco extra; copy: cópia completa")
     args = parser.parse_args()
 
     ensure_dir(OUTPUT_BASE)
 
     video_index = build_video_index(MAKEMOVIE_VIDEO_PATHS)
+    automaton = TermAutomaton.from_video_index(video_index)
     stories = build_stories(args.limit)
-    mapping = match_terms_to_videos(stories, video_index)
+    mapping = match_terms_to_videos(stories, automaton, args.workers)
 
     with open(os.path.join(OUTPUT_BASE, "stories_terms_map.json"), "w", encoding="utf-8") as f:
         json.dump(mapping, f, indent=2, ensure_ascii=False)
 
-    materialize(mapping, video_index)
+    materialize(mapping, video_index, args.mode)
 
     log("\n  PROCESSO FINALIZADO COM SUCESSO")
 
@@ -1,12 +1,243 @@
-import whisper
+import math
 import os
+import re
+import wave
+import numpy as np
 from utils.time_format import format_srt_time
 
 _model = None
 
-def generate_srt(audio_path: str, output_srt: str) -> None:
+# --------------------------------------------------
+# ALINHAMENTO (texto conhecido → tempos)
+# --------------------------------------------------
+# O áudio é gerado por TTS a partir de um texto que já
+# conhecemos: não é preciso reconhecer fala, só descobrir
+# ONDE cada frase cai. A energia do WAV separa fala de
+# silêncio; cada fronteira entre frases é ancorada numa
+# pausa detectada (o TTS pausa entre frases), escolhendo
+# as pausas por programação dinâmica: em ordem, perto da
+# posição esperada pelo tamanho do texto. Só a fronteira
+# sem pausa por perto é estimada pela proporção.
+# --------------------------------------------------
+
+ALIGN_FRAME_MS = 20          # janela de análise de energia
+ALIGN_SILENCE_RATIO = 0.08   # < 8% do RMS típico = silêncio
+ALIGN_MIN_SILENCE_MS = 250   # pausas menores não separam trechos
+# Custo (s) de deixar uma fronteira sem pausa: fim de frase
+# quase sempre tem pausa; quebra no meio da frase, raramente
+ALIGN_SENTENCE_PENALTY_S = 1.5
+ALIGN_CHUNK_PENALTY_S = 0.3
+SUBTITLE_MAX_WORDS = 12
+
+
+def _read_wav_mono(audio_path: str):
+    with wave.open(audio_path, "rb") as wf:
+        rate = wf.getframerate()
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+
+    if width != 2:
+        raise ValueError("alinhamento suporta apenas WAV 16-bit")
+
+    samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    return samples, rate
+
+
+def _speech_regions(samples, rate):
+    """Trechos [(início_s, fim_s)] com fala, pela energia RMS."""
+    frame = max(1, int(rate * ALIGN_FRAME_MS / 1000))
+    count = len(samples) // frame
+    if count == 0:
+        return []
+
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt((frames ** 2).mean(axis=1))
+
+    threshold = np.percentile(rms, 90) * ALIGN_SILENCE_RATIO
+    voiced = rms > threshold
+
+    regions = []
+    start = None
+    silence = 0
+    min_gap = ALIGN_MIN_SILENCE_MS // ALIGN_FRAME_MS
+
+    for i, v in enumerate(voiced):
+        if v:
+            if start is None:
+                start = i
+            silence = 0
+        elif start is not None:
+            silence += 1
+            if silence >= min_gap:
+                regions.append((start, i - silence + 1))
+                start = None
+                silence = 0
+
+    if start is not None:
+        regions.append((start, count - silence))
+
+    step = ALIGN_FRAME_MS / 1000
+    return [(a * step, b * step) for a, b in regions if b > a]
+
+
+def _split_phrases(text: str):
+    """
+    [(frase, fim_de_sentença)] do roteiro, em blocos equilibrados
+    de até SUBTITLE_MAX_WORDS.
+    """
+    phrases = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        words = sentence.split()
+        if not words:
+            continue
+        size = math.ceil(len(words) / math.ceil(len(words) / SUBTITLE_MAX_WORDS))
+        for i in range(0, len(words), size):
+            phrases.append((" ".join(words[i:i + size]), i + size >= len(words)))
+    return phrases
+
+
+def _anchor_boundaries(expected, penalties, gap_positions):
+    """
+    Liga cada fronteira (posição esperada, em tempo só-fala) a
+    no máximo uma pausa, em ordem, minimizando a distância +
+    a penalidade das fronteiras que ficam sem pausa.
+    Retorna [índice_da_pausa | None] por fronteira.
+    """
+    n, m = len(expected), len(gap_positions)
+    INF = float("inf")
+
+    # cost[i][j]: melhor custo das fronteiras i.. usando pausas j..
+    cost = [[INF] * (m + 1) for _ in range(n + 1)]
+    choice = [[None] * (m + 1) for _ in range(n + 1)]
+    for j in range(m + 1):
+        cost[n][j] = 0.0
+
+    for i in range(n - 1, -1, -1):
+        for j in range(m, -1, -1):
+            best, pick = penalties[i] + cost[i + 1][j], "none"
+            if j < m:
+                anchored = abs(expected[i] - gap_positions[j]) + cost[i + 1][j + 1]
+                if anchored < best:
+                    best, pick = anchored, "gap"
+                if cost[i][j + 1] < best:
+                    best, pick = cost[i][j + 1], "skip"
+            cost[i][j], choice[i][j] = best, pick
+
+    anchors = []
+    i = j = 0
+    while i < n:
+        pick = choice[i][j]
+        if pick == "skip":
+            j += 1
+        elif pick == "gap":
+            anchors.append(j)
+            i += 1
+            j += 1
+        else:
+            anchors.append(None)
+            i += 1
+
+    return anchors
+
+
+def align_text(audio_path: str, text: str):
+    """
+    [(início_s, fim_s, frase)] para o texto falado no áudio.
+    Fronteiras ancoradas nas pausas: a legenda começa quando a
+    fala da frase começa e termina quando ela termina.
+    """
+    samples, rate = _read_wav_mono(audio_path)
+    regions = _speech_regions(samples, rate)
+    phrases = _split_phrases(text)
+
+    if not regions or not phrases:
+        return []
+
+    # Linha do tempo "só fala" (silêncios removidos)
+    offsets = [0.0]
+    for a, b in regions:
+        offsets.append(offsets[-1] + b - a)
+    speech_total = offsets[-1]
+
+    def to_real_time(pos):
+        for (a, b), before in zip(regions, offsets):
+            if pos <= before + (b - a):
+                return a + max(0.0, pos - before)
+        return regions[-1][1]
+
+    # Posição esperada de cada fronteira, pela proporção de caracteres
+    weights = [len(p) for p, _ in phrases]
+    scale = speech_total / sum(weights)
+    expected, acc = [], 0.0
+    for w in weights[:-1]:
+        acc += w * scale
+        expected.append(acc)
+
+    penalties = [
+        ALIGN_SENTENCE_PENALTY_S if ends else ALIGN_CHUNK_PENALTY_S
+        for _, ends in phrases[:-1]
+    ]
+
+    # Pausa j fica entre regions[j] e regions[j + 1]
+    anchors = _anchor_boundaries(expected, penalties, offsets[1:-1])
+
+    # Posição só-fala de cada fronteira: ancorada = a da pausa;
+    # solta = interpolada pelo texto entre as âncoras vizinhas
+    marks = [(0, 0.0)] + [
+        (i + 1, offsets[j + 1]) for i, j in enumerate(anchors) if j is not None
+    ] + [(len(phrases), speech_total)]
+    cum = [0]
+    for w in weights:
+        cum.append(cum[-1] + w)
+
+    positions = []
+    for i in range(1, len(phrases)):
+        (k0, p0), (k1, p1) = next(
+            (lo, hi) for lo, hi in zip(marks, marks[1:]) if lo[0] <= i <= hi[0]
+        )
+        share = (cum[i] - cum[k0]) / ((cum[k1] - cum[k0]) or 1)
+        positions.append(p0 + (p1 - p0) * share)
+
+    # Tempo real: fronteira numa pausa → fim do trecho anterior /
+    # início do próximo; fronteira solta → mesmo instante nos dois
+    starts = [regions[0][0]]
+    ends = []
+    for pos, j in zip(positions, anchors):
+        if j is not None:
+            ends.append(regions[j][1])
+            starts.append(regions[j + 1][0])
+        else:
+            t = to_real_time(pos)
+            ends.append(t)
+            starts.append(t)
+    ends.append(regions[-1][1])
+
+    return [(s, e, p) for s, e, (p, _) in zip(starts, ends, phrases)]
+
+
+# --------------------------------------------------
+# SRT
+# --------------------------------------------------
+
+def _write_srt(cues, output_srt: str) -> None:
+    os.makedirs(os.path.dirname(output_srt), exist_ok=True)
+
+    with open(output_srt, "w", encoding="utf-8") as f:
+        for i, (start, end, text) in enumerate(cues, start=1):
+            f.write(f"{i}\n")
+            f.write(f"{format_srt_time(start)} --> {format_srt_time(end)}\n")
+            f.write(f"{text.strip()}\n\n")
+
+
+def _transcribe_whisper(audio_path: str):
     global _model
 
+    import whisper
+
     if _model is None:
         _model = whisper.load_model("base")
 
@@ -16,14 +247,26 @@ def generate_srt(audio_path: str, output_srt: str) -> None:
         language="en"
     )
 
-    os.makedirs(os.path.dirname(output_srt), exist_ok=True)
+    return [
+        (seg["start"], seg["end"], seg["text"])
+        for seg in result["segments"]
+    ]
 
-    with open(output_srt, "w", encoding="utf-8") as f:
-        for i, seg in enumerate(result["segments"], start=1):
-            start = format_srt_time(seg["start"])
-            end = format_srt_time(seg["end"])
-            text = seg["text"].strip()
 
-            f.write(f"{i}\n")
-            f.write(f"{start} --> {end}\n")
-            f.write(f"{text}\n\n")
+def generate_srt(audio_path: str, output_srt: str, text: str = None) -> None:
+    """
+    Com o texto do roteiro: alinha o texto exato ao áudio (sem Whisper).
+    Sem texto (ou se o alinhamento falhar): transcreve com Whisper.
+    """
+    cues = []
+
+    if text:
+        try:
+            cues = align_text(audio_path, text)
+        except Exception as e:
+            print(f"   ⚠ Alinhamento falhou ({e}), usando Whisper")
+
+    if not cues:
+        cues = _transcribe_whisper(audio_path)
+
+    _write_srt(cues, output_srt)
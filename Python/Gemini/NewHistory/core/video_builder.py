@@ -1,6 +1,7 @@
 from moviepy.editor import VideoClip, AudioFileClip
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
+import bisect
 import os
 import re
 
@@ -102,6 +103,30 @@ def draw_subtitle(frame: Image.Image, text: str, font: ImageFont.FreeTypeFont):
     return img.convert("RGB")
 
 
+# --------------------------------------------------
+# BUSCA DE SEGMENTO (bisect)
+# --------------------------------------------------
+
+def find_segment(starts, segments, t):
+    """
+    Índice do segmento ativo em t (ou None).
+    Em empate na fronteira (fim de um == início do próximo)
+    vale o anterior, como na varredura linear original.
+    """
+    i = bisect.bisect_right(starts, t) - 1
+
+    if i < 0:
+        return None
+
+    if i > 0 and segments[i - 1][1] >= t:
+        return i - 1
+
+    if segments[i][1] >= t:
+        return i
+
+    return None
+
+
 # --------------------------------------------------
 # VIDEO BUILDER
 # --------------------------------------------------
@@ -132,22 +157,36 @@ def build_video(
         subtitle_style["font_size"]
     )
 
+    # SELO (topo direito) aplicado UMA vez no fundo
+    base = bg.convert("RGBA")
+    base.alpha_composite(
+        badge,
+        (VIDEO_W - badge.width - 30, 30)
+    )
+
+    plain_frame = np.array(base.convert("RGB"))
+
+    # Segmentos ordenados por início → busca por bisect
+    segments = sorted(segments, key=lambda seg: seg[0])
+    starts = [seg[0] for seg in segments]
+
+    # O MoviePy pede os quadros em ordem: basta guardar o quadro
+    # do segmento atual (legenda desenhada uma vez por segmento)
+    rendered = {"index": None, "frame": plain_frame}
+
     def make_frame(t):
-        frame = bg.copy().convert("RGBA")
+        index = find_segment(starts, segments, t)
 
-        # SELO (topo direito)
-        frame.alpha_composite(
-            badge,
-            (VIDEO_W - badge.width - 30, 30)
-        )
+        if index is None:
+            return plain_frame
 
-        # LEGENDA
-        for s, e, text in segments:
-            if s <= t <= e:
-                frame = draw_subtitle(frame, text, font)
-                break
+        if rendered["index"] != index:
+            rendered["index"] = index
+            rendered["frame"] = np.array(
+                draw_subtitle(base, segments[index][2], font)
+            )
 
-        return np.array(frame)
+        return rendered["frame"]
 
     video = (
         VideoClip(make_frame, duration=audio.duration)
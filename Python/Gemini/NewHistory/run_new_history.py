@@ -157,7 +157,7 @@ for idx, story in enumerate(stories, start=1):
         # 2️⃣ LEGENDA
         # -----------------------------
         print("   📝 Gerando legenda...")
-        generate_srt(audio_path, srt_path)
+        generate_srt(audio_path, srt_path, text=text)
 
         # -----------------------------
         # 3️⃣ IMAGEM (GEMINI)
@@ -1,60 +1,55 @@
 # C:\dev\scripts\ScriptsUteis\.venv\Scripts\Activate.ps1
+#
+# Gera os MP3 de todos os JSONs de WordBank_Vocabulary no
+# mesmo processo (sem copiar para textos.json nem abrir um
+# interpretador por arquivo).
+#
+# 1. Coleta as frases de TODOS os JSONs
+# 2. Sintetiza uma única vez as que ainda não estão no cache
+# 3. Monta o MP3 de cada JSON só com clipes do cache
 import os
-import shutil
-import subprocess
-import sys
+import json
+
+from MakeMp3 import coletar_tts, gerar_mp3
+from tts_cache import TTSCache
 
 # Caminhos base
 base_dir = os.path.dirname(os.path.abspath(__file__))
-fileSource_dir = os.path.join(base_dir, "WordBank_Vocabulary")  # pasta de origem 
-textos_json = os.path.join(base_dir, "textos.json")
-make_mp3_script = os.path.join(base_dir, "MakeMp3.py")
-audios_juntos = os.path.join(base_dir, "audios", "juntos")
-
-# Garantir que a pasta de saída exista
-os.makedirs(audios_juntos, exist_ok=True)
+fileSource_dir = os.path.join(base_dir, "WordBank_Vocabulary")  # pasta de origem
+audios_dir = os.path.join(base_dir, "audios")
 
 # Lista todos os arquivos JSON na pasta BNN Book words
 arquivos = [f for f in os.listdir(fileSource_dir) if f.endswith(".json")]
 arquivos.sort()  # organiza pela ordem alfabética
 
+conteudos = {}
 for arquivo in arquivos:
-    caminho_origem = os.path.join(fileSource_dir, arquivo)
-
-    print(f"\n[PROCESSANDO] {arquivo}...")
-
-    # Copiar conteúdo para textos.json
-    shutil.copy(caminho_origem, textos_json)
-    print(f"✔ Copiado {arquivo} para textos.json")
+    try:
+        with open(os.path.join(fileSource_dir, arquivo), "r", encoding="utf-8") as f:
+            conteudos[arquivo] = json.load(f)
+    except Exception as e:
+        print(f"Erro ao carregar {arquivo}: {e}")
 
-    # Executar MakeMp3.py no mesmo interpretador (venv)
-    result = subprocess.run(
-        [sys.executable, make_mp3_script],
-        capture_output=True,
-        text=True
-    )
+cache = TTSCache()
 
-    if result.returncode == 0:
-        print(f"✔ MakeMp3.py executado com sucesso para {arquivo}")
+# Uma passada de rede para a unidade inteira (só frases únicas)
+pedidos = [p for conteudo in conteudos.values() for p in coletar_tts(conteudo)]
+print(f"[TTS] {len(pedidos)} clipes pedidos, {len(set(pedidos))} únicos")
+cache.prefetch(pedidos)
+print(f"[TTS] {cache.synthesized} sintetizados agora")
 
-        # Nome esperado do arquivo de saída padrão (gerado pelo MakeMp3.py)
-        mp3_saida = os.path.join(audios_juntos, "Unit9_Frases_TodosTempos.mp3")
-
-        # Nome novo baseado no JSON de origem
-        unidade_nome = arquivo.replace(".json", "_TodosTempos.mp3")
-        mp3_destino = os.path.join(audios_juntos, unidade_nome)
-
-        # Se o arquivo de saída existir, renomeia/move
-        if os.path.exists(mp3_saida):
-            # Se já existir um destino com o mesmo nome, remove para evitar conflito
-            if os.path.exists(mp3_destino):
-                os.remove(mp3_destino)
+for arquivo, conteudo in conteudos.items():
+    print(f"\n[PROCESSANDO] {arquivo}...")
 
-            shutil.move(mp3_saida, mp3_destino)
-            print(f"Arquivo salvo como: {mp3_destino}")
-        else:
-            print("⚠ Não encontrei o MP3 gerado. Verifique o MakeMp3.py")
+    # Nome baseado no JSON de origem
+    unidade_nome = arquivo.replace(".json", "_TodosTempos")
 
-    else:
+    try:
+        gerados = gerar_mp3(conteudo, cache, audios_dir, modo="juntos", nome_juntos=unidade_nome)
+        for mp3 in gerados:
+            print(f"Arquivo salvo como: {mp3}")
+    except Exception as e:
         print(f"Erro ao processar {arquivo}")
-        print(result.stderr)
+        print(e)
+
+print(f"\n✅ Concluído. TTS: {cache.synthesized} sintetizados, {cache.hits} reaproveitados do cache")
@@ -43,7 +43,7 @@ Funcionalidades principais:
 - Arquivo de entrada:
     textos.json → contém frases e configurações
 - Estrutura de saída:
-    audios/<timestamp>/
+    audios/
         ├── separados/  (arquivos por tempo/seção)
         ├── juntos/     (arquivo consolidado)
         └── frases/     (quando output_mode = "frases")
@@ -83,6 +83,10 @@ C:\dev\scripts\ScriptsUteis\.venv\Scripts\Activate.ps1
 4. Os arquivos serão gerados em:
     audios/<data_hora_execucao>/
 
+Frases, labels e anúncios ficam em cache (.cache/tts, ver
+tts_cache.py): só frases nunca sintetizadas vão para a rede.
+Para vários JSONs de uma vez use BatchMakeMp3.py.
+
 ---------------------------------------------------------------
 📂 Saídas esperadas
 ---------------------------------------------------------------
@@ -105,10 +109,11 @@ C:\dev\scripts\ScriptsUteis\.venv\Scripts\Activate.ps1
 
 
 import os
+import copy
 import json
-from gtts import gTTS
+
+from tts_cache import TTSCache, TTSRecorder, concat_segments
 from pydub import AudioSegment
-from datetime import datetime
 
 # =========================================================
 # Configurações padrão
@@ -139,48 +144,26 @@ section_labels = {
     "Instrucoesadicionais": "Instruções adicionais para estudo"
 }
 
+# Labels e anúncios: voz normal, sem aceleração
+LABEL_SPEED = 2
+
 # =========================================================
 # Funções auxiliares
 # =========================================================
 
-def setVoiceSpeed(audio, nivel: int) -> AudioSegment:
-    if nivel <= 1:
-        return audio
-    elif nivel == 2:
-        return audio
-    else:
-        fator = 1.0 + (nivel - 2) * 0.25
-        return audio.speedup(playback_speed=fator)
-
-def build_tts(text: str, lang: str, velocidade: int, temp_file: str) -> AudioSegment | None:
+def build_tts(text: str, lang: str, velocidade: int, cache) -> AudioSegment | None:
     if not text.strip():
         return None
-    use_slow = velocidade == 1
-    tts = gTTS(text=text, lang=lang, slow=use_slow)
-    tts.save(temp_file)
-    audio = AudioSegment.from_mp3(temp_file)
-    return setVoiceSpeed(audio, velocidade)
+    return cache.get(lang, text, velocidade)
 
-def build_label(lang: str, output_dir: str, tempo: str, idx: str) -> AudioSegment | None:
+def build_label(lang: str, cache) -> AudioSegment | None:
     label_text = labels.get(lang)
     if not label_text:
         return None
-    temp_file = os.path.join(output_dir, f"tmp_label_{tempo}_{idx}.mp3")
-    gTTS(text=label_text, lang=lang, slow=False).save(temp_file)
-    return AudioSegment.from_mp3(temp_file)
-
-def generate_intro(text: str, output_dir: str, nome: str) -> AudioSegment:
-    temp_file = os.path.join(output_dir, f"tmp_anuncio_{nome}.mp3")
-    gTTS(text=text, lang="pt", slow=False).save(temp_file)
-    return AudioSegment.from_mp3(temp_file)
-
-def tempClear(output_dir: str):
-    for f in os.listdir(output_dir):
-        if f.startswith("tmp_") and f.endswith(".mp3"):
-            try:
-                os.remove(os.path.join(output_dir, f))
-            except:
-                pass
+    return cache.get(lang, label_text, LABEL_SPEED)
+
+def generate_intro(text: str, cache) -> AudioSegment:
+    return cache.get("pt", text, LABEL_SPEED)
 
 def check_lang(item) -> str:
     if isinstance(item, dict) and "lang" in item:
@@ -193,7 +176,41 @@ def check_lang(item) -> str:
 # Processamento principal de blocos
 # =========================================================
 
-def processar_bloco(frases, tempo: str, base_dir: str, config_estudo: dict, velocidades: dict) -> list:
+def adicionar_trecho(destino: list, trecho: dict, config_estudo: dict, velocidades: dict, cache) -> bool:
+    """Label + repetições + pausa de uma frase. False se não houver áudio."""
+    lang = trecho["lang"]
+    text = trecho.get("text", "").strip()
+    if not text:
+        return False
+
+    # 🆕 Suporte a VoiceSpeed
+    velocidade = trecho.get("VoiceSpeed", velocidades.get(lang, 2))
+
+    if config_estudo.get("usar_labels", False):
+        label_audio = build_label(lang, cache)
+        if label_audio:
+            destino.append(label_audio)
+
+    audio = build_tts(text, lang, velocidade, cache)
+    if not audio:
+        return False
+
+    rep = trecho.get("repeat", config_estudo.get("repeat_each", {}).get(lang, 1))
+    for r in range(rep):
+        destino.append(audio)
+        if rep > 1 and r < rep - 1:
+            destino.append(AudioSegment.silent(duration=config_estudo.get("pausa_repeticao", 400)))
+
+    if "pause" in trecho:
+        destino.append(AudioSegment.silent(duration=trecho["pause"]))
+
+    return True
+
+def processar_bloco(frases, tempo: str, config_estudo: dict, velocidades: dict, cache) -> list:
+    """
+    Lista plana de trechos da seção, na ordem de reprodução.
+    A junção é feita uma única vez por concat_segments().
+    """
     partes = []
 
     for idx, item in enumerate(frases, start=1):
@@ -205,169 +222,167 @@ def processar_bloco(frases, tempo: str, base_dir: str, config_estudo: dict, velo
 
         # Frase mista (lista de trechos)
         elif isinstance(item, list):
-            subpartes = []
-            for sub_idx, trecho in enumerate(item, start=1):
+            for trecho in item:
                 if "pause" in trecho and "text" not in trecho:
-                    subpartes.append(AudioSegment.silent(duration=trecho["pause"]))
+                    bloco.append(AudioSegment.silent(duration=trecho["pause"]))
                 else:
-                    lang = trecho["lang"]
-                    text = trecho.get("text", "").strip()
-                    if not text:
-                        continue
+                    adicionar_trecho(bloco, trecho, config_estudo, velocidades, cache)
 
-                    # 🆕 Suporte a VoiceSpeed
-                    velocidade = trecho.get("VoiceSpeed", velocidades.get(lang, 2))
+        # Frase simples
+        elif isinstance(item, dict) and "lang" in item and "text" in item:
+            if not adicionar_trecho(bloco, item, config_estudo, velocidades, cache):
+                continue
 
-                    temp_file = os.path.join(base_dir, f"tmp_{tempo}_{idx}_{sub_idx}.mp3")
+        else:
+            continue
 
-                    if config_estudo.get("usar_labels", False):
-                        label_audio = build_label(lang, base_dir, tempo, f"{idx}_{sub_idx}")
-                        if label_audio:
-                            subpartes.append(label_audio)
+        partes.extend(bloco)
 
-                    audio = build_tts(text, lang, velocidade, temp_file)
-                    if not audio:
-                        continue
+        if config_estudo.get("pausa_entre_idiomas") and idx < len(frases):
+            partes.append(AudioSegment.silent(duration=config_estudo["pausa_entre_idiomas"]))
 
-                    rep = trecho.get("repeat", config_estudo.get("repeat_each", {}).get(lang, 1))
-                    for r in range(rep):
-                        subpartes.append(audio)
-                        if rep > 1 and r < rep - 1:
-                            subpartes.append(AudioSegment.silent(duration=config_estudo.get("pausa_repeticao", 400)))
+    return partes
 
-                    if "pause" in trecho:
-                        subpartes.append(AudioSegment.silent(duration=trecho["pause"]))
+# =========================================================
+# Geração de um JSON
+# =========================================================
 
-            bloco.append(sum(subpartes))
+SECOES_RESERVADAS = ("introducao", "Instrucoesadicionais", "velocidades", "repeat_each", "nome_arquivos")
+
+def carregar_config(conteudo: dict):
+    # deepcopy: no batch o mesmo processo gera vários JSONs
+    config_estudo = copy.deepcopy(default_config)
+    velocidades = default_voiceSpeed.copy()
+
+    if "velocidades" in conteudo:
+        velocidades.update(conteudo["velocidades"])
+    if "repeat_each" in conteudo:
+        config_estudo["repeat_each"].update(conteudo["repeat_each"])
+    if "introducao" in conteudo:
+        config_estudo["introducao"] = conteudo["introducao"]
+    if "nome_arquivos" in conteudo:
+        config_estudo["nome_arquivos"] = conteudo["nome_arquivos"]
+
+    return config_estudo, velocidades
+
+def listar_secoes(conteudo: dict) -> list:
+    secoes = []
+    if "Instrucoesadicionais" in conteudo:
+        secoes.append(("Instrucoesadicionais", conteudo["Instrucoesadicionais"]))
+    for tempo, frases in conteudo.items():
+        if tempo in SECOES_RESERVADAS:
+            continue
+        secoes.append((tempo, frases))
+    return secoes
 
-        # Frase simples
-        elif isinstance(item, dict) and "lang" in item and "text" in item:
-            lang = item["lang"]
-            text = item.get("text", "").strip()
-            if not text:
-                continue
+def montar_secoes(conteudo: dict, cache):
+    """Percorre o JSON pedindo cada clipe ao cache. Retorna (intro, [(tempo, partes)])."""
+    config_estudo, velocidades = carregar_config(conteudo)
 
-            # 🆕 Suporte a VoiceSpeed
-            velocidade = item.get("VoiceSpeed", velocidades.get(lang, 2))
+    introducao_audio = None
+    if config_estudo.get("introducao"):
+        introducao_audio = generate_intro(config_estudo["introducao"], cache)
 
-            temp_file = os.path.join(base_dir, f"tmp_{tempo}_{idx}.mp3")
+    secoes = []
+    for tempo, frases in listar_secoes(conteudo):
+        partes = []
 
-            if config_estudo.get("usar_labels", False):
-                label_audio = build_label(lang, base_dir, tempo, idx)
-                if label_audio:
-                    bloco.append(label_audio)
+        if config_estudo.get("anunciar_tempo", False):
+            nome_amigavel = section_labels.get(tempo, tempo)
+            anuncio_audio = generate_intro(f"Iniciando: {nome_amigavel}", cache)
+            if anuncio_audio:
+                partes.append(anuncio_audio)
 
-            audio = build_tts(text, lang, velocidade, temp_file)
-            if not audio:
-                continue
+        partes.extend(processar_bloco(frases, tempo, config_estudo, velocidades, cache))
+        secoes.append((tempo, partes))
 
-            rep = item.get("repeat", config_estudo.get("repeat_each", {}).get(lang, 1))
-            for r in range(rep):
-                bloco.append(audio)
-                if rep > 1 and r < rep - 1:
-                    bloco.append(AudioSegment.silent(duration=config_estudo.get("pausa_repeticao", 400)))
+    return introducao_audio, secoes
 
-            if "pause" in item:
-                bloco.append(AudioSegment.silent(duration=item["pause"]))
+def coletar_tts(conteudo: dict) -> list:
+    """Todas as (lang, text, velocidade) que o JSON vai pedir ao TTS."""
+    recorder = TTSRecorder()
+    montar_secoes(conteudo, recorder)
+    return recorder.requests
 
-        else:
-            continue
+def gerar_mp3(conteudo: dict, cache: TTSCache, base_dir: str = "audios",
+              modo: str = output_mode, nome_juntos: str | None = None) -> list:
+    """
+    Gera os MP3 de um JSON já carregado. Retorna os arquivos gerados.
+    nome_juntos substitui o nome do consolidado (usado pelo batch).
+    """
+    config_estudo, _ = carregar_config(conteudo)
 
-        partes.append(sum(bloco))
+    separados_dir = os.path.join(base_dir, "separados")
+    juntos_dir = os.path.join(base_dir, "juntos")
+    frases_dir = os.path.join(base_dir, "frases")
 
-        if config_estudo.get("pausa_entre_idiomas") and idx < len(frases):
-            partes.append(AudioSegment.silent(duration=config_estudo["pausa_entre_idiomas"]))
+    if modo in ("separado", "ambos"):
+        os.makedirs(separados_dir, exist_ok=True)
+    if modo in ("juntos", "ambos"):
+        os.makedirs(juntos_dir, exist_ok=True)
+    if modo == "frases":
+        os.makedirs(frases_dir, exist_ok=True)
 
-    return partes
+    # Uma passada de rede só com as frases que faltam no cache
+    cache.prefetch(coletar_tts(conteudo))
 
-# =========================================================
-# Execução principal
-# =========================================================
+    introducao_audio, secoes = montar_secoes(conteudo, cache)
 
-try:
-    with open("textos.json", "r", encoding="utf-8") as f:
-        conteudo = json.load(f)
-except Exception as e:
-    print(f"Erro ao carregar JSON: {e}")
-    exit(1)
-
-config_estudo = default_config.copy()
-velocidades = default_voiceSpeed.copy()
-
-if "velocidades" in conteudo:
-    velocidades.update(conteudo["velocidades"])
-if "repeat_each" in conteudo:
-    config_estudo["repeat_each"].update(conteudo["repeat_each"])
-if "introducao" in conteudo:
-    config_estudo["introducao"] = conteudo["introducao"]
-if "nome_arquivos" in conteudo:
-    config_estudo["nome_arquivos"] = conteudo["nome_arquivos"]
-
-# Criar pastas
-timestamp = datetime.now().strftime("%Y%m%d%H%M")
-base_dir = os.path.join("audios")
-separados_dir = os.path.join(base_dir, "separados")
-juntos_dir = os.path.join(base_dir, "juntos")
-frases_dir = os.path.join(base_dir, "frases")
-
-if output_mode in ("separado", "ambos"):
-    os.makedirs(separados_dir, exist_ok=True)
-if output_mode in ("juntos", "ambos"):
-    os.makedirs(juntos_dir, exist_ok=True)
-if output_mode == "frases":
-    os.makedirs(frases_dir, exist_ok=True)
-
-todos_tempos = []
-
-# Introdução
-introducao_audio = None
-if config_estudo.get("introducao"):
-    introducao_audio = generate_intro(config_estudo["introducao"], base_dir, "intro")
-
-# Seções
-secoes = []
-if "Instrucoesadicionais" in conteudo:
-    secoes.append(("Instrucoesadicionais", conteudo["Instrucoesadicionais"]))
-for tempo, frases in conteudo.items():
-    if tempo in ("introducao", "Instrucoesadicionais", "velocidades", "repeat_each", "nome_arquivos"):
-        continue
-    secoes.append((tempo, frases))
-
-# Processar
-for tempo, frases in secoes:
-    print(f"Gerando áudio para: {tempo}...")
+    # Os trechos já montados seguram o áudio; os clipes soltos
+    # não servem ao próximo JSON (lote) e só ocupariam memória
+    cache.clear_memory()
 
-    partes = []
+    gerados = []
+    todos_tempos = []
 
-    if config_estudo.get("anunciar_tempo", False):
-        nome_amigavel = section_labels.get(tempo, tempo)
-        anuncio_audio = generate_intro(f"Iniciando: {nome_amigavel}", base_dir, tempo)
-        partes.append(anuncio_audio)
+    for tempo, partes in secoes:
+        print(f"Gerando áudio para: {tempo}...")
 
-    partes.extend(processar_bloco(frases, tempo, base_dir, config_estudo, velocidades))
+        if not partes:
+            continue
 
-    if partes:
-        combinado = sum(partes)
+        combinado = concat_segments(partes)
 
-        if output_mode in ("separado", "ambos"):
+        if modo in ("separado", "ambos"):
             prefixo = config_estudo.get("nome_arquivos") or tempo
             final_file = os.path.join(separados_dir, f"{prefixo}_{tempo}.mp3")
             combinado.export(final_file, format="mp3")
+            gerados.append(final_file)
             print(f"Arquivo gerado: {final_file}")
 
-        if output_mode in ("juntos", "ambos"):
+        if modo in ("juntos", "ambos"):
             todos_tempos.append(combinado)
 
-    tempClear(base_dir)
+    # Consolidado
+    if modo in ("juntos", "ambos") and todos_tempos:
+        combinado_total = concat_segments([introducao_audio] + todos_tempos)
+        prefixo = nome_juntos or config_estudo.get("nome_arquivos") or "TodosTemposVerbais_VozGoogle"
+        final_all = os.path.join(juntos_dir, f"{prefixo}.mp3")
+        combinado_total.export(final_all, format="mp3")
+        gerados.append(final_all)
+        print(f"Arquivo final: {final_all}")
+
+    return gerados
+
+# =========================================================
+# Execução principal
+# =========================================================
+
+def main():
+    try:
+        with open("textos.json", "r", encoding="utf-8") as f:
+            conteudo = json.load(f)
+    except Exception as e:
+        print(f"Erro ao carregar JSON: {e}")
+        exit(1)
+
+    base_dir = os.path.join("audios")
+
+    cache = TTSCache()
+    gerar_mp3(conteudo, cache, base_dir)
 
-# Consolidado
-if output_mode in ("juntos", "ambos") and todos_tempos:
-    combinado_total = sum(todos_tempos)
-    if introducao_audio:
-        combinado_total = introducao_audio + combinado_total
-    prefixo = config_estudo.get("nome_arquivos") or "TodosTemposVerbais_VozGoogle"
-    final_all = os.path.join(juntos_dir, f"{prefixo}.mp3")
-    combinado_total.export(final_all, format="mp3")
-    print(f"Arquivo final: {final_all}")
+    print(f"TTS: {cache.synthesized} sintetizados, {cache.hits} reaproveitados do cache")
+    print("✅ Concluído! Arquivos salvos em:", base_dir)
 
-print("✅ Concluído! Arquivos salvos em:", base_dir)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
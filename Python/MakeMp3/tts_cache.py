@@ -0,0 +1,214 @@
+"""
+===============================================================
+ Script: tts_cache.py
+ Autor: Leandro
+===============================================================
+
+Cache persistente de clipes TTS + concatenação linear, usados
+por MakeMp3.py e BatchMakeMp3.py.
+
+- Cada clipe é identificado por (engine, lang, text, speed)
+  e guardado já com a velocidade aplicada, em WAV
+  (.cache/tts/<sha1>.wav) → reler não precisa de ffmpeg
+  nem de rede.
+- prefetch() sintetiza de uma vez, em paralelo, só as
+  frases que ainda não estão no cache (só grava em disco,
+  não guarda os clipes em memória).
+- Em memória ficam só os clipes do JSON em montagem:
+  gerar_mp3() chama clear_memory() ao terminar cada um.
+- concat_segments() junta N trechos num único buffer PCM
+  pré-alocado, em vez de sum() (que recopia o áudio
+  acumulado a cada soma → custo quadrático).
+===============================================================
+"""
+
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pydub import AudioSegment
+
+# =========================================================
+# Configurações
+# =========================================================
+
+ENGINE = "gtts"
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tts")
+
+# gTTS é limitado por rede: algumas chamadas em paralelo bastam
+TTS_WORKERS = 4
+
+# =========================================================
+# Síntese
+# =========================================================
+
+def setVoiceSpeed(audio, nivel: int) -> AudioSegment:
+    if nivel <= 1:
+        return audio
+    elif nivel == 2:
+        return audio
+    else:
+        fator = 1.0 + (nivel - 2) * 0.25
+        return audio.speedup(playback_speed=fator)
+
+
+def _synthesize(lang: str, text: str, velocidade: int) -> AudioSegment:
+    from gtts import gTTS
+
+    tmp_file = os.path.join(CACHE_DIR, f"tmp_{threading.get_ident()}.mp3")
+    gTTS(text=text, lang=lang, slow=velocidade == 1).save(tmp_file)
+    try:
+        audio = AudioSegment.from_mp3(tmp_file)
+    finally:
+        os.remove(tmp_file)
+
+    return setVoiceSpeed(audio, velocidade)
+
+# =========================================================
+# Cache
+# =========================================================
+
+class TTSCache:
+    """
+    Clipes prontos em memória (do JSON em montagem) e em disco
+    (entre execuções). Seguro entre threads.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, engine: str = ENGINE):
+        self.cache_dir = cache_dir
+        self.engine = engine
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.synthesized = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, lang: str, text: str, velocidade: int) -> str:
+        raw = "\x1f".join((self.engine, lang, text, str(velocidade)))
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    def get(self, lang: str, text: str, velocidade: int) -> AudioSegment | None:
+        """Clipe da frase (sintetiza só se nunca foi gerado)."""
+        text = text.strip()
+        if not text:
+            return None
+
+        key = (lang, text, velocidade)
+        with self._lock:
+            if key in self._memory:
+                self.hits += 1
+                return self._memory[key]
+
+        path = self._path(lang, text, velocidade)
+
+        if os.path.exists(path):
+            audio = AudioSegment.from_wav(path)
+            hit = True
+        else:
+            audio = self._store(path, lang, text, velocidade)
+            hit = False
+
+        with self._lock:
+            self._memory[key] = audio
+            if hit:
+                self.hits += 1
+
+        return audio
+
+    def _store(self, path: str, lang: str, text: str, velocidade: int) -> AudioSegment:
+        audio = _synthesize(lang, text, velocidade)
+        # .tmp + replace: execução interrompida não deixa WAV truncado
+        tmp = path + ".tmp"
+        audio.export(tmp, format="wav")
+        os.replace(tmp, path)
+
+        with self._lock:
+            self.synthesized += 1
+
+        return audio
+
+    def _ensure(self, lang: str, text: str, velocidade: int):
+        """Garante o WAV em disco, sem decodificar nem guardar em memória."""
+        path = self._path(lang, text, velocidade)
+        if not os.path.exists(path):
+            self._store(path, lang, text, velocidade)
+
+    def clear_memory(self):
+        """Descarta os clipes em memória (o cache em disco continua)."""
+        with self._lock:
+            self._memory.clear()
+
+    def prefetch(self, requests, workers: int = TTS_WORKERS):
+        """
+        Garante no cache todas as (lang, text, velocidade) pedidas.
+        Frases repetidas viram uma única chamada de rede.
+        Só o cache em disco é preenchido: num lote, manter em
+        memória os clipes de todos os JSONs estouraria a RAM.
+        """
+        unique = {
+            (lang, text.strip(), velocidade)
+            for lang, text, velocidade in requests
+            if text and text.strip()
+        }
+        if not unique:
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda r: self._ensure(*r), sorted(unique)))
+
+
+class TTSRecorder:
+    """
+    Mesmo contrato de TTSCache.get(), mas só anota o pedido.
+    Permite descobrir todas as frases de um JSON (pelo mesmo
+    código que monta o áudio) antes de sintetizar qualquer uma.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, lang: str, text: str, velocidade: int):
+        self.requests.append((lang, text, velocidade))
+        return None
+
+# =========================================================
+# Concatenação
+# =========================================================
+
+def concat_segments(segments) -> AudioSegment:
+    """
+    Equivalente a sum(segments), mas copiando cada trecho uma
+    única vez para um buffer pré-alocado.
+    Formatos diferentes são igualados ao maior (como o pydub faz).
+    """
+    segments = [s for s in segments if s is not None]
+    if not segments:
+        return AudioSegment.empty()
+
+    frame_rate = max(s.frame_rate for s in segments)
+    channels = max(s.channels for s in segments)
+    sample_width = max(s.sample_width for s in segments)
+
+    normalized = []
+    for s in segments:
+        if s.frame_rate != frame_rate:
+            s = s.set_frame_rate(frame_rate)
+        if s.channels != channels:
+            s = s.set_channels(channels)
+        if s.sample_width != sample_width:
+            s = s.set_sample_width(sample_width)
+        normalized.append(s)
+
+    buffer = bytearray(sum(len(s.raw_data) for s in normalized))
+    view = memoryview(buffer)
+    pos = 0
+    for s in normalized:
+        data = s.raw_data
+        view[pos:pos + len(data)] = data
+        pos += len(data)
+
+    return normalized[0]._spawn(bytes(buffer))
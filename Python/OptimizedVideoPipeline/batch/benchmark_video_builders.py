@@ -0,0 +1,89 @@
+import os
+import sys
+import math
+import time
+import wave
+import struct
+import argparse
+import tempfile
+
+# ============================================================
+# GARANTIR ROOT NO PATH
+# ============================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from engine.project_root import get_project_root
+from engine.video.video_builder import BUILDERS, get_builder
+from engine.video.ffmpeg_builder import audio_duration
+
+ROOT = get_project_root()
+
+DEFAULT_IMAGE = ROOT / "Assets" / "default_bg.png"
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def make_test_wav(path: str, seconds: float, rate: int = 24000):
+    """WAV mono 16-bit (tom de 440 Hz), no mesmo formato do áudio do Gemini."""
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        sample = int(8000 * math.sin(2 * math.pi * 440 * i / rate))
+        frames += struct.pack("<h", sample)
+
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara o tempo de encode dos builders de vídeo (moviepy x ffmpeg)."
+    )
+    parser.add_argument("--image", default=str(DEFAULT_IMAGE))
+    parser.add_argument("--audio", help="WAV de entrada (padrão: tom sintético)")
+    parser.add_argument("--seconds", type=float, default=60, help="duração do WAV sintético")
+    # o primeiro builder da lista é a referência da comparação
+    parser.add_argument("--builders", nargs="+", default=["moviepy", "ffmpeg"], choices=BUILDERS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio = args.audio
+        if not audio:
+            audio = os.path.join(tmp, "benchmark.wav")
+            make_test_wav(audio, args.seconds)
+
+        duration = audio_duration(audio)
+        print(f"🖼️ Imagem: {args.image}")
+        print(f"🎤 Áudio : {audio} ({duration:.1f}s)" if duration else f"🎤 Áudio : {audio}")
+        print()
+
+        results = []
+        for name in args.builders:
+            output = os.path.join(tmp, f"benchmark_{name}.mp4")
+
+            start = time.perf_counter()
+            get_builder(name)("benchmark", args.image, audio, output)
+            elapsed = time.perf_counter() - start
+
+            size_mb = os.path.getsize(output) / (1024 * 1024)
+            results.append((name, elapsed, size_mb))
+            print(f"⏱️ {name:<8} {elapsed:8.2f}s  {size_mb:6.2f} MB")
+
+    if len(results) > 1:
+        base = results[0][1]
+        print()
+        for name, elapsed, _ in results[1:]:
+            print(f"🚀 {name}: {base / elapsed:.1f}x mais rápido que {results[0][0]}")
+
+
+if __name__ == "__main__":
+    main()
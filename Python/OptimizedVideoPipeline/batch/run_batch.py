@@ -7,8 +7,20 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
+from process_word import process_word
+from stage_runner import StageRunner
+
 CREATE_LATER = Path("CreateLater.json")
 
+
+def save_pending(pending):
+    # grava via arquivo temporário: um crash nunca deixa o JSON pela metade
+    tmp = CREATE_LATER.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"pending": pending}, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, CREATE_LATER)
+
+
 with open(CREATE_LATER, "r", encoding="utf-8") as f:
     pending = json.load(f).get("pending", [])
 
@@ -16,11 +28,27 @@ if not pending:
     print("ℹ️ Nada para processar.")
     sys.exit(0)
 
-for word in pending:
+runner = StageRunner()
+failed = []
+
+for word in list(pending):
     print(f"▶ Processando: {word}")
-    os.system(f'{sys.executable} batch/process_word.py "{word}"')
 
-with open(CREATE_LATER, "w", encoding="utf-8") as f:
-    json.dump({"pending": []}, f, indent=2, ensure_ascii=False)
+    try:
+        process_word(word, runner)
+    except Exception as e:
+        # artefatos já gerados ficam no manifesto → próxima execução retoma daqui
+        print(f"❌ Falha em '{word}': {e}")
+        failed.append(word)
+        continue
+
+    # remove do CreateLater apenas o que terminou com sucesso
+    pending.remove(word)
+    save_pending(pending)
 
-print("✅ Batch concluído.")
+if failed:
+    print(f"⚠️ Batch concluído com {len(failed)} falha(s); mantidas no CreateLater.json:")
+    for word in failed:
+        print(f"   - {word}")
+else:
+    print("✅ Batch concluído.")
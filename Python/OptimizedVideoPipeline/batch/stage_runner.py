@@ -0,0 +1,277 @@
+"""
+=========================================================
+ Script: stage_runner.py
+ Objetivo:
+   - Executar o pipeline text → audio / image → video
+     como um grafo de etapas retomável
+   - Cada etapa grava seu artefato em media/ e registra
+     no manifesto (media/manifest.json) o hash do conteúdo
+     e o hash das entradas que o produziram
+   - Na reexecução, etapas com artefato válido são puladas
+     (nenhuma chamada paga ao Groq/Gemini é refeita)
+   - Etapas independentes (audio e image) rodam em paralelo
+=========================================================
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from engine.project_root import get_project_root
+
+# ============================================================
+# ROOT / PATHS
+# ============================================================
+
+ROOT = get_project_root()
+
+MEDIA_DIR = ROOT / "media"
+MANIFEST_PATH = MEDIA_DIR / "manifest.json"
+
+STAGE_WORKERS = 2
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def sha256_file(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_json(data) -> str:
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_settings(name: str) -> dict:
+    path = ROOT / "settings" / f"{name}.json"
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ============================================================
+# MANIFESTO
+# ============================================================
+
+class Manifest:
+    """
+    media/manifest.json
+
+    {
+      "<safe>": {
+        "word": "...",
+        "stages": {
+          "text": {
+            "status": "done" | "failed",
+            "artifact": "media/videos/<safe>.json",
+            "sha256": "...",
+            "inputs": "...",
+            "finished_at": "..."
+          }
+        }
+      }
+    }
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {}
+
+        if path.exists():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except Exception:
+                self.data = {}
+
+    def get(self, safe: str, stage: str) -> dict:
+        return self.data.get(safe, {}).get("stages", {}).get(stage, {})
+
+    def record(self, safe: str, word: str, stage: str, entry: dict):
+        with self._lock:
+            item = self.data.setdefault(safe, {"word": word, "stages": {}})
+            item["word"] = word
+            item["stages"][stage] = entry
+            self._save_locked()
+
+    def _save_locked(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+# ============================================================
+# ETAPAS
+#
+# Cada etapa recebe o contexto (word, safe, artefatos já
+# prontos) e devolve o caminho do artefato gerado.
+# Imports dos engines são feitos dentro das etapas: só quem
+# realmente roda carrega o SDK correspondente.
+# ============================================================
+
+def _stage_text(ctx) -> str:
+    from engine.text.groq_text_generator import generate_text
+
+    lesson = generate_text(ctx["word"])
+
+    output = MEDIA_DIR / "videos" / f"{ctx['safe']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(lesson, f, ensure_ascii=False, indent=2)
+
+    return str(output)
+
+
+def _stage_audio(ctx) -> str:
+    from engine.audio.gemini_audio_generator import generate_audio
+
+    with open(ctx["artifacts"]["text"], encoding="utf-8") as f:
+        lesson = json.load(f)
+
+    print("🎤 Gerando áudio...")
+    return generate_audio(lesson, ctx["safe"])
+
+
+def _stage_image(ctx) -> str:
+    print("🖼️ Gerando imagem...")
+
+    if load_settings("pipeline").get("enable_image_ai", True):
+        from engine.image.gemini_image_generator import generate_image
+        return generate_image(ctx["safe"])
+
+    from engine.image.fixed_image_provider import get_fixed_image
+    return get_fixed_image()
+
+
+def _stage_video(ctx) -> str:
+    from engine.video.video_builder import build_video
+
+    print("🎬 Montando vídeo...")
+    build_video(ctx["safe"], ctx["artifacts"]["image"], ctx["artifacts"]["audio"])
+
+    return str(MEDIA_DIR / "videos" / f"{ctx['safe']}.mp4")
+
+
+# nome → (dependências, função, settings que entram no hash das entradas)
+STAGES = {
+    "text":  ((),                 _stage_text,  ("groq",)),
+    "image": ((),                 _stage_image, ("pipeline", "gemini_image")),
+    "audio": (("text",),          _stage_audio, ("gemini_audio",)),
+    "video": (("audio", "image"), _stage_video, ("moviepy",)),
+}
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+
+class StageRunner:
+
+    def __init__(self, manifest: Manifest = None, workers: int = STAGE_WORKERS):
+        self.manifest = manifest or Manifest()
+        self.workers = workers
+
+    def _inputs_hash(self, stage: str, ctx) -> str:
+        deps, _, settings = STAGES[stage]
+        return sha256_json({
+            "stage": stage,
+            "word": ctx["word"],
+            "deps": {d: ctx["hashes"][d] for d in deps},
+            "settings": {name: load_settings(name) for name in settings}
+        })
+
+    def _valid_artifact(self, safe: str, stage: str, inputs: str):
+        """Retorna o registro se o artefato existe, bate o hash e as entradas."""
+        entry = self.manifest.get(safe, stage)
+
+        if entry.get("status") != "done" or entry.get("inputs") != inputs:
+            return None
+
+        artifact = entry.get("artifact")
+        if not artifact or not os.path.exists(artifact):
+            return None
+
+        if sha256_file(artifact) != entry.get("sha256"):
+            return None
+
+        return entry
+
+    def _run_stage(self, stage: str, ctx) -> str:
+        safe, word = ctx["safe"], ctx["word"]
+        inputs = self._inputs_hash(stage, ctx)
+
+        cached = self._valid_artifact(safe, stage, inputs)
+        if cached:
+            print(f"   ⏭️  [{stage}] artefato válido → pulando ({cached['artifact']})")
+            ctx["hashes"][stage] = cached["sha256"]
+            return cached["artifact"]
+
+        _, func, _ = STAGES[stage]
+
+        try:
+            artifact = func(ctx)
+        except Exception as e:
+            self.manifest.record(safe, word, stage, {
+                "status": "failed",
+                "inputs": inputs,
+                "error": str(e),
+                "finished_at": datetime.now().isoformat(timespec="seconds")
+            })
+            raise
+
+        digest = sha256_file(artifact)
+        ctx["hashes"][stage] = digest
+
+        self.manifest.record(safe, word, stage, {
+            "status": "done",
+            "artifact": artifact,
+            "sha256": digest,
+            "inputs": inputs,
+            "finished_at": datetime.now().isoformat(timespec="seconds")
+        })
+
+        print(f"   ✔ [{stage}] {artifact}")
+        return artifact
+
+    def run(self, word: str, safe: str) -> dict:
+        """
+        Executa o grafo para uma palavra.
+        Retorna {etapa: artefato}. Propaga a primeira exceção.
+        """
+        ctx = {"word": word, "safe": safe, "artifacts": {}, "hashes": {}}
+
+        remaining = dict(STAGES)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while remaining or running:
+
+                # dispara todas as etapas cujas dependências já terminaram
+                for stage, (deps, _, _) in list(remaining.items()):
+                    if all(d in ctx["artifacts"] for d in deps):
+                        running[pool.submit(self._run_stage, stage, ctx)] = stage
+                        del remaining[stage]
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage = running.pop(future)
+                    # exceção aqui cancela o resto; o manifesto já guardou o que terminou
+                    ctx["artifacts"][stage] = future.result()
+
+        return ctx["artifacts"]
@@ -0,0 +1,82 @@
+import json
+import shutil
+import subprocess
+import wave
+from engine.project_root import get_project_root
+
+ROOT = get_project_root()
+
+cfg = json.load(
+    open(ROOT / "settings" / "moviepy.json", encoding="utf-8")
+)
+
+# ============================================================
+# FFMPEG
+# ------------------------------------------------------------
+# O vídeo é uma única imagem parada sobre o áudio: em vez de
+# empurrar milhares de quadros RGB idênticos pelo Python
+# (moviepy), o ffmpeg repete a imagem e multiplexa o WAV.
+# ============================================================
+
+def get_ffmpeg_bin() -> str:
+    """
+    Ordem: settings/moviepy.json → ffmpeg do PATH → binário
+    que acompanha o moviepy (imageio-ffmpeg).
+    """
+    configured = cfg.get("ffmpeg_bin")
+    if configured:
+        return configured
+
+    found = shutil.which("ffmpeg")
+    if found:
+        return found
+
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def audio_duration(audio: str):
+    """Duração do WAV em segundos (None se não for WAV legível)."""
+    try:
+        with wave.open(audio, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+def build_video(word: str, image: str, audio: str, output: str = None):
+    output = output or str(ROOT / "media" / "videos" / f"{word}.mp4")
+
+    # A imagem é decodificada UMA vez e repetida pelo filtro loop
+    # (com "-loop 1" o ffmpeg redecodifica o PNG a cada quadro).
+    # yuv420p exige largura/altura pares.
+    video_filter = (
+        "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p,"
+        f"loop=loop=-1:size=1:start=0,fps={cfg['fps']}"
+    )
+
+    cmd = [
+        get_ffmpeg_bin(),
+        "-y",
+        "-loglevel", "error",
+        "-i", str(image),
+        "-i", str(audio),
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-vf", video_filter,
+        "-c:v", cfg["codec"],
+        "-tune", "stillimage",
+        "-preset", cfg.get("ffmpeg_preset", "veryfast"),
+        "-c:a", cfg["audio_codec"],
+    ]
+
+    duration = audio_duration(audio)
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    else:
+        cmd += ["-shortest"]
+
+    cmd += ["-movflags", "+faststart", output]
+
+    subprocess.run(cmd, check=True)
+    return output
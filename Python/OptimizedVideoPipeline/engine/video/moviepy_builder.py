@@ -8,13 +8,13 @@ cfg = json.load(
     open(ROOT / "settings" / "moviepy.json", encoding="utf-8")
 )
 
-def build_video(word: str, image: str, audio: str):
+def build_video(word: str, image: str, audio: str, output: str = None):
     bg = ImageClip(image)
     aud = AudioFileClip(audio)
 
     video = bg.set_audio(aud).set_duration(aud.duration)
 
-    output = ROOT / "media" / "videos" / f"{word}.mp4"
+    output = output or str(ROOT / "media" / "videos" / f"{word}.mp4")
 
     video.write_videofile(
         str(output),
@@ -22,3 +22,5 @@ def build_video(word: str, image: str, audio: str):
         codec=cfg["codec"],
         audio_codec=cfg["audio_codec"]
     )
+
+    return output
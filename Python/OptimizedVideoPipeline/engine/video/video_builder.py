@@ -0,0 +1,30 @@
+import json
+from engine.project_root import get_project_root
+
+ROOT = get_project_root()
+
+cfg = json.load(
+    open(ROOT / "settings" / "moviepy.json", encoding="utf-8")
+)
+
+# "ffmpeg" (rápido, imagem parada) ou "moviepy" (original)
+BUILDERS = ("ffmpeg", "moviepy")
+
+
+def get_builder(name: str = None):
+    """Retorna a função build_video do builder escolhido em settings/moviepy.json."""
+    name = name or cfg.get("builder", "moviepy")
+
+    if name == "ffmpeg":
+        from engine.video.ffmpeg_builder import build_video
+        return build_video
+
+    if name == "moviepy":
+        from engine.video.moviepy_builder import build_video
+        return build_video
+
+    raise ValueError(f"Builder de vídeo desconhecido: {name} (use {', '.join(BUILDERS)})")
+
+
+def build_video(word: str, image: str, audio: str, output: str = None):
+    return get_builder()(word, image, audio, output)
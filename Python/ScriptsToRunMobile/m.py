@@ -8,13 +8,13 @@ import os
 import json
 import random
 import requests
-import urllib.parse
 import threading
 import webbrowser
 import re
-from http.server import SimpleHTTPRequestHandler, HTTPServer
 from datetime import datetime
 
+from media_server import MediaIndex, media_url, start_server
+
 # ============================================================
 # CONFIG
 # ============================================================
@@ -23,6 +23,7 @@ HOST = "127.0.0.1"
 PORT = 8000
 
 CACHE_FILE = "./media_search_cache.json"
+MEDIA_INDEX_FILE = "./media_index.json"
 OUTPUT_HTML = "index.html"
 
 # -------- MEDIA PATHS --------
@@ -42,10 +43,6 @@ GROQ_MODEL = "openai/gpt-oss-20b"
 
 from groq_keys_loader import GROQ_KEYS
 
-# -------- MEDIA --------
-
-MEDIA_EXT = (".mp4", ".mov", ".mp3", ".wav", ".aac", ".flac", ".ogg")
-
 # ============================================================
 # TERMINAL COLORS
 # ============================================================
@@ -56,20 +53,13 @@ RED = "\033[91m"
 CYAN = "\033[96m"
 RESET = "\033[0m"
 
-# ============================================================
-# HTTP SERVER
-# ============================================================
-
-class MediaHandler(SimpleHTTPRequestHandler):
-    def translate_path(self, path):
-        if path.startswith("/media/"):
-            return urllib.parse.unquote(path.replace("/media/", ""))
-        return super().translate_path(path)
-
 # ============================================================
 # CACHE
 # ============================================================
 
+# buscas pela página chegam em threads do servidor
+_CACHE_LOCK = threading.Lock()
+
 def load_cache():
     if not os.path.exists(CACHE_FILE):
         return {}
@@ -172,8 +162,9 @@ def ensure_video_info(video_key: str, cache: dict) -> dict:
         print(f"{YELLOW}⚠️ IA falhou:{RESET}", ex)
 
     data["updated_at"] = datetime.now().isoformat()
-    cache[video_key] = data
-    save_cache(cache)
+    with _CACHE_LOCK:
+        cache[video_key] = data
+        save_cache(cache)
 
     return data
 
@@ -181,70 +172,35 @@ def ensure_video_info(video_key: str, cache: dict) -> dict:
 # BUSCA DE MÍDIA (COM DEDUPLICAÇÃO)
 # ============================================================
 
-def search_media(paths, term):
-    matches = []
-    seen_files = set()
-
-    for base in paths:
-        if not os.path.exists(base):
-            continue
-
-        for root, _, files in os.walk(base):
-            for f in files:
-                fname = f.lower()
+def build_items(paths, cache):
+    items = []
 
-                if fname in seen_files:
-                    continue
+    for path in paths:
+        filename = os.path.basename(path)
+        key = normalize_video_key(filename)
 
-                if fname.endswith(MEDIA_EXT) and term.lower() in fname:
-                    full = os.path.join(root, f)
-                    matches.append(full)
-                    seen_files.add(fname)
+        info = ensure_video_info(key, cache)
 
-    return matches
+        items.append({
+            "key": key,
+            "filename": filename,
+            "path": path,
+            "url": media_url(path),
+            "info": info
+        })
 
-def player_html(path):
-    url = "/media/" + urllib.parse.quote(path.replace("\\", "/"))
-    return f'<video controls preload="metadata" src="{url}"></video>'
+    return items
 
 # ============================================================
 # UI
 # ============================================================
 
-def generate_html(items):
-    cards = []
-    modals = []
-
-    for item in items:
-        info = item["info"]
-        key = item["key"]
-
-        cards.append(f"""
-        <div class="card">
-            <div class="title">{item["filename"]}</div>
-            {player_html(item["path"])}
-            {f'<button onclick="openModal(`{key}`)">Detalhes</button>' if info["_status"]=="enriched" else ''}
-            <div class="path">{item["path"]}</div>
-        </div>
-        """)
-
-        if info["_status"] == "enriched":
-            modals.append(f"""
-            <div id="modal-{key}" class="modal">
-              <div class="modal-content">
-                <button onclick="closeModal(`{key}`)">Fechar</button>
-                <h3>{key} — {info.get("translation_pt","")}</h3>
-                <p>{info.get("meaning_pt","")}</p>
-                <p><strong>Definição:</strong> {info.get("definition_en","")}</p>
-                <p><strong>Gramática:</strong> {info.get("grammar_focus","")}</p>
-                <ul>
-                  {''.join(f"<li>{e}</li>" for e in info.get("examples_en", []))}
-                </ul>
-                <em>{info.get("learning_tip_pt","")}</em>
-              </div>
-            </div>
-            """)
+def _script_json(value):
+    """JSON seguro dentro de <script>."""
+    return json.dumps(value, ensure_ascii=False).replace("</", "<\\/")
 
+def generate_html(term, items):
+    # primeira busca embutida; as próximas vêm de /api/search
     return f"""<!DOCTYPE html>
 <html lang="pt-BR">
 <head>
@@ -261,16 +217,66 @@ button {{ width:100%;padding:10px;border:none;border-radius:10px;background:#256
 .path {{ font-size:11px;color:#94a3b8;word-break:break-all; }}
 .modal {{ display:none;position:fixed;inset:0;background:rgba(0,0,0,.7); }}
 .modal-content {{ background:#020617;margin:8% auto;padding:20px;width:90%;max-width:520px;border-radius:14px; }}
+form {{ display:flex;margin-bottom:12px; }}
+input[type=search] {{ flex:1;padding:10px;border:none;border-radius:10px;background:#020617;color:#e5e7eb; }}
 </style>
 <script>
-function openModal(key) {{ document.getElementById("modal-" + key).style.display = "block"; }}
-function closeModal(key) {{ document.getElementById("modal-" + key).style.display = "none"; }}
+let ITEMS = [];
+
+function esc(s) {{
+    return String(s ?? "").replace(/[&<>"']/g, c => ({{"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;","'":"&#39;"}})[c]);
+}}
+
+function openModal(i) {{
+    const item = ITEMS[i], info = item.info;
+    document.getElementById("modal-body").innerHTML = `
+        <h3>${{esc(item.key)}} — ${{esc(info.translation_pt)}}</h3>
+        <p>${{esc(info.meaning_pt)}}</p>
+        <p><strong>Definição:</strong> ${{esc(info.definition_en)}}</p>
+        <p><strong>Gramática:</strong> ${{esc(info.grammar_focus)}}</p>
+        <ul>${{(info.examples_en || []).map(e => `<li>${{esc(e)}}</li>`).join("")}}</ul>
+        <em>${{esc(info.learning_tip_pt)}}</em>`;
+    document.getElementById("modal").style.display = "block";
+}}
+
+function closeModal() {{ document.getElementById("modal").style.display = "none"; }}
+
+function render(items) {{
+    ITEMS = items;
+    document.getElementById("grid").innerHTML = items.map((item, i) => `
+        <div class="card">
+            <div class="title">${{esc(item.filename)}}</div>
+            <video controls preload="metadata" src="${{item.url}}"></video>
+            ${{item.info._status == "enriched" ? `<button onclick="openModal(${{i}})">Detalhes</button>` : ""}}
+            <div class="path">${{esc(item.path)}}</div>
+        </div>`).join("") || "<p>Nenhum vídeo encontrado.</p>";
+}}
+
+async function search(ev) {{
+    ev.preventDefault();
+    const term = document.getElementById("term").value.trim().toLowerCase();
+    if (!term) return;
+    const res = await fetch("/api/search?q=" + encodeURIComponent(term));
+    render((await res.json()).items);
+}}
 </script>
 </head>
 <body>
+<form onsubmit="search(event)">
+<input type="search" id="term" placeholder="Buscar vídeo...">
+</form>
 <h2>Resultados encontrados</h2>
-<div class="grid">{''.join(cards)}</div>
-{''.join(modals)}
+<div class="grid" id="grid"></div>
+<div id="modal" class="modal">
+  <div class="modal-content">
+    <button onclick="closeModal()">Fechar</button>
+    <div id="modal-body"></div>
+  </div>
+</div>
+<script>
+document.getElementById("term").value = {_script_json(term)};
+render({_script_json(items)});
+</script>
 </body>
 </html>"""
 
@@ -278,44 +284,35 @@ function closeModal(key) {{ document.getElementById("modal-" + key).style.displa
 # MAIN
 # ============================================================
 
-def start_server():
-    HTTPServer((HOST, PORT), MediaHandler).serve_forever()
-
 def main():
     term = input("Digite o termo: ").strip().lower()
     if not term:
         return
 
     cache = load_cache()
-    files = search_media(MEDIA_PATHS, term)
+
+    index = MediaIndex(MEDIA_PATHS, MEDIA_INDEX_FILE)
+    index.refresh()
+    files = index.search(term, unique_names=True)
 
     if not files:
         print(f"{YELLOW}😕 Nenhum vídeo encontrado para:{RESET} {CYAN}{term}{RESET}")
         print(f"{GREEN}💡 Dica:{RESET} verifique o nome do arquivo ou tente outro termo.")
         return
 
-    items = []
-
-    for path in files:
-        filename = os.path.basename(path)
-        key = normalize_video_key(filename)
-
-        info = ensure_video_info(key, cache)
-
-        items.append({
-            "key": key,
-            "filename": filename,
-            "path": path,
-            "info": info
-        })
+    items = build_items(files, cache)
 
     with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
-        f.write(generate_html(items))
+        f.write(generate_html(term, items))
 
-    threading.Thread(target=start_server, daemon=True).start()
+    start_server(
+        HOST, PORT, index,
+        build_items=lambda paths: build_items(paths, cache),
+        unique_names=True
+    )
     webbrowser.open(f"http://{HOST}:{PORT}/{OUTPUT_HTML}")
 
-    input("Servidor ativo. ENTER para sair.")
+    input("Servidor ativo (novas buscas pela página). ENTER para sair.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,401 @@
+# ============================================================
+# media_server.py
+# Servidor de mídia + índice persistente de nomes de arquivo
+#
+# Usado por media_search.py (e cópia em ScriptsToRunMobile
+# para o m.py, que roda sozinho no celular).
+#
+# FONTE: video_playlist_player/media_search/media_server.py
+# A cópia em ScriptsToRunMobile NÃO deve ser editada: altere
+# a fonte e rode media_search/sync_media_server.py
+#
+# 1. ThreadingHTTPServer: um cliente fazendo streaming não
+#    trava os outros pedidos
+# 2. /media/<path>: Range (206 / 416), HEAD, ETag e
+#    If-None-Match / If-Modified-Since / If-Range (304),
+#    corpo enviado com socket.sendfile (zero-copy onde o
+#    sistema suporta) → o player do celular consegue avançar
+# 3. /api/search?q=termo: resultados em JSON, direto do
+#    índice (a página HTML não precisa ser regerada)
+# 4. MediaIndex: nomes das mídias por pasta em JSON; a cada
+#    refresh só relista pastas cujo mtime mudou
+# ============================================================
+
+import os
+import json
+import threading
+import time
+import urllib.parse
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+MEDIA_EXT = (".mp4", ".mov", ".mp3", ".wav", ".aac", ".flac", ".ogg")
+VIDEO_EXT = (".mp4", ".mov")
+
+MEDIA_INDEX_FILE = "media_index.json"
+
+# Busca com índice mais velho que isso dispara um refresh (incremental)
+REFRESH_SECONDS = 30
+
+# Fallback quando o sistema não tem sendfile
+COPY_CHUNK = 1024 * 1024
+
+INDEX_VERSION = 1
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def media_url(path):
+    return "/media/" + urllib.parse.quote(path.replace("\\", "/"))
+
+
+def media_kind(path):
+    return "video" if path.lower().endswith(VIDEO_EXT) else "audio"
+
+
+def default_items(paths):
+    """Formato padrão de /api/search."""
+    return [
+        {
+            "filename": os.path.basename(p),
+            "path": p,
+            "url": media_url(p),
+            "kind": media_kind(p)
+        }
+        for p in paths
+    ]
+
+
+def parse_range(header, size):
+    """
+    "bytes=a-b" / "bytes=a-" / "bytes=-n" → (início, fim) inclusivo.
+    None  = ignorar (sem Range ou multi-range → arquivo inteiro)
+    False = intervalo impossível (416)
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    start, _, end = header[6:].strip().partition("-")
+
+    try:
+        if start == "":
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or end < start:
+        return False
+
+    return start, min(end, size - 1)
+
+
+# ============================================================
+# ÍNDICE
+# ============================================================
+
+class MediaIndex:
+    """
+    {pasta_absoluta: {"mtime", "files", "subdirs"}} em JSON.
+
+    Criar/apagar/renomear arquivo muda o mtime da pasta;
+    pastas com o mesmo mtime reaproveitam a listagem salva
+    (custo: um stat por pasta, em vez de listar tudo).
+    """
+
+    def __init__(self, roots, index_file=MEDIA_INDEX_FILE, extensions=MEDIA_EXT,
+                 max_age=REFRESH_SECONDS):
+        self.roots = list(roots)
+        self.index_file = index_file
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.max_age = max_age
+
+        self.dirs = {}
+        self.files = []
+        self.refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.dirs = data.get("dirs", {})
+        except Exception:
+            self.dirs = {}
+
+    def _save(self):
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "dirs": self.dirs}, f, ensure_ascii=False)
+        os.replace(tmp, self.index_file)
+
+    def _list_dir(self, path):
+        files, subdirs = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.name.lower().endswith(self.extensions):
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        files.sort()
+        subdirs.sort()
+        return files, subdirs
+
+    def refresh(self):
+        """Atualiza o índice. Retorna quantas pastas precisaram ser relistadas."""
+        with self._lock:
+            dirs = {}
+            files = []
+            seen_files = set()
+            relisted = 0
+
+            for root in self.roots:
+                if not os.path.isdir(root):
+                    continue
+
+                stack = [root]
+                while stack:
+                    path = stack.pop()
+                    key = os.path.abspath(path)
+                    if key in dirs:
+                        continue
+
+                    try:
+                        mtime = os.stat(path).st_mtime
+                    except OSError:
+                        continue
+
+                    entry = self.dirs.get(key)
+                    if not entry or entry["mtime"] != mtime:
+                        try:
+                            names, subdirs = self._list_dir(path)
+                        except OSError:
+                            continue
+                        entry = {"mtime": mtime, "files": names, "subdirs": subdirs}
+                        relisted += 1
+
+                    dirs[key] = entry
+
+                    for name in entry["files"]:
+                        full = os.path.join(path, name)
+                        real = os.path.abspath(full)
+                        if real not in seen_files:
+                            seen_files.add(real)
+                            files.append(full)
+
+                    # ordem reversa na pilha = mesma ordem de os.walk
+                    stack.extend(os.path.join(path, d) for d in reversed(entry["subdirs"]))
+
+            changed = relisted > 0 or dirs.keys() != self.dirs.keys()
+
+            self.dirs = dirs
+            self.files = files
+            self.refreshed_at = time.monotonic()
+
+            if changed:
+                self._save()
+
+            return relisted
+
+    def search(self, term, unique_names=False):
+        """Arquivos cujo nome contém term. unique_names: um por nome de arquivo."""
+        if time.monotonic() - self.refreshed_at > self.max_age:
+            self.refresh()
+
+        term = term.strip().lower()
+        results = []
+        seen_names = set()
+
+        for path in self.files:
+            name = os.path.basename(path).lower()
+            if term not in name:
+                continue
+            if unique_names:
+                if name in seen_names:
+                    continue
+                seen_names.add(name)
+            results.append(path)
+
+        return results
+
+
+# ============================================================
+# HTTP
+# ============================================================
+
+class MediaHandler(SimpleHTTPRequestHandler):
+    """Arquivos estáticos do diretório atual + /media/ + /api/search."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # sem log por requisição: o player faz dezenas de Range por vídeo
+        pass
+
+    # ----------------------------------------------------------
+
+    def do_GET(self):
+        self._dispatch(head=False)
+
+    def do_HEAD(self):
+        self._dispatch(head=True)
+
+    def _dispatch(self, head):
+        parsed = urllib.parse.urlsplit(self.path)
+
+        if parsed.path.startswith("/media/"):
+            path = urllib.parse.unquote(parsed.path[len("/media/"):])
+            self._send_media(path, head)
+            return
+
+        if parsed.path == "/api/search":
+            term = urllib.parse.parse_qs(parsed.query).get("q", [""])[0]
+            self._send_search(term, head)
+            return
+
+        if head:
+            super().do_HEAD()
+        else:
+            super().do_GET()
+
+    # ----------------------------------------------------------
+
+    def _allowed(self, path):
+        real = os.path.realpath(path)
+        for root in self.server.index.roots:
+            root = os.path.realpath(root)
+            if real == root or real.startswith(root.rstrip(os.sep) + os.sep):
+                return True
+        return False
+
+    def _send_search(self, term, head):
+        server = self.server
+        paths = server.index.search(term, unique_names=server.unique_names) if term.strip() else []
+        body = json.dumps(
+            {"term": term, "items": server.build_items(paths)},
+            ensure_ascii=False
+        ).encode("utf-8")
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _not_modified(self, etag, mtime):
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            return etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+
+        return False
+
+    def _send_media(self, path, head):
+        if not self._allowed(path) or not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        st = os.stat(path)
+        size = st.st_size
+        etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+
+        if self._not_modified(etag, st.st_mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return
+
+        byte_range = parse_range(self.headers.get("Range"), size)
+
+        # If-Range: só vale o Range se o arquivo ainda é o mesmo
+        if_range = self.headers.get("If-Range")
+        if byte_range and if_range and if_range not in (etag, last_modified):
+            byte_range = None
+
+        if byte_range is False:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if byte_range:
+            start, end = byte_range
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            start, end = 0, size - 1
+            self.send_response(HTTPStatus.OK)
+
+        length = end - start + 1
+
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(max(0, length)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+
+        if head or length <= 0:
+            return
+
+        try:
+            with open(path, "rb") as f:
+                self.wfile.flush()
+                try:
+                    self.connection.sendfile(f, offset=start, count=length)
+                except (AttributeError, NotImplementedError):
+                    f.seek(start)
+                    remaining = length
+                    while remaining > 0:
+                        chunk = f.read(min(COPY_CHUNK, remaining))
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+                        remaining -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            # player cancelou o pedido (ex.: usuário avançou o vídeo)
+            self.close_connection = True
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, index, build_items=None, unique_names=False):
+        super().__init__(address, MediaHandler)
+        self.index = index
+        self.build_items = build_items or default_items
+        self.unique_names = unique_names
+
+
+def start_server(host, port, index, build_items=None, unique_names=False):
+    """Sobe o servidor numa thread daemon e retorna a instância."""
+    server = MediaServer((host, port), index, build_items, unique_names)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -7,6 +7,10 @@ r"""
    - Transcreve PT + traduz EN via Whisper
    - Renderiza legenda DIRETO no vídeo (MoviePy + PIL)
    - Vídeo em movimento + legenda contínua (NewHistory style)
+   - Modelo Whisper carregado uma vez por lote; transcribe (PT) e
+     translate (EN) rodam em paralelo num pool de processos
+   - Redimensionamento feito pelo ffmpeg; legendas renderizadas uma
+     vez por par de segmentos e aplicadas com alpha blending (numpy)
 =====================================================================
 
 python transcriptV2.py "C:\\MeusVideos"
@@ -20,6 +24,8 @@ import glob
 import sys
 import shutil
 import time
+import bisect
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
 from moviepy.editor import VideoFileClip, VideoClip, AudioFileClip
@@ -54,6 +60,10 @@ EXTRACTOR_SLEEP = 1.2
 DEFAULT_VIDEO_PATH = r"./Movies"
 WHISPER_MODEL = "medium"
 
+# 2 = transcribe (PT) e translate (EN) ao mesmo tempo, cada processo
+# com o seu modelo carregado (≈2x a RAM do modelo). 1 = sequencial.
+WHISPER_WORKERS = 2
+
 VIDEO_W = 1920
 VIDEO_H = 1080
 FPS = 30
@@ -89,6 +99,63 @@ def extract_audio(video_path: str, out_dir: str) -> str:
 
     return audio_path
 
+# ===============================================================
+# WHISPER (MODELO CARREGADO UMA VEZ POR LOTE)
+# ===============================================================
+
+_worker_model = None
+
+
+def _init_whisper_worker(model_name):
+    global _worker_model
+    _worker_model = whisper.load_model(model_name)
+
+
+def _whisper_task(audio_path, task, language=None):
+    options = {"task": task}
+    if language:
+        options["language"] = language
+    return _worker_model.transcribe(audio_path, **options)
+
+
+class WhisperRunner:
+    """
+    Mantém o Whisper carregado durante todo o lote.
+
+    WHISPER_WORKERS >= 2 → pool de processos (um modelo por
+    processo); PT e EN do mesmo áudio rodam em paralelo.
+    WHISPER_WORKERS == 1 → um único modelo no processo atual.
+    """
+
+    def __init__(self, model_name=WHISPER_MODEL, workers=WHISPER_WORKERS):
+        self.pool = None
+
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_whisper_worker,
+                initargs=(model_name,)
+            )
+        else:
+            _init_whisper_worker(model_name)
+
+    def transcribe_pt_en(self, audio_path):
+        if self.pool is None:
+            print("📝 Transcrevendo PT...")
+            pt = _whisper_task(audio_path, "transcribe", "pt")
+            print("🌍 Traduzindo EN...")
+            en = _whisper_task(audio_path, "translate")
+            return pt, en
+
+        print("📝🌍 Transcrevendo PT + traduzindo EN (em paralelo)...")
+        pt_future = self.pool.submit(_whisper_task, audio_path, "transcribe", "pt")
+        en_future = self.pool.submit(_whisper_task, audio_path, "translate")
+        return pt_future.result(), en_future.result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
 # ===============================================================
 # TEXT WRAP + DRAW
 # ===============================================================
@@ -140,52 +207,119 @@ def draw_boxed_text(img, text, font, y_base, bg_color):
     return y_box
 
 # ===============================================================
-# VIDEO BUILDER (FIX PIL ANTIALIAS)
+# LEGENDAS PRÉ-RENDERIZADAS
+# ===============================================================
+
+def find_segment(starts, segments, t):
+    """
+    Segmento ativo em t via bisect (ou None).
+    Na fronteira (fim de um == início do próximo) vale o anterior,
+    como no next(...) linear original.
+    """
+    i = bisect.bisect_right(starts, t) - 1
+
+    if i < 0:
+        return None
+
+    if i > 0 and segments[i - 1]["end"] >= t:
+        return i - 1
+
+    if segments[i]["end"] >= t:
+        return i
+
+    return None
+
+
+def render_caption_overlay(text_en, text_pt, font_en, font_pt):
+    """
+    Desenha as duas caixas (PT embaixo, EN acima) UMA vez numa
+    camada RGBA transparente. Retorna (y0, rgb, alpha) já
+    recortados na faixa ocupada pelas legendas, ou None.
+    """
+    layer = Image.new("RGBA", (VIDEO_W, VIDEO_H), (0, 0, 0, 0))
+
+    y = VIDEO_H - BOTTOM_MARGIN
+    top = y
+
+    if text_pt:
+        y = draw_boxed_text(layer, text_pt, font_pt, y, BG_PT) - 10
+        top = y
+
+    if text_en:
+        top = draw_boxed_text(layer, text_en, font_en, y, BG_EN)
+
+    if top >= VIDEO_H - BOTTOM_MARGIN:
+        return None
+
+    y0 = max(int(top), 0)
+    band = np.asarray(layer)[y0:VIDEO_H - BOTTOM_MARGIN]
+
+    alpha = band[:, :, 3:4].astype(np.float32) / 255.0
+    rgb = band[:, :, :3].astype(np.float32) * alpha
+
+    return y0, rgb, alpha
+
+
+def apply_overlay(frame_np, overlay):
+    """Alpha blending (numpy) da faixa de legenda sobre o quadro."""
+    y0, rgb, alpha = overlay
+    y1 = y0 + rgb.shape[0]
+
+    out = frame_np.copy()
+    region = out[y0:y1].astype(np.float32)
+    out[y0:y1] = (rgb + region * (1.0 - alpha)).astype(np.uint8)
+
+    return out
+
+# ===============================================================
+# VIDEO BUILDER
 # ===============================================================
 
 def build_video_with_dual_subs(video_path, audio_path, seg_en, seg_pt, output_path):
-    base_clip = VideoFileClip(video_path)
+    # redimensionamento feito pelo próprio ffmpeg na leitura
+    base_clip = VideoFileClip(
+        video_path,
+        target_resolution=(VIDEO_H, VIDEO_W),
+        resize_algorithm="lanczos"
+    )
     audio = AudioFileClip(audio_path)
 
     font_en = ImageFont.truetype(FONT_EN, FONT_SIZE_EN)
     font_pt = ImageFont.truetype(FONT_PT, FONT_SIZE_PT)
 
+    seg_en = sorted(seg_en, key=lambda s: s["start"])
+    seg_pt = sorted(seg_pt, key=lambda s: s["start"])
+    starts_en = [s["start"] for s in seg_en]
+    starts_pt = [s["start"] for s in seg_pt]
+
+    # quadros chegam em ordem → basta o overlay do par atual
+    cached = {"key": None, "overlay": None}
+
     def frame_at(t):
         frame_np = base_clip.get_frame(t)
 
-        frame = (
-            Image.fromarray(frame_np)
-            .resize(
-                (VIDEO_W, VIDEO_H),
-                resample=Image.Resampling.LANCZOS
-            )
-            .convert("RGBA")
+        key = (
+            find_segment(starts_en, seg_en, t),
+            find_segment(starts_pt, seg_pt, t)
         )
 
-        current_en = next((s for s in seg_en if s["start"] <= t <= s["end"]), None)
-        current_pt = next((s for s in seg_pt if s["start"] <= t <= s["end"]), None)
-
-        y = VIDEO_H - BOTTOM_MARGIN
-
-        if current_pt:
-            y = draw_boxed_text(
-                frame,
-                current_pt["text"].strip(),
-                font_pt,
-                y,
-                BG_PT
-            ) - 10
+        if key == (None, None):
+            return frame_np
 
-        if current_en:
-            draw_boxed_text(
-                frame,
-                current_en["text"].strip(),
+        if cached["key"] != key:
+            en_idx, pt_idx = key
+            cached["key"] = key
+            cached["overlay"] = render_caption_overlay(
+                seg_en[en_idx]["text"].strip() if en_idx is not None else "",
+                seg_pt[pt_idx]["text"].strip() if pt_idx is not None else "",
                 font_en,
-                y,
-                BG_EN
+                font_pt
             )
 
-        return np.array(frame.convert("RGB"))
+        if cached["overlay"] is None:
+            return frame_np
+
+        return apply_overlay(frame_np, cached["overlay"])
 
     final = (
         VideoClip(frame_at, duration=audio.duration)
@@ -232,7 +366,7 @@ def chunk_text(text: str, max_size: int):
 # PROCESS VIDEO
 # ===============================================================
 
-def process_video(video_file):
+def process_video(video_file, runner):
     base = os.path.splitext(os.path.basename(video_file))[0]
     base_dir = os.path.dirname(video_file)
     work_dir = os.path.join(base_dir, base)
@@ -248,13 +382,7 @@ def process_video(video_file):
     audio_dir = os.path.join(work_dir, "audio")
     audio_path = extract_audio(original, audio_dir)
 
-    model = whisper.load_model(WHISPER_MODEL)
-
-    print("📝 Transcrevendo PT...")
-    pt = model.transcribe(audio_path, task="transcribe", language="pt")
-
-    print("🌍 Traduzindo EN...")
-    en = model.transcribe(audio_path, task="translate")
+    pt, en = runner.transcribe_pt_en(audio_path)
 
     # ===========================================================
     # ENGLISH CONTENT EXTRACTION (CHUNKED / NON-BLOCKING)
@@ -319,11 +447,16 @@ if __name__ == "__main__":
         print("❌ Nenhum vídeo encontrado.")
         sys.exit(1)
 
-    for v in videos:
-        try:
-            process_video(v)
-        except Exception as e:
-            print(f"❌ Erro em {v}: {e}")
+    runner = WhisperRunner()
+
+    try:
+        for v in videos:
+            try:
+                process_video(v, runner)
+            except Exception as e:
+                print(f"❌ Erro em {v}: {e}")
+    finally:
+        runner.close()
 
     elapsed = timedelta(seconds=time.time() - start)
 
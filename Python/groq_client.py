@@ -0,0 +1,530 @@
+"""
+============================================================
+ groq_client.py
+------------------------------------------------------------
+ Cliente Groq compartilhado, construído sobre groq_keys_loader.
+
+ OBJETIVO
+ --------
+ Substituir as várias cópias de groq() / call_groq() /
+ _call_groq() espalhadas pelos scripts por um único cliente
+ que:
+
+   - Mantém uma requests.Session (keep-alive) por chave,
+     evitando um handshake TLS a cada chamada
+   - Lê os headers x-ratelimit-* de cada resposta e guarda
+     o saldo de requests/tokens de cada chave
+   - Escolhe sempre a chave com mais folga (em vez de
+     round-robin cego)
+   - Em 429, coloca a chave em espera pelo tempo indicado
+     em retry-after / x-ratelimit-reset-* e tenta outra
+   - Expõe map(prompts) com concorrência limitada
+   - Opcionalmente consulta o cache persistente (llm_cache)
+     antes de chamar a API
+
+ COMO USAR EM OUTRO .py
+ ---------------------
+     from groq_client import GroqClient
+
+     client = GroqClient(model="openai/gpt-oss-20b")
+
+     texto = client.ask("Translate 'casa' to English")
+
+     respostas = client.map(
+         ["prompt 1", "prompt 2", "prompt 3"],
+         max_workers=4
+     )
+
+ Com cache persistente (só call sites que passam cache_ttl):
+
+     from llm_cache import get_default_cache, DAY
+
+     client = GroqClient(cache=get_default_cache())
+     client.ask(prompt, cache_ttl=30 * DAY, cache_tag="translate")
+
+ Só grava no cache a resposta que o chamador consegue usar:
+
+     client.ask(prompt, cache_ttl=30 * DAY, cache_validate=is_json)
+
+ Ou, para usar a instância compartilhada do processo:
+
+     from groq_client import get_default_client
+     texto = get_default_client().ask("...")
+
+ Cliente no nível do módulo (criado só na primeira chamada):
+
+     from groq_client import LazyGroqClient
+     _groq_client = LazyGroqClient(model="openai/gpt-oss-20b")
+
+============================================================
+"""
+
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from groq_keys_loader import GROQ_KEYS
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+DEFAULT_MODEL = "openai/gpt-oss-20b"
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_WORKERS = 4
+
+# Espera padrão quando a Groq devolve 429 sem dizer quanto esperar
+DEFAULT_COOLDOWN_SECONDS = 10.0
+
+# Espera máxima aceitável antes de desistir (todas as chaves em espera)
+MAX_WAIT_SECONDS = 90.0
+
+# Erros transitórios que valem nova tentativa em outra chave
+RETRYABLE_STATUS = {500, 502, 503, 504}
+
+# Chave inválida/revogada: tira a chave de uso e tenta outra.
+# Qualquer outro 4xx (400, 404, 413...) é erro do pedido e
+# falharia igual em todas as chaves → sobe na hora.
+KEY_ERROR_STATUS = {401, 403}
+KEY_ERROR_BLOCK_SECONDS = 3600.0
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_duration(value) -> float | None:
+    """
+    Converte os valores de reset da Groq em segundos.
+
+    Exemplos aceitos: "7.66s", "2m59.56s", "1h2m", "250ms", "12"
+    """
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    found = False
+    for amount, unit in _DURATION_RE.findall(value):
+        found = True
+        amount = float(amount)
+        if unit == "h":
+            total += amount * 3600
+        elif unit == "m":
+            total += amount * 60
+        elif unit == "s":
+            total += amount
+        elif unit == "ms":
+            total += amount / 1000
+
+    return total if found else None
+
+
+def _cacheable(content, validate) -> bool:
+    """Resposta vazia ou reprovada pelo validador do chamador não entra no cache."""
+    if not content or not str(content).strip():
+        return False
+    if validate is None:
+        return True
+    try:
+        return bool(validate(content))
+    except Exception:
+        return False
+
+
+def _to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class GroqRequestError(RuntimeError):
+    """4xx não recuperável: o pedido em si é inválido."""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"❌ Groq recusou o pedido (HTTP {status_code}): {body}")
+        self.status_code = status_code
+        self.body = body
+
+
+# ============================================================
+# ESTADO POR CHAVE
+# ============================================================
+
+class _KeyState:
+    """Sessão HTTP e saldo de rate-limit de uma chave."""
+
+    def __init__(self, name: str, key: str, pool_size: int):
+        self.name = name
+        self.key = key
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json"
+        })
+
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.blocked_until = 0.0
+        self.in_flight = 0
+
+        self.calls = 0
+        self.rate_limited = 0
+
+    def headroom(self):
+        """Quanto maior, mais folga a chave tem (None = desconhecido)."""
+        requests_left = (
+            float("inf") if self.remaining_requests is None
+            else self.remaining_requests
+        )
+        tokens_left = (
+            float("inf") if self.remaining_tokens is None
+            else self.remaining_tokens
+        )
+        return (requests_left - self.in_flight, tokens_left)
+
+    def update_from_headers(self, headers):
+        remaining_requests = _to_int(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = _to_int(headers.get("x-ratelimit-remaining-tokens"))
+
+        if remaining_requests is not None:
+            self.remaining_requests = remaining_requests
+        if remaining_tokens is not None:
+            self.remaining_tokens = remaining_tokens
+
+        # Saldo zerado → espera até o reset informado
+        now = time.monotonic()
+        if self.remaining_requests == 0:
+            wait = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            self.blocked_until = max(self.blocked_until, now + (wait or DEFAULT_COOLDOWN_SECONDS))
+        if self.remaining_tokens == 0:
+            wait = parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+            self.blocked_until = max(self.blocked_until, now + (wait or DEFAULT_COOLDOWN_SECONDS))
+
+    def block_from_429(self, headers):
+        wait = (
+            parse_reset_duration(headers.get("retry-after"))
+            or parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+            or parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            or DEFAULT_COOLDOWN_SECONDS
+        )
+        self.blocked_until = max(self.blocked_until, time.monotonic() + wait)
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.rate_limited += 1
+
+
+# ============================================================
+# CLIENTE
+# ============================================================
+
+class GroqClient:
+    """
+    Cliente Groq multi-chave com sessões persistentes e
+    roteamento pela chave com mais folga.
+    """
+
+    def __init__(
+        self,
+        keys=None,
+        model: str = DEFAULT_MODEL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_wait: float = MAX_WAIT_SECONDS,
+        cache=None
+    ):
+        keys = GROQ_KEYS if keys is None else keys
+
+        valid = [
+            k for k in keys
+            if isinstance(k, dict) and str(k.get("key", "")).strip().startswith("gsk_")
+        ]
+        if not valid:
+            raise RuntimeError("❌ Nenhuma GROQ API Key válida encontrada.")
+
+        # Ordem aleatória para não sobrecarregar sempre a primeira chave
+        valid = random.sample(valid, len(valid))
+
+        self.model = model
+        self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+        self.max_wait = max_wait
+        self.cache = cache
+
+        self._keys = [
+            _KeyState(k.get("name", f"key{i}"), k["key"].strip(), self.max_workers)
+            for i, k in enumerate(valid)
+        ]
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------
+    # ESCOLHA DE CHAVE
+    # --------------------------------------------------------
+
+    def _acquire_key(self) -> _KeyState:
+        deadline = time.monotonic() + self.max_wait
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                available = [k for k in self._keys if k.blocked_until <= now]
+
+                if available:
+                    best = max(available, key=lambda k: (k.headroom(), random.random()))
+                    best.in_flight += 1
+                    return best
+
+                wait = min(k.blocked_until for k in self._keys) - now
+
+            if time.monotonic() + wait > deadline:
+                raise RuntimeError(
+                    "❌ Todas as GROQ keys estão em rate limit "
+                    f"(próxima liberação em {wait:.0f}s)."
+                )
+
+            time.sleep(max(0.05, wait))
+
+    def _release_key(self, state: _KeyState):
+        with self._lock:
+            state.in_flight = max(0, state.in_flight - 1)
+
+    # --------------------------------------------------------
+    # CHAMADAS
+    # --------------------------------------------------------
+
+    def chat(
+        self,
+        messages: list,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        response_format: dict | None = None,
+        timeout: float | None = None,
+        max_attempts: int | None = None,
+        cache_ttl: float | None = None,
+        cache_tag: str | None = None,
+        cache_validate=None
+    ) -> str:
+        """
+        Envia uma conversa para /chat/completions e retorna o
+        conteúdo da primeira escolha.
+
+        Se o cliente tiver cache e cache_ttl for informado, a
+        resposta é lida/gravada no cache com esse TTL (segundos).
+        Resposta vazia nunca vai para o cache; com cache_validate
+        (callable(texto) -> bool, ex.: "é JSON válido?") só vai a
+        que passar. Entrada em cache que não passa é ignorada e
+        refeita.
+        """
+        payload = {
+            "model": model or self.model,
+            "messages": messages
+        }
+
+        cache_key = None
+        if self.cache is not None and cache_ttl is not None:
+            cache_key = self.cache.make_key(
+                payload["model"], messages, temperature,
+                max_tokens=max_tokens, response_format=response_format
+            )
+            cached = self.cache.get(cache_key, tag=cache_tag)
+            if cached is not None and _cacheable(cached, cache_validate):
+                return cached
+
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if response_format is not None:
+            payload["response_format"] = response_format
+
+        attempts = max_attempts or len(self._keys) * 2
+        last_error = None
+
+        for _ in range(attempts):
+            try:
+                state = self._acquire_key()
+            except RuntimeError:
+                if last_error is None:
+                    raise
+                # chaves bloqueadas por erros desta chamada (ex.: todas com 401)
+                break
+
+            try:
+                res = state.session.post(
+                    GROQ_URL,
+                    json=payload,
+                    timeout=timeout or self.timeout
+                )
+
+                with self._lock:
+                    state.calls += 1
+
+                    if res.status_code == 429:
+                        state.block_from_429(res.headers)
+                        last_error = f"Rate limit ({state.name})"
+                        continue
+
+                    state.update_from_headers(res.headers)
+
+                if res.status_code in RETRYABLE_STATUS:
+                    last_error = f"HTTP {res.status_code} ({state.name})"
+                    continue
+
+                if res.status_code in KEY_ERROR_STATUS:
+                    with self._lock:
+                        state.blocked_until = time.monotonic() + KEY_ERROR_BLOCK_SECONDS
+                    last_error = f"HTTP {res.status_code} ({state.name})"
+                    continue
+
+                if 400 <= res.status_code < 500:
+                    raise GroqRequestError(res.status_code, res.text[:500])
+
+                res.raise_for_status()
+                content = res.json()["choices"][0]["message"]["content"]
+
+                if cache_key is not None and _cacheable(content, cache_validate):
+                    self.cache.set(cache_key, content, ttl=cache_ttl, tag=cache_tag)
+
+                return content
+
+            except requests.RequestException as e:
+                last_error = str(e)
+                continue
+
+            finally:
+                self._release_key(state)
+
+        raise RuntimeError(f"❌ Todas as GROQ keys falharam. Último erro: {last_error}")
+
+    def ask(self, prompt: str, system: str | None = None, **kwargs) -> str:
+        """Atalho para um único prompt de usuário (e system opcional)."""
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        return self.chat(messages, **kwargs)
+
+    def map(
+        self,
+        prompts,
+        system: str | None = None,
+        max_workers: int | None = None,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> list:
+        """
+        Executa vários prompts em paralelo (concorrência limitada)
+        e retorna as respostas na mesma ordem da entrada.
+
+        Com return_exceptions=True, falhas individuais voltam como
+        a própria exceção na posição correspondente.
+        """
+        prompts = list(prompts)
+        if not prompts:
+            return []
+
+        workers = min(max_workers or self.max_workers, len(prompts))
+
+        def _run(prompt):
+            try:
+                return self.ask(prompt, system=system, **kwargs)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_run, prompts))
+
+    # --------------------------------------------------------
+    # DIAGNÓSTICO
+    # --------------------------------------------------------
+
+    def stats(self) -> list[dict]:
+        """Resumo por chave: chamadas, 429s e saldo conhecido."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "name": k.name,
+                    "calls": k.calls,
+                    "rate_limited": k.rate_limited,
+                    "remaining_requests": k.remaining_requests,
+                    "remaining_tokens": k.remaining_tokens,
+                    "blocked_for": round(max(0.0, k.blocked_until - now), 1)
+                }
+                for k in self._keys
+            ]
+
+    def close(self):
+        for k in self._keys:
+            k.session.close()
+
+
+# ============================================================
+# CRIAÇÃO ADIADA
+# ============================================================
+
+class LazyGroqClient:
+    """
+    Cria o GroqClient só no primeiro uso. Para clientes de nível de
+    módulo: importar o script não exige GROQ keys configuradas, só
+    chamar a Groq.
+
+        _groq_client = LazyGroqClient(model=GROQ_MODEL, timeout=20)
+        _groq_client.ask("...")   # cliente criado aqui
+    """
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self) -> GroqClient:
+        with self._lock:
+            if self._client is None:
+                self._client = GroqClient(**self._kwargs)
+            return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+# ============================================================
+# INSTÂNCIA COMPARTILHADA
+# ============================================================
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_default_client() -> GroqClient:
+    """Retorna (criando na primeira vez) o cliente padrão do processo."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            from llm_cache import get_default_cache
+            _default_client = GroqClient(cache=get_default_cache())
+        return _default_client
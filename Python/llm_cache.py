@@ -0,0 +1,280 @@
+"""
+============================================================
+ llm_cache.py
+------------------------------------------------------------
+ Cache persistente (SQLite) de respostas de LLM.
+
+ OBJETIVO
+ --------
+ Evitar que os scripts paguem de novo por prompts que já
+ foram respondidos em execuções anteriores.
+
+   - Chave = SHA-256 de (modelo, mensagens, temperatura)
+   - TTL definido por quem chama (cada call site decide)
+   - Limite de tamanho em disco com despejo LRU
+   - Contadores de hit/miss por tag, persistidos no banco
+
+ COMO USAR EM OUTRO .py
+ ---------------------
+ Direto:
+
+     from llm_cache import get_default_cache, DAY
+
+     cache = get_default_cache()
+     key = cache.make_key(model, messages, temperature)
+
+     cached = cache.get(key, tag="translate")
+     if cached is None:
+         resposta = chamar_llm(...)
+         cache.set(key, resposta, ttl=30 * DAY, tag="translate")
+
+ Ou via groq_client (recomendado):
+
+     client = GroqClient(cache=get_default_cache())
+     client.ask(prompt, cache_ttl=30 * DAY, cache_tag="translate")
+
+ LOCAL DO ARQUIVO
+ ----------------
+ Variável de ambiente LLM_CACHE_PATH, ou
+ <pasta deste arquivo>/.cache/llm_cache.sqlite3
+
+============================================================
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite3")
+)
+
+# Tamanho máximo das respostas armazenadas (bytes)
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# TTL para respostas que nunca expiram
+FOREVER = float("inf")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key          TEXT PRIMARY KEY,
+    tag          TEXT,
+    value        TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    expires_at   REAL,
+    last_access  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access);
+
+CREATE TABLE IF NOT EXISTS counters (
+    tag     TEXT PRIMARY KEY,
+    hits    INTEGER NOT NULL DEFAULT 0,
+    misses  INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# ============================================================
+# CACHE
+# ============================================================
+
+class LLMCache:
+    """Cache de respostas endereçado por conteúdo, com TTL e LRU."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        # Contadores desta execução (os totais ficam na tabela counters)
+        self.hits = 0
+        self.misses = 0
+
+    # --------------------------------------------------------
+    # CHAVE
+    # --------------------------------------------------------
+
+    @staticmethod
+    def make_key(model: str, messages, temperature=None, **extra) -> str:
+        """
+        Gera a chave do cache. `messages` pode ser a lista de
+        mensagens do chat ou um prompt simples (str).
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if extra:
+            payload["extra"] = extra
+
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # --------------------------------------------------------
+    # LEITURA / ESCRITA
+    # --------------------------------------------------------
+
+    def _count(self, tag: str | None, hit: bool):
+        column = "hits" if hit else "misses"
+        self._conn.execute(
+            f"INSERT INTO counters(tag, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(tag) DO UPDATE SET {column} = {column} + 1",
+            (tag or "",)
+        )
+
+    def get(self, key: str, tag: str | None = None) -> str | None:
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                self._count(tag, hit=False)
+                self._conn.commit()
+                return None
+
+            self.hits += 1
+            self._count(tag, hit=True)
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (now, key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float = FOREVER, tag: str | None = None):
+        if value is None:
+            return
+
+        now = time.time()
+        expires_at = None if ttl is None or ttl == FOREVER else now + ttl
+        size = len(value.encode("utf-8"))
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                "(key, tag, value, size, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, tag, value, size, now, expires_at, now)
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    # --------------------------------------------------------
+    # MANUTENÇÃO
+    # --------------------------------------------------------
+
+    def _evict_locked(self):
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,)
+        )
+
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+        if total <= self.max_bytes:
+            return
+
+        # Remove os menos usados recentemente até caber no limite
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def evict(self):
+        """Remove expirados e aplica o limite de tamanho (LRU)."""
+        with self._lock:
+            self._evict_locked()
+            self._conn.commit()
+
+    def clear(self, tag: str | None = None):
+        """Apaga todo o cache, ou apenas as respostas de uma tag."""
+        with self._lock:
+            if tag is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute("DELETE FROM responses WHERE tag = ?", (tag,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Totais persistidos por tag + contadores desta execução."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            per_tag = {
+                tag or "(sem tag)": {"hits": hits, "misses": misses}
+                for tag, hits, misses in self._conn.execute(
+                    "SELECT tag, hits, misses FROM counters ORDER BY tag"
+                )
+            }
+
+        return {
+            "entries": entries,
+            "bytes": size,
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+            "by_tag": per_tag
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================
+# INSTÂNCIA COMPARTILHADA
+# ============================================================
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> LLMCache:
+    """Retorna (criando na primeira vez) o cache padrão do processo."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
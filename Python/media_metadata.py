@@ -0,0 +1,307 @@
+"""
+============================================================
+ media_metadata.py
+------------------------------------------------------------
+ Cache persistente (SQLite) de metadados de mídia.
+
+ OBJETIVO
+ --------
+ Evitar um ffprobe por vídeo a cada execução / a cada volta
+ da playlist.
+
+   - Chave = (caminho absoluto, tamanho, mtime): arquivo
+     alterado ou substituído é sondado de novo
+   - Guarda duração, resolução e codec de vídeo (um único
+     ffprobe por arquivo)
+   - get_many() sonda só as faltas, em paralelo
+   - prefetch() sonda em segundo plano (ex.: o próximo vídeo
+     da playlist enquanto o atual toca)
+
+ COMO USAR EM OUTRO .py
+ ---------------------
+     from media_metadata import get_default_metadata
+
+     meta = get_default_metadata()
+
+     info = meta.get("video.mp4")          # dict ou None
+     segundos = meta.duration("video.mp4")  # float ou None
+
+     todos = meta.get_many(lista_de_videos)  # {path: dict | None}
+
+     meta.prefetch(proximo_video)
+
+ LOCAL DO ARQUIVO
+ ----------------
+ Variável de ambiente MEDIA_METADATA_PATH, ou
+ <pasta deste arquivo>/.cache/media_metadata.sqlite3
+
+============================================================
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+DEFAULT_METADATA_PATH = os.environ.get(
+    "MEDIA_METADATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "media_metadata.sqlite3")
+)
+
+FFPROBE_BIN = "ffprobe"
+
+# ffprobe passa a maior parte do tempo esperando disco
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+PROBE_TIMEOUT = 60
+
+# Limite de variáveis por SELECT ... IN (...)
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path       TEXT PRIMARY KEY,
+    size       INTEGER NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    duration   REAL,
+    width      INTEGER,
+    height     INTEGER,
+    codec      TEXT,
+    probed_at  REAL NOT NULL
+);
+"""
+
+_FIELDS = ("duration", "width", "height", "codec")
+
+# ============================================================
+# FFPROBE
+# ============================================================
+
+def probe_file(path: str, ffprobe: str = FFPROBE_BIN) -> dict | None:
+    """Duração, resolução e codec do primeiro stream de vídeo (None se falhar)."""
+    try:
+        result = subprocess.run(
+            [
+                ffprobe, "-v", "error",
+                "-show_entries", "format=duration:stream=codec_type,codec_name,width,height",
+                "-of", "json",
+                path
+            ],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, timeout=PROBE_TIMEOUT
+        )
+        data = json.loads(result.stdout or "{}")
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+    try:
+        duration = float(data.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        return None
+
+    video = next(
+        (s for s in data.get("streams", []) if s.get("codec_type") == "video"),
+        {}
+    )
+
+    return {
+        "duration": duration,
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "codec": video.get("codec_name")
+    }
+
+# ============================================================
+# CACHE
+# ============================================================
+
+class MediaMetadata:
+    """Metadados por (caminho, tamanho, mtime), com sondagem paralela."""
+
+    def __init__(self, path: str = DEFAULT_METADATA_PATH, workers: int = DEFAULT_WORKERS,
+                 ffprobe: str = FFPROBE_BIN):
+        self.path = path
+        self.workers = max(1, workers)
+        self.ffprobe = ffprobe
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        self._pool = None
+        self._pending = {}
+
+        # Contadores desta execução
+        self.hits = 0
+        self.probes = 0
+
+    # --------------------------------------------------------
+    # INTERNOS
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _signature(path: str):
+        """(caminho absoluto, tamanho, mtime_ns) ou None se o arquivo sumiu."""
+        full = os.path.abspath(path)
+        try:
+            st = os.stat(full)
+        except OSError:
+            return None
+        return full, st.st_size, st.st_mtime_ns
+
+    def _lookup(self, signatures) -> dict:
+        """{caminho_absoluto: metadados} para as assinaturas que batem no banco."""
+        found = {}
+        wanted = {sig[0]: sig for sig in signatures}
+        keys = list(wanted)
+
+        with self._lock:
+            for i in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[i:i + _QUERY_CHUNK]
+                rows = self._conn.execute(
+                    "SELECT path, size, mtime_ns, duration, width, height, codec FROM media "
+                    f"WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+
+                for path, size, mtime_ns, *values in rows:
+                    if wanted[path][1:] == (size, mtime_ns):
+                        found[path] = dict(zip(_FIELDS, values))
+
+        return found
+
+    def _store(self, signature, info: dict):
+        full, size, mtime_ns = signature
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media "
+                "(path, size, mtime_ns, duration, width, height, codec, probed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (full, size, mtime_ns, info["duration"], info["width"],
+                 info["height"], info["codec"], time.time())
+            )
+            self._conn.commit()
+
+    def _probe(self, signature) -> dict | None:
+        info = probe_file(signature[0], self.ffprobe)
+        with self._lock:
+            self.probes += 1
+        if info is not None:
+            self._store(signature, info)
+        return info
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    # --------------------------------------------------------
+    # API
+    # --------------------------------------------------------
+
+    def get(self, path) -> dict | None:
+        """Metadados do arquivo (sonda só se não estiver no cache)."""
+        signature = self._signature(str(path))
+        if signature is None:
+            return None
+
+        # prefetch em andamento para o mesmo arquivo: só espera
+        with self._lock:
+            pending = self._pending.get(signature)
+        if pending is not None:
+            return pending.result()
+
+        cached = self._lookup([signature]).get(signature[0])
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        return self._probe(signature)
+
+    def duration(self, path) -> float | None:
+        info = self.get(path)
+        return info["duration"] if info else None
+
+    def get_many(self, paths) -> dict:
+        """{path: metadados | None}, sondando as faltas em paralelo."""
+        paths = [str(p) for p in paths]
+        signatures = {p: self._signature(p) for p in paths}
+
+        cached = self._lookup([s for s in signatures.values() if s])
+        with self._lock:
+            self.hits += len(cached)
+
+        result = {}
+        misses = {}
+        for p, sig in signatures.items():
+            if sig is None:
+                result[p] = None
+            elif sig[0] in cached:
+                result[p] = cached[sig[0]]
+            else:
+                misses[p] = sig
+
+        if misses:
+            probed = self._executor().map(self._probe, misses.values())
+            result.update(zip(misses.keys(), probed))
+
+        return {p: result[p] for p in paths}
+
+    def prefetch(self, path):
+        """Sonda em segundo plano se ainda não estiver no cache."""
+        signature = self._signature(str(path))
+        if signature is None or self._lookup([signature]):
+            return
+
+        with self._lock:
+            if signature in self._pending:
+                return
+
+        future = self._executor().submit(self._probe, signature)
+
+        with self._lock:
+            self._pending[signature] = future
+        future.add_done_callback(lambda _: self._forget_pending(signature))
+
+    def _forget_pending(self, signature):
+        with self._lock:
+            self._pending.pop(signature, None)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================
+# INSTÂNCIA COMPARTILHADA
+# ============================================================
+
+_default_metadata = None
+_default_lock = threading.Lock()
+
+
+def get_default_metadata() -> MediaMetadata:
+    """Retorna (criando na primeira vez) o cache padrão do processo."""
+    global _default_metadata
+    with _default_lock:
+        if _default_metadata is None:
+            _default_metadata = MediaMetadata()
+        return _default_metadata
@@ -1,4 +1,4 @@
-"""
+r"""
 ============================================================
  Script: smart_video_compressor.py
  Autor: Leandro
@@ -6,16 +6,36 @@
    - Comprime vídeos usando FFmpeg
    - Mantém qualidade visual usando CRF
    - Redução grande de tamanho usando H265
-   - Entrada: caminho do vídeo
+   - Entrada: caminho do vídeo OU de uma pasta (lote)
    - Saída: vídeo comprimido na mesma pasta
+
+ LOTE
+   - N encodes simultâneos, dimensionados pelo nº de núcleos
+     (cada job recebe THREADS_PER_JOB threads)
+   - Pula saídas que já existem e são mais novas que a entrada
+   - ffprobe rápido escolhe o perfil (CRF por resolução) e
+     pula vídeos que já estão pequenos (bitrate baixo)
+   - Encoder automático: usa HEVC por hardware (NVENC / QSV /
+     VideoToolbox / AMF) se o ffmpeg tiver, senão libx265
+   - Progresso via -progress e relatório com taxa de
+     compressão e fps de encode por arquivo
 ============================================================
 
 python smart_video_compressor.py "C:\videos\meu_video.mp4"
+python smart_video_compressor.py "C:\videos\EnableToYoutubeUpload" --recursive
+python smart_video_compressor.py "C:\videos\EnableToYoutubeUpload" --jobs 2 --force
 """
 
+import argparse
+import json
+import os
 import subprocess
-from pathlib import Path
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
 # ==========================================================
 # CONFIG
@@ -25,45 +45,308 @@ CRF_VALUE = 24          # menor = mais qualidade (18-28 recomendado)
 PRESET = "slow"         # slow = melhor compressão
 AUDIO_BITRATE = "128k"  # mantém boa qualidade de áudio
 
+FFMPEG_BIN = "ffmpeg"
+FFPROBE_BIN = "ffprobe"
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".avi", ".m4v", ".webm")
+OUTPUT_SUFFIX = "_compressed"
+
+# "auto" → primeiro encoder HEVC por hardware disponível, senão libx265
+ENCODER = "auto"
+HARDWARE_ENCODERS = ("hevc_nvenc", "hevc_qsv", "hevc_videotoolbox", "hevc_amf")
+
+# libx265 escala bem até ~4 threads por encode; acima disso
+# rende mais rodar vários encodes em paralelo
+THREADS_PER_JOB = 4
+
+# Encoders por hardware: poucas sessões simultâneas por GPU
+HARDWARE_JOBS = 2
+
+# Intervalo mínimo entre linhas de progresso de um mesmo job
+PROGRESS_EVERY_SECONDS = 15
+
+# Linhas finais do stderr do ffmpeg guardadas para a mensagem de erro
+STDERR_TAIL_LINES = 50
+
+# ----------------------------------------------------------
+# PERFIS (por altura do vídeo)
+#   max_height: limite superior da faixa
+#   crf: qualidade do encode
+#   target_kbps: bitrate que já consideramos "pequeno" —
+#                entradas abaixo disso não são reencodadas
+# ----------------------------------------------------------
+
+PROFILES = [
+    {"name": "sd",    "max_height": 480,   "crf": CRF_VALUE + 2, "target_kbps": 900},
+    {"name": "720p",  "max_height": 720,   "crf": CRF_VALUE + 1, "target_kbps": 1800},
+    {"name": "1080p", "max_height": 1080,  "crf": CRF_VALUE,     "target_kbps": 3500},
+    {"name": "4k",    "max_height": 99999, "crf": CRF_VALUE - 1, "target_kbps": 9000},
+]
+
+# Codecs que já são eficientes: bitrate abaixo do alvo → não mexe
+EFFICIENT_CODECS = ("hevc", "av1", "vp9")
+
+_print_lock = threading.Lock()
+
 # ==========================================================
 # FUNCTIONS
 # ==========================================================
 
+def log(msg: str):
+    with _print_lock:
+        print(msg, flush=True)
+
+
 def check_ffmpeg():
     """Verifica se FFmpeg está instalado"""
     try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run([FFMPEG_BIN, "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except FileNotFoundError:
         print("❌ FFmpeg não encontrado. Instale: https://ffmpeg.org/")
         sys.exit(1)
 
 
+def detect_encoder() -> str:
+    """Encoder HEVC a usar (ENCODER fixo ou detecção automática)."""
+    if ENCODER != "auto":
+        return ENCODER
+
+    result = subprocess.run(
+        [FFMPEG_BIN, "-hide_banner", "-encoders"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    available = result.stdout
+
+    for encoder in HARDWARE_ENCODERS:
+        if f" {encoder} " not in available:
+            continue
+        # listado não garante GPU presente: testa um encode de 1 frame
+        probe = subprocess.run(
+            [FFMPEG_BIN, "-v", "error", "-f", "lavfi", "-i", "color=black:s=256x256",
+             "-frames:v", "1", "-c:v", encoder, "-f", "null", "-"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if probe.returncode == 0:
+            return encoder
+
+    return "libx265"
+
+
+def encoder_args(encoder: str, crf: int, threads: int) -> list:
+    """Parâmetros de qualidade equivalentes ao CRF em cada encoder."""
+    if encoder == "hevc_nvenc":
+        return ["-c:v", encoder, "-preset", "p6", "-rc", "vbr", "-cq", str(crf), "-b:v", "0"]
+    if encoder == "hevc_qsv":
+        return ["-c:v", encoder, "-preset", "slow", "-global_quality", str(crf)]
+    if encoder == "hevc_videotoolbox":
+        # escala 1-100 (maior = melhor); CRF 24 ≈ 60
+        return ["-c:v", encoder, "-q:v", str(max(1, min(100, 108 - 2 * crf)))]
+    if encoder == "hevc_amf":
+        return ["-c:v", encoder, "-quality", "quality", "-rc", "cqp",
+                "-qp_i", str(crf), "-qp_p", str(crf)]
+
+    return [
+        "-c:v", "libx265",
+        "-crf", str(crf),
+        "-preset", PRESET,
+        "-threads", str(threads),
+        "-x265-params", f"pools={threads}:log-level=error"
+    ]
+
+
 def build_output_path(input_path: Path) -> Path:
     """Gera nome do arquivo de saída"""
-    return input_path.with_name(f"{input_path.stem}_compressed.mp4")
+    return input_path.with_name(f"{input_path.stem}{OUTPUT_SUFFIX}.mp4")
+
+
+def probe_video(input_path: Path) -> dict:
+    """Resolução, codec, duração, bitrate e nº de frames (estimado)."""
+    result = subprocess.run(
+        [
+            FFPROBE_BIN, "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,width,height,avg_frame_rate,bit_rate:format=duration,bit_rate",
+            "-of", "json",
+            str(input_path)
+        ],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+    )
+    data = json.loads(result.stdout)
+    stream = (data.get("streams") or [{}])[0]
+    fmt = data.get("format", {})
+
+    duration = float(fmt.get("duration") or 0)
+
+    num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+    fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+
+    # bitrate do stream de vídeo; contêineres que não informam → total do arquivo
+    bitrate = stream.get("bit_rate") or fmt.get("bit_rate")
+    if not bitrate and duration:
+        bitrate = input_path.stat().st_size * 8 / duration
+
+    return {
+        "codec": stream.get("codec_name", ""),
+        "width": int(stream.get("width") or 0),
+        "height": int(stream.get("height") or 0),
+        "duration": duration,
+        "fps": fps,
+        "frames": int(duration * fps),
+        "kbps": float(bitrate or 0) / 1000
+    }
+
+
+def choose_profile(info: dict):
+    """(perfil, motivo_para_pular | None)."""
+    height = min(info["width"], info["height"]) or info["height"]
+    profile = next(p for p in PROFILES if height <= p["max_height"])
+
+    if info["kbps"] and info["kbps"] <= profile["target_kbps"]:
+        return profile, f"já pequeno ({info['kbps']:.0f} kbps ≤ {profile['target_kbps']} kbps)"
+
+    if info["codec"] in EFFICIENT_CODECS and info["kbps"] <= profile["target_kbps"] * 1.5:
+        return profile, f"já em {info['codec']} ({info['kbps']:.0f} kbps)"
+
+    return profile, None
+
 
+def is_up_to_date(input_path: Path, output_path: Path) -> bool:
+    return (
+        output_path.exists()
+        and output_path.stat().st_size > 0
+        and output_path.stat().st_mtime >= input_path.stat().st_mtime
+    )
 
-def compress_video(input_path: Path, output_path: Path):
-    """Executa compressão usando FFmpeg"""
+
+def compress_video(input_path: Path, output_path: Path, encoder: str = "libx265",
+                   crf: int = CRF_VALUE, threads: int = 0, total_frames: int = 0) -> dict:
+    """Executa compressão usando FFmpeg. Retorna frames e tempo do encode."""
+
+    # grava em .part e só renomeia no fim: interrupção não deixa saída "pronta" pela metade
+    part_path = output_path.with_name(output_path.stem + ".part.mp4")
 
     command = [
-        "ffmpeg",
+        FFMPEG_BIN, "-y",
+        "-v", "error",
+        "-nostats",
+        "-progress", "pipe:1",
         "-i", str(input_path),
-        "-vcodec", "libx265",
-        "-crf", str(CRF_VALUE),
-        "-preset", PRESET,
-        "-acodec", "aac",
+        *encoder_args(encoder, crf, threads),
+        "-tag:v", "hvc1",
+        "-c:a", "aac",
         "-b:a", AUDIO_BITRATE,
-        str(output_path)
+        "-movflags", "+faststart",
+        str(part_path)
     ]
 
-    print("\n🎬 Comprimindo vídeo...")
-    print(f"📥 Entrada : {input_path}")
-    print(f"📤 Saída   : {output_path}\n")
+    name = input_path.name
+    started = time.monotonic()
+    last_report = started
+    frames = 0
+
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    # stderr drenado em paralelo: entrada corrompida gera muito erro de decode e,
+    # com o pipe cheio (poucos KB no Windows), o ffmpeg travaria esperando leitura
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    stderr_reader = threading.Thread(target=stderr_tail.extend, args=(proc.stderr,), daemon=True)
+    stderr_reader.start()
+
+    # -progress escreve blocos key=value terminados em progress=continue|end
+    for line in proc.stdout:
+        key, _, value = line.strip().partition("=")
+
+        if key == "frame":
+            frames = int(value or 0)
+
+        elif key == "progress":
+            now = time.monotonic()
+            if value == "continue" and now - last_report >= PROGRESS_EVERY_SECONDS:
+                last_report = now
+                pct = f"{frames / total_frames * 100:5.1f}%" if total_frames else "   ?  "
+                log(f"   ⏳ {name}: {pct} | {frames / (now - started):6.1f} fps")
+
+    proc.wait()
+    stderr_reader.join()
+    stderr = "".join(stderr_tail)
+
+    if proc.returncode != 0:
+        if part_path.exists():
+            part_path.unlink()
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else f"ffmpeg saiu com {proc.returncode}")
+
+    os.replace(part_path, output_path)
+
+    return {"frames": frames, "seconds": time.monotonic() - started}
+
+
+def process_file(input_path: Path, encoder: str, threads: int, force: bool) -> dict:
+    """Um item da fila. Nunca levanta exceção: o resultado vai para o relatório."""
+    output_path = build_output_path(input_path)
+    report = {"file": input_path.name, "status": "", "detail": ""}
+
+    try:
+        if not force and is_up_to_date(input_path, output_path):
+            report.update(status="pulado", detail="saída já atualizada")
+            return report
+
+        info = probe_video(input_path)
+        profile, skip_reason = choose_profile(info)
+
+        if skip_reason and not force:
+            report.update(status="pulado", detail=skip_reason)
+            return report
+
+        log(f"🎬 {input_path.name}: {info['width']}x{info['height']} {info['codec']} "
+            f"{info['kbps']:.0f} kbps → perfil {profile['name']} (crf {profile['crf']}, {encoder})")
 
-    subprocess.run(command)
+        result = compress_video(
+            input_path, output_path, encoder, profile["crf"], threads, info["frames"]
+        )
 
-    print("\n✅ Compressão finalizada.")
+        in_size = input_path.stat().st_size
+        out_size = output_path.stat().st_size
+
+        # H.265 que sai maior que a entrada não vale a pena guardar
+        if out_size >= in_size:
+            output_path.unlink()
+            report.update(status="descartado", detail="saída maior que a entrada")
+            return report
+
+        fps = result["frames"] / result["seconds"] if result["seconds"] else 0.0
+        report.update(
+            status="ok",
+            detail=f"{in_size / out_size:.2f}x ({in_size / 1e6:.0f} MB → {out_size / 1e6:.0f} MB) | {fps:.1f} fps",
+            ratio=in_size / out_size,
+            fps=fps
+        )
+        log(f"✅ {input_path.name}: {report['detail']}")
+
+    except Exception as e:
+        report.update(status="erro", detail=str(e))
+        log(f"❌ {input_path.name}: {e}")
+
+    return report
+
+
+def collect_inputs(target: Path, recursive: bool) -> list:
+    if target.is_file():
+        return [target]
+
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        p for p in target.glob(pattern)
+        if p.is_file()
+        and p.suffix.lower() in VIDEO_EXTENSIONS
+        and not p.stem.endswith(OUTPUT_SUFFIX)
+        and not p.stem.endswith(".part")
+    )
+
+
+def default_jobs(encoder: str) -> int:
+    if encoder != "libx265":
+        return HARDWARE_JOBS
+    return max(1, (os.cpu_count() or 1) // THREADS_PER_JOB)
 
 
 # ==========================================================
@@ -71,24 +354,56 @@ def compress_video(input_path: Path, output_path: Path):
 # ==========================================================
 
 def main():
+    parser = argparse.ArgumentParser(description="Compressão H.265 de um vídeo ou de uma pasta")
+    parser.add_argument("path", help="vídeo ou pasta")
+    parser.add_argument("--jobs", type=int, default=None, help="encodes simultâneos (padrão: núcleos / THREADS_PER_JOB)")
+    parser.add_argument("--recursive", action="store_true", help="inclui subpastas")
+    parser.add_argument("--force", action="store_true", help="reencoda mesmo saídas atualizadas / vídeos pequenos")
+    args = parser.parse_args()
 
-    if len(sys.argv) < 2:
-        print("\nUso:")
-        print("python smart_video_compressor.py <caminho_do_video>\n")
-        return
+    target = Path(args.path)
 
-    input_path = Path(sys.argv[1])
-
-    if not input_path.exists():
+    if not target.exists():
         print("❌ Arquivo não encontrado.")
         return
 
     check_ffmpeg()
 
-    output_path = build_output_path(input_path)
+    inputs = collect_inputs(target, args.recursive)
+    if not inputs:
+        print("Nenhum vídeo encontrado.")
+        return
+
+    encoder = detect_encoder()
+    jobs = max(1, min(args.jobs or default_jobs(encoder), len(inputs)))
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+
+    print(f"\n📦 {len(inputs)} vídeo(s) | encoder {encoder} | {jobs} job(s) x {threads} thread(s)\n")
+
+    started = time.monotonic()
+    reports = []
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(process_file, p, encoder, threads, args.force) for p in inputs]
+        for future in as_completed(futures):
+            reports.append(future.result())
+
+    # ------------------------------------------------------
+    # RELATÓRIO
+    # ------------------------------------------------------
+
+    print("\n" + "=" * 60)
+    print(" RELATÓRIO")
+    print("=" * 60)
+    for r in sorted(reports, key=lambda r: r["file"]):
+        print(f" [{r['status']:^10}] {r['file']} — {r['detail']}")
 
-    compress_video(input_path, output_path)
+    done = [r for r in reports if r["status"] == "ok"]
+    print("-" * 60)
+    print(f" Comprimidos: {len(done)} | Pulados: {sum(r['status'] == 'pulado' for r in reports)} "
+          f"| Erros: {sum(r['status'] == 'erro' for r in reports)} "
+          f"| Tempo total: {(time.monotonic() - started) / 60:.1f} min")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
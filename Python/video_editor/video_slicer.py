@@ -12,13 +12,26 @@
    - Quando preenchido (> 0), sobrepõe o SEGMENTS manual
    - Divide o vídeo automaticamente em partes iguais
    - Ex: SLICE_DURATION_MINUTES = 5 → partes de 5 minutos
+
+ LEITURA ÚNICA
+   - Modo AUTO: um único ffmpeg com o segment muxer; os
+     cortes caem no keyframe seguinte a cada fronteira e os
+     nomes usam os tempos reais (segment_list)
+   - Modo MANUAL: um único ffmpeg com uma entrada (-ss/-t)
+     por trecho mapeado e -map para cada saída; trechos não
+     mapeados nunca são lidos nem gravados
+   - FULL_: hardlink / reflink do original (sem recopiar)
+   - VIDEO_FILES: vários vídeos fatiados em paralelo
 ============================================================
 """
 
 import os
+import csv
+import shutil
 import subprocess
 import sys
 import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ============================================================
 # CONFIGURAÇÃO INLINE
@@ -28,6 +41,12 @@ USE_INTERNAL_CONFIG = True
 
 VIDEO_FILE = r"C:\Users\leand\LTS - CONSULTORIA E DESENVOLVtIMENTO DE SISTEMAS\Communication site - ReunioesGravadas\2026-05-12_08-31-13.mp4"
 
+# Vários vídeos de uma vez (vazio → usa só VIDEO_FILE)
+VIDEO_FILES = []
+
+# Vídeos processados ao mesmo tempo (stream copy é limitado pelo disco)
+SLICE_WORKERS = 2
+
 GLOBAL_VIDEO_NAME = ""
 
 # 🔹 False → {nome_do_arquivo}_slicedFiles
@@ -57,6 +76,9 @@ SEGMENTS = [
 FFMPEG_BIN = "ffmpeg"
 FFPROBE_BIN = "ffprobe"
 
+# Saídas por invocação no modo manual (limite de linha de comando do Windows)
+MAX_OUTPUTS_PER_RUN = 40
+
 # ============================================================
 # HELPERS
 # ============================================================
@@ -90,27 +112,19 @@ def get_video_duration(video_file: str) -> float:
     return float(result.stdout.strip())
 
 
-def run_ffmpeg(input_video: str, start: float, duration: float, output_file: str):
-    cmd = [
-        FFMPEG_BIN,
-        "-y",
-        "-ss", str(start),
-        "-i", input_video,
-        "-t", str(duration),
-        "-c", "copy",
-        output_file
-    ]
+def run_ffmpeg(cmd: list, tag: str = ""):
+    print(f"{tag}FFMPEG CMD:", " ".join(cmd))
+    subprocess.run(cmd, check=True)
 
-    print("FFMPEG CMD:", " ".join(cmd))
 
-    subprocess.run(
-        cmd,
-        check=True
+def slice_name(label: str, start: float, end: float) -> str:
+    prefix = f"{GLOBAL_VIDEO_NAME}_" if GLOBAL_VIDEO_NAME else ""
+    return (
+        f"{prefix}{label}_"
+        f"{int(start//60):02d}m{int(start%60):02d}s"
+        f"_to_{int(end//60):02d}m{int(end%60):02d}s.mp4"
     )
 
-    if not os.path.exists(output_file):
-        raise RuntimeError(f"FFmpeg não gerou o arquivo esperado: {output_file}")
-
 
 def generate_auto_segments(video_duration: float, slice_minutes: float) -> list:
     """
@@ -132,15 +146,127 @@ def generate_auto_segments(video_duration: float, slice_minutes: float) -> list:
 
 
 # ============================================================
-# MAIN
+# ENGINE
 # ============================================================
 
-def main():
-    if not USE_INTERNAL_CONFIG:
-        print("Este script está configurado apenas para uso inline.")
-        sys.exit(1)
+def slice_auto(video_file: str, segments: list, output_dir: str, tag: str = "") -> list:
+    """
+    Partes contíguas: uma leitura sequencial com o segment muxer.
+    Cada parte começa num keyframe → tempos reais vêm da segment_list.
+    """
+    base_name = os.path.splitext(os.path.basename(video_file))[0]
+    pattern = os.path.join(output_dir, f".tmp_{base_name}_%03d.mp4")
+    seg_list = os.path.join(output_dir, f".tmp_{base_name}_segments.csv")
+
+    cut_points = ",".join(f"{start:.3f}" for start, _, _ in segments[1:])
+
+    cmd = [
+        FFMPEG_BIN, "-y",
+        "-i", video_file,
+        "-c", "copy",
+        "-f", "segment",
+        "-segment_format", "mp4",
+        "-reset_timestamps", "1",
+        "-segment_list", seg_list,
+        "-segment_list_type", "csv"
+    ]
+    if cut_points:
+        cmd += ["-segment_times", cut_points]
+    cmd.append(pattern)
+
+    run_ffmpeg(cmd, tag)
+
+    outputs = []
+    with open(seg_list, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    os.remove(seg_list)
+
+    for i, (filename, start, end) in enumerate(rows, 1):
+        name = slice_name(f"{i:02d}", float(start), float(end))
+        final_path = os.path.join(output_dir, name)
+        os.replace(os.path.join(output_dir, os.path.basename(filename)), final_path)
+        print(f"{tag}[{i}] ✔ {name}")
+        outputs.append(final_path)
+
+    return outputs
+
+
+def slice_manual(video_file: str, segments: list, output_dir: str, tag: str = "") -> list:
+    """
+    Só os trechos mapeados: uma entrada (-ss/-t) por trecho no mesmo
+    ffmpeg; cada entrada busca direto o keyframe anterior ao início,
+    então o resto do arquivo não é lido.
+    """
+    outputs = []
+
+    for batch_start in range(0, len(segments), MAX_OUTPUTS_PER_RUN):
+        batch = segments[batch_start:batch_start + MAX_OUTPUTS_PER_RUN]
+
+        cmd = [FFMPEG_BIN, "-y"]
+        for start, end, _ in batch:
+            cmd += ["-ss", str(start), "-t", str(end - start), "-i", video_file]
+
+        paths = []
+        for i, (start, end, label) in enumerate(batch):
+            path = os.path.join(output_dir, slice_name(label, start, end))
+            cmd += ["-map", f"{i}:v:0?", "-map", f"{i}:a:0?", "-c", "copy", path]
+            paths.append(path)
+
+        run_ffmpeg(cmd, tag)
+
+        for path in paths:
+            if not os.path.exists(path):
+                raise RuntimeError(f"FFmpeg não gerou o arquivo esperado: {path}")
+            print(f"{tag}✔ {os.path.basename(path)}")
+
+        outputs.extend(paths)
+
+    return outputs
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """hardlink → reflink (cp --reflink) → cópia. Retorna o método usado."""
+    if os.path.exists(dst):
+        os.remove(dst)
+
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+
+    if os.name != "nt":
+        result = subprocess.run(
+            ["cp", "--reflink=always", src, dst],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if result.returncode == 0:
+            return "reflink"
 
-    video_file = os.path.abspath(VIDEO_FILE)
+    shutil.copy2(src, dst)
+    return "cópia"
+
+
+def build_intervals(video_duration: float) -> tuple:
+    """(modo, [(início, fim, nome)]) — só trechos que serão gravados."""
+    if SLICE_DURATION_MINUTES and SLICE_DURATION_MINUTES > 0:
+        return "auto", generate_auto_segments(video_duration, SLICE_DURATION_MINUTES)
+
+    segments_seconds = sorted(
+        (
+            parse_time_to_seconds(s["start"]),
+            min(parse_time_to_seconds(s["end"]), video_duration),
+            s["name"]
+        )
+        for s in SEGMENTS
+    )
+
+    return "manual", [seg for seg in segments_seconds if seg[1] > seg[0]]
+
+
+def process_video(video_file: str) -> str:
+    video_file = os.path.abspath(video_file)
 
     if not os.path.isfile(video_file):
         raise FileNotFoundError(f"Vídeo não encontrado: {video_file}")
@@ -149,6 +275,7 @@ def main():
 
     base_dir = os.path.dirname(video_file)
     base_name = os.path.splitext(os.path.basename(video_file))[0]
+    tag = f"[{base_name}] "
 
     # ========================================================
     # REGRA DA PASTA
@@ -160,101 +287,66 @@ def main():
         output_dir = os.path.join(base_dir, f"{base_name}_slicedFiles")
         os.makedirs(output_dir, exist_ok=True)
 
-    # ========================================================
-    # MODO: AUTO vs MANUAL
-    # ========================================================
-
-    if SLICE_DURATION_MINUTES and SLICE_DURATION_MINUTES > 0:
-        # 🔸 MODO AUTOMÁTICO: gera segmentos pela duração informada
-        print(f"\n[MODO AUTO] Dividindo em partes de {SLICE_DURATION_MINUTES} minuto(s)...")
-        intervals = generate_auto_segments(video_duration, SLICE_DURATION_MINUTES)
-
-    else:
-        # 🔹 MODO MANUAL: usa o SEGMENTS definido acima
-        print("\n[MODO MANUAL] Usando SEGMENTS configurado...")
-
-        segments_seconds = [
-            (
-                parse_time_to_seconds(s["start"]),
-                parse_time_to_seconds(s["end"]),
-                s["name"]
-            )
-            for s in SEGMENTS
-        ]
-
-        segments_seconds.sort(key=lambda x: x[0])
-
-        intervals = []
-        cursor = 0
-
-        for start, end, name in segments_seconds:
-            if start > cursor:
-                intervals.append((cursor, start, "nao_mapeado"))
-            intervals.append((start, end, name))
-            cursor = end
-
-        if cursor < video_duration:
-            intervals.append((cursor, video_duration, "nao_mapeado"))
-
-    # ========================================================
+    mode, intervals = build_intervals(video_duration)
 
     print("\n==================================================")
     print(" VIDEO SLICER (MAPPED ONLY)")
     print("==================================================")
     print(f"Arquivo origem.: {video_file}")
     print(f"Duração........: {video_duration:.2f}s")
+    print(f"Modo...........: {mode}")
     print(f"Partes.........: {len(intervals)}")
     print(f"Pasta destino..: {output_dir}")
     print("==================================================\n")
 
-    for i, (start, end, label) in enumerate(intervals, 1):
-
-        if GLOBAL_VIDEO_NAME:
-            prefix = f"{GLOBAL_VIDEO_NAME}_"
-        else:
-            prefix = ""
-
-        output_name = (
-            f"{prefix}{label}_"
-            f"{int(start//60):02d}m{int(start%60):02d}s"
-            f"_to_{int(end//60):02d}m{int(end%60):02d}s.mp4"
-        )
-
-        temp_output_path = os.path.join(base_dir, output_name)
-
-        print(f"[{i}] Gerando: {output_name}")
-        run_ffmpeg(video_file, start, end - start, temp_output_path)
-
-        if label != "nao_mapeado":
-            final_path = os.path.join(output_dir, output_name)
-            os.replace(temp_output_path, final_path)
-            print("    ✔ Movido para pasta de slices")
-        else:
-            os.remove(temp_output_path)
-            print("    ✖ Não mapeado removido")
+    if mode == "auto":
+        slice_auto(video_file, intervals, output_dir, tag)
+    elif intervals:
+        slice_manual(video_file, intervals, output_dir, tag)
 
     # ========================================================
-    # FULL: copia o vídeo inteiro (00:00 até 1s antes do fim)
+    # FULL: o próprio original, sem reencodar nem recopiar
     # ========================================================
 
-    full_output_name = f"FULL_{os.path.basename(video_file)}"
-    full_output_path = os.path.join(output_dir, full_output_name)
-    full_duration = max(video_duration - 1, 1)
-
-    print(f"\n[FULL] Gerando cópia completa: {full_output_name}")
-    run_ffmpeg(video_file, 0, full_duration, full_output_path)
-    print(f"    ✔ FULL salvo em: {full_output_path}")
+    full_output_path = os.path.join(output_dir, f"FULL_{os.path.basename(video_file)}")
+    method = link_or_copy(video_file, full_output_path)
+    print(f"{tag}[FULL] ✔ {full_output_path} ({method})")
 
     # ========================================================
     # Remove o vídeo original
     # ========================================================
 
     os.remove(video_file)
-    print(f"\n    🗑 Original removido: {video_file}")
+    print(f"{tag}🗑 Original removido: {video_file}")
+
+    return output_dir
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    if not USE_INTERNAL_CONFIG:
+        print("Este script está configurado apenas para uso inline.")
+        sys.exit(1)
+
+    video_files = VIDEO_FILES or [VIDEO_FILE]
+    failures = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SLICE_WORKERS, len(video_files)))) as pool:
+        futures = {pool.submit(process_video, f): f for f in video_files}
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures += 1
+                print(f"\n❌ Falha em {futures[future]}: {e}")
 
-    print("\nProcesso finalizado com sucesso.")
+    print("\nProcesso finalizado." if failures else "\nProcesso finalizado com sucesso.")
     print("Apenas os trechos mapeados foram mantidos.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
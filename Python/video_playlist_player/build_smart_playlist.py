@@ -6,7 +6,6 @@ import os
 import sys
 import random
 from itertools import cycle
-import re
 import subprocess
 
 # ======================================================
@@ -49,6 +48,7 @@ if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
 from groq_keys_loader import GROQ_KEYS
+from card_index import CardIndex
 # ================================================================================
 # CONFIG - GROQ MULTI KEYS (ROTATION / RANDOM)
 # ================================================================================
@@ -156,51 +156,6 @@ def groq(prompt: str) -> str:
 
     raise RuntimeError("Groq indisponível")
 
-# ======================================================
-# EXTRAÇÃO DE TEXTO
-# ======================================================
-
-def extract_text_from_json(path: Path):
-    texts = []
-    nome_arquivo = None
-
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        if isinstance(data, dict):
-            nome_arquivo = data.get("nome_arquivos")
-
-            for v in data.values():
-                if isinstance(v, str):
-                    texts.append(v)
-                elif isinstance(v, list):
-                    for item in v:
-                        if isinstance(item, dict):
-                            for val in item.values():
-                                if isinstance(val, str):
-                                    texts.append(val)
-
-    except Exception:
-        pass
-
-    return nome_arquivo, " ".join(texts).lower()
-
-def extract_text_from_srt(path: Path) -> str:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        return " ".join(
-            line.strip()
-            for line in lines
-            if not re.match(r"^\d+$", line.strip())
-            and "-->" not in line
-        ).lower()
-
-    except Exception:
-        return ""
-
 # ======================================================
 # TERM EXPANSION (INTELIGÊNCIA EXTRA)
 # ======================================================
@@ -562,19 +517,25 @@ def main():
 
         candidates = {}
 
-        # JSON terms
-        for f in TERMS_PATHS[0].glob("*.json"):
-            nome_arquivo, content = extract_text_from_json(f)
-            ref = nome_arquivo or f.stem
+        # índice incremental: só relê JSON/SRT novos ou alterados
+        index = CardIndex()
+        json_files = list(TERMS_PATHS[0].glob("*.json"))
+        index.refresh(json_files, kind="json")
+        index.refresh(srts, kind="srt")
+
+        # pré-filtro FTS5 (substring) → só os acertos passam pela validação
+        hits = (
+            index.search(expanded_terms, paths=json_files, kind="json")
+            + index.search(expanded_terms, paths=srts, kind="srt")
+        )
+
+        for entry in hits:
+            ref = entry["nome_arquivo"]
+            content = entry["content"]
             if content and is_relevant_any(expanded_terms, content, ref):
                 candidates[ref] = content
 
-        # SRT histories
-        for srt in srts:
-            base = srt.stem.split(".")[0]
-            content = extract_text_from_srt(srt)
-            if content and is_relevant_any(expanded_terms, content, base):
-                candidates[base] = content
+        index.close()
 
         selected = [v for v in videos if v.stem in candidates]
         selected.sort(key=lambda v: priority_key(v, expanded_terms, candidates.get(v.stem, "")))
@@ -1,12 +1,10 @@
 from pathlib import Path
 from datetime import datetime
 import json
-import requests
 import os
 import sys
 import random
-from itertools import cycle
-import re
+from concurrent.futures import ThreadPoolExecutor
 
 # ======================================================
 # CONFIGURAÇÕES INLINE
@@ -48,16 +46,20 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from groq_keys_loader import GROQ_KEYS
+from groq_client import LazyGroqClient
+from card_index import CardIndex
+from llm_cache import get_default_cache, DAY
 
-# ================================================================================
-# CONFIG - GROQ MULTI KEYS (ROTATION / RANDOM)
-# ================================================================================
-_groq_key_cycle = cycle(random.sample(GROQ_KEYS, len(GROQ_KEYS)))
-
-GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_MODEL = "openai/gpt-oss-20b"
 
+# Cliente compartilhado: sessões keep-alive e roteamento por folga de rate-limit
+_groq_client = LazyGroqClient(model=GROQ_MODEL, timeout=20, cache=get_default_cache())
+
+# TTL do cache persistente por tipo de chamada
+CACHE_TTL_TRANSLATE = 180 * DAY
+CACHE_TTL_EXPAND = 90 * DAY
+CACHE_TTL_RELEVANCE = 30 * DAY
+
 # ======================================================
 # UTILS
 # ======================================================
@@ -119,42 +121,33 @@ def get_all_srts(paths):
 # GROQ
 # ======================================================
 
-def get_next_groq_key():
-    for _ in range(len(GROQ_KEYS)):
-        key = next(_groq_key_cycle).get("key", "")
-        if key.startswith("gsk_"):
-            return key
-    raise RuntimeError("Nenhuma GROQ key válida.")
-
-def groq(prompt: str) -> str:
-    for _ in range(len(GROQ_KEYS)):
-        try:
-            key = get_next_groq_key()
-            log("      🤖 Consultando Groq...")
-            res = requests.post(
-                GROQ_URL,
-                headers={
-                    "Authorization": f"Bearer {key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": GROQ_MODEL,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.2
-                },
-                timeout=20
-            )
-
-            if res.status_code == 429:
-                continue
-
-            res.raise_for_status()
-            return res.json()["choices"][0]["message"]["content"]
+def parse_json_array(raw: str):
+    """Array JSON da resposta (tolera texto antes/depois dos colchetes)."""
+    raw = raw.strip()
+    start = raw.find("[")
+    end = raw.rfind("]")
+    if start != -1 and end != -1 and end > start:
+        raw = raw[start:end + 1]
+    return json.loads(raw)
 
-        except Exception:
-            continue
 
-    raise RuntimeError("Groq indisponível")
+def _is_json_array(raw: str) -> bool:
+    try:
+        return isinstance(parse_json_array(raw), list)
+    except ValueError:
+        return False
+
+
+def groq(prompt: str, cache_ttl: float | None = None, cache_tag: str | None = None) -> str:
+    log("      🤖 Consultando Groq...")
+    return _groq_client.ask(
+        prompt,
+        temperature=0.2,
+        cache_ttl=cache_ttl,
+        cache_tag=cache_tag,
+        # resposta vazia/sem array JSON não fica meses no cache
+        cache_validate=_is_json_array
+    )
 
 # ======================================================
 # DATA DE ARQUIVO (FILESYSTEM)
@@ -179,100 +172,16 @@ def get_best_datetime(path: Path) -> datetime:
     return min(mtime, ctime)
 
 # ======================================================
-# EXTRAÇÃO DE TEXTO / JSON
+# ÍNDICE DE CARDS / SRTs (SQLite + FTS5, incremental)
 # ======================================================
 
-def extract_text_from_json(path: Path):
-    """
-    Extrai nome_arquivos e conteúdo textual de um JSON de card de vocabulário.
-    Retorna (nome_arquivo, texto_concatenado).
-    """
-    nome_arquivo = None
-    texts = []
-
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        if not isinstance(data, dict):
-            return None, ""
-
-        nome_arquivo = data.get("nome_arquivos") or path.stem
-
-        # introducao
-        intro = data.get("introducao", "")
-        if intro:
-            texts.append(intro)
-
-        # WORD_BANK: array de arrays de objetos {lang, text, pause}
-        word_bank = data.get("WORD_BANK", [])
-        for group in word_bank:
-            if isinstance(group, list):
-                for item in group:
-                    if isinstance(item, dict):
-                        t = item.get("text", "")
-                        if t:
-                            texts.append(t)
-            elif isinstance(group, dict):
-                t = group.get("text", "")
-                if t:
-                    texts.append(t)
-
-        # _known_terms_context
-        ktc = data.get("_known_terms_context", {})
-        for term in ktc.get("terms_used", []):
-            if term:
-                texts.append(term)
-
-        # varredura genérica em outros campos string
-        for key, val in data.items():
-            if key in ("nome_arquivos", "introducao", "WORD_BANK", "_known_terms_context", "repeat_each"):
-                continue
-            if isinstance(val, str) and val:
-                texts.append(val)
-
-    except Exception:
-        return None, ""
+_card_index = None
 
-    return nome_arquivo, " ".join(texts).lower()
-
-
-def extract_main_term_from_json(path: Path) -> str:
-    """
-    Extrai o termo principal do JSON: primeiro item EN do primeiro grupo de WORD_BANK.
-    Ex: {"WORD_BANK": [[{"lang":"en","text":"30-day threshold",...}]]} -> "30-day threshold"
-    """
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        word_bank = data.get("WORD_BANK", [])
-        for group in word_bank:
-            if isinstance(group, list):
-                for item in group:
-                    if isinstance(item, dict) and item.get("lang") == "en":
-                        term = item.get("text", "").strip()
-                        if term:
-                            return term.lower()
-    except Exception:
-        pass
-    return ""
-
-
-def extract_text_from_srt(path: Path) -> str:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        return " ".join(
-            line.strip()
-            for line in lines
-            if not re.match(r"^\d+$", line.strip())
-            and "-->" not in line
-        ).lower()
-
-    except Exception:
-        return ""
+def get_card_index() -> CardIndex:
+    global _card_index
+    if _card_index is None:
+        _card_index = CardIndex()
+    return _card_index
 
 # ======================================================
 # GROQ — ANÁLISE SEMÂNTICA EM LOTE (OPÇÃO 3)
@@ -294,12 +203,8 @@ Rules:
 
 Terms: {json.dumps(terms, ensure_ascii=False)}
 """
-        raw = groq(prompt).strip()
-        start = raw.find("[")
-        end = raw.rfind("]")
-        if start != -1 and end != -1 and end > start:
-            raw = raw[start:end + 1]
-        translated = json.loads(raw)
+        raw = groq(prompt, CACHE_TTL_TRANSLATE, "playlist.translate")
+        translated = parse_json_array(raw)
         if isinstance(translated, list):
             cleaned = [t.strip().lower() for t in translated if isinstance(t, str) and t.strip()]
             return cleaned if cleaned else terms
@@ -337,12 +242,8 @@ Rules:
 
 Base terms: {json.dumps(base_terms, ensure_ascii=False)}
 """
-        raw = groq(prompt).strip()
-        start = raw.find("[")
-        end = raw.rfind("]")
-        if start != -1 and end != -1 and end > start:
-            raw = raw[start:end + 1]
-        arr = json.loads(raw)
+        raw = groq(prompt, CACHE_TTL_EXPAND, "playlist.expand")
+        arr = parse_json_array(raw)
         if isinstance(arr, list):
             merged = set(t.strip().lower() for t in arr if isinstance(t, str) and t.strip())
             for t in base_terms:
@@ -417,12 +318,8 @@ No explanation, no markdown, just the array.
 Cards:
 {json.dumps(items, ensure_ascii=False)}
 """
-        raw = groq(prompt).strip()
-        start = raw.find("[")
-        end = raw.rfind("]")
-        if start != -1 and end != -1 and end > start:
-            raw = raw[start:end + 1]
-        result = json.loads(raw)
+        raw = groq(prompt, CACHE_TTL_RELEVANCE, "playlist.relevance")
+        result = parse_json_array(raw)
         if isinstance(result, list):
             return [r for r in result if isinstance(r, str)]
     except Exception as e:
@@ -461,37 +358,31 @@ def find_relevant_by_term(query: str, all_json_files: list[Path], srts: list[Pat
     else:
         expanded_terms = base_terms
 
-    # ---- FASE 1: candidatos por substring (rápido, sem custo de API) ----
+    # ---- ÍNDICE: relê só arquivos novos/alterados ----
+    index = get_card_index()
+    for kind, files in (("json", all_json_files), ("srt", srts)):
+        stats = index.refresh(files, kind=kind)
+        if stats["updated"] or stats["removed"]:
+            log(f"   🗂  Índice {kind}: {stats['updated']} atualizados, {stats['removed']} removidos")
+
+    # ---- FASE 1: candidatos por substring (FTS5, sem custo de API) ----
     log("\n🔍 Fase 1 — Filtragem rápida por substring...")
     substring_candidates = {}  # nome_arquivo -> {main_term, content}
 
-    for json_path in all_json_files:
-        nome_arquivo, content = extract_text_from_json(json_path)
-        if not nome_arquivo:
-            nome_arquivo = json_path.stem
-        main_term = extract_main_term_from_json(json_path)
-
-        # match no nome do arquivo ou no conteúdo
-        ref_l = nome_arquivo.lower()
-        hit = any(t and (t in ref_l or t in content) for t in expanded_terms)
-        if hit:
-            substring_candidates[nome_arquivo] = {
-                "main_term": main_term,
-                "content": content,
-                "path": json_path
-            }
+    for entry in index.search(expanded_terms, paths=all_json_files, kind="json"):
+        substring_candidates[entry["nome_arquivo"]] = {
+            "main_term": entry["main_term"],
+            "content": entry["content"],
+            "path": entry["path"]
+        }
 
     # SRTs
-    for srt in srts:
-        base = srt.stem.split(".")[0]
-        content = extract_text_from_srt(srt)
-        hit = any(t and (t in base.lower() or t in content) for t in expanded_terms)
-        if hit:
-            substring_candidates[base] = {
-                "main_term": base,
-                "content": content,
-                "path": srt
-            }
+    for entry in index.search(expanded_terms, paths=srts, kind="srt"):
+        substring_candidates[entry["nome_arquivo"]] = {
+            "main_term": entry["main_term"],
+            "content": entry["content"],
+            "path": entry["path"]
+        }
 
     log(f"   → {len(substring_candidates)} candidatos encontrados por substring")
 
@@ -514,18 +405,14 @@ def find_relevant_by_term(query: str, all_json_files: list[Path], srts: list[Pat
             "content_snippet": info["content"]
         })
 
-    # complementa com os demais JSONs (fase semântica pode pegar o que substring perdeu)
+    # complementa com os demais JSONs (vindos do índice, sem reler o disco)
     already = set(substring_candidates.keys())
-    for json_path in all_json_files:
-        nome_arquivo, content = extract_text_from_json(json_path)
-        if not nome_arquivo:
-            nome_arquivo = json_path.stem
-        if nome_arquivo not in already:
-            main_term = extract_main_term_from_json(json_path)
+    for entry in index.entries(paths=all_json_files, kind="json"):
+        if entry["nome_arquivo"] not in already:
             all_candidates_for_groq.append({
-                "nome_arquivo": nome_arquivo,
-                "main_term": main_term,
-                "content_snippet": content
+                "nome_arquivo": entry["nome_arquivo"],
+                "main_term": entry["main_term"],
+                "content_snippet": entry["content"]
             })
 
     # limita total
@@ -540,11 +427,13 @@ def find_relevant_by_term(query: str, all_json_files: list[Path], srts: list[Pat
 
     log(f"   → {len(batches)} lotes de até {GROQ_BATCH_SIZE} cards cada")
 
-    for idx, batch in enumerate(batches, 1):
-        log(f"   → Lote {idx}/{len(batches)} ({len(batch)} cards)...")
-        relevant_ids = groq_batch_relevance(query, batch)
-        groq_relevant.update(relevant_ids)
-        log(f"      ✅ {len(relevant_ids)} relevantes neste lote")
+    # lotes independentes → disparados em paralelo (concorrência limitada pelo cliente)
+    workers = min(_groq_client.max_workers, len(batches)) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda b: groq_batch_relevance(query, b), batches)
+        for idx, (batch, relevant_ids) in enumerate(zip(batches, results), 1):
+            groq_relevant.update(relevant_ids)
+            log(f"   → Lote {idx}/{len(batches)} ({len(batch)} cards): ✅ {len(relevant_ids)} relevantes")
 
     log(f"\n✅ Total após análise semântica: {len(groq_relevant)} cards relevantes")
 
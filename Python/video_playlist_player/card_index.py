@@ -0,0 +1,343 @@
+"""
+======================================================
+ card_index.py
+------------------------------------------------------
+ Índice SQLite incremental dos cards JSON e das SRTs
+ usados pelos construtores de playlist inteligente.
+
+ - Guarda nome_arquivos, termo principal e texto
+   achatado (minúsculo) de cada arquivo
+ - Só reprocessa arquivos cujo (tamanho, mtime) mudou
+ - Busca full-text via FTS5 (tokenizer trigram, que
+   equivale ao antigo `t in content` por substring)
+
+ USO
+ ---
+     from card_index import CardIndex
+
+     index = CardIndex()
+     index.refresh(json_files, kind="json")
+     index.refresh(srt_files, kind="srt")
+
+     hits = index.search(["work", "worked"], paths=json_files)
+     for entry in hits:
+         print(entry["nome_arquivo"], entry["main_term"])
+======================================================
+"""
+
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+# ======================================================
+# CONFIG
+# ======================================================
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent / ".cache" / "card_index.sqlite3"
+
+# Trigram não encontra termos com menos de 3 caracteres
+MIN_FTS_TERM_LEN = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path         TEXT PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    mtime        REAL NOT NULL,
+    nome_arquivo TEXT,
+    main_term    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_kind ON files(kind);
+"""
+
+# v2: linhas do FTS com rowid = files.rowid (antes: coluna path
+# UNINDEXED, e cada DELETE por path varria a tabela inteira)
+SCHEMA_VERSION = 2
+
+# ======================================================
+# EXTRAÇÃO (um único json.load por arquivo)
+# ======================================================
+
+_JSON_SKIP_KEYS = ("nome_arquivos", "introducao", "WORD_BANK", "_known_terms_context", "repeat_each")
+
+
+def parse_card_json(path: Path):
+    """
+    Lê um card JSON uma única vez.
+    Retorna (nome_arquivo, main_term, texto_concatenado_minúsculo).
+    nome_arquivo é None se o arquivo não for um card válido.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None, "", ""
+
+    if not isinstance(data, dict):
+        return None, "", ""
+
+    nome_arquivo = data.get("nome_arquivos") or Path(path).stem
+    texts = []
+    main_term = ""
+
+    # introducao
+    intro = data.get("introducao", "")
+    if isinstance(intro, str) and intro:
+        texts.append(intro)
+
+    # WORD_BANK: array de arrays de objetos {lang, text, pause}
+    for group in data.get("WORD_BANK", []) or []:
+        items = group if isinstance(group, list) else [group]
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            t = item.get("text", "")
+            if isinstance(t, str) and t:
+                texts.append(t)
+                # termo principal: primeiro item EN do WORD_BANK
+                if not main_term and isinstance(group, list) and item.get("lang") == "en":
+                    main_term = t.strip().lower()
+
+    # _known_terms_context
+    ktc = data.get("_known_terms_context", {})
+    if isinstance(ktc, dict):
+        for term in ktc.get("terms_used", []) or []:
+            if isinstance(term, str) and term:
+                texts.append(term)
+
+    # varredura genérica em outros campos string
+    for key, val in data.items():
+        if key in _JSON_SKIP_KEYS:
+            continue
+        if isinstance(val, str) and val:
+            texts.append(val)
+
+    return nome_arquivo, main_term, " ".join(texts).lower()
+
+
+def parse_srt(path: Path) -> str:
+    """Texto corrido (minúsculo) de uma SRT, sem índices nem timestamps."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+
+        return " ".join(
+            line.strip()
+            for line in lines
+            if not re.match(r"^\d+$", line.strip())
+            and "-->" not in line
+        ).lower()
+
+    except Exception:
+        return ""
+
+
+# ======================================================
+# ÍNDICE
+# ======================================================
+
+class CardIndex:
+
+    def __init__(self, db_path: Path = DEFAULT_INDEX_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.db_path = db_path
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+
+        # índice é cache: versão antiga → reconstrói do zero
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS files_fts")
+            self.conn.execute("DROP TABLE IF EXISTS files")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self.conn.executescript(_SCHEMA)
+
+        self.trigram = self._create_fts()
+        self.conn.commit()
+
+    def _create_fts(self) -> bool:
+        """Cria a tabela FTS5 (trigram se disponível). Retorna True se trigram."""
+        row = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'files_fts'"
+        ).fetchone()
+        if row:
+            return "trigram" in (row[0] or "")
+
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE files_fts USING fts5("
+                "nome, content, tokenize='trigram')"
+            )
+            return True
+        except sqlite3.OperationalError:
+            # SQLite antigo: sem trigram → busca cai no instr()
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE files_fts USING fts5(nome, content)"
+            )
+            return False
+
+    # --------------------------------------------------
+    # ATUALIZAÇÃO INCREMENTAL
+    # --------------------------------------------------
+
+    def refresh(self, files, kind: str) -> dict:
+        """
+        Sincroniza o índice com a lista atual de arquivos de um tipo
+        ("json" ou "srt"). Só relê arquivos novos ou alterados e remove
+        do índice os arquivos desse tipo que não existem mais no disco.
+        """
+        known = {
+            path: (size, mtime)
+            for path, size, mtime in self.conn.execute(
+                "SELECT path, size, mtime FROM files WHERE kind = ?", (kind,)
+            )
+        }
+
+        seen = set()
+        updated = 0
+
+        for f in files:
+            path = str(f)
+            seen.add(path)
+
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+
+            signature = (st.st_size, st.st_mtime)
+            if known.get(path) == signature:
+                continue
+
+            if kind == "srt":
+                nome = Path(path).stem.split(".")[0]
+                main_term = nome.lower()
+                content = parse_srt(Path(path))
+            else:
+                nome, main_term, content = parse_card_json(Path(path))
+                if not nome:
+                    nome = Path(path).stem
+
+            self._upsert(path, kind, signature, nome, main_term, content)
+            updated += 1
+
+        removed = [
+            path for path in known
+            if path not in seen and not os.path.exists(path)
+        ]
+        for path in removed:
+            row = self.conn.execute("SELECT rowid FROM files WHERE path = ?", (path,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM files_fts WHERE rowid = ?", row)
+                self.conn.execute("DELETE FROM files WHERE rowid = ?", row)
+
+        self.conn.commit()
+        return {"kind": kind, "total": len(seen), "updated": updated, "removed": len(removed)}
+
+    def _upsert(self, path, kind, signature, nome, main_term, content):
+        # UPDATE mantém o rowid (INSERT OR REPLACE criaria outro):
+        # o FTS é chaveado por ele
+        row = self.conn.execute("SELECT rowid FROM files WHERE path = ?", (path,)).fetchone()
+
+        if row:
+            rowid = row[0]
+            self.conn.execute(
+                "UPDATE files SET kind = ?, size = ?, mtime = ?, nome_arquivo = ?, main_term = ? "
+                "WHERE rowid = ?",
+                (kind, signature[0], signature[1], nome, main_term, rowid)
+            )
+            self.conn.execute("DELETE FROM files_fts WHERE rowid = ?", (rowid,))
+        else:
+            rowid = self.conn.execute(
+                "INSERT INTO files(path, kind, size, mtime, nome_arquivo, main_term) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (path, kind, signature[0], signature[1], nome, main_term)
+            ).lastrowid
+
+        self.conn.execute(
+            "INSERT INTO files_fts(rowid, nome, content) VALUES (?, ?, ?)",
+            (rowid, (nome or "").lower(), content or "")
+        )
+
+    # --------------------------------------------------
+    # CONSULTA
+    # --------------------------------------------------
+
+    def _rows(self, sql: str, params=()):
+        return [
+            {
+                "path": Path(path),
+                "kind": kind,
+                "nome_arquivo": nome,
+                "main_term": main_term or "",
+                "content": content or ""
+            }
+            for path, kind, nome, main_term, content in self.conn.execute(sql, params)
+        ]
+
+    _SELECT = (
+        "SELECT f.path, f.kind, f.nome_arquivo, f.main_term, x.content "
+        "FROM files f JOIN files_fts x ON x.rowid = f.rowid "
+    )
+
+    def search(self, terms, paths=None, kind: str | None = None) -> list[dict]:
+        """
+        Retorna os arquivos cujo nome ou conteúdo contém QUALQUER
+        um dos termos (mesma semântica de substring do loop antigo).
+
+        paths: restringe o resultado a este conjunto de arquivos.
+        """
+        terms = sorted({t.strip().lower() for t in terms if t and t.strip()})
+        if not terms:
+            return []
+
+        kind_sql = " AND f.kind = ?" if kind else ""
+        kind_params = (kind,) if kind else ()
+
+        fts_terms = [t for t in terms if self.trigram and len(t) >= MIN_FTS_TERM_LEN]
+        scan_terms = [t for t in terms if t not in fts_terms]
+
+        found = {}
+
+        if fts_terms:
+            query = " OR ".join('"' + t.replace('"', '""') + '"' for t in fts_terms)
+            for row in self._rows(
+                self._SELECT + "WHERE files_fts MATCH ?" + kind_sql,
+                (query,) + kind_params
+            ):
+                found[str(row["path"])] = row
+
+        for t in scan_terms:
+            for row in self._rows(
+                self._SELECT + "WHERE (instr(x.nome, ?) > 0 OR instr(x.content, ?) > 0)" + kind_sql,
+                (t, t) + kind_params
+            ):
+                found[str(row["path"])] = row
+
+        if paths is not None:
+            allowed = {str(p) for p in paths}
+            return [row for key, row in found.items() if key in allowed]
+
+        return list(found.values())
+
+    def entries(self, paths=None, kind: str | None = None) -> list[dict]:
+        """Todos os arquivos indexados (opcionalmente filtrados), sem reler o disco."""
+        if kind:
+            rows = self._rows(self._SELECT + "WHERE f.kind = ?", (kind,))
+        else:
+            rows = self._rows(self._SELECT)
+
+        if paths is None:
+            return rows
+
+        order = {str(p): i for i, p in enumerate(paths)}
+        rows = [r for r in rows if str(r["path"]) in order]
+        rows.sort(key=lambda r: order[str(r["path"])])
+        return rows
+
+    def close(self):
+        self.conn.close()
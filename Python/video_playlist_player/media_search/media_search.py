@@ -4,62 +4,25 @@
 # ============================================================
 
 import sys
-import os
-import urllib.parse
-import threading
+import html
+import json
 import webbrowser
-from http.server import SimpleHTTPRequestHandler, HTTPServer
-from datetime import datetime
+
+from media_server import MediaIndex, default_items, start_server
 
 HOST = "127.0.0.1"
 PORT = 8000
 OUTPUT_HTML = "index.html"
 
-MEDIA_EXT = (".mp4", ".mov", ".mp3", ".wav", ".aac", ".flac", ".ogg")
-VIDEO_EXT = (".mp4", ".mov")
-AUDIO_EXT = (".mp3", ".wav", ".aac", ".flac", ".ogg")
-
-
-class MediaHandler(SimpleHTTPRequestHandler):
-    def translate_path(self, path):
-        if path.startswith("/media/"):
-            return urllib.parse.unquote(path.replace("/media/", ""))
-        return super().translate_path(path)
-
-
-def search_media(paths, term):
-    results = []
-    for base in paths:
-        if not os.path.exists(base):
-            continue
-
-        for root, _, files in os.walk(base):
-            for f in files:
-                if f.lower().endswith(MEDIA_EXT) and term in f.lower():
-                    results.append(os.path.join(root, f))
-    return results
-
 
-def player_html(path):
-    url = "/media/" + urllib.parse.quote(path.replace("\\", "/"))
-    ext = os.path.splitext(path)[1].lower()
-
-    if ext in VIDEO_EXT:
-        return f'<video controls preload="metadata" src="{url}"></video>'
-    return f'<audio controls preload="metadata" src="{url}"></audio>'
+def _script_json(value):
+    """JSON seguro dentro de <script>."""
+    return json.dumps(value, ensure_ascii=False).replace("</", "<\\/")
 
 
 def generate_html(term, results):
-    cards = []
-
-    for path in results:
-        cards.append(f"""
-        <div class="card">
-            <div class="title">{os.path.basename(path)}</div>
-            {player_html(path)}
-            <div class="path">{path}</div>
-        </div>
-        """)
+    # primeira busca embutida; as próximas vêm de /api/search
+    initial = _script_json(default_items(results))
 
     return f"""
 <!DOCTYPE html>
@@ -125,27 +88,69 @@ video, audio {{
     word-break: break-all;
 }}
 
+form {{
+    display: flex;
+    gap: 8px;
+    margin-bottom: 12px;
+}}
+
+input[type=search] {{
+    flex: 1;
+    padding: 10px;
+    border-radius: 10px;
+    border: none;
+    background: var(--card);
+    color: var(--text);
+}}
+
 </style>
 </head>
 
 <body>
 
-<h1> "{term}"</h1>
-<small>{len(results)} resultado(s) • {datetime.now():%d/%m/%Y %H:%M:%S}</small>
+<form id="search">
+    <input type="search" id="term" value="{html.escape(term)}" placeholder="Buscar mídia...">
+</form>
 
-<div class="grid">
-{''.join(cards)}
-</div>
+<h1 id="heading"></h1>
+<small id="summary"></small>
+
+<div class="grid" id="grid"></div>
+
+<script>
+function escapeHtml(s) {{
+    return s.replace(/[&<>"']/g, c => ({{"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;","'":"&#39;"}})[c]);
+}}
+
+function render(term, items) {{
+    document.getElementById("heading").textContent = ' "' + term + '"';
+    document.getElementById("summary").textContent =
+        items.length + " resultado(s) • " + new Date().toLocaleString("pt-BR");
+    document.getElementById("grid").innerHTML = items.map(item => `
+        <div class="card">
+            <div class="title">${{escapeHtml(item.filename)}}</div>
+            <${{item.kind}} controls preload="metadata" src="${{item.url}}"></${{item.kind}}>
+            <div class="path">${{escapeHtml(item.path)}}</div>
+        </div>`).join("");
+}}
+
+document.getElementById("search").addEventListener("submit", async ev => {{
+    ev.preventDefault();
+    const term = document.getElementById("term").value.trim().toLowerCase();
+    if (!term) return;
+    const res = await fetch("/api/search?q=" + encodeURIComponent(term));
+    const data = await res.json();
+    render(term, data.items);
+}});
+
+render({_script_json(term)}, {initial});
+</script>
 
 </body>
 </html>
 """
 
 
-def start_server():
-    HTTPServer((HOST, PORT), MediaHandler).serve_forever()
-
-
 def main():
     if len(sys.argv) < 2:
         print("Informe paths via parâmetro.")
@@ -156,7 +161,11 @@ def main():
     if not term:
         return
 
-    results = search_media(paths, term)
+    index = MediaIndex(paths)
+    relisted = index.refresh()
+    print(f"Índice: {len(index.files)} mídias ({relisted} pasta(s) relistada(s))")
+
+    results = index.search(term)
     if not results:
         print("Nenhum resultado.")
         return
@@ -164,13 +173,13 @@ def main():
     with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
         f.write(generate_html(term, results))
 
-    threading.Thread(target=start_server, daemon=True).start()
+    start_server(HOST, PORT, index)
 
     url = f"http://{HOST}:{PORT}/{OUTPUT_HTML}"
     print("Abrindo:", url)
     webbrowser.open(url)
 
-    input("Servidor ativo. ENTER para sair.")
+    input("Servidor ativo (novas buscas pela página). ENTER para sair.")
 
 
 if __name__ == "__main__":
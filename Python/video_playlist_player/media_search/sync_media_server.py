@@ -0,0 +1,43 @@
+# ============================================================
+# sync_media_server.py
+# Copia media_server.py (fonte, nesta pasta) para
+# ScriptsToRunMobile, onde o m.py roda sozinho no celular
+#
+# Uso:
+#   python sync_media_server.py          → atualiza a cópia
+#   python sync_media_server.py --check  → só confere
+#                                          (sai com 1 se diferente)
+# ============================================================
+
+import os
+import sys
+import shutil
+import filecmp
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SOURCE = os.path.join(BASE_DIR, "media_server.py")
+MOBILE_COPY = os.path.normpath(
+    os.path.join(BASE_DIR, "..", "..", "ScriptsToRunMobile", "media_server.py")
+)
+
+
+def in_sync() -> bool:
+    return os.path.exists(MOBILE_COPY) and filecmp.cmp(SOURCE, MOBILE_COPY, shallow=False)
+
+
+def main():
+    if in_sync():
+        print(f"✅ Cópia em dia: {MOBILE_COPY}")
+        return
+
+    if "--check" in sys.argv[1:]:
+        print(f"❌ Cópia desatualizada: {MOBILE_COPY}")
+        sys.exit(1)
+
+    shutil.copyfile(SOURCE, MOBILE_COPY)
+    print(f"📋 Copiado: {SOURCE} → {MOBILE_COPY}")
+
+
+if __name__ == "__main__":
+    main()
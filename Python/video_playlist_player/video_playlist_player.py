@@ -1,3 +1,5 @@
+import os
+import sys
 import json
 import random
 import subprocess
@@ -6,6 +8,13 @@ import argparse
 from pathlib import Path
 from datetime import datetime, date
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# Duração / resolução / codec em cache persistente (um ffprobe por arquivo, não por volta)
+from media_metadata import get_default_metadata
+
 # ======================================================
 # CONFIGURAÇÕES
 # ======================================================
@@ -87,12 +96,11 @@ def build_random_subset(videos, mapping, max_size, shuffle, fixed):
 # ======================================================
 
 def get_video_duration(video):
-    r = subprocess.run(
-        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
-         "-of", "default=nokey=1:noprint_wrappers=1", str(video)],
-        capture_output=True, text=True
-    )
-    return int(float(r.stdout.strip())) + 3
+    """Segundos de reprodução (duração + 3s de folga), ou None se o ffprobe falhar."""
+    duration = get_default_metadata().duration(video)
+    if duration is None:
+        return None
+    return int(duration) + 3
 
 def play_video(video, duration):
     log(f"▶ Reproduzindo: {video.name}")
@@ -159,9 +167,19 @@ def main():
     played_seconds = 0
 
     while True:
-        for v in playlist:
+        for idx, v in enumerate(playlist):
             duration = get_video_duration(v)
 
+            if duration is None:
+                log(f"⚠ Não foi possível obter a duração: {v.name}")
+                continue
+
+            # Sonda o próximo vídeo enquanto este toca
+            if idx + 1 < len(playlist):
+                get_default_metadata().prefetch(playlist[idx + 1])
+            elif args.loop:
+                get_default_metadata().prefetch(playlist[0])
+
             if args.enable_max_total_playtime and played_seconds + duration > max_seconds:
                 log("⏹ Tempo máximo atingido. Encerrando.")
                 return